@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Per-codec decoding cost calibration.
+
+Decodes every test file and sample with each codec and reports the best
+time per decoded byte and the expansion (decoded / compressed size) of
+each codec, and prints them as the COST_FACTORS and EXPANSION tables of
+un80.schedule. Only the ratios between codecs matter to the scheduler,
+so the tables need updating when a decoder gets faster or slower
+relative to the others, not when the machine changes.
+
+'stored' is timed as reading the bytes back with jobs.read_range, which
+is all a worker does for a stored member. There are no tokenized BASIC
+samples large enough to time.
+
+Usage:
+    python benchmarks/costs.py [--runs 10]
+"""
+
+import argparse
+import gc
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+TESTS = ROOT / "tests"
+SAMPLES = TESTS / "samples"
+sys.path.insert(0, str(ROOT / "src"))
+
+
+def cases() -> list[tuple[str, str, int, object]]:
+    """(codec, name, compressed size, zero-argument decode) for every sample."""
+    from un80 import formats, jobs
+    from un80.arc import METHOD_CODECS, decompress_member, list_arc
+
+    result = []
+    single = {
+        'squeeze': [TESTS / "test.aqm", *sorted((SAMPLES / "squeeze").iterdir())],
+        'crunch': [TESTS / "test.lzt", *sorted((SAMPLES / "crunch").iterdir())],
+        'crlzh': [TESTS / "test.aym", *sorted((SAMPLES / "crlzh").iterdir())],
+    }
+    for codec, paths in single.items():
+        for path in paths:
+            if formats.detect_format(path) != codec:
+                continue  # An uncompressed sample (e.g. a .COM)
+            data = path.read_bytes()
+            decode = formats.decoder(codec)
+            result.append((codec, path.name, len(data), lambda d=decode, data=data: d(data)))
+
+    for path in [TESTS / "test.arc", *sorted((SAMPLES / "arc").iterdir())]:
+        with open(path, 'rb') as f:
+            for entry in list_arc(path):
+                codec = METHOD_CODECS.get(entry.method)
+                if codec is None:
+                    continue
+                name = f"{path.name}:{entry.filename}"
+                if codec == 'stored':
+                    decode = (lambda p=path, e=entry:
+                              jobs.read_range(p, e.data_offset, e.compressed_size))
+                else:
+                    f.seek(entry.data_offset)
+                    data = f.read(entry.compressed_size)
+                    decode = lambda e=entry, data=data: decompress_member(e, data)
+                result.append((codec, name, entry.compressed_size, decode))
+    return result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    # codec -> [seconds, decoded bytes, compressed bytes]
+    totals: dict[str, list] = {}
+    for codec, name, size, decode in cases():
+        best = None
+        for _ in range(args.runs):
+            gc.collect()
+            gc.disable()
+            start = time.perf_counter()
+            output = decode()
+            elapsed = time.perf_counter() - start
+            gc.enable()
+            best = elapsed if best is None else min(best, elapsed)
+        if not output:
+            continue
+        total = totals.setdefault(codec, [0.0, 0, 0])
+        total[0] += best
+        total[1] += len(output)
+        total[2] += size
+
+    header = f"{'Codec':<10} {'decoded':>10} {'ns/byte':>10} {'expansion':>10}"
+    print(header)
+    print('-' * len(header))
+    for codec, (seconds, decoded, compressed) in sorted(totals.items()):
+        print(f"{codec:<10} {decoded:>10} {seconds / decoded * 1e9:>10.2f} "
+              f"{decoded / compressed:>10.2f}")
+
+    print("\nCOST_FACTORS = {")
+    for codec, (seconds, decoded, _) in sorted(totals.items()):
+        print(f"    {codec!r}: {seconds / decoded * 1e9:.3g},")
+    print("}\nEXPANSION = {")
+    for codec, (_, decoded, compressed) in sorted(totals.items()):
+        print(f"    {codec!r}: {decoded / compressed:.2g},")
+    print("}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
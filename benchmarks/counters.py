@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Decoder counters overhead benchmark.
+
+Times each decoder on the test files with counters absent and present.
+With --against REV the package from an earlier git revision is imported
+alongside the current one (as a separately named package) and the same
+decodes are timed on it, alternating call by call so that machine noise
+affects both equally. This checks that the counters add no measurable
+cost when they are not passed.
+
+Usage:
+    python benchmarks/counters.py [--runs 40] [--against e18ed5d]
+"""
+
+import argparse
+import gc
+import importlib
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+from io import BytesIO
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+TESTS = ROOT / "tests"
+sys.path.insert(0, str(ROOT / "src"))
+
+# Allowed slowdown of counters=None over the reference revision
+OVERHEAD_LIMIT = 1.03
+
+
+def cases(package: str, with_counters: bool = False) -> dict:
+    """Name -> zero-argument decode function, using the given package."""
+    arc = importlib.import_module(f'{package}.arc')
+    crlzh = importlib.import_module(f'{package}.crlzh')
+    crunch = importlib.import_module(f'{package}.crunch')
+    squeeze = importlib.import_module(f'{package}.squeeze')
+
+    kwargs = {}
+    if with_counters:
+        from un80.counters import DecodeCounters
+        kwargs = {'counters': DecodeCounters()}
+
+    result = {}
+    for name, decode, path in (
+        ('crunch', crunch.uncrunch, TESTS / "test.lzt"),
+        ('squeeze', squeeze.unsqueeze, TESTS / "test.aqm"),
+        ('crlzh', crlzh.uncrlzh, TESTS / "test.aym"),
+    ):
+        data = path.read_bytes()
+        result[name] = lambda decode=decode, data=data: decode(data, **kwargs)
+
+    for path in (TESTS / "test.arc", TESTS / "samples" / "arc" / "method9.arc"):
+        if not path.exists():
+            continue
+        members = []
+        with open(path, 'rb') as f:
+            for entry in arc.list_arc(path):
+                f.seek(entry.data_offset)
+                members.append((entry, f.read(entry.compressed_size)))
+
+        def decode_all(members=members, decode=arc.decompress_member):
+            for entry, data in members:
+                decode(entry, data, **kwargs)
+        result[f'arc:{path.name}'] = decode_all
+
+    return result
+
+
+def import_revision(rev: str, dest: Path) -> str:
+    """Make src/un80 of a git revision importable as un80_<rev>."""
+    archive = subprocess.run(['git', 'archive', rev, 'src/un80'], cwd=ROOT,
+                             capture_output=True, check=True).stdout
+    with tarfile.open(fileobj=BytesIO(archive)) as tf:
+        tf.extractall(dest)
+    package = 'un80_' + ''.join(c if c.isalnum() else '_' for c in rev)
+    (dest / "src" / "un80").rename(dest / package)
+    sys.path.insert(0, str(dest))
+    return package
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=40)
+    parser.add_argument('--against', metavar='REV',
+                        help='Git revision to compare counters=None against')
+    args = parser.parse_args()
+
+    configs = {
+        'absent': cases('un80'),
+        'present': cases('un80', with_counters=True),
+    }
+    with tempfile.TemporaryDirectory() as tmpdir:
+        if args.against:
+            configs[args.against] = cases(import_revision(args.against, Path(tmpdir)))
+
+        # Best of runs per case, alternating configurations call by call
+        # (rotating the order) with the garbage collector off, as timeit does
+        best = {config: {} for config in configs}
+        order = list(configs)
+        for name in configs['absent']:
+            for run in range(args.runs):
+                for config in order[run % len(order):] + order[:run % len(order)]:
+                    gc.collect()
+                    gc.disable()
+                    start = time.perf_counter()
+                    configs[config][name]()
+                    elapsed = time.perf_counter() - start
+                    gc.enable()
+                    best[config][name] = min(best[config].get(name, elapsed), elapsed)
+
+    header = f"{'Case':<22}" + ''.join(f" {config + ' ms':>14}" for config in configs)
+    if args.against:
+        header += f" {'ratio':>6}"
+    print(header)
+    print('-' * len(header))
+
+    failed = False
+    for name in best['absent']:
+        line = f"{name:<22}" + ''.join(f" {best[c][name] * 1000:>14.2f}" for c in configs)
+        if args.against:
+            ratio = best['absent'][name] / best[args.against][name]
+            line += f" {ratio:>6.3f}"
+            if ratio > OVERHEAD_LIMIT:
+                line += "  FAIL"
+                failed = True
+        print(line)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+CLI startup benchmark.
+
+Measures the import cost of un80.cli with `python -X importtime` and the
+wall-clock time of `80un -l` on a small LBR, and fails if the import
+time exceeds the budget or a module that should load lazily shows up.
+
+Usage:
+    python benchmarks/startup.py [--budget-ms 25] [--runs 20]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SRC = ROOT / "src"
+SMALL_LBR = ROOT / "tests" / "test.lbr"
+
+# Import time budget for `import un80.cli`, in milliseconds
+IMPORT_BUDGET_MS = 25.0
+
+# Modules that must not be imported just to list an LBR
+LAZY_MODULES = ("un80.arc", "un80.bas", "un80.squeeze", "un80.crunch", "un80.crlzh")
+
+LIST_CODE = (
+    "import sys; from un80.cli import main; "
+    f"main(['-l', {str(SMALL_LBR)!r}]); "
+    f"sys.stderr.write(repr(sorted(m for m in sys.modules if m in {LAZY_MODULES!r})))"
+)
+
+
+def _env() -> dict[str, str]:
+    env = dict(os.environ, PYTHONPATH=str(SRC))
+    # Startup should be measured with cached bytecode
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    return env
+
+
+def import_times(runs: int) -> dict[str, int]:
+    """Best-of-N cumulative import time (us) per module for `import un80.cli`."""
+    best: dict[str, int] = {}
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import un80.cli"],
+            env=_env(), capture_output=True, text=True, check=True,
+        )
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "cumulative" in line:
+                continue
+            _, cumulative, name = line[len("import time:"):].split("|")
+            name = name.strip()
+            best[name] = min(best.get(name, 1 << 62), int(cumulative))
+    return best
+
+
+def wall_time(args: list[str], runs: int) -> float:
+    """Median wall time (ms) of running the interpreter with args."""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], env=_env(),
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    # Warm up: writes bytecode caches
+    subprocess.run([sys.executable, "-c", LIST_CODE], env=_env(),
+                   capture_output=True, check=True)
+
+    times = import_times(args.runs)
+    total_ms = times["un80.cli"] / 1000
+    print(f"import un80.cli: {total_ms:.1f} ms (budget {args.budget_ms:.1f} ms)")
+    for name, us in sorted(times.items(), key=lambda kv: -kv[1])[1:8]:
+        print(f"  {name:<24} {us / 1000:6.1f} ms")
+
+    bare = wall_time(["-c", "pass"], args.runs)
+    listing = wall_time(["-c", LIST_CODE], args.runs)
+    print(f"python -c pass:  {bare:.1f} ms")
+    print(f"80un -l {SMALL_LBR.name}: {listing:.1f} ms ({listing - bare:.1f} ms over bare interpreter)")
+
+    loaded = subprocess.run([sys.executable, "-c", LIST_CODE], env=_env(),
+                            capture_output=True, text=True, check=True).stderr
+    failed = False
+    if loaded != "[]":
+        print(f"FAIL: eagerly imported {loaded}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print("FAIL: import time over budget")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
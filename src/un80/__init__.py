@@ -7,24 +7,56 @@ Supports:
 - .?q? - Squeezed files (Huffman + RLE)
 - .?z? - Crunched files (LZW)
 - .?y? - CrLZH files (LZH)
+- .dsk/.imd - CP/M disk images
 """
 
+from importlib import import_module
+from typing import TYPE_CHECKING
+
 __version__ = "0.2.2"
 
-from .squeeze import unsqueeze
-from .crunch import uncrunch
-from .lbr import extract_lbr
-from .arc import extract_arc
-from .crlzh import uncrlzh
-from .cpm import strip_cpm_eof, crlf_to_lf, is_text_file
-
-__all__ = [
-    "unsqueeze",
-    "uncrunch",
-    "uncrlzh",
-    "extract_lbr",
-    "extract_arc",
-    "strip_cpm_eof",
-    "crlf_to_lf",
-    "is_text_file",
-]
+# Public name -> submodule defining it. Submodules are imported on first
+# access so that importing un80 (or running the CLI) stays cheap.
+_EXPORTS = {
+    "unsqueeze": "squeeze",
+    "uncrunch": "crunch",
+    "uncrlzh": "crlzh",
+    "unsqueeze_into": "squeeze",
+    "uncrunch_into": "crunch",
+    "uncrlzh_into": "crlzh",
+    "decode_into": "formats",
+    "extract_lbr": "lbr",
+    "extract_arc": "arc",
+    "extract_disk": "disk",
+    "iter_bundle": "bundle",
+    "strip_cpm_eof": "cpm",
+    "crlf_to_lf": "cpm",
+    "is_text_file": "cpm",
+}
+
+__all__ = list(_EXPORTS)
+
+if TYPE_CHECKING:
+    # The same names for type checkers and linters, which cannot follow __getattr__
+    from .arc import extract_arc
+    from .bundle import iter_bundle
+    from .cpm import crlf_to_lf, is_text_file, strip_cpm_eof
+    from .crlzh import uncrlzh, uncrlzh_into
+    from .crunch import uncrunch, uncrunch_into
+    from .disk import extract_disk
+    from .formats import decode_into
+    from .lbr import extract_lbr
+    from .squeeze import unsqueeze, unsqueeze_into
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
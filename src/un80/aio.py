@@ -0,0 +1,179 @@
+"""
+Asyncio interface to the archive extractors.
+
+Decoding is CPU bound and file access is blocking, so every step runs on
+an executor and the event loop only awaits the results:
+
+    async for member in open_archive_async("archive.lbr"):
+        async for chunk in member:
+            await response.write(chunk)
+
+Nothing is read ahead of the consumer: each member is decoded, and each
+stored chunk is read, only when it is awaited. Cancelling the consuming
+task stops the extraction after the executor call in flight.
+
+The work units in un80.jobs take a path rather than an open file, so
+any concurrent.futures executor works. A ProcessPoolExecutor lets several
+archives decode in parallel; the default thread pool keeps the event
+loop responsive but shares the GIL. On a process pool, large decoded
+members are handed back in shared memory (see un80.jobs) and read out a
+chunk at a time.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator, Iterator
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from . import jobs
+from .stream import CHUNK_SIZE
+
+
+@dataclass
+class AsyncMember:
+    """An archive member whose data is read asynchronously."""
+    entry: Any  # LbrEntry or ArcEntry
+    filename: str
+    codec: str
+    _path: Path = field(repr=False)
+    _data: bytes | Iterator[memoryview] | None = field(repr=False)
+    _offset: int = field(repr=False)
+    _size: int = field(repr=False)
+    _executor: Executor | None = field(repr=False)
+    chunk_size: int = field(default=CHUNK_SIZE, repr=False)
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        if isinstance(self._data, bytes):
+            yield self._data
+            return
+        if self._data is not None:
+            # Shared memory (read once); a chunk is only valid until the next
+            for chunk in self._data:
+                yield bytes(chunk)
+            return
+
+        loop = asyncio.get_running_loop()
+        offset, remaining = self._offset, self._size
+        while remaining > 0:
+            chunk = await loop.run_in_executor(
+                self._executor, jobs.read_range, self._path, offset,
+                min(self.chunk_size, remaining),
+            )
+            if not chunk:
+                return
+            offset += len(chunk)
+            remaining -= len(chunk)
+            yield chunk
+
+    async def read(self) -> bytes:
+        """Read the whole member."""
+        return b''.join([chunk async for chunk in self])
+
+
+async def list_archive_async(
+    path: str | Path,
+    *,
+    format_type: str | None = None,
+    executor: Executor | None = None,
+) -> list:
+    """
+    List the entries of an LBR or ARC archive.
+
+    Args:
+        path: Path to the archive
+        format_type: 'lbr' or 'arc'; detected from the file if None
+        executor: Executor to run blocking work on (default: loop's default)
+
+    Returns:
+        List of LbrEntry or ArcEntry objects
+    """
+    loop = asyncio.get_running_loop()
+    path = Path(path)
+    if format_type is None:
+        format_type = await loop.run_in_executor(executor, jobs.detect, path)
+    return await loop.run_in_executor(executor, jobs.list_entries, path, format_type)
+
+
+async def open_archive_async(
+    path: str | Path,
+    *,
+    format_type: str | None = None,
+    convert_text: bool = False,
+    executor: Executor | None = None,
+    limits=None,
+) -> AsyncIterator[AsyncMember]:
+    """
+    Iterate over the members of an LBR or ARC archive asynchronously.
+
+    Args:
+        path: Path to the archive
+        format_type: 'lbr' or 'arc'; detected from the file if None
+        convert_text: Whether to convert text files (strip ^Z, CR/LF to LF)
+        executor: Executor to run decoding and file reads on
+        limits: Optional un80.limits.Limits; usage of every member is
+            added to it, so its archive totals apply to the whole archive
+
+    Yields:
+        AsyncMember objects in archive order
+
+    Raises:
+        LimitExceeded: If limits are given and a member passes one
+    """
+    loop = asyncio.get_running_loop()
+    path = Path(path)
+    if format_type is None:
+        format_type = await loop.run_in_executor(executor, jobs.detect, path)
+
+    entries = await loop.run_in_executor(executor, jobs.list_entries, path, format_type)
+    shared = isinstance(executor, ProcessPoolExecutor)
+
+    for entry in entries:
+        (filename, codec, data, offset, size), usage = await loop.run_in_executor(
+            executor, jobs.prepare_member_limited, path, format_type, entry,
+            convert_text, limits, shared,
+        )
+        if limits is not None:
+            limits.charge(*usage)
+        if isinstance(data, jobs.SharedData):
+            # Mapped and unlinked now, so a member that is skipped is freed too
+            data = jobs.shared_chunks(data)
+        yield AsyncMember(
+            entry=entry,
+            filename=filename,
+            codec=codec,
+            _path=path,
+            _data=data,
+            _offset=offset,
+            _size=size,
+            _executor=executor,
+        )
+
+
+async def decompress_async(
+    data: bytes,
+    format_type: str,
+    *,
+    executor: Executor | None = None,
+    limits=None,
+) -> bytes:
+    """
+    Decompress a squeezed, crunched or CrLZH file on an executor.
+
+    Args:
+        data: Compressed file data (including magic header)
+        format_type: 'squeeze', 'crunch' or 'crlzh'
+        executor: Executor to run decoding on
+        limits: Optional un80.limits.Limits to enforce while decoding
+
+    Returns:
+        Decompressed data
+
+    Raises:
+        LimitExceeded: If limits are given and one is passed
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, jobs.decompress, data, format_type, limits)
@@ -30,29 +30,72 @@ Compression methods:
   9 - Squashed (13-bit LZW, Phil Katz)
 """
 
+from __future__ import annotations
+
+import datetime as dt
 import struct
+import sys
+from collections.abc import Iterator
 from dataclasses import dataclass
 from pathlib import Path
 from typing import BinaryIO
 
+from .cpm import OutputSizeError, copy_into, decode_rle90, dos_datetime, is_text_file
+from .squeeze import decode_squeezed
+from .stream import Member, iter_chunks, open_source, text_chunks
+
 ARC_MARKER = 0x1A
 
+# Header after the marker and method byte: filename (null-terminated,
+# but may use all 13 bytes), compressed size, DOS date and time, CRC and
+# original size (absent for method 1)
+_HEADER = struct.Struct('<13sIIHI')
+_OLD_HEADER = struct.Struct('<13sIIH')
+
+# Marker, method and the longest header
+MAX_HEADER_SIZE = 2 + _HEADER.size
+
+# Codec family used by each compression method
+METHOD_CODECS = {
+    1: 'stored',
+    2: 'stored',
+    3: 'rle',
+    4: 'squeeze',
+    5: 'crunch',
+    6: 'crunch',
+    7: 'crunch',
+    8: 'crunch',
+    9: 'squash',
+}
+
 
 class ArcError(Exception):
     """Error during ARC processing."""
 
 
+class ArcSizeError(ArcError):
+    """A member decodes to more than the size recorded in its header."""
+
+
 @dataclass
 class ArcEntry:
     """A single entry in an ARC archive."""
+    __slots__ = ('method', 'filename', 'compressed_size', 'original_size', 'crc',
+                 'datetime', 'data_offset')
+
     method: int
     filename: str
     compressed_size: int
     original_size: int
     crc: int
-    datetime: int
+    datetime: int  # DOS date (low word) and time (high word)
     data_offset: int  # Offset in file where compressed data starts
 
+    @property
+    def modified(self) -> dt.datetime | None:
+        """Date and time stored in the header, if any."""
+        return dos_datetime(self.datetime & 0xFFFF, self.datetime >> 16)
+
     @property
     def method_name(self) -> str:
         """Human-readable compression method name."""
@@ -75,73 +118,59 @@ def parse_header(f: BinaryIO) -> ArcEntry | None:
     """
     Parse an ARC member header.
 
+    The marker, method and header are taken from one read, and f is
+    left at the start of the member's data.
+
     Args:
         f: Open file positioned at start of entry (0x1A byte)
 
     Returns:
         ArcEntry or None for end of archive
     """
-    marker = f.read(1)
-    if not marker:
+    start = f.tell()
+    block = f.read(MAX_HEADER_SIZE)
+    if not block:
         return None
-    if marker[0] != ARC_MARKER:
-        raise ArcError(f"Invalid marker: 0x{marker[0]:02X}")
+    if block[0] != ARC_MARKER:
+        raise ArcError(f"Invalid marker: 0x{block[0]:02X}")
+    if len(block) < 2 or block[1] == 0:
+        return None  # End of archive
 
-    method_byte = f.read(1)
-    if not method_byte:
-        return None
-    method = method_byte[0]
+    method = block[1]
+    end = 2 + header_size(method)
+    if len(block) < end:
+        raise ArcError("Truncated header")
+    if len(block) > end:
+        f.seek(start + end)  # Method 1 headers are shorter
+    return unpack_header(method, block[2:end], start + end)
+
+
+def header_size(method: int) -> int:
+    """Bytes of header after the marker and method byte."""
+    # Old format (method 1) has no original size field
+    return _OLD_HEADER.size if method == 1 else _HEADER.size
 
-    if method == 0:
-        return None  # End of archive
 
-    # Read header fields (25 bytes total after marker and method)
-    # Offset 0: 13 bytes filename (null-terminated, but may use all 13)
-    # Offset 13: 4 bytes compressed size
-    # Offset 17: 2 bytes date
-    # Offset 19: 2 bytes time
-    # Offset 21: 2 bytes CRC
-    # Offset 23: 4 bytes original size (only present for method >= 2)
+def unpack_header(method: int, header: bytes, data_offset: int) -> ArcEntry:
+    """
+    Build an ArcEntry from the header bytes that follow the method byte.
 
+    Args:
+        method: Compression method byte
+        header: header_size(method) bytes
+        data_offset: Offset of the member's data in the file
+    """
     if method == 1:
-        # Old format without original size field
-        header = f.read(23)
-        if len(header) < 23:
-            raise ArcError("Truncated header")
-        original_size_bytes = b''
+        name, compressed_size, datetime, crc = _OLD_HEADER.unpack_from(header)
+        original_size = compressed_size
     else:
-        header = f.read(27)
-        if len(header) < 27:
-            raise ArcError("Truncated header")
-        original_size_bytes = header[23:27]
+        name, compressed_size, datetime, crc, original_size = _HEADER.unpack_from(header)
 
     # Filename is null-terminated, up to 13 chars
-    filename_bytes = header[0:13]
-    null_pos = filename_bytes.find(0)
-    if null_pos >= 0:
-        filename_bytes = filename_bytes[:null_pos]
-    filename = filename_bytes.decode('ascii', errors='replace')
-
-    # Parse numeric fields (little-endian)
-    compressed_size = struct.unpack('<I', header[13:17])[0]
-    datetime = struct.unpack('<I', header[17:21])[0]
-    crc = struct.unpack('<H', header[21:23])[0]
-    if original_size_bytes:
-        original_size = struct.unpack('<I', original_size_bytes)[0]
-    else:
-        original_size = compressed_size
-
-    data_offset = f.tell()
+    filename = name.partition(b'\0')[0].decode('ascii', errors='replace')
 
-    return ArcEntry(
-        method=method,
-        filename=filename,
-        compressed_size=compressed_size,
-        original_size=original_size,
-        crc=crc,
-        datetime=datetime,
-        data_offset=data_offset,
-    )
+    return ArcEntry(method, filename, compressed_size, original_size, crc, datetime,
+                    data_offset)
 
 
 class BitReader:
@@ -167,86 +196,66 @@ class BitReader:
         return result
 
 
-def decode_rle(data: bytes) -> bytes:
-    """Decode RLE90-encoded data."""
-    result = bytearray()
-    prev = 0
-    i = 0
-
-    while i < len(data):
-        byte = data[i]
-        i += 1
+def decode_rle(data: bytes, expected_size: int | None = None, limits=None) -> bytearray:
+    """
+    Decode RLE90-encoded data (methods 3, 4, 6, 7 and 8).
 
-        if byte == 0x90:
-            if i >= len(data):
-                result.append(0x90)
-                break
-            count = data[i]
-            i += 1
-            if count == 0:
-                result.append(0x90)
-                prev = 0x90
-            else:
-                result.extend([prev] * count)
-        else:
-            result.append(byte)
-            prev = byte
+    Raises:
+        ArcSizeError: If the output exceeds expected_size
+        LimitExceeded: If limits are given and one is passed
+    """
+    try:
+        return decode_rle90(data, expected_size, limits)
+    except OutputSizeError as e:
+        raise ArcSizeError(str(e)) from None
 
-    return bytes(result)
 
+def _next_check(limits, out_size: int, expected_size: int) -> int:
+    """
+    Output size at which a decode loop should next call this.
 
-def decompress_squeezed(data: bytes) -> bytes:
+    Raises ArcSizeError past expected_size, and checks limits (if given).
+    """
+    if out_size > expected_size:
+        raise ArcSizeError(f"Output exceeds expected size of {expected_size} bytes")
+    if limits is None:
+        return expected_size
+    return min(expected_size, limits.check(out_size))
+
+
+def decompress_squeezed(
+    data: bytes,
+    counters=None,
+    expected_size: int | None = None,
+    limits=None,
+) -> bytes:
     """
     Decompress ARC method 4 (squeezed) data.
 
-    This is Huffman coding applied after RLE.
+    This is Huffman coding applied after RLE, as in squeezed files, with
+    the tree stored at the start of the data (see squeeze.decode_squeezed).
     """
     if len(data) < 2:
         return data
 
-    # Read Huffman tree
-    bits = BitReader(data)
-
-    # Number of nodes
-    node_count = bits.read_bits(16)
+    # Number of nodes, then the node table
+    node_count = data[0] | (data[1] << 8)
     if node_count > 256:
         raise ArcError(f"Too many Huffman nodes: {node_count}")
+    tree_end = 2 + 4 * node_count
+    if tree_end > len(data):
+        raise ArcError("Unexpected end of data")
+    nodes = list(struct.iter_unpack('<hh', data[2:tree_end]))
 
-    # Read node table
-    nodes = []
-    for _ in range(node_count):
-        left = bits.read_bits(16)
-        right = bits.read_bits(16)
-        # Convert to signed
-        if left >= 0x8000:
-            left -= 0x10000
-        if right >= 0x8000:
-            right -= 0x10000
-        nodes.append((left, right))
-
-    # Decode using Huffman tree
-    result = bytearray()
-    while True:
-        try:
-            node = 0
-            while node >= 0:
-                bit = bits.read_bits(1)
-                left, right = nodes[node]
-                node = right if bit else left
-
-            # Leaf: value is -(node + 1)
-            value = -(node + 1)
-            if value == 256:  # EOF
-                break
-            result.append(value)
-        except ArcError:
-            break
-
-    # Decode RLE
-    return decode_rle(bytes(result))
+    if counters is not None:
+        counters['huffman_nodes'] += node_count
+    try:
+        return decode_squeezed(data, tree_end, nodes, expected_size, limits, counters)
+    except OutputSizeError as e:
+        raise ArcSizeError(str(e)) from None
 
 
-def decompress_lzw_arc8(data: bytes) -> bytes:
+def decompress_lzw_arc8(data: bytes, counters=None, limits=None) -> bytearray:
     """
     Decompress ARC method 8 (Crunched) LZW-encoded data.
 
@@ -258,7 +267,7 @@ def decompress_lzw_arc8(data: bytes) -> bytes:
     - 1-byte header (max bits)
     """
     if len(data) < 2:
-        return b''
+        return bytearray()
 
     # First byte is the max bits value
     max_bits = data[0]
@@ -272,6 +281,7 @@ def decompress_lzw_arc8(data: bytes) -> bytes:
     FIRST_CODE = 257
 
     result = bytearray()
+    check = sys.maxsize if limits is None else limits.check(0)
     code_size = 9
     next_code = FIRST_CODE
     max_code_for_size = (1 << code_size) - 1
@@ -286,6 +296,9 @@ def decompress_lzw_arc8(data: bytes) -> bytes:
             break
 
         if code == CLEAR_CODE:
+            if counters is not None:
+                counters['lzw_resets'] += 1
+                counters['lzw_table_full'] += next_code >= (1 << max_bits)
             dictionary = {i: bytes([i]) for i in range(256)}
             code_size = 9
             next_code = FIRST_CODE
@@ -304,7 +317,9 @@ def decompress_lzw_arc8(data: bytes) -> bytes:
         else:
             break
 
-        result.extend(string)
+        result += string
+        if len(result) > check:
+            check = limits.check(len(result))
 
         # Add to dictionary (except for first code)
         if not first and prev_string:
@@ -320,10 +335,18 @@ def decompress_lzw_arc8(data: bytes) -> bytes:
         prev_string = string
         first = False
 
-    return bytes(result)
+    if counters is not None:
+        counters['lzw_table_full'] += next_code >= (1 << max_bits)
+
+    return result
 
 
-def decompress_lzw_arc56(data: bytes) -> bytes:
+def decompress_lzw_arc56(
+    data: bytes,
+    counters=None,
+    expected_size: int | None = None,
+    limits=None,
+) -> bytearray:
     """
     Decompress ARC methods 5-6 (old crunched) LZW-encoded data.
 
@@ -332,9 +355,12 @@ def decompress_lzw_arc56(data: bytes) -> bytes:
     - Fixed 12-bit codes
     - No clear code
     - Hashed dictionary
+
+    If expected_size is given (method 5, which has no RLE pass), ArcSizeError
+    is raised as soon as the output would exceed it.
     """
     if not data:
-        return b''
+        return bytearray()
 
     # MSB-first bit reader
     bit_buffer = 0
@@ -361,6 +387,9 @@ def decompress_lzw_arc56(data: bytes) -> bytes:
     FIRST_CODE = 256
 
     result = bytearray()
+    limit = sys.maxsize if expected_size is None else expected_size
+    out_size = 0
+    check = _next_check(limits, 0, limit)
     next_code = FIRST_CODE
     prev_string = b''
     first = True
@@ -381,7 +410,10 @@ def decompress_lzw_arc56(data: bytes) -> bytes:
         else:
             break
 
-        result.extend(string)
+        out_size += len(string)
+        if out_size > check:
+            check = _next_check(limits, out_size, limit)
+        result += string
 
         # Add to dictionary
         if not first and prev_string:
@@ -392,41 +424,114 @@ def decompress_lzw_arc56(data: bytes) -> bytes:
         prev_string = string
         first = False
 
-    return bytes(result)
+    if counters is not None:
+        counters['lzw_table_full'] += next_code >= 4096
+
+    return result
 
 
-def decompress_member(entry: ArcEntry, data: bytes) -> bytes:
+def decompress_member(
+    entry: ArcEntry,
+    data: bytes,
+    *,
+    counters=None,
+    limits=None,
+) -> bytes:
     """
     Decompress a member's data based on its method.
+
+    If counters is given, decoder counts are added to it (see
+    un80.counters). If limits (un80.limits.Limits) is given, decoding
+    stops with LimitExceeded as soon as one is passed.
     """
+    return bytes(_decompress(entry, data, counters, limits))
+
+
+def decompress_member_into(
+    entry: ArcEntry,
+    data: bytes,
+    dst,
+    *,
+    counters=None,
+    limits=None,
+) -> int:
+    """
+    Decompress a member's data into a caller's buffer.
+
+    Every method stops at the size recorded in the header, so a member
+    whose original_size is larger than dst is refused before decoding.
+
+    Args:
+        entry: Header of the member
+        data: Its compressed data
+        dst: Writable buffer (bytearray, mmap, SharedMemory.buf, ...)
+        counters: As for decompress_member
+        limits: As for decompress_member
+
+    Returns:
+        Number of bytes written to the start of dst
+
+    Raises:
+        ArcError: If decompression fails
+        OutputSizeError: If the output does not fit in dst
+        LimitExceeded: If limits are given and one is passed
+    """
+    with memoryview(dst) as view:
+        size = view.nbytes
+    if entry.method not in (1, 2) and entry.original_size > size:
+        raise OutputSizeError(f"Output of {entry.original_size} bytes does not fit "
+                              f"in a buffer of {size} bytes")
+    return copy_into(_decompress(entry, data, counters, limits), dst)
+
+
+def _decompress(entry: ArcEntry, data: bytes, counters, limits) -> bytes | bytearray:
+    """decompress_member without the copy to bytes."""
+    if limits is not None:
+        limits.begin(len(data))
+    result = _decompress_method(entry, data, counters, limits)
+    if limits is not None:
+        limits.end(len(result))
+    if counters is not None:
+        counters['input_bytes'] += len(data)
+        counters['output_bytes'] += len(result)
+    return result
+
+
+def _decompress_method(entry: ArcEntry, data: bytes, counters, limits) -> bytes | bytearray:
     if entry.method in (1, 2):
         # Stored
         return data
 
+    # The header records the decoded size; the last pass stops with an
+    # error as soon as its output would exceed it
+    size = entry.original_size
+
     if entry.method == 3:
         # RLE only
-        return decode_rle(data)
+        return decode_rle(data, size, limits)
 
     if entry.method == 4:
         # Squeezed (Huffman + RLE)
-        return decompress_squeezed(data)
+        return decompress_squeezed(data, counters, size, limits)
 
-    if entry.method in (5, 6):
+    if entry.method == 5:
         # Old crunched (MSB-first, fixed 12-bit)
-        result = decompress_lzw_arc56(data)
-        if entry.method == 6:
-            result = decode_rle(result)
-        return result
+        return decompress_lzw_arc56(data, counters, size, limits)
+
+    if entry.method == 6:
+        # Old crunched with RLE
+        result = decompress_lzw_arc56(data, counters, limits=limits)
+        return decode_rle(result, size, limits)
 
     if entry.method == 7:
         # Crunched with faster hash - try arc8 format
-        result = decompress_lzw_arc8(data)
-        return decode_rle(result)
+        result = decompress_lzw_arc8(data, counters, limits)
+        return decode_rle(result, size, limits)
 
     if entry.method == 8:
         # Crunched (LSB-first, 9-12 bit variable, with RLE)
-        result = decompress_lzw_arc8(data)
-        return decode_rle(result)
+        result = decompress_lzw_arc8(data, counters, limits)
+        return decode_rle(result, size, limits)
 
     if entry.method == 9:
         # Squashed (13-bit LZW, no RLE, no header)
@@ -436,6 +541,8 @@ def decompress_member(entry: ArcEntry, data: bytes) -> bytes:
         CLEAR_CODE = 256
         FIRST_CODE = 257
         result = bytearray()
+        out_size = 0
+        check = _next_check(limits, 0, size)
         code_size = 9
         next_code = FIRST_CODE
         prev_string = b''
@@ -447,6 +554,9 @@ def decompress_member(entry: ArcEntry, data: bytes) -> bytes:
             except ArcError:
                 break
             if code == CLEAR_CODE:
+                if counters is not None:
+                    counters['lzw_resets'] += 1
+                    counters['lzw_table_full'] += next_code >= 8192
                 dictionary = {i: bytes([i]) for i in range(256)}
                 code_size = 9
                 next_code = FIRST_CODE
@@ -461,7 +571,10 @@ def decompress_member(entry: ArcEntry, data: bytes) -> bytes:
                 string = prev_string + prev_string[0:1]
             else:
                 break
-            result.extend(string)
+            out_size += len(string)
+            if out_size > check:
+                check = _next_check(limits, out_size, size)
+            result += string
             if not first and prev_string and next_code < 8192:
                 dictionary[next_code] = prev_string + string[0:1]
                 next_code += 1
@@ -469,87 +582,163 @@ def decompress_member(entry: ArcEntry, data: bytes) -> bytes:
                     code_size += 1
             prev_string = string
             first = False
-        return bytes(result)
+        if counters is not None:
+            counters['lzw_table_full'] += next_code >= 8192
+        return result
 
     raise ArcError(f"Unsupported compression method: {entry.method}")
 
 
-def list_arc(path: str | Path) -> list[ArcEntry]:
+def list_arc(path: str | Path | BinaryIO) -> list[ArcEntry]:
     """
     List contents of an ARC archive.
 
     Args:
-        path: Path to the ARC file
+        path: Path to the ARC file, or an open binary file
 
     Returns:
         List of entries in the archive
     """
-    entries = []
+    return list(iter_arc_entries(path))
+
+
+def iter_arc_entries(path: str | Path | BinaryIO) -> Iterator[ArcEntry]:
+    """
+    Iterate over the entries of an ARC archive as their headers are read.
+
+    Between entries the file is positioned at the start of the member's
+    data; it is moved on to the next header when iteration resumes.
 
-    with open(path, 'rb') as f:
+    Args:
+        path: Path to the ARC file, or an open binary file
+
+    Yields:
+        ArcEntry objects in file order
+    """
+    with open_source(path) as f:
         while True:
             entry = parse_header(f)
             if entry is None:
                 break
-            entries.append(entry)
+            yield entry
             f.seek(entry.data_offset + entry.compressed_size)
 
-    return entries
+
+def _decoded_chunks(entry: ArcEntry, data: bytes, limits) -> Iterator[bytes]:
+    """Decompress a member when its chunks are first requested."""
+    try:
+        yield _decompress(entry, data, None, limits)
+    except ArcSizeError:
+        # The header's size is the integrity check; never pass off the
+        # raw compressed bytes as output that failed it
+        raise
+    except ArcError:
+        # Store raw data if decompression fails
+        yield data
+
+
+def unpack_member(
+    f: BinaryIO,
+    entry: ArcEntry,
+    *,
+    convert_text: bool = False,
+    limits=None,
+) -> Member:
+    """
+    Prepare one member for streaming extraction.
+
+    Stored members (methods 1 and 2) are read from f chunk by chunk;
+    other methods read the compressed data and decompress it when the
+    chunk iterator is first advanced.
+
+    Args:
+        f: Open file handle
+        entry: Header of the member
+        convert_text: Whether to convert text files (strip ^Z, CR/LF to LF)
+        limits: Optional un80.limits.Limits applied to the decoder
+
+    Returns:
+        Member whose chunks yield the decompressed data
+    """
+    codec = METHOD_CODECS.get(entry.method, 'unknown')
+
+    if codec == 'stored':
+        chunks = iter_chunks(f, entry.data_offset, entry.compressed_size)
+    else:
+        f.seek(entry.data_offset)
+        chunks = _decoded_chunks(entry, f.read(entry.compressed_size), limits)
+
+    # Optionally convert text files
+    if convert_text and is_text_file(entry.filename):
+        chunks = text_chunks(chunks)
+
+    return Member(entry=entry, filename=entry.filename, codec=codec, chunks=chunks)
+
+
+def iter_arc(
+    path: str | Path | BinaryIO,
+    *,
+    convert_text: bool = False,
+    limits=None,
+) -> Iterator[Member]:
+    """
+    Iterate over the members of an ARC archive without holding them all.
+
+    Each member's chunks must be consumed (or abandoned) before advancing
+    to the next member; only one member is decompressed at a time.
+
+    Args:
+        path: Path to the ARC file, or an open binary file
+        convert_text: Whether to convert text files (strip ^Z, CR/LF to LF)
+        limits: Optional un80.limits.Limits, shared by all members
+
+    Yields:
+        Member objects in archive order
+
+    Raises:
+        LimitExceeded: From a member's chunks, if limits are given
+    """
+    with open_source(path) as f:
+        while True:
+            entry = parse_header(f)
+            if entry is None:
+                break
+            yield unpack_member(f, entry, convert_text=convert_text, limits=limits)
+            f.seek(entry.data_offset + entry.compressed_size)
 
 
 def extract_arc(
-    path: str | Path,
+    path: str | Path | BinaryIO,
     output_dir: str | Path | None = None,
     *,
     convert_text: bool = False,
+    limits=None,
 ) -> list[tuple[str, bytes]]:
     """
     Extract all files from an ARC archive.
 
     Args:
-        path: Path to the ARC file
+        path: Path to the ARC file, or an open binary file
         output_dir: Directory to extract to. If None, returns data in memory.
         convert_text: Whether to convert text files (strip ^Z, CR/LF to LF)
+        limits: Optional un80.limits.Limits, shared by all members
 
     Returns:
         List of (filename, data) tuples for extracted files
     """
-    from .cpm import strip_cpm_eof, crlf_to_lf, is_text_file
-
-    path = Path(path)
     if output_dir:
         output_dir = Path(output_dir)
         output_dir.mkdir(parents=True, exist_ok=True)
 
     results = []
 
-    with open(path, 'rb') as f:
-        while True:
-            entry = parse_header(f)
-            if entry is None:
-                break
-
-            # Read compressed data
-            compressed_data = f.read(entry.compressed_size)
-
-            # Decompress
-            try:
-                data = decompress_member(entry, compressed_data)
-            except ArcError:
-                # Store raw data if decompression fails
-                data = compressed_data
-
-            filename = entry.filename
-
-            # Optionally convert text files
-            if convert_text and is_text_file(filename):
-                data = strip_cpm_eof(data)
-                data = crlf_to_lf(data)
+    for member in iter_arc(path, convert_text=convert_text, limits=limits):
+        data = member.read()
 
-            if output_dir:
-                out_path = output_dir / filename
-                out_path.write_bytes(data)
+        if output_dir:
+            out_path = output_dir / member.filename
+            out_path.write_bytes(data)
 
-            results.append((filename, data))
+        results.append((member.filename, data))
 
     return results
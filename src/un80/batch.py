@@ -0,0 +1,309 @@
+"""
+Parallel extraction of many archives and files (80un batch).
+
+Every recognised file under the inputs is broken into units of work:
+one per LBR or ARC member, and one per single compressed file, BASIC
+file or disk image. The units run on a process pool in the order
+un80.schedule gives them (most expensive first, within a memory
+budget), and this process writes each result as it arrives, so the
+pool is kept busy until the last large member is done rather than
+waiting on archives one at a time.
+
+Output mirrors the input tree: an archive's members go to
+<output>/<its directory>/<its stem>/ and a decoded file to
+<output>/<its directory>/, as with --from-bundle. Members of one
+archive finish in any order, so if two of them share a name, which one
+gets the _1 suffix depends on which is written first.
+
+Given a Journal (see un80.journal), each unit is recorded once its
+files are written, and a later run with the same journal skips the
+units recorded as done without decoding them again. Sources the journal
+already lists are hashed up front to see whether they have changed;
+the others are hashed on a thread while their units are decoded.
+
+Usage:
+    for result in run_batch(['mirror/'], 'out/', workers=8):
+        print(result.output, result.status)
+"""
+
+from __future__ import annotations
+
+import os
+from collections import namedtuple
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from . import formats, jobs, schedule
+from .journal import file_hash
+from .lbr import SECTOR_SIZE
+from .output import OutputDir
+from .scan import scan
+from .stream import iter_chunks
+
+if TYPE_CHECKING:
+    from .journal import Journal
+    from .limits import Limits
+
+
+class Source(namedtuple('Source', [
+    'path',  # Input file (str)
+    'format',  # Format name from formats.classify
+    'size',  # File size in bytes
+    'target',  # Output directory for its files
+    'hash',  # Digest of its contents if hashed up front (see plan), else None
+])):
+    """A recognised input file and where its output goes."""
+    __slots__ = ()
+
+
+class BatchResult(namedtuple('BatchResult', [
+    'source',  # Source the unit came from
+    'name',  # Archive member or disk file name; None for a single file
+    'output',  # Path written (None if the unit failed)
+    'status',  # 'wrote', 'overwrote', 'skipped' or 'failed'
+    'error',  # Error message if the unit failed, else None
+])):
+    """Outcome of writing one output file (or of a unit that failed)."""
+    __slots__ = ()
+
+
+def find_sources(
+    inputs: Iterable[str | os.PathLike],
+    output_dir: str | os.PathLike,
+) -> Iterator[Source]:
+    """
+    Recognised files under each input, with their output directories.
+
+    Directories are walked (see un80.scan) and files are taken as given.
+    Unrecognised files are left out, as are files that cannot be read.
+    """
+    output_dir = Path(output_dir)
+    for root in inputs:
+        base = root if os.path.isdir(root) else os.path.dirname(root)
+        for result in scan(root):
+            if result.format is None:
+                continue
+            relative = Path(os.path.relpath(result.path, base))
+            target = output_dir / relative.parent
+            if result.format in formats.ARCHIVE_FORMATS:
+                target /= relative.stem
+            yield Source(result.path, result.format, result.size, target, None)
+
+
+def unit_offset(format_type: str, entry) -> int | None:
+    """Where a member's data starts in its archive (None for a whole file)."""
+    if entry is None:
+        return None
+    if format_type == 'lbr':
+        return entry.index * SECTOR_SIZE
+    return entry.data_offset
+
+
+def _journal_key(source: Source, entry, source_hash: str | None) -> tuple:
+    """Key of a unit in Journal.completed."""
+    return (os.path.abspath(source.path), source_hash, unit_offset(source.format, entry))
+
+
+def plan(
+    sources: Iterable[Source],
+    convert_text: bool = False,
+    limits=None,
+    journal: Journal | None = None,
+) -> tuple[list[schedule.Task], list[BatchResult]]:
+    """
+    Tasks for every unit of work in the sources (see un80.schedule).
+
+    Each task's args are (source, entry, convert_text, limits) for
+    _run_unit; entry is None for a whole file. With a journal, the
+    sources it lists have their hash filled in, and units it lists as
+    completed for the same contents are left out.
+
+    Returns:
+        (tasks, failures): failures has a BatchResult for each archive
+        whose directory (or source whose contents) could not be read
+    """
+    tasks = []
+    failures = []
+    journaled = set() if journal is None else {key[0] for key in journal.completed}
+    for source in sources:
+        try:
+            if os.path.abspath(source.path) in journaled:
+                source = source._replace(hash=file_hash(source.path))
+            if source.format in ('lbr', 'arc'):
+                entries = jobs.list_entries(source.path, source.format)
+            else:
+                entries = [None]
+        except Exception as e:
+            failures.append(BatchResult(source, None, None, 'failed', str(e)))
+            continue
+        for entry in entries:
+            if (source.hash is not None
+                    and _journal_key(source, entry, source.hash) in journal.completed):
+                continue
+            args = (source, entry, convert_text, limits)
+            if entry is None:
+                tasks.append(schedule.estimate_file(source.format, source.size, args))
+            else:
+                tasks.append(schedule.estimate_member(source.format, entry, args))
+    return tasks, failures
+
+
+def _run_unit(source: Source, entry, convert_text: bool, limits):
+    """Work function for one task; runs on the pool."""
+    if entry is None:
+        return jobs.decode_file_limited(source.path, source.format, convert_text, limits)
+    return jobs.prepare_member_limited(source.path, source.format, entry, convert_text,
+                                       limits, True)
+
+
+def _discard(result) -> None:
+    """Free a member decoded into shared memory that will not be written."""
+    prepared, _ = result
+    if isinstance(prepared, tuple):
+        jobs.discard(prepared[2])
+
+
+def run_batch(
+    inputs: Iterable[str | os.PathLike],
+    output_dir: str | os.PathLike,
+    *,
+    workers: int | None = None,
+    memory_budget: int = schedule.MEMORY_BUDGET,
+    convert_text: bool = False,
+    no_clobber: bool = False,
+    limits: Limits | None = None,
+    fsync: bool = False,
+    journal: Journal | None = None,
+) -> Iterator[BatchResult]:
+    """
+    Extract everything recognised under the inputs on a process pool.
+
+    A unit that fails (a damaged member, a limit passed) is reported
+    and the rest of the run goes on.
+
+    Args:
+        inputs: Files and directories to extract
+        output_dir: Directory to write into
+        workers: Number of worker processes (default: CPU count)
+        memory_budget: Estimated bytes of decoded results in flight
+        convert_text: Convert text files (strip ^Z, CR/LF to LF)
+        no_clobber: Skip files that already exist
+        limits: Resource limits; per-member limits apply to each unit,
+            totals to the whole run
+        fsync: Flush extracted files to disk (see un80.output)
+        journal: Journal to record each finished unit in; units it
+            already lists as completed are skipped, and their output
+            names are not reused
+
+    Yields:
+        BatchResult for every file written or skipped and every unit
+        that failed, as they happen
+    """
+    tasks, failures = plan(find_sources(inputs, output_dir), convert_text, limits, journal)
+    yield from failures
+    # Output directories stay open until their last unit is written
+    remaining: dict[Source, int] = {}
+    for task in tasks:
+        remaining[task.args[0]] = remaining.get(task.args[0], 0) + 1
+    dirs: dict[Source, OutputDir] = {}
+    # (source path, hash) -> names written by earlier runs, kept from unique_name
+    claimed: dict[tuple[str, str], list[str]] = {}
+    hashes: dict[Source, Future] = {}
+    if journal is not None:
+        for (path, source_hash, _), output in journal.completed.items():
+            if output:
+                claimed.setdefault((path, source_hash), []).append(os.path.basename(output))
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor, \
+            ThreadPoolExecutor(max_workers=1) as hasher:
+        try:
+            if journal is not None:
+                hashes = {source: hasher.submit(file_hash, source.path)
+                          for source in remaining if source.hash is None}
+            for task, future in schedule.largest_first(
+                    executor, _run_unit, tasks, max_pending=2 * workers,
+                    memory_budget=memory_budget, discard=_discard):
+                source, entry = task.args[:2]
+                outputs = []
+                error = None
+                try:
+                    for result in _write_result(source, entry, future, dirs, claimed,
+                                                limits, no_clobber, fsync):
+                        if result.status == 'failed':
+                            error = result.error
+                        else:
+                            outputs.append(result.output)
+                        yield result
+                finally:
+                    remaining[source] -= 1
+                    if not remaining[source] and source in dirs:
+                        dirs.pop(source).close()
+                if journal is not None:
+                    # A disk image's files are recorded by their directory
+                    if source.format == 'disk':
+                        output = None if error else os.fspath(source.target)
+                    else:
+                        output = outputs[0] if outputs else None
+                    path, source_hash, offset = _journal_key(
+                        source, entry, _source_hash(source, hashes))
+                    journal.record(path, source_hash, offset, output,
+                                   'failed' if error else 'done', error)
+        finally:
+            for future in hashes.values():
+                future.cancel()
+            for out in dirs.values():
+                out.close()
+
+
+def _source_hash(source: Source, hashes: dict[Source, Future]) -> str | None:
+    """A source's hash, waiting for it if it is being hashed (None if unreadable)."""
+    if source.hash is not None:
+        return source.hash
+    try:
+        return hashes[source].result()
+    except OSError:
+        return None  # Never matches, so the unit is done again on resume
+
+
+def _write_result(source, entry, future, dirs, claimed, limits, no_clobber, fsync):
+    """Write the output of one finished unit, yielding a BatchResult per file."""
+    name = None if entry is None else entry.filename
+    try:
+        result, usage = future.result()
+    except Exception as e:
+        yield BatchResult(source, name, None, 'failed', str(e) or type(e).__name__)
+        return
+    if limits is not None:
+        limits.charge(*usage)
+
+    out = dirs.get(source)
+    if out is None:
+        out = dirs[source] = OutputDir(source.target, no_clobber=no_clobber, fsync=fsync)
+        for claimed_name in claimed.get((os.path.abspath(source.path), source.hash), ()):
+            out.unique_name(claimed_name)
+
+    if entry is None:
+        files = result
+        offset = size = None  # Whole files always come back decoded
+    else:
+        filename, _, data, offset, size = result
+        files = [(filename, data, entry.modified)]
+
+    for filename, data, modified in files:
+        if source.format == 'disk':
+            name = filename
+        output = out.unique_name(filename)
+        try:
+            if data is None:
+                # Stored member: copied from the archive
+                with open(source.path, 'rb') as f:
+                    status = out.write(output, iter_chunks(f, offset, size), modified)
+            else:
+                status = out.write(output, jobs.shared_chunks(data), modified)
+        except OSError as e:
+            yield BatchResult(source, name, None, 'failed', str(e))
+            continue
+        yield BatchResult(source, name, os.path.join(out.path, output), status, None)
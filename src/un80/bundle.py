@@ -0,0 +1,128 @@
+"""
+Reading CP/M archives straight out of zip and tar bundles.
+
+Collections of CP/M software are usually distributed as .zip or .tar.gz
+files full of .LBR, .ARK and squeezed files. iter_bundle yields each
+regular file of such a bundle as an open binary file, without writing
+anything to disk:
+
+- zip members are decompressed by zipfile as they are read. The central
+  directory is at the end of a zip file, so the bundle must be seekable.
+- tar members are read in a single forward pass with tarfile's stream
+  mode ('r|*'), which also handles gzip, bzip2 and xz compression, so a
+  tar bundle may come from a pipe.
+
+Each member's file must be read (or abandoned) before advancing to the
+next, as for Member.chunks. The archive readers can take it wrapped in a
+stream.PipeReader, which lets them peek at its header and read it
+forward without the decompressor having to seek back.
+
+Usage:
+    for member in iter_bundle('mirror.tar.gz'):
+        records = iter_records(PipeReader(member.file), 'lbr')
+"""
+
+from __future__ import annotations
+
+import os
+import tarfile
+import zipfile
+from collections import namedtuple
+from collections.abc import Iterator
+from typing import BinaryIO
+
+from .stream import PipeReader, open_source
+
+ZIP_MAGIC = b'PK\x03\x04'
+EMPTY_ZIP_MAGIC = b'PK\x05\x06'
+
+
+class BundleError(Exception):
+    """Error reading a zip or tar bundle."""
+
+
+class BundleMember(namedtuple('BundleMember', [
+    'name',  # Relative POSIX path within the bundle (see member_path)
+    'size',  # Uncompressed size in bytes
+    'file',  # Open binary file; read it before the next member
+])):
+    """A regular file inside a bundle."""
+    __slots__ = ()
+
+
+def member_path(name: str) -> str:
+    """
+    A bundle member's name made safe to write under an output directory.
+
+    Backslashes are treated as separators, and leading slashes, drive
+    letters and '.' and '..' components are dropped, as zipfile does when
+    extracting.
+
+    Returns:
+        Relative POSIX path, or '' if nothing is left
+    """
+    parts = name.replace('\\', '/').split('/')
+    if parts and len(parts[0]) == 2 and parts[0][1] == ':':
+        parts = parts[1:]
+    return '/'.join(part for part in parts if part not in ('', '.', '..'))
+
+
+def iter_bundle(path: str | os.PathLike | BinaryIO) -> Iterator[BundleMember]:
+    """
+    Iterate over the regular files in a zip or tar bundle.
+
+    Args:
+        path: Path to the bundle, or an open binary file (a tar bundle
+            may be a pipe)
+
+    Yields:
+        BundleMember objects in archive order; directories, links and
+        members whose name is empty once made safe are skipped
+
+    Raises:
+        BundleError: If the bundle is neither zip nor tar, or is damaged
+    """
+    if hasattr(path, 'read') and not path.seekable():
+        path = PipeReader(path, name=getattr(path, 'name', 'stdin'))
+    with open_source(path) as f:
+        magic = f.read(4)
+        f.seek(0)
+        if magic in (ZIP_MAGIC, EMPTY_ZIP_MAGIC):
+            yield from _zip_members(f)
+        else:
+            yield from _tar_members(f)
+
+
+def _zip_members(f: BinaryIO) -> Iterator[BundleMember]:
+    if not f.seekable():
+        raise BundleError("A zip bundle cannot be read from a pipe")
+    try:
+        bundle = zipfile.ZipFile(f)
+    except zipfile.BadZipFile as e:
+        raise BundleError(f"Bad zip bundle: {e}") from None
+    with bundle:
+        for info in bundle.infolist():
+            name = member_path(info.filename)
+            if info.is_dir() or not name:
+                continue
+            try:
+                with bundle.open(info) as member:
+                    yield BundleMember(name, info.file_size, member)
+            except zipfile.BadZipFile as e:
+                raise BundleError(f"{info.filename}: {e}") from None
+
+
+def _tar_members(f: BinaryIO) -> Iterator[BundleMember]:
+    try:
+        bundle = tarfile.open(fileobj=f, mode='r|*')
+    except tarfile.TarError as e:
+        raise BundleError(f"Not a zip or tar bundle: {e}") from None
+    with bundle:
+        try:
+            for info in bundle:
+                name = member_path(info.name)
+                if not info.isfile() or not name:
+                    continue
+                yield BundleMember(name, info.size, bundle.extractfile(info))
+        except (tarfile.TarError, EOFError) as e:
+            raise BundleError(f"Damaged tar bundle: {e}") from None
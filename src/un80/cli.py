@@ -9,355 +9,677 @@ Usage:
     80un file.tqt                 # Decompress single file
     80un file.bas                 # Detokenize MBASIC file
     80un file.txt --text          # Convert text file endings
+    80un salvage damaged.arc      # Recover members of a damaged file
+    80un kaypro.dsk --list        # List files on a CP/M disk image
+    80un - < file.arc             # Extract an archive read from stdin
+    80un file.tqt -c | less       # Decompress to stdout
+    80un file.lbr -x README.DOC   # Write one member to stdout
+    80un *.arc --ndjson           # List many archives, one JSON line per member
+    80un --from-bundle cpm.zip    # Extract the archives inside a zip or tar bundle
+    80un batch mirror/ -o out/    # Extract a whole tree on a process pool
+    80un batch in/ -o out/ --resume  # Carry on after an interrupted batch
 """
 
+from __future__ import annotations
+
 import argparse
+import os
 import sys
+from collections.abc import Iterable
 from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO
 
 from . import __version__
-from .cpm import detect_compression, strip_cpm_eof, crlf_to_lf
-from .lbr import list_lbr, extract_lbr
-from .arc import list_arc, extract_arc
-from .squeeze import unsqueeze, get_squeezed_filename
-from .crunch import uncrunch, get_crunched_filename, get_crunch_info
-from .crlzh import uncrlzh, get_crlzh_filename, get_crlzh_info
-from .bas import is_tokenized_basic, is_protected_basic, detokenize_bytes
+from . import formats
+from .cpm import crlf_to_lf, detect_compression, is_text_file, strip_cpm_eof
+from .formats import detect_format, get_output_filename  # re-exported for existing callers
 
+if TYPE_CHECKING:
+    from .limits import Limits
+    from .output import OutputDir
+    from .stats import ArchiveStats
 
-def detect_format(path: Path) -> str | None:
-    """Detect file format from content and extension."""
-    with open(path, 'rb') as f:
-        header = f.read(32)
-
-    compression = detect_compression(header)
-    if compression:
-        return compression
-
-    # Check for tokenized BASIC (0xFF magic byte with .bas extension)
-    ext = path.suffix.lower()
-    if ext == '.bas' and is_tokenized_basic(header):
-        return 'bas'
-
-    # Fall back to extension
-    if ext in ('.lbr', '.lqr', '.lzr'):
-        return 'lbr'
-    if ext in ('.arc', '.ark'):
-        return 'arc'
-
-    # Check for squeezed/crunched by middle letter
-    if len(ext) == 4:
-        mid = ext[2].lower()
-        if mid == 'q':
-            return 'squeeze'
-        if mid == 'z':
-            return 'crunch'
-        if mid == 'y':
-            return 'crlzh'
-
-    return None
-
-
-def get_output_filename(path: Path, compression: str) -> str:
-    """Get the decompressed output filename."""
-    # Try to get embedded filename
+# Codecs and subcommand modules are imported where they are used, so a
+# run only pays for the formats it handles
+# pylint: disable=import-outside-toplevel
+
+
+# File argument meaning "read standard input"
+STDIN_NAME = '-'
+
+
+def _read_input(path: Path | BinaryIO) -> bytes:
+    """Whole contents of a path, or of an open file such as stdin."""
+    if hasattr(path, 'read'):
+        return path.read()
     with open(path, 'rb') as f:
-        data = f.read()
+        return f.read()
 
-    if compression == 'squeeze':
-        name = get_squeezed_filename(data)
-        if name:
-            return name
-    elif compression == 'crunch':
-        name = get_crunched_filename(data)
-        if name:
-            return name
-    elif compression == 'crlzh':
-        name = get_crlzh_filename(data)
-        if name:
-            return name
-
-    # Reconstruct from extension
-    stem = path.stem
-    ext = path.suffix.lower()
-
-    if len(ext) == 4 and ext[2] in 'qzy':
-        # .tqt -> .txt, etc.
-        new_ext = ext[1] + ext[1] + ext[3]
-        if ext in ('.qqq', '.zzz', '.yyy'):
-            return stem  # No extension
-        return stem + '.' + new_ext
-
-    return stem + '.out'
-
-
-def cmd_list(path: Path, format_type: str, verbose: bool = False) -> int:
-    """List archive contents."""
-    if format_type == 'lbr':
-        entries = list_lbr(path)
-        if verbose:
-            print(f"{'Filename':<16} {'Size':>8} {'Sectors':>8} {'Compression':<16}")
-            print('-' * 52)
-        else:
-            print(f"{'Filename':<16} {'Size':>8} {'Sectors':>8}")
-            print('-' * 36)
-        for entry in entries:
-            size = entry.data_size
-            if verbose:
-                # Detect compression type of member
-                member_data = entry.get_data(path) if hasattr(entry, 'get_data') else None
-                if member_data:
-                    comp = detect_compression(member_data)
-                    comp_str = comp if comp else 'stored'
+
+def _open_input(
+    file: Path,
+    format_type: str | None,
+) -> tuple[Path | BinaryIO, str | None]:
+    """
+    Source and format for a file argument ('-' reads stdin).
+
+    Returns:
+        (source, format_type): source is file, or a PipeReader over
+        stdin; format_type is the one given, else detected (None if
+        unrecognised)
+
+    Raises:
+        FileNotFoundError: If file does not exist
+    """
+    if str(file) == STDIN_NAME:
+        # Read as a stream: archives are parsed without seeking back
+        # further than the PipeReader keeps, disk images and single
+        # files are read whole
+        from .stream import PipeReader
+        source = PipeReader(sys.stdin.buffer)
+        return source, format_type or _sniff_format(source, '')
+    if not file.exists():
+        raise FileNotFoundError(f"File not found: {file}")
+    return file, format_type or detect_format(file)
+
+
+def _sniff_format(source: BinaryIO, name: str) -> str | None:
+    """Detect the format of a stream from its first bytes, leaving it at 0."""
+    format_type = formats.classify(source.read(32), name)
+    source.seek(0)
+    return format_type
+
+
+def cmd_list_json(
+    files: list[Path],
+    format_type: str | None,
+    ndjson: bool = False,
+    disk_format: str | None = None,
+) -> int:
+    """
+    List one or more inputs as JSON or NDJSON (see un80.listing).
+
+    An input that cannot be read is reported in the output and the
+    rest are still listed; the exit status is then 1.
+    """
+    from .listing import JsonWriter, iter_records
+
+    writer = JsonWriter(sys.stdout, ndjson, many=len(files) > 1)
+    ok = True
+    try:
+        for file in files:
+            try:
+                source, file_format = _open_input(file, format_type)
+            except FileNotFoundError as e:
+                ok &= writer.write_input(str(file), None, error=str(e))
+                continue
+            if not file_format:
+                ok &= writer.write_input(str(file), None, error="Cannot determine format")
+                continue
+            records = iter_records(source, file_format, disk_format=disk_format)
+            ok &= writer.write_input(str(file), file_format, records)
+        writer.close()
+    except BrokenPipeError:
+        return _stdout_closed()
+    return 0 if ok else 1
+
+
+def _stdout_closed() -> int:
+    """
+    End a run quietly after the reader of stdout went away (e.g. `| head`).
+
+    Returns:
+        Exit status 1
+    """
+    # Python would otherwise report the failed flush of stdout at exit
+    try:
+        fd = sys.stdout.fileno()
+    except (AttributeError, OSError, ValueError):
+        return 1  # Not a real file (e.g. captured in tests)
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, fd)
+    os.close(devnull)
+    return 1
+
+
+def cmd_bundle(
+    bundles: list[Path],
+    format_type: str | None,
+    action: str,
+    output_dir: Path | None = None,
+    convert_text: bool = False,
+    no_clobber: bool = False,
+    verbose: bool = False,
+    limits: Limits | None = None,
+    disk_format: str | None = None,
+    fsync: bool = False,
+) -> int:
+    """
+    List or extract the archives and files inside zip or tar bundles.
+
+    Each member is read straight out of the bundle (see un80.bundle);
+    members of no recognised format are skipped. Extracting writes an
+    archive's members to <output>/<member's directory>/<archive stem>/
+    and a single file to <output>/<member's directory>/. A member that
+    fails is reported and the rest are still processed; the exit status
+    is then 1.
+
+    Args:
+        bundles: Bundle paths ('-' reads a tar bundle from stdin)
+        format_type: Format of every member, or None to detect each
+        action: 'extract', 'list', 'json' or 'ndjson'
+    """
+    from .bundle import BundleError
+    from .listing import JsonWriter, iter_records
+
+    writer = None
+    if action in ('json', 'ndjson'):
+        writer = JsonWriter(sys.stdout, action == 'ndjson', many=True)
+    output_dir = output_dir or Path('.')
+    options = {'convert_text': convert_text, 'no_clobber': no_clobber, 'limits': limits,
+               'disk_format': disk_format, 'fsync': fsync}
+
+    ok = True
+    for bundle in bundles:
+        try:
+            for member_name, file, file_format in _bundle_inputs(bundle, format_type):
+                name = f"{bundle}/{member_name}"
+                if writer is not None:
+                    records = iter_records(file, file_format, disk_format=disk_format)
+                    ok &= writer.write_input(name, file_format, records)
                 else:
-                    comp_str = '?'
-                print(f"{entry.filename:<16} {size:>8} {entry.length:>8} {comp_str:<16}")
+                    print(f"{name}:")
+                    ok &= _bundle_member(file, member_name, file_format, action, output_dir,
+                                         verbose, options) == 0
+        except BrokenPipeError:
+            return _stdout_closed()
+        except (OSError, BundleError) as e:
+            if writer is not None:
+                writer.write_input(str(bundle), None, error=str(e))
             else:
-                print(f"{entry.filename:<16} {size:>8} {entry.length:>8}")
-        print(f"\n{len(entries)} file(s)")
+                print(f"{bundle}: {e}", file=sys.stderr)
+            ok = False
+    if writer is not None:
+        try:
+            writer.close()
+        except BrokenPipeError:
+            return _stdout_closed()
+    return 0 if ok else 1
+
+
+def _bundle_inputs(bundle: Path, format_type: str | None):
+    """(member name, file, format) for each member of a bundle in a known format."""
+    from pathlib import PurePosixPath
+    from .bundle import iter_bundle
+    from .stream import PipeReader
+
+    source = sys.stdin.buffer if str(bundle) == STDIN_NAME else bundle
+    for member in iter_bundle(source):
+        filename = PurePosixPath(member.name).name
+        # Archive readers seek back within what they have read;
+        # the PipeReader keeps it, so the member is decoded once
+        file = PipeReader(member.file, name=filename)
+        file_format = format_type or _sniff_format(file, filename)
+        if file_format:
+            yield member.name, file, file_format
+
+
+def _bundle_member(
+    file: BinaryIO,
+    member_name: str,
+    file_format: str,
+    action: str,
+    output_dir: Path,
+    verbose: bool,
+    options: dict,
+) -> int:
+    """List or extract one member of a bundle (see cmd_bundle)."""
+    from pathlib import PurePosixPath
 
-    elif format_type == 'arc':
-        entries = list_arc(path)
-        if verbose:
-            print(f"{'Filename':<16} {'Original':>10} {'Compressed':>12} {'Method':<16}")
-            print('-' * 58)
-            for entry in entries:
-                method_detail = f"{entry.method}: {entry.method_name}"
-                print(f"{entry.filename:<16} {entry.original_size:>10} "
-                      f"{entry.compressed_size:>12} {method_detail:<16}")
-        else:
-            print(f"{'Filename':<16} {'Original':>10} {'Compressed':>12} {'Method':<12}")
-            print('-' * 54)
-            for entry in entries:
-                print(f"{entry.filename:<16} {entry.original_size:>10} "
-                      f"{entry.compressed_size:>12} {entry.method_name:<12}")
-        print(f"\n{len(entries)} file(s)")
+    member_path = PurePosixPath(member_name)
+    try:
+        if action == 'list':
+            return cmd_list(file, file_format, verbose, options['disk_format'])
+        target = output_dir.joinpath(*member_path.parent.parts)
+        if file_format in formats.ARCHIVE_FORMATS:
+            target /= member_path.stem
+        return cmd_extract(file, target, file_format, **options)
+    except Exception as e:
+        print(f"  Error: {e}", file=sys.stderr)
+        return 1
 
-    elif format_type in ('squeeze', 'crunch', 'crlzh'):
-        # Show info for single compressed file
-        with open(path, 'rb') as f:
-            data = f.read()
-
-        if format_type == 'squeeze':
-            name = get_squeezed_filename(data)
-            print(f"Format: Squeeze (Huffman + RLE)")
-            print(f"Original filename: {name or 'unknown'}")
-
-        elif format_type == 'crunch':
-            info = get_crunch_info(data)
-            if info:
-                print(f"Format: Crunch {info['description']}")
-                print(f"Original filename: {info['filename']}")
-                if verbose:
-                    print(f"Siglevel: 0x{info['siglevel']:02X}")
-                    print(f"Code bits: {info['bits']}")
-            else:
-                print(f"Format: Crunch (cannot parse header)")
-
-        elif format_type == 'crlzh':
-            info = get_crlzh_info(data)
-            if info:
-                print(f"Format: CrLZH {info['description']}")
-                print(f"Original filename: {info['filename']}")
-                if verbose:
-                    print(f"Version byte: 0x{info['version']:02X}")
-                    print(f"Position bits: {info['position_bits']}")
-            else:
-                print(f"Format: CrLZH (cannot parse header)")
 
+def cmd_list(
+    path: Path | BinaryIO,
+    format_type: str,
+    verbose: bool = False,
+    disk_format: str | None = None,
+) -> int:
+    """List archive contents."""
+    if format_type == 'lbr':
+        _list_lbr(path, verbose)
+    elif format_type == 'arc':
+        _list_arc(path, verbose)
+    elif format_type == 'disk':
+        _list_disk(path, verbose, disk_format)
+    elif format_type in ('squeeze', 'crunch', 'crlzh'):
+        _list_compressed(path, format_type, verbose)
     elif format_type == 'bas':
-        with open(path, 'rb') as f:
-            data = f.read()
-
-        if is_protected_basic(data):
-            print(f"Format: MBASIC Protected (0xFE)")
-            print(f"Status: Encrypted with 143-byte XOR cycle")
-        elif is_tokenized_basic(data):
-            print(f"Format: MBASIC Tokenized (0xFF)")
-            print(f"Status: Binary tokenized")
-        else:
-            print(f"Format: MBASIC ASCII")
-            print(f"Status: Plain text source")
-
+        _list_bas(path)
     else:
         print(f"Cannot list contents of {format_type} files", file=sys.stderr)
         return 1
-
     return 0
 
 
-def safe_write(out_path: Path, data: bytes, no_clobber: bool) -> tuple[Path, str]:
-    """
-    Safely write data to a file, handling overwrites.
-
-    Returns (actual_path, status) where status is 'wrote', 'skipped', or 'overwrote'.
-    """
-    if not out_path.exists():
-        out_path.write_bytes(data)
-        return out_path, 'wrote'
+def _list_lbr(path: Path | BinaryIO, verbose: bool) -> None:
+    """Table of an LBR's members (with -v, their compression)."""
+    from .lbr import list_lbr
+    entries = list_lbr(path)
+    if verbose:
+        print(f"{'Filename':<16} {'Size':>8} {'Sectors':>8} {'Compression':<16}")
+        print('-' * 52)
+    else:
+        print(f"{'Filename':<16} {'Size':>8} {'Sectors':>8}")
+        print('-' * 36)
+    for entry in entries:
+        size = entry.data_size
+        if verbose:
+            # Detect compression type of member
+            member_data = entry.get_data(path) if hasattr(entry, 'get_data') else None
+            if member_data:
+                comp = detect_compression(member_data)
+                comp_str = comp if comp else 'stored'
+            else:
+                comp_str = '?'
+            print(f"{entry.filename:<16} {size:>8} {entry.length:>8} {comp_str:<16}")
+        else:
+            print(f"{entry.filename:<16} {size:>8} {entry.length:>8}")
+    print(f"\n{len(entries)} file(s)")
 
-    if no_clobber:
-        return out_path, 'skipped'
 
-    # File exists and we're allowed to overwrite
-    out_path.write_bytes(data)
-    return out_path, 'overwrote'
+def _list_arc(path: Path | BinaryIO, verbose: bool) -> None:
+    """Table of an ARC's members."""
+    from .arc import list_arc
+    entries = list_arc(path)
+    if verbose:
+        print(f"{'Filename':<16} {'Original':>10} {'Compressed':>12} {'Method':<16}")
+        print('-' * 58)
+        for entry in entries:
+            method_detail = f"{entry.method}: {entry.method_name}"
+            print(f"{entry.filename:<16} {entry.original_size:>10} "
+                  f"{entry.compressed_size:>12} {method_detail:<16}")
+    else:
+        print(f"{'Filename':<16} {'Original':>10} {'Compressed':>12} {'Method':<12}")
+        print('-' * 54)
+        for entry in entries:
+            print(f"{entry.filename:<16} {entry.original_size:>10} "
+                  f"{entry.compressed_size:>12} {entry.method_name:<12}")
+    print(f"\n{len(entries)} file(s)")
 
 
-def get_unique_path_for_archive(out_path: Path, used_names: set[str]) -> Path:
-    """
-    Get a unique filename, avoiding conflicts with names already used in this extraction.
+def _list_disk(path: Path | BinaryIO, verbose: bool, disk_format: str | None) -> None:
+    """Table of the files on a disk image."""
+    from .disk import DiskImage
+    with DiskImage(path, disk_format) as image:
+        entries = image.list()
+        if verbose:
+            print(f"Format: {image.format.description}")
+    print(f"{'Filename':<16} {'User':>4} {'Size':>8} {'Attr':<4}")
+    print('-' * 35)
+    for entry in entries:
+        attr = ('R' if entry.read_only else '') + ('S' if entry.system else '')
+        print(f"{entry.filename:<16} {entry.user:>4} {entry.data_size:>8} {attr:<4}")
+    print(f"\n{len(entries)} file(s)")
+
+
+def _list_compressed(path: Path | BinaryIO, format_type: str, verbose: bool) -> None:
+    """Show info for a single compressed file."""
+    data = _read_input(path)
+
+    # With -v the file is decoded to report the decoder's counters
+    counters = None
+    if verbose:
+        from .counters import DecodeCounters
+        counters = DecodeCounters()
+
+    if format_type == 'squeeze':
+        from .squeeze import get_squeezed_filename, unsqueeze, SqueezeError
+        name = get_squeezed_filename(data)
+        print("Format: Squeeze (Huffman + RLE)")
+        print(f"Original filename: {name or 'unknown'}")
+        if verbose:
+            try:
+                unsqueeze(data, counters=counters)
+            except SqueezeError:
+                pass
+
+    elif format_type == 'crunch':
+        from .crunch import get_crunch_info
+        info = get_crunch_info(data, counters)
+        if info:
+            print(f"Format: Crunch {info['description']}")
+            print(f"Original filename: {info['filename']}")
+            if verbose:
+                print(f"Siglevel: 0x{info['siglevel']:02X}")
+                print(f"Code bits: {info['bits']}")
+        else:
+            print("Format: Crunch (cannot parse header)")
+
+    elif format_type == 'crlzh':
+        from .crlzh import get_crlzh_info
+        info = get_crlzh_info(data, counters)
+        if info:
+            print(f"Format: CrLZH {info['description']}")
+            print(f"Original filename: {info['filename']}")
+            if verbose:
+                print(f"Version byte: 0x{info['version']:02X}")
+                print(f"Position bits: {info['position_bits']}")
+        else:
+            print("Format: CrLZH (cannot parse header)")
 
-    This handles duplicate filenames WITHIN an archive (e.g., two files named README.TXT).
-    Appends _1, _2, etc. to the stem until a unique name is found.
+    if counters:
+        for line in counters.format_lines():
+            print(line)
 
-    Note: This only checks used_names, not existing files on disk (that's handled by safe_write).
-    """
-    original = out_path
-    counter = 1
 
-    while str(out_path) in used_names:
-        stem = original.stem
-        suffix = original.suffix
-        out_path = original.parent / f"{stem}_{counter}{suffix}"
-        counter += 1
+def _list_bas(path: Path | BinaryIO) -> None:
+    """Show which kind of MBASIC file this is."""
+    from .bas import is_tokenized_basic, is_protected_basic
+    data = _read_input(path)
 
-    return out_path
+    if is_protected_basic(data):
+        print("Format: MBASIC Protected (0xFE)")
+        print("Status: Encrypted with 143-byte XOR cycle")
+    elif is_tokenized_basic(data):
+        print("Format: MBASIC Tokenized (0xFF)")
+        print("Status: Binary tokenized")
+    else:
+        print("Format: MBASIC ASCII")
+        print("Status: Plain text source")
 
 
 def cmd_extract(
-    path: Path,
+    path: Path | BinaryIO,
     output_dir: Path | None,
     format_type: str,
     convert_text: bool,
     no_clobber: bool = False,
+    stats: ArchiveStats | None = None,
+    limits: Limits | None = None,
+    disk_format: str | None = None,
+    fsync: bool = False,
 ) -> int:
-    """Extract archive or decompress file."""
-    extracted = 0
-    skipped = 0
-    overwrote = 0
-
-    if format_type == 'lbr':
-        results = extract_lbr(path, None, convert_text=convert_text)  # Extract to memory first
-        used_names: set[str] = set()
+    """
+    Extract archive or decompress file.
 
-        for filename, data in results:
-            if output_dir:
-                out_path = output_dir / filename
-            else:
-                out_path = path.parent / filename
+    If stats is given, per-member timings are recorded into it. If
+    limits is given, extraction stops at the first member that passes
+    one (members already written are kept). If fsync is set, output is
+    flushed to disk (see un80.output.OutputDir).
+    """
+    from .output import OutputDir
 
-            # Handle duplicate names within archive
-            out_path = get_unique_path_for_archive(out_path, used_names)
-            used_names.add(str(out_path))
+    with OutputDir(output_dir or path.parent, no_clobber=no_clobber, fsync=fsync) as out:
+        return _extract_into(out, path, format_type, convert_text, stats, limits,
+                             disk_format)
 
-            actual_path, status = safe_write(out_path, data, no_clobber)
 
-            if status == 'skipped':
-                print(f"  {filename} (skipped, already exists)")
-                skipped += 1
-            elif status == 'overwrote':
-                print(f"  {filename} (overwrote)")
-                overwrote += 1
-            else:
-                if actual_path.name != filename:
-                    print(f"  {filename} -> {actual_path.name}")
-                else:
-                    print(f"  {filename}")
-                extracted += 1
+def _extract_into(
+    out: OutputDir,
+    path: Path | BinaryIO,
+    format_type: str,
+    convert_text: bool,
+    stats: ArchiveStats | None,
+    limits: Limits | None,
+    disk_format: str | None,
+) -> int:
+    """Body of cmd_extract, writing into an open OutputDir."""
+    if format_type in ('lbr', 'arc', 'disk'):
+        return _extract_members(out, path, format_type, convert_text, stats, limits,
+                                disk_format)
+    if format_type in ('squeeze', 'crunch', 'crlzh'):
+        _extract_compressed(out, path, format_type, convert_text, stats, limits)
+    elif format_type == 'bas':
+        _extract_bas(out, path, stats)
+    else:
+        print(f"Unknown format: {format_type}", file=sys.stderr)
+        return 1
+    return 0
 
-        _print_extract_summary(extracted, skipped, overwrote)
 
-    elif format_type == 'arc':
-        results = extract_arc(path, None, convert_text=convert_text)
-        used_names = set()
+def _extract_members(
+    out: OutputDir,
+    path: Path | BinaryIO,
+    format_type: str,
+    convert_text: bool,
+    stats: ArchiveStats | None,
+    limits: Limits | None,
+    disk_format: str | None,
+) -> int:
+    """
+    Extract the members of an archive or disk image.
 
-        for filename, data in results:
-            if output_dir:
-                out_path = output_dir / filename
-            else:
-                out_path = path.parent / filename
+    Members are read ahead and written behind on their own threads
+    while this one decodes (see un80.pipeline).
+    """
+    from contextlib import ExitStack
+    from .limits import LimitExceeded
+    from .pipeline import WriteBehind, decode_member, read_ahead
+    from .stream import open_source
 
-            out_path = get_unique_path_for_archive(out_path, used_names)
-            used_names.add(str(out_path))
+    extracted = 0
+    skipped = 0
+    overwrote = 0
 
-            actual_path, status = safe_write(out_path, data, no_clobber)
+    def write(item) -> None:
+        nonlocal extracted, skipped, overwrote
+        member, name = item
+        filename = member.filename
+        status = out.write(name, member.chunks, member.entry.modified)
 
-            if status == 'skipped':
-                print(f"  {filename} (skipped, already exists)")
-                skipped += 1
-            elif status == 'overwrote':
-                print(f"  {filename} (overwrote)")
-                overwrote += 1
+        if status == 'skipped':
+            print(f"  {filename} (skipped, already exists)")
+            skipped += 1
+        elif status == 'overwrote':
+            print(f"  {filename} (overwrote)")
+            overwrote += 1
+        else:
+            if name != filename:
+                print(f"  {filename} -> {name}")
             else:
-                if actual_path.name != filename:
-                    print(f"  {filename} -> {actual_path.name}")
-                else:
-                    print(f"  {filename}")
-                extracted += 1
+                print(f"  {filename}")
+            extracted += 1
+
+    failed = False
+
+    with ExitStack() as stack:
+        # Stored members are copied by the writer thread, so the
+        # archive is held open until it has finished
+        source = path if format_type == 'disk' else stack.enter_context(open_source(path))
+        writer = stack.enter_context(WriteBehind(write))
+        staged = read_ahead(_iter_members(source, format_type, convert_text, limits,
+                                          disk_format))
+        stack.callback(staged.close)
+        members = staged if stats is None else stats.track(staged)
+
+        for member in members:
+            filename = member.filename
+            # Handle duplicate names within archive
+            name = out.unique_name(filename)
 
-        _print_extract_summary(extracted, skipped, overwrote)
+            # A file that will be skipped is not decoded
+            if not (out.no_clobber and out.exists(name)):
+                try:
+                    member = decode_member(member)
+                except LimitExceeded as e:
+                    print(f"  {filename}: {e}", file=sys.stderr)
+                    failed = True
+                    break
+            writer.put((member, name))
 
-    elif format_type in ('squeeze', 'crunch', 'crlzh'):
-        with open(path, 'rb') as f:
-            data = f.read()
+    _print_extract_summary(extracted, skipped, overwrote)
+    return 1 if failed else 0
 
-        if format_type == 'squeeze':
-            result = unsqueeze(data)
-        elif format_type == 'crunch':
-            result = uncrunch(data)
-        else:
-            result = uncrlzh(data)
 
-        if convert_text:
-            result = strip_cpm_eof(result)
-            result = crlf_to_lf(result)
+def _extract_compressed(
+    out: OutputDir,
+    path: Path | BinaryIO,
+    format_type: str,
+    convert_text: bool,
+    stats: ArchiveStats | None,
+    limits: Limits | None,
+) -> None:
+    """Decompress a single squeezed, crunched or CrLZH file."""
+    from functools import partial
+
+    data = _read_input(path)
+
+    decode = partial(formats.decoder(format_type, buffer=True), counters=None,
+                     limits=limits)
+    if stats is not None:
+        result = stats.record(path.name, format_type, len(data), decode, data)
+    else:
+        result = decode(data)
 
-        out_name = get_output_filename(path, format_type)
-        if output_dir:
-            out_path = output_dir / out_name
-        else:
-            out_path = path.parent / out_name
+    if convert_text:
+        result = strip_cpm_eof(result)
+        result = crlf_to_lf(result)
 
-        actual_path, status = safe_write(out_path, result, no_clobber)
+    out_name = get_output_filename(path, format_type, data)
+    status = out.write(out_name, result)
 
-        if status == 'skipped':
-            print(f"  {out_name} (skipped, already exists)")
-        elif status == 'overwrote':
-            print(f"  {out_name} ({len(result)} bytes, overwrote)")
-        else:
-            print(f"  {out_name} ({len(result)} bytes)")
+    if status == 'skipped':
+        print(f"  {out_name} (skipped, already exists)")
+    elif status == 'overwrote':
+        print(f"  {out_name} ({len(result)} bytes, overwrote)")
+    else:
+        print(f"  {out_name} ({len(result)} bytes)")
 
-    elif format_type == 'bas':
-        # Detokenize MBASIC file
-        with open(path, 'rb') as f:
-            data = f.read()
 
+def _extract_bas(out: OutputDir, path: Path | BinaryIO, stats: ArchiveStats | None) -> None:
+    """Detokenize an MBASIC file."""
+    from .bas import detokenize_bytes
+    data = _read_input(path)
+
+    if stats is not None:
+        result = stats.record(path.name, 'bas', len(data), detokenize_bytes, data)
+    else:
         result = detokenize_bytes(data)
 
-        # Output keeps same name (still .bas, but now ASCII)
-        out_name = path.name
-        if output_dir:
-            out_path = output_dir / out_name
-        else:
-            out_path = path.parent / out_name
+    # Output keeps same name (still .bas, but now ASCII)
+    out_name = path.name
+    status = out.write(out_name, result)
 
-        actual_path, status = safe_write(out_path, result, no_clobber)
+    if status == 'skipped':
+        print(f"  {out_name} (skipped, already exists)")
+    elif status == 'overwrote':
+        print(f"  {out_name} (detokenized, {len(result)} bytes, overwrote)")
+    else:
+        print(f"  {out_name} (detokenized, {len(result)} bytes)")
 
-        if status == 'skipped':
-            print(f"  {out_name} (skipped, already exists)")
-        elif status == 'overwrote':
-            print(f"  {out_name} (detokenized, {len(result)} bytes, overwrote)")
-        else:
-            print(f"  {out_name} (detokenized, {len(result)} bytes)")
 
+def _iter_members(
+    path: Path | BinaryIO,
+    format_type: str,
+    convert_text: bool,
+    limits: Limits | None,
+    disk_format: str | None = None,
+):
+    """Member iterator for an archive or disk image."""
+    if format_type == 'lbr':
+        from .lbr import iter_lbr
+        return iter_lbr(path, convert_text=convert_text, limits=limits)
+    if format_type == 'disk':
+        from .disk import iter_disk
+        return iter_disk(path, disk_format=disk_format,
+                         convert_text=convert_text, limits=limits)
+    from .arc import iter_arc
+    return iter_arc(path, convert_text=convert_text, limits=limits)
+
+
+def cmd_stdout(
+    path: Path | BinaryIO,
+    format_type: str,
+    convert_text: bool,
+    member_name: str | None = None,
+    limits: Limits | None = None,
+    disk_format: str | None = None,
+) -> int:
+    """
+    Write decoded output to stdout instead of to files.
+
+    Archive members are written one after another, or only the member
+    named member_name (matched case-insensitively against its stored or
+    decompressed name). Nothing else is printed to stdout.
+    """
+    from .limits import LimitExceeded
+
+    out = sys.stdout.buffer
+
+    if format_type in ('lbr', 'arc', 'disk'):
+        wanted = member_name.upper() if member_name else None
+        found = False
+        for member in _iter_members(path, format_type, convert_text, limits, disk_format):
+            if wanted and wanted not in (member.filename.upper(),
+                                         member.entry.filename.upper()):
+                continue
+            try:
+                _write_stream(out, member.chunks)
+            except LimitExceeded as e:
+                print(f"  {member.filename}: {e}", file=sys.stderr)
+                return 1
+            found = True
+            if wanted:
+                break
+        if wanted and not found:
+            print(f"Member not found: {member_name}", file=sys.stderr)
+            return 1
+        return 0
+
+    if member_name:
+        print(f"--member needs an archive, not a {format_type} file", file=sys.stderr)
+        return 1
+
+    data = _read_input(path)
+    if format_type in ('squeeze', 'crunch', 'crlzh'):
+        result = formats.decoder(format_type, buffer=True)(data, None, limits)
+        if convert_text:
+            result = crlf_to_lf(strip_cpm_eof(result))
+    elif format_type == 'bas':
+        from .bas import detokenize_bytes
+        result = detokenize_bytes(data)
     else:
         print(f"Unknown format: {format_type}", file=sys.stderr)
         return 1
 
+    _write_stream(out, (result,))
     return 0
 
 
+def _write_stream(out: BinaryIO, chunks: Iterable[bytes]) -> None:
+    """
+    Write chunks to an open binary stream such as stdout.
+
+    As in OutputDir.write, a stored member's FileRange copies itself
+    when the stream has a file descriptor.
+    """
+    copy_to = getattr(chunks, 'copy_to', None)
+    fd = None
+    if copy_to is not None:
+        try:
+            fd = out.fileno()
+        except (AttributeError, OSError):
+            pass  # In-memory stream
+    if fd is not None:
+        out.flush()  # Keep anything already buffered in order
+        copy_to(fd)
+    else:
+        for chunk in chunks:
+            out.write(chunk)
+    out.flush()
+
+
 def _print_extract_summary(extracted: int, skipped: int, overwrote: int) -> None:
     """Print extraction summary."""
     parts = []
@@ -375,8 +697,400 @@ def _print_extract_summary(extracted: int, skipped: int, overwrote: int) -> None
         print(f"\n{total} file(s)")
 
 
-def main(argv: list[str] | None = None) -> int:
-    """Main entry point."""
+def _print_stats(run, style: str) -> None:
+    """Print a RunStats report to stderr."""
+    if style == 'json':
+        import json
+        print(json.dumps(run.to_dict(), indent=2), file=sys.stderr)
+    else:
+        print(run.format_text(), file=sys.stderr)
+
+
+def cmd_serve(argv: list[str]) -> int:
+    """Run the HTTP extraction service (80un serve)."""
+    parser = argparse.ArgumentParser(
+        prog='80un serve',
+        description='Serve archive listings and extraction over HTTP',
+    )
+    parser.add_argument(
+        '--host',
+        default='127.0.0.1',
+        help='Address to bind (default: 127.0.0.1)',
+    )
+    parser.add_argument(
+        '-p', '--port',
+        type=int,
+        default=8080,
+        help='Port to listen on (default: 8080)',
+    )
+    parser.add_argument(
+        '-r', '--root',
+        type=Path,
+        default=Path('.'),
+        metavar='DIR',
+        help='Directory archives are served from (default: current directory)',
+    )
+    parser.add_argument(
+        '-w', '--workers',
+        type=int,
+        help='Number of worker processes (default: CPU count)',
+    )
+    _add_limit_options(parser)
+    args = parser.parse_args(argv)
+
+    if not args.root.is_dir():
+        print(f"Directory not found: {args.root}", file=sys.stderr)
+        return 1
+
+    from .server import serve
+    serve(args.host, args.port, args.root, args.workers, _limits_from_args(args))
+    return 0
+
+
+def cmd_convert(argv: list[str]) -> int:
+    """Repack an archive as ZIP or TAR (80un convert)."""
+    parser = argparse.ArgumentParser(
+        prog='80un convert',
+        description='Repack an LBR or ARC archive as .zip, .tar or .tar.gz',
+    )
+    parser.add_argument(
+        'file',
+        type=Path,
+        help='LBR or ARC archive to convert',
+    )
+    parser.add_argument(
+        'output',
+        type=Path,
+        help='Archive to create (.zip, .tar, .tar.gz, .tgz, .tar.bz2, .tar.xz)',
+    )
+    parser.add_argument(
+        '-t', '--text',
+        action='store_true',
+        help='Convert text files (strip ^Z, CR/LF to LF)',
+    )
+    parser.add_argument(
+        '-f', '--format',
+        choices=['lbr', 'arc', 'disk'],
+        help='Force input format (auto-detected by default)',
+    )
+    args = parser.parse_args(argv)
+
+    if not args.file.exists():
+        print(f"File not found: {args.file}", file=sys.stderr)
+        return 1
+
+    from .convert import convert_archive
+    try:
+        count = convert_archive(
+            args.file, args.output, format_type=args.format, convert_text=args.text,
+        )
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    print(f"{args.output}: {count} file(s)")
+    return 0
+
+
+def cmd_scan(argv: list[str]) -> int:
+    """Classify every file in a directory tree (80un scan)."""
+    parser = argparse.ArgumentParser(
+        prog='80un scan',
+        description='Detect the format of every file under a directory',
+    )
+    parser.add_argument(
+        'dir',
+        type=Path,
+        help='Directory to scan',
+    )
+    parser.add_argument(
+        '-a', '--all',
+        action='store_true',
+        help='Also report unrecognised files',
+    )
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=16,
+        help='Number of reader threads (default: 16)',
+    )
+    args = parser.parse_args(argv)
+
+    if not args.dir.exists():
+        print(f"Directory not found: {args.dir}", file=sys.stderr)
+        return 1
+
+    from .scan import scan
+    counts: dict[str, int] = {}
+    total = 0
+    for result in scan(args.dir, workers=args.jobs):
+        total += 1
+        if result.error:
+            print(f"{result.path}: {result.error}", file=sys.stderr)
+            continue
+        format_type = result.format or '-'
+        counts[format_type] = counts.get(format_type, 0) + 1
+        if result.format or args.all:
+            line = f"{format_type:<8} {result.size:>10}  {result.path}"
+            if result.original_name:
+                line += f"  ({result.original_name})"
+            print(line)
+
+    summary = ', '.join(f"{count} {name}" for name, count in sorted(counts.items())
+                        if name != '-')
+    print(f"\n{total} file(s) scanned" + (f": {summary}" if summary else ""))
+    return 0
+
+
+def cmd_batch(argv: list[str]) -> int:
+    """Extract every archive and file under some directories in parallel (80un batch)."""
+    parser = argparse.ArgumentParser(
+        prog='80un batch',
+        description='Extract everything recognised under files and directories, '
+                    'on a process pool with the largest work first',
+    )
+    parser.add_argument(
+        'input',
+        type=Path,
+        nargs='+',
+        help='Files and directories to extract',
+    )
+    parser.add_argument(
+        '-o', '--output',
+        type=Path,
+        default=Path('.'),
+        metavar='DIR',
+        help='Output directory; the input tree is mirrored under it '
+             '(default: current directory)',
+    )
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        help='Number of worker processes (default: CPU count)',
+    )
+    parser.add_argument(
+        '--memory',
+        type=_size,
+        default='256M',
+        metavar='SIZE',
+        help='Estimated decoded data to hold in flight at once (default: 256M)',
+    )
+    parser.add_argument(
+        '-t', '--text',
+        action='store_true',
+        help='Convert text files (strip ^Z, CR/LF to LF)',
+    )
+    parser.add_argument(
+        '-n', '--no-clobber',
+        action='store_true',
+        help='Do not overwrite existing files',
+    )
+    parser.add_argument(
+        '--fsync',
+        action='store_true',
+        help='Flush extracted files (and the journal) to disk',
+    )
+    parser.add_argument(
+        '--journal',
+        type=Path,
+        metavar='FILE',
+        help='Record finished work in FILE (default: .80un-journal in the output directory)',
+    )
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='Skip the work an interrupted run recorded in the journal as finished',
+    )
+    _add_limit_options(parser)
+    args = parser.parse_args(argv)
+
+    for path in args.input:
+        if not path.exists():
+            print(f"File not found: {path}", file=sys.stderr)
+            return 1
+
+    from .batch import run_batch
+    from .journal import JOURNAL_NAME, Journal
+    args.output.mkdir(parents=True, exist_ok=True)
+    journal_path = args.journal or args.output / JOURNAL_NAME
+    counts = {'wrote': 0, 'skipped': 0, 'overwrote': 0, 'failed': 0}
+    with Journal(journal_path, resume=args.resume, fsync=args.fsync) as journal:
+        if journal.completed:
+            print(f"Resuming: {len(journal.completed)} unit(s) already done")
+        for result in run_batch(args.input, args.output, workers=args.jobs,
+                                memory_budget=args.memory, convert_text=args.text,
+                                no_clobber=args.no_clobber, limits=_limits_from_args(args),
+                                fsync=args.fsync, journal=journal):
+            counts[result.status] += 1
+            if result.status == 'failed':
+                where = result.source.path
+                if result.name:
+                    where += f": {result.name}"
+                print(f"{where}: {result.error}", file=sys.stderr)
+            elif result.status == 'skipped':
+                print(f"  {result.output} (skipped, already exists)")
+            elif result.status == 'overwrote':
+                print(f"  {result.output} (overwrote)")
+            else:
+                print(f"  {result.output}")
+
+    _print_extract_summary(counts['wrote'], counts['skipped'], counts['overwrote'])
+    if counts['failed']:
+        print(f"{counts['failed']} failed", file=sys.stderr)
+        return 1
+    return 0
+
+
+def cmd_salvage(argv: list[str]) -> int:
+    """Recover members from a damaged archive (80un salvage)."""
+    parser = argparse.ArgumentParser(
+        prog='80un salvage',
+        description='Recover what can still be found in a damaged or truncated file',
+    )
+    parser.add_argument(
+        'file',
+        type=Path,
+        help='Damaged ARC, LBR or compressed file',
+    )
+    parser.add_argument(
+        '-o', '--output',
+        type=Path,
+        metavar='DIR',
+        help='Output directory',
+    )
+    parser.add_argument(
+        '-l', '--list',
+        action='store_true',
+        help='List recoverable members without extracting',
+    )
+    parser.add_argument(
+        '-t', '--text',
+        action='store_true',
+        help='Convert text files (strip ^Z, CR/LF to LF)',
+    )
+    parser.add_argument(
+        '-n', '--no-clobber',
+        action='store_true',
+        help='Do not overwrite existing files',
+    )
+    _add_limit_options(parser)
+    args = parser.parse_args(argv)
+
+    if not args.file.exists():
+        print(f"File not found: {args.file}", file=sys.stderr)
+        return 1
+
+    from .salvage import salvage
+    members = salvage(args.file, limits=_limits_from_args(args))
+    if not members:
+        print(f"No recoverable members found in: {args.file}", file=sys.stderr)
+        return 1
+
+    if args.list:
+        print(f"{'Offset':>8} {'Source':<8} {'Size':>8} {'Check':<10} Filename")
+        print('-' * 52)
+        for member in members:
+            check = 'ok' if member.verified else 'unverified'
+            print(f"{member.offset:>8} {member.source:<8} {len(member.data):>8} "
+                  f"{check:<10} {member.filename}")
+        print(f"\n{len(members)} file(s)")
+        return 0
+
+    from .output import OutputDir
+    extracted = skipped = overwrote = 0
+    with OutputDir(args.output or args.file.parent, no_clobber=args.no_clobber) as out:
+        for member in members:
+            data = member.data
+            if args.text and is_text_file(member.filename):
+                data = crlf_to_lf(strip_cpm_eof(data))
+
+            name = out.unique_name(member.filename)
+            status = out.write(name, data)
+
+            note = '' if member.verified else ', unverified'
+            if status == 'skipped':
+                print(f"  {name} (skipped, already exists)")
+                skipped += 1
+            elif status == 'overwrote':
+                print(f"  {name} ({member.source} at {member.offset}{note}, overwrote)")
+                overwrote += 1
+            else:
+                print(f"  {name} ({member.source} at {member.offset}{note})")
+                extracted += 1
+
+    _print_extract_summary(extracted, skipped, overwrote)
+    return 0
+
+
+def _size(text: str) -> int:
+    """argparse type for byte counts such as 500K or 64M."""
+    from .limits import parse_size
+    try:
+        return parse_size(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size: {text!r}") from None
+
+
+def _add_limit_options(parser: argparse.ArgumentParser) -> None:
+    """Add the resource limit options (see un80.limits)."""
+    group = parser.add_argument_group(
+        'resource limits',
+        'Stop decoding when a member or archive passes a limit',
+    )
+    group.add_argument(
+        '--max-output',
+        type=_size,
+        metavar='SIZE',
+        help='Largest decoded size of one member (e.g. 64M)',
+    )
+    group.add_argument(
+        '--max-ratio',
+        type=float,
+        metavar='N',
+        help='Largest decoded size of one member per compressed byte',
+    )
+    group.add_argument(
+        '--max-cpu',
+        type=float,
+        metavar='SECONDS',
+        help='CPU time allowed for decoding one member',
+    )
+    group.add_argument(
+        '--max-total-output',
+        type=_size,
+        metavar='SIZE',
+        help='Largest decoded size of all members of an archive',
+    )
+    group.add_argument(
+        '--max-total-cpu',
+        type=float,
+        metavar='SECONDS',
+        help='CPU time allowed for decoding all members of an archive',
+    )
+
+
+def _limits_from_args(args: argparse.Namespace) -> Limits | None:
+    """Limits built from _add_limit_options, or None if none were given."""
+    values = (args.max_output, args.max_ratio, args.max_cpu,
+              args.max_total_output, args.max_total_cpu)
+    if all(value is None for value in values):
+        return None
+    from .limits import Limits
+    return Limits(*values)
+
+
+# Subcommands recognised as the first argument; anything else is a file
+COMMANDS = {
+    'batch': cmd_batch,
+    'convert': cmd_convert,
+    'salvage': cmd_salvage,
+    'scan': cmd_scan,
+    'serve': cmd_serve,
+}
+
+
+def _main_parser() -> argparse.ArgumentParser:
+    """Parser for the main command (extract, list or decode files)."""
     parser = argparse.ArgumentParser(
         prog='80un',
         description='Unpacker for CP/M compression and packing formats',
@@ -387,7 +1101,9 @@ def main(argv: list[str] | None = None) -> int:
     parser.add_argument(
         'file',
         type=Path,
-        help='File to extract or decompress',
+        nargs='+',
+        help=f"File to extract or decompress ('{STDIN_NAME}' for standard input); "
+             "several may be listed with --json or --ndjson, or given with --from-bundle",
     )
     parser.add_argument(
         '-o', '--output',
@@ -400,6 +1116,35 @@ def main(argv: list[str] | None = None) -> int:
         action='store_true',
         help='List contents without extracting',
     )
+    parser.add_argument(
+        '--json',
+        action='store_const',
+        const='json',
+        help='List contents as JSON (implies --list)',
+    )
+    parser.add_argument(
+        '--ndjson',
+        action='store_const',
+        const='ndjson',
+        dest='json',
+        help='List contents as one JSON object per line (implies --list)',
+    )
+    parser.add_argument(
+        '-c', '--stdout',
+        action='store_true',
+        help='Write decoded output to stdout (archive members one after another)',
+    )
+    parser.add_argument(
+        '-x', '--member',
+        metavar='MEMBER',
+        help='Write only this archive member to stdout (implies --stdout)',
+    )
+    parser.add_argument(
+        '--from-bundle',
+        action='store_true',
+        help='Each FILE is a zip or tar bundle: list or extract the archives '
+             'and files inside it, without unpacking it to disk',
+    )
     parser.add_argument(
         '-t', '--text',
         action='store_true',
@@ -407,46 +1152,138 @@ def main(argv: list[str] | None = None) -> int:
     )
     parser.add_argument(
         '-f', '--format',
-        choices=['lbr', 'arc', 'squeeze', 'crunch', 'crlzh', 'bas'],
+        choices=['lbr', 'arc', 'disk', 'squeeze', 'crunch', 'crlzh', 'bas'],
         help='Force file format (auto-detected by default)',
     )
+    parser.add_argument(
+        '--disk-format',
+        metavar='NAME',
+        help='CP/M disk format of a disk image (e.g. ibm-8ss, kaypro2; '
+             'detected by default)',
+    )
     parser.add_argument(
         '-n', '--no-clobber',
         action='store_true',
         help='Do not overwrite existing files',
     )
+    parser.add_argument(
+        '--fsync',
+        action='store_true',
+        help='Flush extracted files to disk before exiting',
+    )
     parser.add_argument(
         '-v', '--verbose',
         action='store_true',
         help='Show detailed version/method info',
     )
+    parser.add_argument(
+        '--stats',
+        action='store_true',
+        help='Report per-member timing and throughput on stderr',
+    )
+    parser.add_argument(
+        '--stats-format',
+        choices=['text', 'json'],
+        help='Format of the --stats report (default: text; implies --stats)',
+    )
+    parser.add_argument(
+        '--trace-memory',
+        action='store_true',
+        help='With --stats, also record peak memory per member (slows decoding)',
+    )
+    _add_limit_options(parser)
+    return parser
 
-    args = parser.parse_args(argv)
 
-    if not args.file.exists():
-        print(f"File not found: {args.file}", file=sys.stderr)
+def main(argv: list[str] | None = None) -> int:
+    """Main entry point."""
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] in COMMANDS:
+        return COMMANDS[argv[0]](argv[1:])
+
+    args = _main_parser().parse_args(argv)
+    if args.stats_format:
+        args.stats = True
+    to_stdout = args.stdout or args.member is not None
+    if to_stdout and (args.list or args.stats):
+        print("--stdout cannot be combined with --list or --stats", file=sys.stderr)
         return 1
 
-    # Detect format
-    format_type = args.format or detect_format(args.file)
+    if args.from_bundle:
+        if to_stdout or args.stats:
+            print("--from-bundle cannot be combined with --stdout or --stats",
+                  file=sys.stderr)
+            return 1
+        action = args.json or ('list' if args.list else 'extract')
+        return cmd_bundle(args.file, args.format, action, args.output, args.text,
+                          args.no_clobber, args.verbose, _limits_from_args(args),
+                          args.disk_format, args.fsync)
+
+    if args.json:
+        return cmd_list_json(args.file, args.format, args.json == 'ndjson',
+                             args.disk_format)
+    if len(args.file) > 1:
+        print("Several files can only be listed, with --json or --ndjson", file=sys.stderr)
+        return 1
+    args.file = args.file[0]
+    return _run_file(args, to_stdout)
+
+
+def _run_file(args: argparse.Namespace, to_stdout: bool) -> int:
+    """List, decode to stdout or extract the one input file of main."""
+    try:
+        source, format_type = _open_input(args.file, args.format)
+    except FileNotFoundError as e:
+        print(e, file=sys.stderr)
+        return 1
+    if source is not args.file and args.output is None:
+        args.output = Path('.')  # Extracting from stdin
+
     if not format_type:
         print(f"Cannot determine format of: {args.file}", file=sys.stderr)
         print("Use --format to specify the format", file=sys.stderr)
         return 1
 
     # Create output directory if needed
-    if args.output:
+    if args.output and not to_stdout:
         args.output.mkdir(parents=True, exist_ok=True)
 
+    limits = _limits_from_args(args)
+
     try:
         if args.list:
-            return cmd_list(args.file, format_type, args.verbose)
-        else:
-            return cmd_extract(args.file, args.output, format_type, args.text, args.no_clobber)
+            return cmd_list(source, format_type, args.verbose, args.disk_format)
+        if to_stdout:
+            return cmd_stdout(source, format_type, args.text, args.member, limits,
+                              args.disk_format)
+        if not args.stats:
+            return cmd_extract(source, args.output, format_type, args.text,
+                               args.no_clobber, limits=limits,
+                               disk_format=args.disk_format, fsync=args.fsync)
+        return _extract_with_stats(args, source, format_type, limits)
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
         return 1
 
 
+def _extract_with_stats(
+    args: argparse.Namespace,
+    source: Path | BinaryIO,
+    format_type: str,
+    limits: Limits | None,
+) -> int:
+    """cmd_extract for main, reporting timings (--stats) once it is done."""
+    from .stats import RunStats
+    run = RunStats()
+    run.start(trace_memory=args.trace_memory)
+    result = cmd_extract(source, args.output, format_type, args.text,
+                         args.no_clobber, run.archive(args.file, format_type), limits,
+                         args.disk_format, args.fsync)
+    run.finish()
+    _print_stats(run, args.stats_format or 'text')
+    return result
+
+
 if __name__ == '__main__':
     sys.exit(main())
@@ -0,0 +1,191 @@
+"""
+Repack LBR and ARC archives as ZIP or TAR.
+
+Members are decoded one at a time and written straight into the
+zipfile/tarfile writer, so no temporary files are created and memory
+use is bounded by a single member. CP/M dates from the archive
+directory are carried over as member modification times.
+"""
+
+import tarfile
+import zipfile
+from datetime import datetime
+from io import BytesIO
+from pathlib import Path
+from typing import BinaryIO, Iterable
+
+from .formats import detect_format
+from .stream import Member
+
+# ZIP cannot represent dates before 1980
+ZIP_EPOCH = datetime(1980, 1, 1)
+
+# Output suffix -> (container, tarfile compression)
+OUTPUT_KINDS = {
+    '.zip': ('zip', ''),
+    '.tar': ('tar', ''),
+    '.tar.gz': ('tar', 'gz'),
+    '.tgz': ('tar', 'gz'),
+    '.tar.bz2': ('tar', 'bz2'),
+    '.tar.xz': ('tar', 'xz'),
+}
+
+
+class ConvertError(Exception):
+    """Error during archive conversion."""
+
+
+def output_kind(path: str | Path) -> tuple[str, str]:
+    """
+    Determine the container type from an output filename.
+
+    Returns:
+        (container, compression), e.g. ('tar', 'gz') for 'out.tar.gz'
+
+    Raises:
+        ConvertError: If the suffix is not recognised
+    """
+    name = Path(path).name.lower()
+    for suffix in sorted(OUTPUT_KINDS, key=len, reverse=True):
+        if name.endswith(suffix):
+            return OUTPUT_KINDS[suffix]
+    raise ConvertError(f"Unsupported output type: {path} "
+                       f"(expected {', '.join(OUTPUT_KINDS)})")
+
+
+def _unique_name(name: str, used: set[str]) -> str:
+    """Rename duplicate member names as NAME_1.EXT, NAME_2.EXT, ..."""
+    candidate = name
+    counter = 1
+    while candidate in used:
+        stem, dot, ext = name.rpartition('.')
+        candidate = f"{stem}_{counter}.{ext}" if dot else f"{name}_{counter}"
+        counter += 1
+    used.add(candidate)
+    return candidate
+
+
+def write_zip(
+    members: Iterable[Member],
+    dst: str | Path | BinaryIO,
+    *,
+    compression: int = zipfile.ZIP_DEFLATED,
+) -> int:
+    """
+    Write members into a ZIP archive, streaming each member's chunks.
+
+    Args:
+        members: Members from iter_lbr/iter_arc (or compatible)
+        dst: Output path or writable binary file (need not be seekable)
+        compression: zipfile compression constant
+
+    Returns:
+        Number of members written
+    """
+    count = 0
+    used: set[str] = set()
+
+    with zipfile.ZipFile(dst, 'w', compression) as zf:
+        for member in members:
+            modified = member.entry.modified or ZIP_EPOCH
+            info = zipfile.ZipInfo(
+                _unique_name(member.filename, used),
+                date_time=max(modified, ZIP_EPOCH).timetuple()[:6],
+            )
+            info.compress_type = compression
+            with zf.open(info, 'w') as out:
+                for chunk in member.chunks:
+                    out.write(chunk)
+            count += 1
+
+    return count
+
+
+def write_tar(
+    members: Iterable[Member],
+    dst: str | Path | BinaryIO,
+    *,
+    compression: str = '',
+) -> int:
+    """
+    Write members into a TAR archive.
+
+    TAR headers carry the member size, so each member is collected
+    before it is written; only one member is held at a time.
+
+    Args:
+        members: Members from iter_lbr/iter_arc (or compatible)
+        dst: Output path or writable binary file (need not be seekable)
+        compression: '', 'gz', 'bz2' or 'xz'
+
+    Returns:
+        Number of members written
+    """
+    count = 0
+    used: set[str] = set()
+
+    if isinstance(dst, (str, Path)):
+        tf = tarfile.open(dst, f'w:{compression}')
+    else:
+        tf = tarfile.open(fileobj=dst, mode=f'w|{compression}')
+
+    with tf:
+        for member in members:
+            data = member.read()
+            info = tarfile.TarInfo(_unique_name(member.filename, used))
+            info.size = len(data)
+            info.mode = 0o644
+            modified = member.entry.modified
+            if modified:
+                info.mtime = int(modified.timestamp())
+            tf.addfile(info, BytesIO(data))
+            count += 1
+
+    return count
+
+
+def convert_archive(
+    src: str | Path,
+    dst: str | Path,
+    *,
+    format_type: str | None = None,
+    convert_text: bool = False,
+) -> int:
+    """
+    Convert an LBR or ARC archive to ZIP or TAR.
+
+    The output type is chosen from the dst suffix (.zip, .tar,
+    .tar.gz/.tgz, .tar.bz2, .tar.xz).
+
+    Args:
+        src: Path to the LBR or ARC archive
+        dst: Path of the archive to create
+        format_type: 'lbr', 'arc' or 'disk'; detected from the file if None
+        convert_text: Whether to convert text files (strip ^Z, CR/LF to LF)
+
+    Returns:
+        Number of members written
+
+    Raises:
+        ConvertError: If the input or output type is not supported
+    """
+    container, compression = output_kind(dst)
+
+    if format_type is None:
+        format_type = detect_format(Path(src))
+
+    if format_type == 'lbr':
+        from .lbr import iter_lbr  # pylint: disable=import-outside-toplevel
+        members = iter_lbr(src, convert_text=convert_text)
+    elif format_type == 'arc':
+        from .arc import iter_arc  # pylint: disable=import-outside-toplevel
+        members = iter_arc(src, convert_text=convert_text)
+    elif format_type == 'disk':
+        from .disk import iter_disk  # pylint: disable=import-outside-toplevel
+        members = iter_disk(src, convert_text=convert_text)
+    else:
+        raise ConvertError(f"Not an LBR or ARC archive or disk image: {src}")
+
+    if container == 'zip':
+        return write_zip(members, dst)
+    return write_tar(members, dst, compression=compression)
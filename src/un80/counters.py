@@ -0,0 +1,70 @@
+"""
+Optional decoder instrumentation.
+
+The decoders accept a `counters` mapping and, when one is passed, add
+counts describing what happened inside them. Nothing is counted inside
+the per-code loops: only rare events (dictionary resets, tree rebuilds)
+are counted where they happen, and totals are filled in once decoding
+finishes. Passing no counters therefore costs nothing.
+
+Keys filled in, by decoder:
+
+    all                 input_bytes, output_bytes
+    LZW (crunch,        lzw_resets       RESET/CLEAR codes seen
+    ARC 5-9)            lzw_table_full   times the dictionary filled up
+    squeeze (and        huffman_nodes    nodes in the Huffman tree
+    ARC method 4)       huffman_symbols  symbols decoded (before RLE)
+                        huffman_bits     bits consumed by those symbols
+    crlzh               huffman_reconsts adaptive tree rebuilds
+                        huffman_bits     bits consumed
+
+Usage:
+    counters = DecodeCounters()
+    uncrunch(data, counters=counters)
+    print(counters['lzw_resets'])
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+
+# Display labels, in report order
+LABELS = {
+    'input_bytes': 'Input bytes',
+    'output_bytes': 'Output bytes',
+    'lzw_resets': 'LZW resets',
+    'lzw_table_full': 'LZW table full',
+    'huffman_nodes': 'Huffman nodes',
+    'huffman_symbols': 'Huffman symbols',
+    'huffman_bits': 'Huffman bits',
+    'huffman_reconsts': 'Huffman rebuilds',
+}
+
+
+class DecodeCounters(Counter):
+    """Counts filled in by a decoder; missing keys read as 0."""
+
+    @property
+    def avg_code_length(self) -> float | None:
+        """Average Huffman code length in bits, if symbols were counted."""
+        if not self['huffman_symbols']:
+            return None
+        return self['huffman_bits'] / self['huffman_symbols']
+
+    @property
+    def ratio(self) -> float | None:
+        """Output bytes per input byte."""
+        if not self['input_bytes']:
+            return None
+        return self['output_bytes'] / self['input_bytes']
+
+    def format_lines(self) -> list[str]:
+        """Human-readable 'Label: value' lines."""
+        keys = [key for key in LABELS if key in self]
+        keys += sorted(key for key in self if key not in LABELS)
+        lines = [f"{LABELS.get(key, key)}: {self[key]}" for key in keys]
+        if self.avg_code_length is not None:
+            lines.append(f"Avg code length: {self.avg_code_length:.2f} bits")
+        if self.ratio is not None:
+            lines.append(f"Expansion ratio: {self.ratio:.2f}")
+        return lines
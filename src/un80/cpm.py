@@ -7,6 +7,11 @@ CP/M files have specific conventions:
 - Text files use CR/LF line endings
 """
 
+from __future__ import annotations
+
+import sys
+from datetime import datetime, timedelta
+
 # Common text file extensions in CP/M
 TEXT_EXTENSIONS = {
     'txt', 'doc', 'asm', 'mac', 'pas', 'bas', 'for', 'cob',
@@ -24,6 +29,9 @@ BINARY_EXTENSIONS = {
 
 CPM_EOF = 0x1A  # Ctrl-Z
 
+# CP/M 3 and LBR dates count days from this day (day 1 = Jan 1, 1978)
+CPM_EPOCH = datetime(1977, 12, 31)
+
 
 def strip_cpm_eof(data: bytes, *, aggressive: bool = False) -> bytes:
     """
@@ -135,6 +143,45 @@ def get_original_extension(compressed_ext: str) -> str:
     return compressed_ext
 
 
+def dos_time(time: int) -> tuple[int, int, int]:
+    """Split a DOS-format time word (hhhhhmmm mmmsssss) into (h, m, s)."""
+    return (time >> 11) & 0x1F, (time >> 5) & 0x3F, (time & 0x1F) * 2
+
+
+def cpm_datetime(days: int, time: int = 0) -> datetime | None:
+    """
+    Convert a CP/M day count and DOS-format time to a datetime.
+
+    Used by LBR directory entries. Returns None if no date is recorded
+    (day 0) or the time word is out of range.
+    """
+    if days == 0:
+        return None
+    hour, minute, second = dos_time(time)
+    try:
+        return (CPM_EPOCH + timedelta(days=days)).replace(
+            hour=hour, minute=minute, second=second)
+    except ValueError:
+        return None
+
+
+def dos_datetime(date: int, time: int) -> datetime | None:
+    """
+    Convert DOS-format date and time words to a datetime.
+
+    Date is yyyyyyym mmmddddd (years from 1980). Used by ARC headers.
+    Returns None if no date is recorded or the fields are out of range.
+    """
+    if date == 0:
+        return None
+    hour, minute, second = dos_time(time)
+    try:
+        return datetime(1980 + (date >> 9), (date >> 5) & 0x0F, date & 0x1F,
+                        hour, minute, second)
+    except ValueError:
+        return None
+
+
 def detect_compression(data: bytes) -> str | None:
     """
     Detect the compression type from file magic bytes.
@@ -169,3 +216,158 @@ def detect_compression(data: bytes) -> str | None:
             return 'lbr'
 
     return None
+
+
+RLE_MARKER = 0x90
+
+
+class OutputSizeError(ValueError):
+    """Decoded data is larger than the size recorded for it, or than its buffer."""
+
+
+def decode_rle90(
+    data: bytes,
+    expected_size: int | None = None,
+    limits=None,
+) -> bytes:
+    """
+    Decode RLE90 run-length encoding (squeeze, crunch, ARC methods 3-8).
+
+    0x90 0x00 is a literal 0x90. 0x90 N (N > 0) means the previous byte
+    occurs N times in all, i.e. is repeated N - 1 more times. Literal
+    runs between markers are copied as slices.
+
+    Args:
+        data: Encoded bytes (bytes or bytearray)
+        expected_size: Decoded size if known (e.g. ArcEntry.original_size)
+        limits: Optional un80.limits.Limits for the member being decoded
+
+    Returns:
+        Decoded data, as a bytearray
+
+    Raises:
+        OutputSizeError: If the output would exceed expected_size
+            (raised as soon as it does, not after decoding everything)
+        LimitExceeded: If limits are given and one is passed
+    """
+    limit = sys.maxsize if expected_size is None else expected_size
+    check = limit if limits is None else min(limit, limits.check(0))
+    out = bytearray()
+    size = prev = i = 0
+    n = len(data)
+    find = data.find
+
+    while i < n:
+        j = find(RLE_MARKER, i)
+        if j < 0:
+            j = n
+        if j > i:
+            # Literal run up to the next marker
+            piece = data[i:j]
+            prev = data[j - 1]
+            i = j
+        elif j + 1 >= n:
+            # Trailing marker without a count: keep it as a literal
+            piece = b'\x90'
+            i = n
+        else:
+            count = data[j + 1]
+            i = j + 2
+            if count == 0:
+                piece = b'\x90'
+                prev = RLE_MARKER
+            elif count == 1:
+                continue
+            else:
+                piece = bytes((prev,)) * (count - 1)
+
+        size += len(piece)
+        if size > check:
+            if size > limit:
+                raise OutputSizeError(f"RLE output exceeds expected size of {limit} bytes")
+            check = min(limit, limits.check(size))
+        out += piece
+
+    return out
+
+
+def copy_into(data: bytes, dst) -> int:
+    """
+    Copy decoded data to the start of a caller's writable buffer.
+
+    Args:
+        data: Decoded data
+        dst: Writable buffer (bytearray, mmap, SharedMemory.buf, ...)
+
+    Returns:
+        Number of bytes written, len(data)
+
+    Raises:
+        OutputSizeError: If data does not fit in dst
+        TypeError: If dst is not a writable buffer
+    """
+    size = len(data)
+    with memoryview(dst) as view, view.cast('B') as out:
+        if size > len(out):
+            raise OutputSizeError(
+                f"Output of {size} bytes does not fit in a buffer of {len(out)} bytes")
+        out[:size] = data
+    return size
+
+
+def _crc16_table() -> list[int]:
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+        table.append(crc)
+    return table
+
+
+_CRC16_TABLE: list[int] = []
+
+
+def crc16(data: bytes, crc: int = 0) -> int:
+    """
+    CRC-16 (reflected polynomial 0xA001) as stored in ARC headers.
+
+    Args:
+        data: Bytes to checksum
+        crc: Running CRC from a previous call, for chunked input
+    """
+    if not _CRC16_TABLE:
+        _CRC16_TABLE.extend(_crc16_table())
+    table = _CRC16_TABLE
+    for byte in data:
+        crc = (crc >> 8) ^ table[(crc ^ byte) & 0xFF]
+    return crc
+
+
+def _crc16_xmodem_table() -> list[int]:
+    table = []
+    for byte in range(256):
+        crc = byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021 if crc & 0x8000 else crc << 1) & 0xFFFF
+        table.append(crc)
+    return table
+
+
+_CRC16_XMODEM_TABLE: list[int] = []
+
+
+def crc16_xmodem(data: bytes, crc: int = 0) -> int:
+    """
+    CRC-16 (polynomial 0x1021, MSB first) as stored in LBR directories.
+
+    Args:
+        data: Bytes to checksum (an LBR member's whole sectors)
+        crc: Running CRC from a previous call, for chunked input
+    """
+    if not _CRC16_XMODEM_TABLE:
+        _CRC16_XMODEM_TABLE.extend(_crc16_xmodem_table())
+    table = _CRC16_XMODEM_TABLE
+    for byte in data:
+        crc = ((crc << 8) & 0xFFFF) ^ table[(crc >> 8) ^ byte]
+    return crc
@@ -20,12 +20,24 @@ Key parameters (from UCRLZH20.COM disassembly):
 - MAX_FREQ = 0x8000 triggers tree reconstruction
 - Position encoding uses d_code/d_len tables (standard LZHUF style)
 
+The decoder itself is shared with Teledisk images (see un80.lzhuf).
+
 References:
 - LZHUF.C by Haruyasu Yoshizaki (1988)
 - UCRLZH20.COM (CP/M decompressor binary, disassembled for verification)
 - CrLZH documentation: http://fileformats.archiveteam.org/wiki/CrLZH
 """
 
+from __future__ import annotations
+
+from typing import BinaryIO
+
+from . import lzhuf
+# MAX_FREQ is re-exported for code that imported it from here
+from .lzhuf import MAX_FREQ, LzhufParams  # noqa: F401 pylint: disable=unused-import
+from .cpm import copy_into
+from .stream import read_source
+
 CRLZH_MAGIC = 0x76FD
 
 # Buffer size for sliding window
@@ -50,306 +62,21 @@ T = N_CHAR * 2 - 1  # 629
 # Root of Huffman tree
 R = T - 1  # 628
 
-# Maximum frequency before tree reconstruction
-MAX_FREQ = 0x8000
-
-# Position decoding tables from LZHUF.C
-# d_code: maps byte value to upper bits of position
-D_CODE = [
-    0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00,
-    0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00,
-    0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00,
-    0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00,
-    0x01, 0x01, 0x01, 0x01, 0x01, 0x01, 0x01, 0x01,
-    0x01, 0x01, 0x01, 0x01, 0x01, 0x01, 0x01, 0x01,
-    0x02, 0x02, 0x02, 0x02, 0x02, 0x02, 0x02, 0x02,
-    0x02, 0x02, 0x02, 0x02, 0x02, 0x02, 0x02, 0x02,
-    0x03, 0x03, 0x03, 0x03, 0x03, 0x03, 0x03, 0x03,
-    0x03, 0x03, 0x03, 0x03, 0x03, 0x03, 0x03, 0x03,
-    0x04, 0x04, 0x04, 0x04, 0x04, 0x04, 0x04, 0x04,
-    0x05, 0x05, 0x05, 0x05, 0x05, 0x05, 0x05, 0x05,
-    0x06, 0x06, 0x06, 0x06, 0x06, 0x06, 0x06, 0x06,
-    0x07, 0x07, 0x07, 0x07, 0x07, 0x07, 0x07, 0x07,
-    0x08, 0x08, 0x08, 0x08, 0x08, 0x08, 0x08, 0x08,
-    0x09, 0x09, 0x09, 0x09, 0x09, 0x09, 0x09, 0x09,
-    0x0A, 0x0A, 0x0A, 0x0A, 0x0A, 0x0A, 0x0A, 0x0A,
-    0x0B, 0x0B, 0x0B, 0x0B, 0x0B, 0x0B, 0x0B, 0x0B,
-    0x0C, 0x0C, 0x0C, 0x0C, 0x0D, 0x0D, 0x0D, 0x0D,
-    0x0E, 0x0E, 0x0E, 0x0E, 0x0F, 0x0F, 0x0F, 0x0F,
-    0x10, 0x10, 0x10, 0x10, 0x11, 0x11, 0x11, 0x11,
-    0x12, 0x12, 0x12, 0x12, 0x13, 0x13, 0x13, 0x13,
-    0x14, 0x14, 0x14, 0x14, 0x15, 0x15, 0x15, 0x15,
-    0x16, 0x16, 0x16, 0x16, 0x17, 0x17, 0x17, 0x17,
-    0x18, 0x18, 0x19, 0x19, 0x1A, 0x1A, 0x1B, 0x1B,
-    0x1C, 0x1C, 0x1D, 0x1D, 0x1E, 0x1E, 0x1F, 0x1F,
-    0x20, 0x20, 0x21, 0x21, 0x22, 0x22, 0x23, 0x23,
-    0x24, 0x24, 0x25, 0x25, 0x26, 0x26, 0x27, 0x27,
-    0x28, 0x28, 0x29, 0x29, 0x2A, 0x2A, 0x2B, 0x2B,
-    0x2C, 0x2C, 0x2D, 0x2D, 0x2E, 0x2E, 0x2F, 0x2F,
-    0x30, 0x31, 0x32, 0x33, 0x34, 0x35, 0x36, 0x37,
-    0x38, 0x39, 0x3A, 0x3B, 0x3C, 0x3D, 0x3E, 0x3F,
-]
-
-# d_len: number of bits used to encode this position value
-D_LEN = [
-    0x03, 0x03, 0x03, 0x03, 0x03, 0x03, 0x03, 0x03,
-    0x03, 0x03, 0x03, 0x03, 0x03, 0x03, 0x03, 0x03,
-    0x03, 0x03, 0x03, 0x03, 0x03, 0x03, 0x03, 0x03,
-    0x03, 0x03, 0x03, 0x03, 0x03, 0x03, 0x03, 0x03,
-    0x04, 0x04, 0x04, 0x04, 0x04, 0x04, 0x04, 0x04,
-    0x04, 0x04, 0x04, 0x04, 0x04, 0x04, 0x04, 0x04,
-    0x04, 0x04, 0x04, 0x04, 0x04, 0x04, 0x04, 0x04,
-    0x04, 0x04, 0x04, 0x04, 0x04, 0x04, 0x04, 0x04,
-    0x04, 0x04, 0x04, 0x04, 0x04, 0x04, 0x04, 0x04,
-    0x04, 0x04, 0x04, 0x04, 0x04, 0x04, 0x04, 0x04,
-    0x05, 0x05, 0x05, 0x05, 0x05, 0x05, 0x05, 0x05,
-    0x05, 0x05, 0x05, 0x05, 0x05, 0x05, 0x05, 0x05,
-    0x05, 0x05, 0x05, 0x05, 0x05, 0x05, 0x05, 0x05,
-    0x05, 0x05, 0x05, 0x05, 0x05, 0x05, 0x05, 0x05,
-    0x05, 0x05, 0x05, 0x05, 0x05, 0x05, 0x05, 0x05,
-    0x05, 0x05, 0x05, 0x05, 0x05, 0x05, 0x05, 0x05,
-    0x05, 0x05, 0x05, 0x05, 0x05, 0x05, 0x05, 0x05,
-    0x05, 0x05, 0x05, 0x05, 0x05, 0x05, 0x05, 0x05,
-    0x06, 0x06, 0x06, 0x06, 0x06, 0x06, 0x06, 0x06,
-    0x06, 0x06, 0x06, 0x06, 0x06, 0x06, 0x06, 0x06,
-    0x06, 0x06, 0x06, 0x06, 0x06, 0x06, 0x06, 0x06,
-    0x06, 0x06, 0x06, 0x06, 0x06, 0x06, 0x06, 0x06,
-    0x06, 0x06, 0x06, 0x06, 0x06, 0x06, 0x06, 0x06,
-    0x06, 0x06, 0x06, 0x06, 0x06, 0x06, 0x06, 0x06,
-    0x07, 0x07, 0x07, 0x07, 0x07, 0x07, 0x07, 0x07,
-    0x07, 0x07, 0x07, 0x07, 0x07, 0x07, 0x07, 0x07,
-    0x07, 0x07, 0x07, 0x07, 0x07, 0x07, 0x07, 0x07,
-    0x07, 0x07, 0x07, 0x07, 0x07, 0x07, 0x07, 0x07,
-    0x07, 0x07, 0x07, 0x07, 0x07, 0x07, 0x07, 0x07,
-    0x07, 0x07, 0x07, 0x07, 0x07, 0x07, 0x07, 0x07,
-    0x08, 0x08, 0x08, 0x08, 0x08, 0x08, 0x08, 0x08,
-    0x08, 0x08, 0x08, 0x08, 0x08, 0x08, 0x08, 0x08,
-]
+# LZHUF variants: v1.x sends six low position bits verbatim, v2.0 five
+# (11-bit positions, which is all a 2048-byte window needs)
+V1_PARAMS = LzhufParams(N, F, THRESHOLD, True, 6, N)
+V2_PARAMS = LzhufParams(N, F, THRESHOLD, True, 5, N)
 
 
 class CrLZHError(Exception):
     """Error during CrLZH decompression."""
 
 
-class BitReader:
-    """Read bits from a byte stream, MSB first."""
-
-    def __init__(self, data: bytes, offset: int = 0):
-        self.data = data
-        self.pos = offset
-        self.buf = 0
-        self.buf_len = 0
-
-    def get_bit(self) -> int:
-        """Get one bit."""
-        while self.buf_len <= 8:
-            if self.pos < len(self.data):
-                byte = self.data[self.pos]
-                self.pos += 1
-            else:
-                byte = 0
-            self.buf |= byte << (8 - self.buf_len)
-            self.buf_len += 8
-
-        result = 1 if self.buf & 0x8000 else 0
-        self.buf = (self.buf << 1) & 0xFFFF
-        self.buf_len -= 1
-        return result
-
-    def get_bits(self, count: int) -> int:
-        """Get multiple bits MSB first."""
-        result = 0
-        for _ in range(count):
-            result = (result << 1) | self.get_bit()
-        return result
-
-    def get_byte(self) -> int:
-        """Get 8 bits as a byte."""
-        return self.get_bits(8)
-
-
-def decode_position_v1(bits: BitReader) -> int:
-    """
-    Decode position using LZHUF d_code/d_len tables (for version < 0x20).
-    """
-    # Read first byte
-    i = bits.get_byte()
-
-    # Upper 6 bits from d_code table
-    c = D_CODE[i] << 6
-
-    # Number of additional bits to read
-    j = D_LEN[i] - 2
-
-    # Read lower bits, shifting i to accumulate them
-    while j > 0:
-        j -= 1
-        i = (i << 1) | bits.get_bit()
-
-    # Combine upper and lower 6 bits
-    return c | (i & 0x3F)
-
-
-def decode_position_v2(bits: BitReader) -> int:
-    """
-    Decode position for CrLZH v2.0 format (version >= 0x20).
-
-    v2.0 uses d_code/d_len tables like v1, but with different parameters:
-    - Read (d_len - 3) extra bits (vs d_len - 2 for v1)
-    - Position = (d_code << 5) | (lower 5 bits) (vs << 6 and 6 bits for v1)
-
-    This gives 11-bit positions (0-2047) for the 2048-byte sliding window.
-    """
-    # Read initial 8-bit value
-    byte_val = bits.get_byte()
-
-    # Look up d_code and d_len
-    d_code = D_CODE[byte_val]
-    d_len = D_LEN[byte_val]
-
-    # Number of extra bits to read: d_len - 3 (minimum 0)
-    extra_count = d_len - 3
-
-    # Accumulate extra bits by shifting and adding
-    # Start with original byte, shift left for each extra bit read
-    accum = byte_val
-    for _ in range(extra_count):
-        accum = (accum << 1) | bits.get_bit()
-
-    # Final position: d_code in upper bits, accumulated lower 5 bits
-    return (d_code << 5) | (accum & 0x1F)
-
-
-class HuffmanTree:
-    """Adaptive Huffman tree for CrLZH decompression."""
+class HuffmanTree(lzhuf.HuffmanTree):
+    """Adaptive Huffman tree with CrLZH's 315 codes."""
 
     def __init__(self):
-        # Frequency table for each node
-        self.freq = [0] * (T + 1)
-
-        # Parent pointers: prnt[T..T+N_CHAR-1] map codes to leaf positions
-        self.prnt = [0] * (T + N_CHAR)
-
-        # Child pointers: son[i] and son[i]+1 are children of node i
-        self.son = [0] * T
-
-        self._init_tree()
-
-    def _init_tree(self):
-        """Initialize tree with uniform frequencies."""
-        # Initialize leaf nodes
-        for i in range(N_CHAR):
-            self.freq[i] = 1
-            self.son[i] = i + T
-            self.prnt[i + T] = i
-
-        # Build internal nodes
-        i = 0
-        j = N_CHAR
-        while j <= R:
-            self.freq[j] = self.freq[i] + self.freq[i + 1]
-            self.son[j] = i
-            self.prnt[i] = self.prnt[i + 1] = j
-            i += 2
-            j += 1
-
-        # Sentinel
-        self.freq[T] = 0xFFFF
-        self.prnt[R] = 0
-
-    def _reconst(self):
-        """Reconstruct tree when frequency counter saturates."""
-        # Collect leaf nodes and halve frequencies
-        j = 0
-        for i in range(T):
-            if self.son[i] >= T:
-                self.freq[j] = (self.freq[i] + 1) // 2
-                self.son[j] = self.son[i]
-                j += 1
-
-        # Rebuild tree by connecting sons
-        i = 0
-        j = N_CHAR
-        while j < T:
-            k = i + 1
-            f = self.freq[j] = self.freq[i] + self.freq[k]
-
-            # Find insertion point
-            k = j - 1
-            while f < self.freq[k]:
-                k -= 1
-            k += 1
-
-            # Shift arrays
-            l = j - k
-            self.freq[k + 1:j + 1] = self.freq[k:j]
-            self.freq[k] = f
-            self.son[k + 1:j + 1] = self.son[k:j]
-            self.son[k] = i
-
-            i += 2
-            j += 1
-
-        # Reconnect parent pointers
-        for i in range(T):
-            k = self.son[i]
-            if k >= T:
-                self.prnt[k] = i
-            else:
-                self.prnt[k] = self.prnt[k + 1] = i
-
-    def update(self, c: int):
-        """Increment frequency of given code and update tree."""
-        if self.freq[R] == MAX_FREQ:
-            self._reconst()
-
-        c = self.prnt[c + T]
-        while True:
-            self.freq[c] += 1
-            k = self.freq[c]
-
-            # Check if order is disturbed
-            l = c + 1
-            if k > self.freq[l]:
-                # Find node to swap with
-                while k > self.freq[l + 1]:
-                    l += 1
-
-                # Swap frequencies
-                self.freq[c] = self.freq[l]
-                self.freq[l] = k
-
-                # Swap children and update parent pointers
-                i = self.son[c]
-                self.prnt[i] = l
-                if i < T:
-                    self.prnt[i + 1] = l
-
-                j = self.son[l]
-                self.son[l] = i
-                self.prnt[j] = c
-                if j < T:
-                    self.prnt[j + 1] = c
-                self.son[c] = j
-
-                c = l
-
-            c = self.prnt[c]
-            if c == 0:
-                break
-
-    def decode_char(self, bits: BitReader) -> int:
-        """Decode one character from bit stream."""
-        c = self.son[R]
-
-        # Traverse from root to leaf
-        while c < T:
-            c += bits.get_bit()
-            c = self.son[c]
-
-        c -= T
-        self.update(c)
-        return c
+        super().__init__(N_CHAR)
 
 
 def parse_header(data: bytes) -> tuple[str | None, int]:
@@ -404,87 +131,73 @@ def parse_header(data: bytes) -> tuple[str | None, int]:
     return filename, pos
 
 
-def uncrlzh(data: bytes) -> bytes:
+def uncrlzh(data: bytes | BinaryIO, *, counters=None, limits=None) -> bytes:
     """
     Decompress CrLZH data.
 
     Args:
-        data: CrLZH file data (including magic header)
+        data: CrLZH file data (including magic header), or an open
+            binary file to read it from
+        counters: Optional mapping to fill in (see un80.counters)
+        limits: Optional un80.limits.Limits to enforce while decoding
 
     Returns:
         Decompressed data
 
     Raises:
         CrLZHError: If decompression fails
+        LimitExceeded: If limits are given and one is passed
     """
-    filename, data_offset = parse_header(data)
-
-    # Initialize bit reader
-    bits = BitReader(data, data_offset)
+    return bytes(_uncrlzh(data, counters, limits))
 
-    # Read 4 header bytes (version/mode info)
-    # First two bytes determine decoding mode (checked against 0x20, 0x21)
-    # UCRLZH20.COM uses these for self-modifying code to select position encoding
-    version1 = bits.get_byte()
-    version2 = bits.get_byte()
 
-    # Check version (UCRLZH20 rejects if >= 0x21)
-    if version1 >= 0x21:
-        raise CrLZHError(f"Unsupported version: {version1:02X}")
-
-    # Select position decoder based on version
-    # Version >= 0x20: simple 8-bit positions (v2.0 format)
-    # Version < 0x20: d_code/d_len tables (v1.x format)
-    use_v2_position = version1 >= 0x20
-    decode_position = decode_position_v2 if use_v2_position else decode_position_v1
-
-    # Read two more header bytes (consumed but not used for version check)
-    bits.get_byte()
-    bits.get_byte()
-
-    # Initialize tree and buffers
-    tree = HuffmanTree()
-    result = bytearray()
+def uncrlzh_into(src: bytes | BinaryIO, dst, *, counters=None, limits=None) -> int:
+    """
+    Decompress CrLZH data into a caller's buffer.
 
-    # Sliding window buffer, initialized to spaces (like CP/M)
-    text_buf = bytearray(b' ' * N)
-    r = N - F  # Current position in buffer (N - F = 1988)
+    Args:
+        src: CrLZH file data (including magic header), or an open
+            binary file to read it from
+        dst: Writable buffer (bytearray, mmap, SharedMemory.buf, ...)
+        counters: Optional mapping to fill in (see un80.counters)
+        limits: Optional un80.limits.Limits to enforce while decoding
 
-    # Main decode loop
-    while True:
-        c = tree.decode_char(bits)
+    Returns:
+        Number of bytes written to the start of dst
 
-        if c < 256:
-            # Literal byte
-            result.append(c)
-            text_buf[r] = c
-            r = (r + 1) & N_MASK
+    Raises:
+        CrLZHError: If decompression fails
+        OutputSizeError: If the output does not fit in dst
+        LimitExceeded: If limits are given and one is passed
+    """
+    return copy_into(_uncrlzh(src, counters, limits), dst)
 
-        elif c == 256:
-            # Stop code
-            break
 
-        else:
-            # Match reference: c encodes length
-            # Length = c - 256 + THRESHOLD + 1 = c - 254
-            # (symbols 257-314 encode lengths 3-60)
-            match_len = c - 254
+def _uncrlzh(data, counters, limits) -> bytearray:
+    """uncrlzh without the copy to bytes."""
+    data = read_source(data)
+    _, data_offset = parse_header(data)
 
-            # Decode position using LZHUF-style encoding
-            pos = decode_position(bits)
+    # 4 header bytes (version/mode info). UCRLZH20.COM checks the first
+    # against 0x20 and 0x21 to select the position encoding
+    if data_offset + 4 > len(data):
+        raise CrLZHError("Data too short")
+    version = data[data_offset]
+    if version >= 0x21:
+        raise CrLZHError(f"Unsupported version: {version:02X}")
+    params = V2_PARAMS if version >= 0x20 else V1_PARAMS
 
-            # Calculate source position in ring buffer
-            i = (r - pos - 1) & N_MASK
+    if limits is not None:
+        limits.begin(len(data))
+    result = lzhuf.decode(data, data_offset + 4, params, limits=limits, counters=counters)
+    if limits is not None:
+        limits.end(len(result))
 
-            # Copy from buffer
-            for _ in range(match_len):
-                c = text_buf[i]
-                result.append(c)
-                text_buf[r] = c
-                r = (r + 1) & N_MASK
-                i = (i + 1) & N_MASK
+    if counters is not None:
+        counters['input_bytes'] += len(data)
+        counters['output_bytes'] += len(result)
 
-    return bytes(result)
+    return result
 
 
 def get_crlzh_filename(data: bytes) -> str | None:
@@ -504,12 +217,14 @@ def get_crlzh_filename(data: bytes) -> str | None:
         return None
 
 
-def get_crlzh_info(data: bytes) -> dict | None:
+def get_crlzh_info(data: bytes, counters=None) -> dict | None:
     """
     Get detailed info about a CrLZH file.
 
     Args:
         data: CrLZH file data
+        counters: If given, the file is also decoded to fill these in,
+            and they are returned under 'counters'
 
     Returns:
         Dictionary with version info, or None if not valid
@@ -522,12 +237,11 @@ def get_crlzh_info(data: bytes) -> dict | None:
             return None
 
         version1 = data[data_offset]
-        version2 = data[data_offset + 1]
 
         is_v2 = version1 >= 0x20
         version_str = "2.0" if is_v2 else f"1.x (0x{version1:02X})"
 
-        return {
+        info = {
             'filename': filename,
             'version': version1,
             'version_str': version_str,
@@ -536,3 +250,12 @@ def get_crlzh_info(data: bytes) -> dict | None:
         }
     except CrLZHError:
         return None
+
+    if counters is not None:
+        try:
+            uncrlzh(data, counters=counters)
+        except CrLZHError:
+            pass
+        info['counters'] = counters
+
+    return info
@@ -22,8 +22,15 @@ Special codes:
 - 0x104+ (260+): Dictionary entries
 """
 
+from __future__ import annotations
+
 import struct
+import sys
 from dataclasses import dataclass
+from typing import BinaryIO
+
+from .cpm import copy_into, decode_rle90
+from .stream import read_source
 
 CRUNCH_MAGIC = 0x76FE
 RLE_MARKER = 0x90
@@ -88,40 +95,15 @@ class BitReader:
         return code
 
 
-def decode_rle(data: bytes) -> bytes:
+def decode_rle(data: bytes, limits=None, expected_size: int | None = None) -> bytearray:
     """
     Decode RLE90-encoded data.
 
     RLE90 uses 0x90 as an escape byte:
     - 0x90 0x00 = literal 0x90
-    - 0x90 N = repeat previous byte N times (N > 0)
+    - 0x90 N = previous byte occurs N times in all (N > 0)
     """
-    result = bytearray()
-    prev_byte = 0
-    i = 0
-
-    while i < len(data):
-        byte = data[i]
-        i += 1
-
-        if byte == RLE_MARKER:
-            if i >= len(data):
-                result.append(RLE_MARKER)
-                break
-
-            count = data[i]
-            i += 1
-
-            if count == 0:
-                result.append(RLE_MARKER)
-                prev_byte = RLE_MARKER
-            else:
-                result.extend([prev_byte] * count)
-        else:
-            result.append(byte)
-            prev_byte = byte
-
-    return bytes(result)
+    return decode_rle90(data, expected_size, limits)
 
 
 def parse_header(data: bytes) -> CrunchHeader:
@@ -177,7 +159,14 @@ def parse_header(data: bytes) -> CrunchHeader:
     )
 
 
-def uncrunch_lzw(data: bytes, start_pos: int, initial_bits: int, is_v2: bool) -> bytes:
+def uncrunch_lzw(
+    data: bytes,
+    start_pos: int,
+    initial_bits: int,
+    is_v2: bool,
+    counters=None,
+    limits=None,
+) -> bytearray:
     """
     Decompress LZW-encoded data.
 
@@ -186,6 +175,8 @@ def uncrunch_lzw(data: bytes, start_pos: int, initial_bits: int, is_v2: bool) ->
         start_pos: Offset where compressed data starts
         initial_bits: Initial code width (9 for V2, 12 for V1)
         is_v2: Whether this is V2 format (variable bit width)
+        counters: Optional mapping to add lzw_resets/lzw_table_full to
+        limits: Optional un80.limits.Limits, checked as output grows
     """
     bits = BitReader(data, start_pos)
 
@@ -193,6 +184,7 @@ def uncrunch_lzw(data: bytes, start_pos: int, initial_bits: int, is_v2: bool) ->
     dictionary: dict[int, bytes] = {i: bytes([i]) for i in range(256)}
 
     result = bytearray()
+    check = sys.maxsize if limits is None else limits.check(0)
     code_size = initial_bits
     next_code = FIRST_CODE  # 260
     prev_string = b''
@@ -215,6 +207,9 @@ def uncrunch_lzw(data: bytes, start_pos: int, initial_bits: int, is_v2: bool) ->
             break
 
         if code == RESET_CODE:
+            if counters is not None:
+                counters['lzw_resets'] += 1
+                counters['lzw_table_full'] += next_code >= TABLE_SIZE
             # Reset dictionary
             dictionary = {i: bytes([i]) for i in range(256)}
             code_size = initial_bits
@@ -238,7 +233,9 @@ def uncrunch_lzw(data: bytes, start_pos: int, initial_bits: int, is_v2: bool) ->
             # Unknown code - probably end of valid data
             break
 
-        result.extend(string)
+        result += string
+        if len(result) > check:
+            check = limits.check(len(result))
 
         # Add new dictionary entry (except for first code)
         if not first_code and prev_string:
@@ -249,23 +246,62 @@ def uncrunch_lzw(data: bytes, start_pos: int, initial_bits: int, is_v2: bool) ->
         prev_string = string
         first_code = False
 
-    return bytes(result)
+    if counters is not None:
+        counters['lzw_table_full'] += next_code >= TABLE_SIZE
+
+    return result
 
 
-def uncrunch(data: bytes) -> bytes:
+def uncrunch(data: bytes | BinaryIO, *, counters=None, limits=None) -> bytes:
     """
     Decompress crunched data.
 
     Args:
-        data: Crunched file data (including magic header)
+        data: Crunched file data (including magic header), or an open
+            binary file to read it from
+        counters: Optional mapping to fill in (see un80.counters)
+        limits: Optional un80.limits.Limits to enforce while decoding
 
     Returns:
         Decompressed data
 
     Raises:
         CrunchError: If decompression fails
+        LimitExceeded: If limits are given and one is passed
+    """
+    return bytes(_uncrunch(data, counters, limits))
+
+
+def uncrunch_into(src: bytes | BinaryIO, dst, *, counters=None, limits=None) -> int:
+    """
+    Decompress crunched data into a caller's buffer.
+
+    Args:
+        src: Crunched file data (including magic header), or an open
+            binary file to read it from
+        dst: Writable buffer (bytearray, mmap, SharedMemory.buf, ...)
+        counters: Optional mapping to fill in (see un80.counters)
+        limits: Optional un80.limits.Limits to enforce while decoding
+
+    Returns:
+        Number of bytes written to the start of dst
+
+    Raises:
+        CrunchError: If decompression fails
+        OutputSizeError: If the output does not fit in dst
+        LimitExceeded: If limits are given and one is passed
     """
+    with memoryview(dst) as view:
+        size = view.nbytes
+    return copy_into(_uncrunch(src, counters, limits, size), dst)
+
+
+def _uncrunch(data, counters, limits, expected_size: int | None = None) -> bytearray:
+    """uncrunch without the copy to bytes (expected_size bounds the RLE pass)."""
+    data = read_source(data)
     header = parse_header(data)
+    if limits is not None:
+        limits.begin(len(data))
 
     # Decompress using LZW
     result = uncrunch_lzw(
@@ -273,11 +309,20 @@ def uncrunch(data: bytes) -> bytes:
         header.data_offset,
         header.initial_bits,
         header.is_v2,
+        counters,
+        limits,
     )
 
     # Decode RLE if present
     if RLE_MARKER in result:
-        result = decode_rle(result)
+        result = decode_rle(result, limits, expected_size)
+
+    if limits is not None:
+        limits.end(len(result))
+
+    if counters is not None:
+        counters['input_bytes'] += len(data)
+        counters['output_bytes'] += len(result)
 
     return result
 
@@ -299,12 +344,14 @@ def get_crunched_filename(data: bytes) -> str | None:
         return None
 
 
-def get_crunch_info(data: bytes) -> dict | None:
+def get_crunch_info(data: bytes, counters=None) -> dict | None:
     """
     Get detailed info about a crunched file.
 
     Args:
         data: Crunched file data
+        counters: If given, the file is also decoded to fill these in,
+            and they are returned under 'counters'
 
     Returns:
         Dictionary with version info, or None if not valid
@@ -312,7 +359,7 @@ def get_crunch_info(data: bytes) -> dict | None:
     try:
         header = parse_header(data)
         version = 2 if header.is_v2 else 1
-        return {
+        info = {
             'filename': header.filename,
             'version': version,
             'siglevel': header.siglevel,
@@ -321,3 +368,12 @@ def get_crunch_info(data: bytes) -> dict | None:
         }
     except CrunchError:
         return None
+
+    if counters is not None:
+        try:
+            uncrunch(data, counters=counters)
+        except CrunchError:
+            pass
+        info['counters'] = counters
+
+    return info
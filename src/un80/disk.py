@@ -0,0 +1,637 @@
+"""
+CP/M disk image support.
+
+Reads files straight out of raw sector dumps (.DSK, .IMG), ImageDisk
+(.IMD) and Teledisk (.TD0) images, without mounting them in an emulator.
+
+A CP/M disk is described by its disk parameter block: the reserved
+(system) tracks, the allocation block size, the number of directory
+entries and blocks, and the sector skew the BIOS applies. DISK_FORMATS
+holds these for common machines; the format is otherwise detected from
+the image size (or IMD/TD0 geometry) and the plausibility of the
+directory.
+
+Directory entry format (32 bytes):
+  Offset  Size  Description
+  0       1     User number (0-15), 0xE5 = deleted
+  1       8     Filename (space-padded, high bits are attributes)
+  9       3     Extension (high bits: read-only, system, archived)
+  12      1     EX: extent number, low bits
+  13      1     S1 (unused)
+  14      1     S2: extent number, high bits
+  15      1     RC: records used in the last logical extent
+  16      16    Block pointers (8-bit, or 16-bit if over 255 blocks)
+
+Images are memory-mapped. File data is returned as memoryview slices of
+the map, one per run of consecutive records, so stored files are
+written out without being copied first. Teledisk images are decoded
+into memory first (see un80.td0), as are images passed as an open file
+(from stdin or a bundle), which are read whole.
+
+Usage:
+    for member in iter_disk('KAYPRO.DSK'):
+        ...
+    with DiskImage('KAYPRO.DSK') as image:
+        members = iter_lbr(image.open('GAMES.LBR'))
+"""
+
+from __future__ import annotations
+
+import mmap
+import struct
+from collections import namedtuple
+from collections.abc import Iterator
+from datetime import datetime
+from io import BytesIO
+from pathlib import Path
+from typing import BinaryIO
+
+from . import formats
+from .cpm import detect_compression, is_text_file
+from .stream import Member, text_chunks
+from .td0 import HEADER_SIZE as TD0_HEADER_SIZE, Td0Error, is_td0, read_td0
+
+RECORD_SIZE = 128
+ENTRY_SIZE = 32
+ENTRY_DELETED = 0xE5
+MAX_USER = 15
+
+IMD_MAGIC = b'IMD '
+
+# user, name, ext, EX, S1, S2, RC, block pointers
+ENTRY_FORMAT = struct.Struct('<B8s3sBBBB16s')
+
+# Attribute bits, from the high bits of the extension
+ATTR_READ_ONLY = 1
+ATTR_SYSTEM = 2
+ATTR_ARCHIVED = 4
+
+
+class DiskError(Exception):
+    """Error reading a disk image."""
+
+
+class DiskFormat(namedtuple('DiskFormat', [
+    'description',
+    'tracks',  # Tracks in the image (cylinders x sides)
+    'sectors',  # Physical sectors per track
+    'sector_size',  # Bytes per physical sector
+    'block_size',  # Allocation block size (1024-16384)
+    'dir_entries',  # Directory entries (DRM + 1)
+    'reserved_tracks',  # System tracks before the directory (OFF)
+    'skew',  # Sector skew applied by the BIOS (1 = none)
+    'blocks',  # Allocation blocks (DSM + 1)
+])):
+    """Geometry and disk parameter block of a CP/M disk format."""
+    __slots__ = ()
+
+    @property
+    def image_size(self) -> int:
+        """Size of a raw image of the whole disk."""
+        return self.tracks * self.sectors * self.sector_size
+
+    @property
+    def records_per_track(self) -> int:
+        return self.sectors * self.sector_size // RECORD_SIZE
+
+    @property
+    def block_records(self) -> int:
+        return self.block_size // RECORD_SIZE
+
+    @property
+    def wide_pointers(self) -> bool:
+        """Whether block pointers are 16-bit (more than 256 blocks)."""
+        return self.blocks > 256
+
+    @property
+    def extent_mask(self) -> int:
+        """EXM: logical 16K extents per directory entry, minus one."""
+        pointers = 8 if self.wide_pointers else 16
+        return pointers * self.block_size // 16384 - 1
+
+    @property
+    def dir_blocks(self) -> int:
+        """Blocks reserved for the directory, from block 0."""
+        return -(-self.dir_entries * ENTRY_SIZE // self.block_size)
+
+    def translate(self) -> list[int]:
+        """Physical sector index for each logical sector of a track."""
+        table = []
+        used = [False] * self.sectors
+        sector = 0
+        for _ in range(self.sectors):
+            while used[sector]:
+                sector = (sector + 1) % self.sectors
+            table.append(sector)
+            used[sector] = True
+            sector = (sector + self.skew) % self.sectors
+        return table
+
+
+# Common formats. Raw images are expected in physical sector order, one
+# track after another (both sides of a cylinder in turn).
+DISK_FORMATS = {
+    'ibm-8ss': DiskFormat('8" SSSD (IBM 3740, CP/M standard)', 77, 26, 128, 1024, 64, 2, 6, 243),
+    'kaypro2': DiskFormat('Kaypro II 5.25" SSDD', 40, 10, 512, 1024, 64, 1, 1, 195),
+    'kaypro4': DiskFormat('Kaypro 4 5.25" DSDD', 80, 10, 512, 2048, 64, 1, 1, 197),
+    'osborne1': DiskFormat('Osborne 1 5.25" SSDD', 40, 5, 1024, 1024, 64, 3, 1, 185),
+    'xerox820': DiskFormat('Xerox 820 5.25" SSSD', 40, 18, 128, 1024, 32, 3, 5, 83),
+}
+
+
+class DiskFile(namedtuple('DiskFile', [
+    'user',  # User area (0-15)
+    'name',  # Filename (space-padded, attributes masked)
+    'ext',  # Extension (space-padded, attributes masked)
+    'attributes',  # ATTR_* bits
+    'records',  # Length in 128-byte records
+    'blocks',  # Allocation blocks in file order (0 for a hole)
+])):
+    """A file in a CP/M disk directory."""
+    __slots__ = ()
+
+    @property
+    def filename(self) -> str:
+        """Full filename with extension."""
+        if self.ext.strip():
+            return f"{self.name.strip()}.{self.ext.strip()}"
+        return self.name.strip()
+
+    @property
+    def data_size(self) -> int:
+        """Size in bytes (CP/M records whole 128-byte records)."""
+        return self.records * RECORD_SIZE
+
+    @property
+    def read_only(self) -> bool:
+        return bool(self.attributes & ATTR_READ_ONLY)
+
+    @property
+    def system(self) -> bool:
+        return bool(self.attributes & ATTR_SYSTEM)
+
+    @property
+    def modified(self) -> datetime | None:
+        """CP/M 2.2 directories carry no dates."""
+        return None
+
+
+class DiskImage:
+    """
+    An open CP/M disk image.
+
+    Args:
+        path: Raw (.DSK, .IMG), ImageDisk (.IMD) or Teledisk (.TD0) image,
+            or an open binary file holding one
+        disk_format: Key of DISK_FORMATS or a DiskFormat; detected if None
+        limits: Optional un80.limits.Limits for decompressing a Teledisk image
+
+    Raises:
+        DiskError: If the image cannot be read or its format is unknown
+        LimitExceeded: If limits are given and a Teledisk image passes one
+    """
+
+    def __init__(
+        self,
+        path: str | Path | BinaryIO,
+        disk_format: str | DiskFormat | None = None,
+        *,
+        limits=None,
+    ):
+        if hasattr(path, 'read'):
+            # Pipes and archive members cannot be mapped
+            self._map = path.read()
+            if not self._map:
+                raise DiskError(f"Empty disk image: {getattr(path, 'name', path)}")
+        else:
+            with open(path, 'rb') as f:
+                try:
+                    self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                except ValueError:
+                    raise DiskError(f"Empty disk image: {path}") from None
+        self._view = memoryview(self._map)
+        self._tracks = None
+        try:
+            if self._map[:4] == IMD_MAGIC:
+                self._tracks = _read_imd(self._map, self._view)
+            elif is_td0(self._map[:TD0_HEADER_SIZE]):
+                self._tracks = _read_td0(self._map, limits)
+            self.format = self._choose_format(disk_format)
+        except BaseException:
+            self.close()
+            raise
+        self._translate = self.format.translate()
+
+    def __enter__(self) -> DiskImage:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Release the image (once no data returned from it is in use)."""
+        self._view.release()
+        if not isinstance(self._map, mmap.mmap):
+            return
+        try:
+            self._map.close()
+        except BufferError:
+            pass  # Chunks are still referenced; unmapped when they go
+
+    def list(self) -> list[DiskFile]:
+        """Files in the directory, in directory order."""
+        fmt = self.format
+        files: dict[tuple, list] = {}
+        for entry in self._entries():
+            user, name, ext, ex, _, s2, rc, pointers = entry
+            if not _valid_entry(entry, fmt):
+                continue
+            key = (user, bytes(b & 0x7F for b in name), bytes(b & 0x7F for b in ext))
+            files.setdefault(key, []).append((s2 << 5 | ex, rc, ext, pointers))
+
+        result = []
+        for (user, name, ext), extents in files.items():
+            extents.sort(key=lambda extent: extent[0])
+            slots: dict[int, int] = {}
+            for extent, _, _, pointers in extents:
+                first = (extent & ~fmt.extent_mask) * 128 // fmt.block_records
+                for i, block in enumerate(_pointers(pointers, fmt)):
+                    if block:
+                        slots[first + i] = block
+            extent, rc, raw_ext, _ = extents[-1]
+            records = extent * 128 + rc
+            attributes = sum(1 << i for i in range(3) if raw_ext[i] & 0x80)
+            blocks = tuple(slots.get(i, 0) for i in range(-(-records // fmt.block_records)))
+            result.append(DiskFile(user, name.decode('ascii'), ext.decode('ascii'),
+                                   attributes, records, blocks))
+        return result
+
+    def find(self, filename: str, user: int | None = None) -> DiskFile:
+        """
+        Look up a file by name (case-insensitive).
+
+        Raises:
+            KeyError: If there is no such file
+        """
+        for file in self.list():
+            if file.filename.upper() == filename.upper() and user in (None, file.user):
+                return file
+        raise KeyError(filename)
+
+    def chunks(self, file: DiskFile) -> Iterator[memoryview]:
+        """
+        Yield a file's data as memoryview slices of the image.
+
+        Each slice covers a run of records that are consecutive in the
+        image; with no skew that is usually a whole block or more.
+        """
+        records = file.records
+        per_block = self.format.block_records
+        run_buf = None
+        run_start = run_end = 0
+        for i, block in enumerate(file.blocks):
+            count = min(per_block, records - i * per_block)
+            for record in range(block * per_block, block * per_block + count):
+                buf, offset = self._locate(record) if block else (_ZERO_RECORD, 0)
+                if buf is run_buf and offset == run_end:
+                    run_end += RECORD_SIZE
+                    continue
+                if run_buf is not None:
+                    yield run_buf[run_start:run_end]
+                run_buf, run_start, run_end = buf, offset, offset + RECORD_SIZE
+        if run_buf is not None:
+            yield run_buf[run_start:run_end]
+
+    def read(self, file: DiskFile) -> bytes:
+        """A file's data."""
+        return b''.join(self.chunks(file))
+
+    def open(self, file: DiskFile | str) -> BytesIO:
+        """
+        A file's data as a binary file object, for iter_lbr, iter_arc
+        and the other readers that accept one.
+        """
+        if isinstance(file, str):
+            file = self.find(file)
+        return BytesIO(self.read(file))
+
+    def _locate(self, record: int, fmt: DiskFormat | None = None,
+                translate: list[int] | None = None) -> tuple[memoryview, int]:
+        """(buffer, offset) of a record counted from the directory."""
+        if fmt is None:
+            fmt, translate = self.format, self._translate
+        track, index = divmod(record, fmt.records_per_track)
+        track += fmt.reserved_tracks
+        sector, part = divmod(index * RECORD_SIZE, fmt.sector_size)
+        sector = translate[sector]
+
+        if self._tracks is not None:
+            sectors = self._tracks[track][1] if track < len(self._tracks) else ()
+            if sector >= len(sectors) or sectors[sector] is None:
+                return _ZERO_RECORD, 0  # Missing or unreadable sector
+            buf, offset = sectors[sector]
+            return buf, offset + part
+
+        offset = (track * fmt.sectors + sector) * fmt.sector_size + part
+        if offset + RECORD_SIZE > len(self._view):
+            return _ZERO_RECORD, 0  # Truncated image
+        return self._view, offset
+
+    def _entries(self, fmt: DiskFormat | None = None) -> Iterator[tuple]:
+        """Raw directory entries (see ENTRY_FORMAT), for fmt or self.format."""
+        fmt = fmt or self.format
+        translate = fmt.translate()
+        data = bytearray()
+        for record in range(fmt.dir_entries * ENTRY_SIZE // RECORD_SIZE):
+            buf, offset = self._locate(record, fmt, translate)
+            data += buf[offset:offset + RECORD_SIZE]
+        return ENTRY_FORMAT.iter_unpack(data)
+
+    def _choose_format(self, disk_format: str | DiskFormat | None) -> DiskFormat:
+        if isinstance(disk_format, DiskFormat):
+            return disk_format
+        if disk_format is not None:
+            try:
+                return DISK_FORMATS[disk_format]
+            except KeyError:
+                raise DiskError(f"Unknown disk format: {disk_format} "
+                                f"(known: {', '.join(DISK_FORMATS)})") from None
+
+        if self._tracks is not None:
+            geometry = {(len(sectors), size) for size, sectors in self._tracks if sectors}
+            candidates = [fmt for fmt in DISK_FORMATS.values()
+                          if (fmt.sectors, fmt.sector_size) in geometry
+                          and fmt.tracks == len(self._tracks)]
+        else:
+            candidates = [fmt for fmt in DISK_FORMATS.values()
+                          if fmt.image_size == len(self._view)]
+
+        # Formats with the same geometry are told apart by which one
+        # reads a plausible directory
+        best, best_score = None, 0
+        for fmt in candidates:
+            score = 0
+            for entry in self._entries(fmt):
+                if _valid_entry(entry, fmt):
+                    score += 1
+                elif entry[0] != ENTRY_DELETED:
+                    score -= 4
+            if best is None or score > best_score:
+                best, best_score = fmt, score
+        if best is None:
+            raise DiskError("Cannot determine the disk format; "
+                            f"specify one of: {', '.join(DISK_FORMATS)}")
+        return best
+
+
+# Stands in for records of missing sectors and holes in sparse files
+_ZERO_RECORD = memoryview(bytes(RECORD_SIZE))
+
+
+def _pointers(pointers: bytes, fmt: DiskFormat):
+    """Block numbers in a directory entry's allocation map."""
+    if fmt.wide_pointers:
+        return [lo | hi << 8 for lo, hi in zip(pointers[0::2], pointers[1::2])]
+    return pointers
+
+
+def _valid_entry(entry: tuple, fmt: DiskFormat) -> bool:
+    """Whether a raw directory entry describes part of a file."""
+    user, name, ext, ex, _, _, rc, pointers = entry
+    if user > MAX_USER or ex > 31 or rc > 128:
+        return False
+    if not 0x20 < name[0] & 0x7F < 0x7F:
+        return False
+    if any(not 0x20 <= b & 0x7F < 0x7F for b in name + ext):
+        return False
+    return all(fmt.dir_blocks <= block < fmt.blocks for block in _pointers(pointers, fmt) if block)
+
+
+def _read_imd(data: mmap.mmap | bytes, view: memoryview) -> list[tuple[int, list]]:
+    """
+    Parse an ImageDisk file into tracks.
+
+    Returns:
+        (sector_size, sectors) per track, ordered by cylinder and head.
+        sectors are (view, offset) for each sector, ordered by sector ID,
+        or None where the image records no data. Sectors stored as a
+        single repeated byte are expanded into their own buffer.
+    """
+    pos = data.find(b'\x1a')  # End of the comment
+    if pos < 0:
+        raise DiskError("Truncated ImageDisk header")
+    pos += 1
+    size = len(data)
+
+    tracks = []
+    while pos < size:
+        if pos + 5 > size:
+            raise DiskError("Truncated ImageDisk track header")
+        _, cylinder, head, count, size_code = data[pos:pos + 5]
+        pos += 5
+        if size_code > 6:
+            raise DiskError("ImageDisk variable sector sizes are not supported")
+        sector_size = 128 << size_code
+        ids = data[pos:pos + count]
+        pos += count
+        if head & 0x80:
+            pos += count  # Cylinder map
+        if head & 0x40:
+            pos += count  # Head map
+
+        sectors = []
+        for _ in range(count):
+            if pos >= size:
+                raise DiskError("Truncated ImageDisk sector data")
+            kind = data[pos]
+            pos += 1
+            if kind == 0:
+                sectors.append(None)  # Data unavailable
+            elif kind & 1:
+                sectors.append((view, pos))
+                pos += sector_size
+            else:
+                sectors.append((memoryview(data[pos:pos + 1] * sector_size), 0))
+                pos += 1
+        if pos > size:
+            raise DiskError("Truncated ImageDisk sector data")
+
+        order = sorted(range(count), key=ids.__getitem__)
+        tracks.append((cylinder, head & 0x3F, sector_size, [sectors[i] for i in order]))
+
+    tracks.sort(key=lambda track: track[:2])
+    return [(sector_size, sectors) for _, _, sector_size, sectors in tracks]
+
+
+def _read_td0(data: mmap.mmap | bytes, limits) -> list[tuple[int, list]]:
+    """
+    Decode a Teledisk image into tracks, in the form _read_imd returns.
+
+    Sectors are ordered by ID and refer to their own decoded buffers.
+    """
+    try:
+        image = read_td0(data, limits=limits)
+    except Td0Error as e:
+        raise DiskError(str(e)) from None
+
+    tracks = []
+    for track in sorted(image.tracks, key=lambda track: (track.cylinder, track.head)):
+        sectors = sorted(track.sectors, key=lambda sector: sector.sector_id)
+        sector_size = max((sector.size for sector in sectors), default=0)
+        tracks.append((sector_size, [
+            None if sector.data is None else (memoryview(sector.data), 0)
+            for sector in sectors
+        ]))
+    return tracks
+
+
+def _decoded_chunks(decoder, data: bytes, limits) -> Iterator[bytes]:
+    """Decode a compressed file when its chunks are first requested."""
+    yield decoder(data, None, limits)
+
+
+def unpack_member(
+    image: DiskImage,
+    file: DiskFile,
+    *,
+    decompress: bool = True,
+    convert_text: bool = False,
+    limits=None,
+) -> Member:
+    """
+    Prepare one file for streaming extraction.
+
+    Stored files are yielded as slices of the image. Squeezed, crunched
+    and CrLZH files are decoded when the chunk iterator is first
+    advanced, and named after the original filename in their header.
+
+    Args:
+        image: Open disk image
+        file: Directory entry of the file
+        decompress: Whether to decompress squeezed/crunched files
+        convert_text: Whether to convert text files (strip ^Z, CR/LF to LF)
+        limits: Optional un80.limits.Limits applied to the decoder
+
+    Returns:
+        Member whose chunks yield the (decoded) data
+    """
+    filename = file.filename
+    codec = 'stored'
+
+    if decompress and file.records:
+        head = next(image.chunks(file))[:2]
+        codec = detect_compression(bytes(head)) or 'stored'
+        if codec not in formats.COMPRESSED_FORMATS:
+            codec = 'stored'
+
+    if codec == 'stored':
+        chunks = image.chunks(file)
+    else:
+        data = image.read(file)
+        decoder = formats.decoder(codec, buffer=True)
+        get_name = formats.filename_getter(codec)
+        orig_name = get_name(data)
+        if orig_name:
+            filename = orig_name
+        chunks = _decoded_chunks(decoder, data, limits)
+
+    # Optionally convert text files
+    if convert_text and is_text_file(filename):
+        chunks = text_chunks(chunks)
+
+    return Member(entry=file, filename=filename, codec=codec, chunks=chunks)
+
+
+def list_disk(
+    path: str | Path | BinaryIO,
+    *,
+    disk_format: str | DiskFormat | None = None,
+) -> list[DiskFile]:
+    """
+    List the files on a CP/M disk image.
+
+    Args:
+        path: Path to the image, or an open binary file
+        disk_format: Key of DISK_FORMATS or a DiskFormat; detected if None
+
+    Returns:
+        List of files in directory order
+    """
+    with DiskImage(path, disk_format) as image:
+        return image.list()
+
+
+def iter_disk(
+    path: str | Path | BinaryIO,
+    *,
+    disk_format: str | DiskFormat | None = None,
+    decompress: bool = True,
+    convert_text: bool = False,
+    limits=None,
+) -> Iterator[Member]:
+    """
+    Iterate over the files on a CP/M disk image.
+
+    Each member's chunks must be consumed (or abandoned) before advancing
+    to the next member; only one member is decoded at a time.
+
+    Args:
+        path: Path to the image, or an open binary file
+        disk_format: Key of DISK_FORMATS or a DiskFormat; detected if None
+        decompress: Whether to decompress squeezed/crunched files
+        convert_text: Whether to convert text files (strip ^Z, CR/LF to LF)
+        limits: Optional un80.limits.Limits, shared by all files
+
+    Yields:
+        Member objects in directory order
+
+    Raises:
+        DiskError: If the image cannot be read
+        LimitExceeded: From a member's chunks, if limits are given
+    """
+    with DiskImage(path, disk_format, limits=limits) as image:
+        for file in image.list():
+            yield unpack_member(image, file, decompress=decompress,
+                                convert_text=convert_text, limits=limits)
+
+
+def extract_disk(
+    path: str | Path | BinaryIO,
+    output_dir: str | Path | None = None,
+    *,
+    disk_format: str | DiskFormat | None = None,
+    decompress: bool = True,
+    convert_text: bool = False,
+    limits=None,
+) -> list[tuple[str, bytes]]:
+    """
+    Extract all files from a CP/M disk image.
+
+    Args:
+        path: Path to the image, or an open binary file
+        output_dir: Directory to extract to. If None, returns data in memory.
+        disk_format: Key of DISK_FORMATS or a DiskFormat; detected if None
+        decompress: Whether to decompress squeezed/crunched files
+        convert_text: Whether to convert text files (strip ^Z, CR/LF to LF)
+        limits: Optional un80.limits.Limits, shared by all files
+
+    Returns:
+        List of (filename, data) tuples for extracted files
+    """
+    if output_dir:
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+    results = []
+
+    for member in iter_disk(path, disk_format=disk_format, decompress=decompress,
+                            convert_text=convert_text, limits=limits):
+        data = member.read()
+
+        if output_dir:
+            out_path = output_dir / member.filename
+            out_path.write_bytes(data)
+
+        results.append((member.filename, data))
+
+    return results
@@ -0,0 +1,196 @@
+"""
+Format registry and detection.
+
+Maps each format name to the module that implements it. Modules are
+imported on first use, so a command only pays the import cost of the
+codec it actually runs.
+
+Formats:
+- lbr, arc, disk: archives (list_*/iter_*/extract_* in the module)
+- squeeze, crunch, crlzh: single compressed files
+- bas: tokenized MBASIC
+"""
+
+from importlib import import_module
+from pathlib import Path
+from typing import BinaryIO
+
+from .cpm import detect_compression
+
+# Format name -> implementing module (relative to this package)
+FORMAT_MODULES = {
+    'lbr': 'lbr',
+    'arc': 'arc',
+    'disk': 'disk',
+    'squeeze': 'squeeze',
+    'crunch': 'crunch',
+    'crlzh': 'crlzh',
+    'bas': 'bas',
+}
+
+ARCHIVE_FORMATS = ('lbr', 'arc', 'disk')
+COMPRESSED_FORMATS = ('squeeze', 'crunch', 'crlzh')
+
+# Single-file codec -> (decoder, original filename getter, decoder into a
+# caller's buffer, decoder returning a bytearray) in its module
+CODEC_FUNCTIONS = {
+    'squeeze': ('unsqueeze', 'get_squeezed_filename', 'unsqueeze_into', '_unsqueeze'),
+    'crunch': ('uncrunch', 'get_crunched_filename', 'uncrunch_into', '_uncrunch'),
+    'crlzh': ('uncrlzh', 'get_crlzh_filename', 'uncrlzh_into', '_uncrlzh'),
+}
+
+# Archive extensions
+ARCHIVE_EXTENSIONS = {
+    '.lbr': 'lbr',
+    '.lqr': 'lbr',
+    '.lzr': 'lbr',
+    '.arc': 'arc',
+    '.ark': 'arc',
+    '.dsk': 'disk',
+    '.imd': 'disk',
+    '.td0': 'disk',
+}
+
+# Middle letter of a CP/M compressed extension (.TQT, .TZT, .TYT)
+MIDDLE_LETTERS = {
+    'q': 'squeeze',
+    'z': 'crunch',
+    'y': 'crlzh',
+}
+
+
+def load(format_type: str):
+    """Import and return the module implementing a format."""
+    try:
+        module = FORMAT_MODULES[format_type]
+    except KeyError:
+        raise ValueError(f"Unknown format: {format_type}") from None
+    return import_module(f'.{module}', __package__)
+
+
+def decoder(codec: str, *, buffer: bool = False):
+    """
+    Return the decompression function for a single-file codec.
+
+    With buffer, the function returned takes (data, counters, limits)
+    positionally and returns a bytearray, skipping the decoder's final
+    copy to bytes; for output that is only written out.
+    """
+    if buffer:
+        return getattr(load(codec), CODEC_FUNCTIONS[codec][3])
+    return getattr(load(codec), CODEC_FUNCTIONS[codec][0])
+
+
+def decode_into(codec: str, src, dst, *, counters=None, limits=None) -> int:
+    """
+    Decompress a single compressed file into a caller's buffer.
+
+    Args:
+        codec: 'squeeze', 'crunch' or 'crlzh'
+        src: Compressed file data, or an open binary file to read it from
+        dst: Writable buffer (bytearray, mmap, SharedMemory.buf, ...)
+        counters: Optional mapping to fill in (see un80.counters)
+        limits: Optional un80.limits.Limits to enforce while decoding
+
+    Returns:
+        Number of bytes written to the start of dst
+
+    Raises:
+        OutputSizeError: If the output does not fit in dst
+        LimitExceeded: If limits are given and one is passed
+        The codec's error (e.g. SqueezeError) if decompression fails
+    """
+    decode = getattr(load(codec), CODEC_FUNCTIONS[codec][2])
+    return decode(src, dst, counters=counters, limits=limits)
+
+
+def filename_getter(codec: str):
+    """Return the embedded-filename function for a single-file codec."""
+    return getattr(load(codec), CODEC_FUNCTIONS[codec][1])
+
+
+def get_output_filename(path: Path | BinaryIO, compression: str, data: bytes) -> str:
+    """
+    Name a single compressed file decodes to.
+
+    The name embedded in data is used if there is one; otherwise it is
+    rebuilt from path's extension (.TQT -> .TXT, .QQQ -> no extension).
+
+    Args:
+        path: The compressed file, or an open file with a name
+        compression: Codec name (squeeze, crunch or crlzh)
+        data: Contents of the compressed file
+    """
+    if hasattr(path, 'read'):
+        path = Path(path.name)
+
+    # Try to get embedded filename
+    if compression in CODEC_FUNCTIONS:
+        name = filename_getter(compression)(data)
+        if name:
+            return name
+
+    # Reconstruct from extension
+    stem = path.stem
+    ext = path.suffix.lower()
+
+    if len(ext) == 4 and ext[2] in 'qzy':
+        # .tqt -> .txt, etc.
+        new_ext = ext[1] + ext[1] + ext[3]
+        if ext in ('.qqq', '.zzz', '.yyy'):
+            return stem  # No extension
+        return stem + '.' + new_ext
+
+    return stem + '.out'
+
+
+def classify(header: bytes, name: str) -> str | None:
+    """
+    Detect a format from the start of a file and its name.
+
+    Magic bytes take precedence; the extension is used as a fallback.
+
+    Args:
+        header: First bytes of the file (32 is plenty)
+        name: Filename, used for the extension rules
+
+    Returns:
+        Format name or None if unrecognised
+    """
+    compression = detect_compression(header)
+    if compression:
+        return compression
+
+    # ImageDisk images start with a signature line
+    if header[:4] == b'IMD ':
+        return 'disk'
+    if header[:2] in (b'TD', b'td'):
+        from .td0 import is_td0  # pylint: disable=import-outside-toplevel
+        if is_td0(header):
+            return 'disk'
+
+    dot = name.rfind('.')
+    ext = name[dot:].lower() if dot > 0 else ''
+
+    # Check for tokenized BASIC (0xFF magic byte with .bas extension)
+    if ext == '.bas':
+        from .bas import is_tokenized_basic  # pylint: disable=import-outside-toplevel
+        if is_tokenized_basic(header):
+            return 'bas'
+
+    # Fall back to extension
+    if ext in ARCHIVE_EXTENSIONS:
+        return ARCHIVE_EXTENSIONS[ext]
+
+    # Check for squeezed/crunched by middle letter
+    if len(ext) == 4:
+        return MIDDLE_LETTERS.get(ext[2])
+
+    return None
+
+
+def detect_format(path: Path) -> str | None:
+    """Detect file format from content and extension."""
+    with open(path, 'rb') as f:
+        header = f.read(32)
+    return classify(header, Path(path).name)
@@ -0,0 +1,274 @@
+"""
+Picklable units of extraction work.
+
+Each function takes paths and plain values rather than open files, so
+it can be submitted to any concurrent.futures executor, including a
+ProcessPoolExecutor. Used by the asyncio API, the HTTP server and
+batch extraction.
+
+A decoded member returned from a worker process would be pickled and
+sent back through a pipe: a full copy plus serialisation per member.
+With shared=True, prepare_member instead leaves members of at least
+SHARED_MIN_SIZE bytes in a multiprocessing.shared_memory segment and
+returns a SharedData descriptor (its name and size). The caller reads it
+with shared_chunks, which maps the segment and removes its name at once,
+so the memory is freed as soon as the chunks are done with, and only the
+descriptor crosses the pipe.
+"""
+
+import copy
+import os
+from collections import namedtuple
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+from . import formats
+from .cpm import copy_into, crlf_to_lf, is_text_file, strip_cpm_eof
+from .stream import CHUNK_SIZE
+
+# Format modules (and shared memory) are imported by the work functions
+# that use them, so a worker only loads what it runs
+# pylint: disable=import-outside-toplevel
+
+# Decoded members smaller than this are cheaper to pickle than to share
+SHARED_MIN_SIZE = 64 * 1024
+
+# Segments outlive the worker's handle only where they have names that
+# can be unlinked; elsewhere (Windows) results are always pickled
+_HAVE_SHARED = os.name == 'posix'
+
+
+class SharedData(namedtuple('SharedData', [
+    'name',  # Name of the shared memory segment
+    'size',  # Bytes of decoded data at its start
+])):
+    """Decoded member data left in shared memory by a worker."""
+    __slots__ = ()
+
+
+def detect(path: Path) -> str | None:
+    """Detect the format of a file (see formats.detect_format)."""
+    return formats.detect_format(path)
+
+
+def list_entries(path: Path, format_type: str) -> list:
+    """Read the directory of an LBR or ARC archive."""
+    if format_type == 'lbr':
+        from .lbr import list_lbr
+        return list_lbr(path)
+    if format_type == 'arc':
+        from .arc import list_arc
+        return list_arc(path)
+    raise ValueError(f"Not an archive format: {format_type}")
+
+
+def prepare_member(
+    path: Path,
+    format_type: str,
+    entry: Any,
+    convert_text: bool = False,
+    limits=None,
+    shared: bool = False,
+) -> tuple[str, str, bytes | SharedData | None, int, int]:
+    """
+    Decode one archive member.
+
+    Returns (filename, codec, data, offset, size). Stored members that
+    need no conversion are not read: data is None and offset/size
+    locate the bytes in the archive so they can be read in pieces
+    with read_range. With shared, data of SHARED_MIN_SIZE bytes or more
+    is a SharedData, which the caller must pass to shared_chunks (or
+    discard) to free it.
+
+    Raises:
+        LimitExceeded: If limits (un80.limits.Limits) are given and
+            decoding passes one
+    """
+    with open(path, 'rb') as f:
+        if format_type == 'lbr':
+            from .lbr import unpack_member, SECTOR_SIZE
+            member = unpack_member(f, entry, convert_text=convert_text, limits=limits)
+            offset, size = entry.index * SECTOR_SIZE, entry.data_size
+        else:
+            from .arc import unpack_member
+            member = unpack_member(f, entry, convert_text=convert_text, limits=limits)
+            offset, size = entry.data_offset, entry.compressed_size
+
+        if member.codec == 'stored' and not (convert_text and is_text_file(member.filename)):
+            return member.filename, member.codec, None, offset, size
+        if not (shared and _HAVE_SHARED):
+            return member.filename, member.codec, member.read(), 0, 0
+
+        # A decoded member is a single bytearray, shared without a join
+        chunks = list(member.chunks)
+        data = chunks[0] if len(chunks) == 1 else b''.join(chunks)
+        data = _share(data) if len(data) >= SHARED_MIN_SIZE else bytes(data)
+        return member.filename, member.codec, data, 0, 0
+
+
+def _share(data: bytes) -> SharedData:
+    """Copy data into a new shared memory segment, left for the caller to unlink."""
+    from multiprocessing import shared_memory
+
+    try:
+        shm = shared_memory.SharedMemory(  # pylint: disable=unexpected-keyword-arg
+            create=True, size=len(data), track=False)
+    except TypeError:
+        # Before Python 3.13 every segment is tracked, and the tracker
+        # would unlink it when this worker exits
+        from multiprocessing import resource_tracker
+        shm = shared_memory.SharedMemory(create=True, size=len(data))
+        resource_tracker.unregister(shm._name, 'shared_memory')  # pylint: disable=protected-access
+    try:
+        copy_into(data, shm.buf)
+    except BaseException:
+        shm.close()
+        shm.unlink()
+        raise
+    shm.close()
+    return SharedData(shm.name, len(data))
+
+
+def shared_chunks(
+    data: bytes | SharedData,
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """
+    Chunks of the data prepare_member returned.
+
+    A SharedData segment is mapped and its name removed straight away,
+    so it is freed once the iterator is finished or dropped, whether or
+    not it is run. Its chunks are memoryviews that are only valid until
+    the next one is requested; write or copy each one before moving on.
+
+    Args:
+        data: Decoded data or a SharedData descriptor
+        chunk_size: Largest chunk to yield from shared memory
+
+    Yields:
+        The data, in one piece unless it is shared
+    """
+    if not isinstance(data, SharedData):
+        return iter((data,))
+    from multiprocessing import shared_memory
+
+    shm = shared_memory.SharedMemory(data.name)
+    shm.unlink()
+    return _view_chunks(shm, data.size, chunk_size)
+
+
+def _view_chunks(shm, size: int, chunk_size: int) -> Iterator[memoryview]:
+    try:
+        with shm.buf[:size] as view:
+            for start in range(0, size, chunk_size):
+                with view[start:start + chunk_size] as chunk:
+                    yield chunk
+    finally:
+        try:
+            shm.close()
+        except BufferError:
+            pass  # A chunk is still referenced; unmapped when it goes
+
+
+def discard(data: bytes | SharedData | None) -> None:
+    """Free data from prepare_member that will not be read."""
+    if isinstance(data, SharedData):
+        shared_chunks(data).close()
+
+
+def prepare_member_limited(
+    path: Path,
+    format_type: str,
+    entry: Any,
+    convert_text: bool,
+    limits,
+    shared: bool = False,
+) -> tuple[tuple, tuple[int, float]]:
+    """
+    prepare_member under resource limits, for use on any executor.
+
+    A worker process only sees a copy of limits, so the usage is
+    returned rather than recorded: the result is (prepared, usage)
+    where usage is the (output bytes, CPU seconds) of this member, to
+    be added to the caller's limits with Limits.charge. limits itself
+    is never modified, so thread pools behave the same way. With no
+    limits the usage is (0, 0.0). shared is as for prepare_member.
+    """
+    return _with_usage(limits, prepare_member, path, format_type, entry, convert_text,
+                       shared=shared)
+
+
+def decode_file(
+    path: Path,
+    format_type: str,
+    convert_text: bool = False,
+    limits=None,
+) -> list[tuple[str, bytes, Any]]:
+    """
+    Decode a whole single compressed file, BASIC file or disk image.
+
+    Returns:
+        List of (filename, data, modified) for each file produced:
+        one for a compressed or BASIC file, named as the command line
+        names it, and one per file on a disk image
+
+    Raises:
+        LimitExceeded: If limits are given and decoding passes one
+    """
+    if format_type == 'disk':
+        from .disk import iter_disk
+        return [(member.filename, member.read(), member.entry.modified)
+                for member in iter_disk(path, convert_text=convert_text, limits=limits)]
+
+    data = Path(path).read_bytes()
+    if format_type == 'bas':
+        from .bas import detokenize_bytes
+        return [(Path(path).name, detokenize_bytes(data), None)]
+    if format_type not in formats.COMPRESSED_FORMATS:
+        raise ValueError(f"Not a file format: {format_type}")
+
+    result = formats.decoder(format_type)(data, limits=limits)
+    if convert_text:
+        result = crlf_to_lf(strip_cpm_eof(result))
+    return [(formats.get_output_filename(Path(path), format_type, data), result, None)]
+
+
+def decode_file_limited(
+    path: Path,
+    format_type: str,
+    convert_text: bool,
+    limits,
+) -> tuple[list, tuple[int, float]]:
+    """decode_file returning (files, usage), as prepare_member_limited does."""
+    return _with_usage(limits, decode_file, path, format_type, convert_text)
+
+
+def _with_usage(limits, fn, *args, **kwargs) -> tuple[Any, tuple[int, float]]:
+    """Call fn(*args, limits=a copy of limits) and return (result, usage)."""
+    if limits is None:
+        return fn(*args, **kwargs), (0, 0.0)
+    limits = copy.copy(limits)
+    before = limits.total_output, limits.total_cpu
+    result = fn(*args, limits=limits, **kwargs)
+    return result, (limits.total_output - before[0], limits.total_cpu - before[1])
+
+
+def read_range(path: Path, offset: int, size: int) -> bytes:
+    """Read size bytes of a file starting at offset."""
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        return f.read(size)
+
+
+def decompress(data: bytes, format_type: str, limits=None) -> bytes:
+    """Decompress a squeezed, crunched or CrLZH file."""
+    if format_type not in formats.COMPRESSED_FORMATS:
+        raise ValueError(f"Not a single-file format: {format_type}")
+    return formats.decoder(format_type)(data, limits=limits)
+
+
+def warm_up() -> None:
+    """Import every codec so the first real job pays no import cost."""
+    for format_type in formats.FORMAT_MODULES:
+        formats.load(format_type)
@@ -0,0 +1,193 @@
+"""
+Append-only journal of finished batch units, for resuming a run.
+
+Each line is a JSON object for one unit of work (see un80.batch) that
+has been written out:
+
+    source  Absolute path of the archive or file
+    hash    BLAKE2b digest of the source's contents (see file_hash)
+    offset  Where the member's data starts in the source, or null for
+            a whole file
+    output  Path written (for a disk image, the directory its files
+            went to), or null if the unit failed
+    status  'done' or 'failed'
+    error   Why it failed (failed units only)
+
+A unit is keyed by (source, hash, offset): a copy of an archive at
+another path is extracted in its own right, and the hash only tells
+whether a source has changed since the journal was written, in which
+case it is extracted again.
+Records are buffered and written JOURNAL_BATCH at a time, or after
+JOURNAL_INTERVAL seconds, so a crash loses at most the last batch;
+those units are simply done again. A line cut short by the crash is
+ignored when the journal is read back.
+
+Usage:
+    with Journal('out/.80un-journal', resume=True) as journal:
+        if (path, digest, offset) not in journal.completed:
+            ...
+            journal.record(path, digest, offset, output)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from collections.abc import Iterator
+
+# Records buffered before they are written out
+JOURNAL_BATCH = 64
+
+# Longest time a record is buffered, in seconds
+JOURNAL_INTERVAL = 1.0
+
+# Default journal file name, in the output directory
+JOURNAL_NAME = '.80un-journal'
+
+# Bytes read at a time when hashing a source
+_HASH_CHUNK = 1024 * 1024
+
+
+def file_hash(path: str | os.PathLike) -> str:
+    """Hex BLAKE2b (128-bit) digest of a file's contents."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(_HASH_CHUNK)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_journal(path: str | os.PathLike) -> Iterator[dict]:
+    """
+    Records of a journal, skipping lines that cannot be parsed.
+
+    A missing journal has no records.
+    """
+    try:
+        f = open(path, encoding='utf-8')
+    except FileNotFoundError:
+        return
+    with f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # Cut short by a crash
+            if isinstance(record, dict):
+                yield record
+
+
+class Journal:
+    """
+    A journal open for appending.
+
+    Args:
+        path: Journal file
+        resume: Keep the records already in it (and load them into
+            completed); otherwise it is started afresh
+        fsync: Flush the journal to disk every time it is written
+        batch: Records to buffer before writing
+        interval: Seconds to buffer a record for at most
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        *,
+        resume: bool = False,
+        fsync: bool = False,
+        batch: int = JOURNAL_BATCH,
+        interval: float = JOURNAL_INTERVAL,
+    ):
+        self.path = os.fspath(path)
+        self.fsync = fsync
+        self.batch = batch
+        self.interval = interval
+        # (source, hash, offset) -> output, for units finished in earlier runs
+        self.completed: dict[tuple[str, str, int | None], str | None] = {}
+        self._pending: list[str] = []
+        self._last_write = time.monotonic()
+
+        if resume:
+            for record in read_journal(self.path):
+                key = (record.get('source'), record.get('hash'), record.get('offset'))
+                if record.get('status') == 'done':
+                    self.completed[key] = record.get('output')
+            _drop_partial_line(self.path)
+        self._file = open(self.path, 'a' if resume else 'w', encoding='utf-8')
+
+    def record(
+        self,
+        source: str,
+        source_hash: str,
+        offset: int | None,
+        output: str | None,
+        status: str = 'done',
+        error: str | None = None,
+    ) -> None:
+        """Add a finished unit; written out with the rest of its batch."""
+        record = {'source': source, 'hash': source_hash, 'offset': offset,
+                  'output': output, 'status': status}
+        if error is not None:
+            record['error'] = error
+        self._pending.append(json.dumps(record) + '\n')
+        if (len(self._pending) >= self.batch
+                or time.monotonic() - self._last_write >= self.interval):
+            self.flush()
+
+    def flush(self) -> None:
+        """Write out the buffered records."""
+        self._last_write = time.monotonic()
+        if not self._pending:
+            return
+        self._file.write(''.join(self._pending))
+        self._pending.clear()
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        """Write out the buffered records and close the file."""
+        if self._file.closed:
+            return
+        try:
+            self.flush()
+        finally:
+            self._file.close()
+
+    def __enter__(self) -> Journal:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _drop_partial_line(path: str) -> None:
+    """Cut off a last line left without its newline, so appends start clean."""
+    try:
+        with open(path, 'rb+') as f:
+            size = f.seek(0, os.SEEK_END)
+            if not size:
+                return
+            f.seek(size - 1)
+            if f.read(1) == b'\n':
+                return
+            # Search back for the last complete line
+            pos = size
+            while pos > 0:
+                start = max(0, pos - 4096)
+                f.seek(start)
+                block = f.read(pos - start)
+                newline = block.rfind(b'\n')
+                if newline >= 0:
+                    f.truncate(start + newline + 1)
+                    return
+                pos = start
+            f.truncate(0)
+    except FileNotFoundError:
+        pass
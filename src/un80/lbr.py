@@ -26,11 +26,19 @@ Directory entry format (32 bytes):
   27      5     Reserved (zeros)
 """
 
+from __future__ import annotations
+
 import struct
+from collections.abc import Iterator
 from dataclasses import dataclass
+from datetime import datetime
 from pathlib import Path
 from typing import BinaryIO
 
+from . import formats
+from .cpm import cpm_datetime, detect_compression, is_text_file
+from .stream import Member, iter_chunks, open_source, text_chunks
+
 SECTOR_SIZE = 128
 ENTRY_SIZE = 32
 
@@ -38,10 +46,21 @@ STATUS_ACTIVE = 0x00
 STATUS_DELETED = 0xFE
 STATUS_UNUSED = 0xFF
 
+# status, name, ext, index, length, crc, creation date, change date,
+# creation time, change time, pad count, 5 unused bytes
+ENTRY_FORMAT = struct.Struct('<B8s3sHHHHHHHB5x')
+
+# Clears bit 7 of every byte (CP/M attribute bits in names)
+_MASK_HIGH = bytes(b & 0x7F for b in range(256))
+
 
 @dataclass
 class LbrEntry:
     """A single entry in an LBR archive."""
+    # No per-instance dict: directories of millions of entries are indexed
+    __slots__ = ('status', 'name', 'ext', 'index', 'length', 'crc', 'creation_date',
+                 'change_date', 'creation_time', 'change_time', 'pad_count')
+
     status: int
     name: str
     ext: str
@@ -74,6 +93,13 @@ class LbrEntry:
         """Check if this is the directory entry itself."""
         return self.name.strip() == '' and self.ext.strip() == '' and self.index == 0
 
+    @property
+    def modified(self) -> datetime | None:
+        """Creation (else last change) date and time, if recorded."""
+        if self.creation_date:
+            return cpm_datetime(self.creation_date, self.creation_time)
+        return cpm_datetime(self.change_date, self.change_time)
+
     @property
     def data_size(self) -> int:
         """Actual data size in bytes (accounting for padding)."""
@@ -86,84 +112,56 @@ def parse_entry(data: bytes) -> LbrEntry:
     """Parse a 32-byte directory entry."""
     if len(data) < ENTRY_SIZE:
         raise ValueError(f"Entry too short: {len(data)} bytes")
+    return _make_entry(ENTRY_FORMAT.unpack_from(data))
 
-    status = data[0]
-
-    # Extract name and extension, masking high bits (CP/M attributes)
-    name = ''.join(chr(b & 0x7F) for b in data[1:9])
-    ext = ''.join(chr(b & 0x7F) for b in data[9:12])
-
-    # Parse numeric fields (little-endian)
-    index, length, crc = struct.unpack('<HHH', data[12:18])
-    creation_date, change_date = struct.unpack('<HH', data[18:22])
-    creation_time, change_time = struct.unpack('<HH', data[22:26])
-    pad_count = data[26]
-
-    return LbrEntry(
-        status=status,
-        name=name,
-        ext=ext,
-        index=index,
-        length=length,
-        crc=crc,
-        creation_date=creation_date,
-        change_date=change_date,
-        creation_time=creation_time,
-        change_time=change_time,
-        pad_count=pad_count,
-    )
+
+def _make_entry(fields: tuple) -> LbrEntry:
+    """LbrEntry from ENTRY_FORMAT fields, masking attribute bits from the name."""
+    status, name, ext, *rest = fields
+    # Names are 7-bit ASCII once the high bits are cleared
+    return LbrEntry(status, name.translate(_MASK_HIGH).decode('ascii'),
+                    ext.translate(_MASK_HIGH).decode('ascii'), *rest)
 
 
 def read_directory(f: BinaryIO) -> list[LbrEntry]:
     """
     Read the LBR directory from an open file.
 
+    The directory is read with two reads (its first sector gives its
+    size) and unpacked in one pass; entries end at the first unused slot.
+
     Args:
         f: Open file handle positioned at start
 
     Returns:
         List of directory entries (excluding the directory entry itself)
     """
-    entries = []
-
     # Read first entry to get directory size
     first_sector = f.read(SECTOR_SIZE)
     if len(first_sector) < ENTRY_SIZE:
         raise ValueError("File too small to be an LBR")
 
-    dir_entry = parse_entry(first_sector[:ENTRY_SIZE])
+    dir_entry = parse_entry(first_sector)
     if dir_entry.status != STATUS_ACTIVE:
         raise ValueError("First entry is not a valid directory entry")
     if dir_entry.length == 0 or dir_entry.length > 32:
         raise ValueError("Invalid directory size")
 
-    dir_sectors = dir_entry.length
-    entries_per_sector = SECTOR_SIZE // ENTRY_SIZE
-
-    # Parse remaining entries in first sector
-    for i in range(1, entries_per_sector):
-        offset = i * ENTRY_SIZE
-        if offset + ENTRY_SIZE <= len(first_sector):
-            entry = parse_entry(first_sector[offset:offset + ENTRY_SIZE])
-            if entry.status == STATUS_UNUSED:
-                break
-            if entry.is_active:
-                entries.append(entry)
-
-    # Read remaining directory sectors
-    for _ in range(1, dir_sectors):
-        sector = f.read(SECTOR_SIZE)
-        if len(sector) < SECTOR_SIZE:
-            break
-
-        for i in range(entries_per_sector):
-            offset = i * ENTRY_SIZE
-            entry = parse_entry(sector[offset:offset + ENTRY_SIZE])
-            if entry.status == STATUS_UNUSED:
-                return entries
-            if entry.is_active:
-                entries.append(entry)
+    # A short last sector is ignored, as is a short first sector's tail
+    directory = first_sector[:len(first_sector) // ENTRY_SIZE * ENTRY_SIZE]
+    if dir_entry.length > 1 and len(first_sector) == SECTOR_SIZE:
+        rest = f.read((dir_entry.length - 1) * SECTOR_SIZE)
+        directory += rest[:len(rest) // SECTOR_SIZE * SECTOR_SIZE]
 
+    entries = []
+    fields = ENTRY_FORMAT.iter_unpack(directory)
+    next(fields)  # The directory entry itself
+    for entry in fields:
+        status = entry[0]
+        if status == STATUS_UNUSED:
+            break
+        if status == STATUS_ACTIVE:
+            entries.append(_make_entry(entry))
     return entries
 
 
@@ -188,87 +186,149 @@ def read_member(f: BinaryIO, entry: LbrEntry) -> bytes:
     return data
 
 
-def list_lbr(path: str | Path) -> list[LbrEntry]:
+def list_lbr(path: str | Path | BinaryIO) -> list[LbrEntry]:
     """
     List contents of an LBR archive.
 
     Args:
-        path: Path to the LBR file
+        path: Path to the LBR file, or an open binary file
 
     Returns:
         List of entries in the archive
     """
-    with open(path, 'rb') as f:
+    with open_source(path) as f:
         return read_directory(f)
 
 
+def _decoded_chunks(decoder, data: bytes, limits) -> Iterator[bytes]:
+    """Decode a compressed member when its chunks are first requested."""
+    yield decoder(data, None, limits)
+
+
+def unpack_member(
+    f: BinaryIO,
+    entry: LbrEntry,
+    *,
+    decompress: bool = True,
+    convert_text: bool = False,
+    limits=None,
+) -> Member:
+    """
+    Prepare one member for streaming extraction.
+
+    Stored members are read from f chunk by chunk. Compressed members are
+    read whole (the original filename lives in their header) and decoded
+    when the chunk iterator is first advanced.
+
+    Args:
+        f: Open file handle
+        entry: The directory entry for the member
+        decompress: Whether to decompress squeezed/crunched members
+        convert_text: Whether to convert text files (strip ^Z, CR/LF to LF)
+        limits: Optional un80.limits.Limits applied to the decoder
+
+    Returns:
+        Member whose chunks yield the (decoded) data
+    """
+    offset = entry.index * SECTOR_SIZE
+    filename = entry.filename
+    codec = 'stored'
+
+    if decompress and entry.data_size:
+        f.seek(offset)
+        codec = detect_compression(f.read(2)) or 'stored'
+        if codec not in formats.COMPRESSED_FORMATS:
+            codec = 'stored'
+
+    if codec == 'stored':
+        chunks = iter_chunks(f, offset, entry.data_size)
+    else:
+        data = read_member(f, entry)
+        decoder = formats.decoder(codec, buffer=True)
+        get_name = formats.filename_getter(codec)
+        orig_name = get_name(data)
+        if orig_name:
+            filename = orig_name
+        chunks = _decoded_chunks(decoder, data, limits)
+
+    # Optionally convert text files
+    if convert_text and is_text_file(filename):
+        chunks = text_chunks(chunks)
+
+    return Member(entry=entry, filename=filename, codec=codec, chunks=chunks)
+
+
+def iter_lbr(
+    path: str | Path | BinaryIO,
+    *,
+    decompress: bool = True,
+    convert_text: bool = False,
+    limits=None,
+) -> Iterator[Member]:
+    """
+    Iterate over the members of an LBR archive without holding them all.
+
+    Each member's chunks must be consumed (or abandoned) before advancing
+    to the next member; only one member is decoded at a time.
+
+    Args:
+        path: Path to the LBR file, or an open binary file
+        decompress: Whether to decompress squeezed/crunched members
+        convert_text: Whether to convert text files (strip ^Z, CR/LF to LF)
+        limits: Optional un80.limits.Limits, shared by all members
+
+    Yields:
+        Member objects in directory order (file order if the file
+        cannot seek, e.g. a PipeReader)
+
+    Raises:
+        LimitExceeded: From a member's chunks, if limits are given
+    """
+    with open_source(path) as f:
+        entries = read_directory(f)
+        if not f.seekable():
+            # A pipe can only be skipped forwards: read members in file order
+            entries.sort(key=lambda entry: entry.index)
+        for entry in entries:
+            yield unpack_member(f, entry, decompress=decompress,
+                                convert_text=convert_text, limits=limits)
+
+
 def extract_lbr(
-    path: str | Path,
+    path: str | Path | BinaryIO,
     output_dir: str | Path | None = None,
     *,
     decompress: bool = True,
     convert_text: bool = False,
+    limits=None,
 ) -> list[tuple[str, bytes]]:
     """
     Extract all files from an LBR archive.
 
     Args:
-        path: Path to the LBR file
+        path: Path to the LBR file, or an open binary file
         output_dir: Directory to extract to. If None, returns data in memory.
         decompress: Whether to decompress squeezed/crunched members
         convert_text: Whether to convert text files (strip ^Z, CR/LF to LF)
+        limits: Optional un80.limits.Limits, shared by all members
 
     Returns:
         List of (filename, data) tuples for extracted files
     """
-    from . import unsqueeze, uncrunch, uncrlzh
-    from .cpm import strip_cpm_eof, crlf_to_lf, is_text_file, detect_compression
-
-    path = Path(path)
     if output_dir:
         output_dir = Path(output_dir)
         output_dir.mkdir(parents=True, exist_ok=True)
 
     results = []
 
-    with open(path, 'rb') as f:
-        entries = read_directory(f)
+    for member in iter_lbr(path, decompress=decompress, convert_text=convert_text,
+                           limits=limits):
+        data = member.read()
 
-        for entry in entries:
-            data = read_member(f, entry)
-            filename = entry.filename
-
-            # Optionally decompress
-            if decompress and data:
-                compression = detect_compression(data)
-                if compression == 'squeeze':
-                    from .squeeze import get_squeezed_filename
-                    orig_name = get_squeezed_filename(data)
-                    data = unsqueeze(data)
-                    if orig_name:
-                        filename = orig_name
-                elif compression == 'crunch':
-                    from .crunch import get_crunched_filename
-                    orig_name = get_crunched_filename(data)
-                    data = uncrunch(data)
-                    if orig_name:
-                        filename = orig_name
-                elif compression == 'crlzh':
-                    from .crlzh import get_crlzh_filename
-                    orig_name = get_crlzh_filename(data)
-                    data = uncrlzh(data)
-                    if orig_name:
-                        filename = orig_name
-
-            # Optionally convert text files
-            if convert_text and is_text_file(filename):
-                data = strip_cpm_eof(data)
-                data = crlf_to_lf(data)
-
-            if output_dir:
-                out_path = output_dir / filename
-                out_path.write_bytes(data)
-
-            results.append((filename, data))
+        if output_dir:
+            out_path = output_dir / member.filename
+            out_path.write_bytes(data)
+
+        results.append((member.filename, data))
 
     return results
@@ -0,0 +1,175 @@
+"""
+Resource limits for decoding untrusted input.
+
+A few bytes of crunched or RLE90 data can expand to megabytes, and a
+single slow CrLZH member can keep a worker busy for a long time. The
+decoders (unsqueeze, uncrunch, uncrlzh, arc.decompress_member) accept a
+`limits` object and stop with LimitExceeded as soon as a limit is
+passed, instead of finishing the member first.
+
+Checks are cheap: the decode loops compare their running output size
+against a single checkpoint, and only when it is passed do they call
+Limits.check, which tests the output caps and the CPU clock. The clock
+is therefore read about once every CHECK_INTERVAL output bytes.
+
+A Limits object also accumulates usage across the members it is used
+for, so the archive totals (max_total_output, max_total_cpu) apply to
+everything decoded with it. Use a fresh object (or copy()) per archive.
+
+Usage:
+    limits = Limits(max_output=64 << 20, max_ratio=200, max_cpu=5.0)
+    for member in iter_arc(path, limits=limits):
+        ...
+"""
+
+import sys
+import time
+
+# Output bytes between CPU time checks
+CHECK_INTERVAL = 64 * 1024
+
+# Limit name -> what passing it means
+MESSAGES = {
+    'max_output': "member output exceeds {} bytes",
+    'max_ratio': "member expands more than {}x",
+    'max_cpu': "member used more than {} s of CPU time",
+    'max_total_output': "archive output exceeds {} bytes",
+    'max_total_cpu': "archive used more than {} s of CPU time",
+}
+
+
+class LimitExceeded(Exception):
+    """Decoding stopped because a resource limit was reached."""
+
+    def __init__(self, limit: str, value, message: str):
+        super().__init__(message)
+        self.limit = limit  # Name of the Limits attribute, e.g. 'max_ratio'
+        self.value = value  # Its configured value
+
+    def __reduce__(self):
+        # Raised in worker processes, so it must survive pickling
+        return type(self), (self.limit, self.value, str(self))
+
+
+class Limits:
+    """
+    Output, expansion and CPU time limits, per member and per archive.
+
+    Args:
+        max_output: Largest decoded size of one member, in bytes
+        max_ratio: Largest decoded size of one member per input byte
+        max_cpu: CPU seconds allowed for decoding one member
+        max_total_output: Largest decoded size of all members together
+        max_total_cpu: CPU seconds allowed for all members together
+
+    Limits left as None are not enforced. CPU time is that of the
+    decoding thread, so other threads of a server do not count.
+    """
+
+    __slots__ = (
+        'max_output', 'max_ratio', 'max_cpu', 'max_total_output', 'max_total_cpu',
+        'total_output', 'total_cpu',
+        '_cap', '_cap_limit', '_deadline', '_deadline_limit', '_start',
+    )
+
+    def __init__(
+        self,
+        max_output: int | None = None,
+        max_ratio: float | None = None,
+        max_cpu: float | None = None,
+        max_total_output: int | None = None,
+        max_total_cpu: float | None = None,
+    ):
+        self.max_output = max_output
+        self.max_ratio = max_ratio
+        self.max_cpu = max_cpu
+        self.max_total_output = max_total_output
+        self.max_total_cpu = max_total_cpu
+        self.total_output = 0  # Decoded bytes of finished members
+        self.total_cpu = 0.0  # CPU seconds of finished members
+        self.begin(0)
+
+    def __repr__(self) -> str:
+        set_limits = ', '.join(
+            f"{name}={getattr(self, name)!r}" for name in self.__slots__[:5]
+            if getattr(self, name) is not None
+        )
+        return f"Limits({set_limits})"
+
+    def copy(self) -> 'Limits':
+        """The same limits with no usage recorded (for the next archive)."""
+        return Limits(self.max_output, self.max_ratio, self.max_cpu,
+                      self.max_total_output, self.max_total_cpu)
+
+    def begin(self, input_size: int) -> None:
+        """Start a member of input_size bytes; called by the decoders."""
+        caps = [(sys.maxsize, None)]
+        if self.max_output is not None:
+            caps.append((self.max_output, 'max_output'))
+        if self.max_ratio is not None:
+            caps.append((int(self.max_ratio * input_size), 'max_ratio'))
+        if self.max_total_output is not None:
+            caps.append((self.max_total_output - self.total_output, 'max_total_output'))
+        self._cap, self._cap_limit = min(caps, key=lambda cap: cap[0])
+
+        self._start = time.thread_time()
+        deadlines = [(float('inf'), None)]
+        if self.max_cpu is not None:
+            deadlines.append((self._start + self.max_cpu, 'max_cpu'))
+        if self.max_total_cpu is not None:
+            deadlines.append((self._start + self.max_total_cpu - self.total_cpu,
+                              'max_total_cpu'))
+        self._deadline, self._deadline_limit = min(deadlines, key=lambda d: d[0])
+
+    def check(self, size: int) -> int:
+        """
+        Check a member's running output size and CPU time.
+
+        Args:
+            size: Bytes decoded so far for the current member
+
+        Returns:
+            The output size at which check should next be called
+
+        Raises:
+            LimitExceeded: If an output or CPU limit has been passed
+        """
+        if size > self._cap:
+            self._raise(self._cap_limit)
+        if time.thread_time() > self._deadline:
+            self._raise(self._deadline_limit)
+        return min(self._cap, size + CHECK_INTERVAL)
+
+    def end(self, output_size: int) -> None:
+        """Finish the current member, adding its usage to the totals."""
+        self.charge(output_size, time.thread_time() - self._start)
+
+    def charge(self, output_size: int, cpu: float) -> None:
+        """Add usage measured elsewhere (e.g. in a worker process)."""
+        self.total_output += output_size
+        self.total_cpu += cpu
+
+    def _raise(self, limit: str):
+        value = getattr(self, limit)
+        raise LimitExceeded(limit, value,
+                            f"Decoding stopped: {MESSAGES[limit].format(value)} ({limit})")
+
+
+def parse_size(text: str) -> int:
+    """
+    Parse a byte count with an optional K, M or G suffix (powers of 1024).
+
+    Raises:
+        ValueError: If text is not a valid size
+    """
+    text = text.strip().upper()
+    if text.endswith('B'):
+        text = text[:-1]
+    scale = 1
+    if text and text[-1] in 'KMG':
+        scale = 1024 ** ('KMG'.index(text[-1]) + 1)
+        text = text[:-1]
+    size = int(float(text) * scale)
+    if size < 0:
+        raise ValueError(f"Negative size: {text}")
+    return size
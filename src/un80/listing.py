@@ -0,0 +1,253 @@
+"""
+Machine-readable listings (JSON and NDJSON).
+
+iter_records reads an archive's directory and yields one dict per entry
+as it is parsed, with every field of the entry's namedtuple plus:
+
+    filename            Name from the directory
+    original_filename   Name embedded in a squeezed/crunched/CrLZH
+                        member's header, or None
+    codec               As Member.codec: for LBR members and disk files
+                        the compression detected from the first bytes,
+                        for ARC members the method ('stored' if none)
+    offset              Where the member's data starts in the file
+    size                Stored size in bytes
+    modified            Directory or header date as ISO 8601, or None
+
+ARC records also have method_name, and disk image records disk_format
+(the format's description). Raw date words are kept as recorded.
+Listing a single compressed file yields one record for the file itself.
+Nothing is decoded, so listing reads the directory and a sector of each
+member and no more.
+
+Usage:
+    for record in iter_records('archive.lbr', 'lbr'):
+        print(json.dumps(record))
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from collections.abc import Iterable, Iterator
+from dataclasses import asdict, is_dataclass
+from pathlib import Path
+from typing import BinaryIO, TextIO
+
+from . import formats
+from .cpm import detect_compression
+from .stream import open_source
+
+# Bytes read from a member to find its codec and embedded filename
+HEAD_SIZE = 128
+
+# ARC methods whose data is stored as-is (and may hold a compressed file)
+_ARC_STORED_METHODS = (1, 2)
+
+
+def iter_records(
+    path: str | Path | BinaryIO,
+    format_type: str,
+    *,
+    disk_format: str | None = None,
+) -> Iterator[dict]:
+    """
+    Yield a record for each entry of an archive, disk image or file.
+
+    Args:
+        path: Path to the input, or an open binary file
+        format_type: Format name (see un80.formats)
+        disk_format: CP/M disk format for disk images (detected if None)
+
+    Yields:
+        JSON-serialisable dicts (see the module docstring)
+    """
+    if format_type == 'lbr':
+        yield from _lbr_records(path)
+    elif format_type == 'arc':
+        yield from _arc_records(path)
+    elif format_type == 'disk':
+        yield from _disk_records(path, disk_format)
+    else:
+        yield _file_record(path, format_type)
+
+
+def _lbr_records(path) -> Iterator[dict]:
+    from .lbr import SECTOR_SIZE, read_directory  # pylint: disable=import-outside-toplevel
+
+    with open_source(path) as f:
+        entries = read_directory(f)
+        if not f.seekable():
+            entries.sort(key=lambda entry: entry.index)
+        for entry in entries:
+            offset = entry.index * SECTOR_SIZE
+            head = b''
+            if entry.data_size:
+                f.seek(offset)
+                head = f.read(min(HEAD_SIZE, entry.data_size))
+            yield _record(entry, offset, entry.data_size, head)
+
+
+def _arc_records(path) -> Iterator[dict]:
+    from .arc import METHOD_CODECS, iter_arc_entries  # pylint: disable=import-outside-toplevel
+
+    with open_source(path) as f:
+        # iter_arc_entries leaves f at each member's data
+        for entry in iter_arc_entries(f):
+            head = b''
+            if entry.method in _ARC_STORED_METHODS:
+                head = f.read(min(HEAD_SIZE, entry.compressed_size))
+            record = _record(entry, entry.data_offset, entry.compressed_size, head)
+            # The ARC method, as for Member.codec; a stored member that
+            # is itself a compressed file only gets its original_filename
+            record['codec'] = METHOD_CODECS.get(entry.method, 'unknown')
+            record['method_name'] = entry.method_name
+            yield record
+
+
+def _disk_records(path, disk_format: str | None) -> Iterator[dict]:
+    from .disk import DiskImage  # pylint: disable=import-outside-toplevel
+
+    with DiskImage(path, disk_format) as image:
+        for file in image.list():
+            head = bytes(next(image.chunks(file), b'')[:HEAD_SIZE])
+            record = _record(file, None, file.data_size, head)
+            record['disk_format'] = image.format.description
+            yield record
+
+
+def _record(entry, offset: int | None, size: int, head: bytes) -> dict:
+    """Fields of entry plus the derived fields shared by every format."""
+    record = asdict(entry) if is_dataclass(entry) else entry._asdict()
+    for key, value in record.items():
+        if isinstance(value, tuple):
+            record[key] = list(value)
+    codec = detect_compression(head) if head else None
+    if codec not in formats.COMPRESSED_FORMATS:
+        codec = None
+    original = formats.filename_getter(codec)(head) if codec else None
+    modified = entry.modified
+    record.update(
+        filename=entry.filename,
+        original_filename=original or None,
+        codec=codec or 'stored',
+        offset=offset,
+        size=size,
+        modified=modified.isoformat() if modified else None,
+    )
+    return record
+
+
+def _file_record(path, format_type: str) -> dict:
+    """Record for a single compressed or BASIC file."""
+    if hasattr(path, 'read'):
+        name = getattr(path, 'name', None)
+        data = path.read()
+        size = len(data)
+        head = data[:HEAD_SIZE]
+    else:
+        name = os.path.basename(path)
+        size = os.path.getsize(path)
+        with open(path, 'rb') as f:
+            head = f.read(HEAD_SIZE)
+    original = None
+    if format_type in formats.CODEC_FUNCTIONS:
+        original = formats.filename_getter(format_type)(head) or None
+    return {
+        'filename': name,
+        'original_filename': original,
+        'codec': format_type,
+        'offset': 0,
+        'size': size,
+        'modified': None,
+    }
+
+
+class JsonWriter:
+    """
+    Stream listing records to a text file as JSON or NDJSON.
+
+    NDJSON writes one line per entry, each carrying the input's name
+    and format, and an error line ({"file", "format", "error"}) for an
+    input that could not be read. JSON writes one object per input,
+    {"file", "format", "entries": [...]} (or "error"), inside an array
+    if there are several inputs. Either way each record is written as
+    soon as it is parsed.
+
+    Args:
+        out: Text stream to write to
+        ndjson: Write NDJSON rather than JSON
+        many: Whether several inputs will be written (JSON only)
+    """
+
+    def __init__(self, out: TextIO, ndjson: bool = False, many: bool = False):
+        self.out = out
+        self.ndjson = ndjson
+        self.many = many
+        self._inputs = 0
+
+    def write_input(
+        self,
+        name: str,
+        format_type: str | None,
+        records: Iterable[dict] = (),
+        error: str | None = None,
+    ) -> bool:
+        """
+        Write the records for one input.
+
+        Args:
+            name: Name of the input as given
+            format_type: Its format, if known
+            records: Iterable of records; an exception raised while
+                iterating is reported as the input's error
+            error: Error to report instead of records
+
+        Returns:
+            True if every record was written, False if there was an error
+        """
+        out = self.out
+        head = {'file': name, 'format': format_type}
+        if not self.ndjson:
+            if self._inputs:
+                out.write(',\n')
+            elif self.many:
+                out.write('[\n')
+            out.write(json.dumps(head)[:-1] + ', "entries": [')
+        self._inputs += 1
+
+        count = 0
+        records = iter(records if error is None else ())
+        while True:
+            # Only errors from reading the input are reported in the output
+            try:
+                record = next(records)
+            except StopIteration:
+                break
+            except Exception as e:
+                error = str(e) or type(e).__name__
+                break
+            if self.ndjson:
+                out.write(json.dumps({**head, **record}) + '\n')
+            else:
+                out.write((',\n  ' if count else '\n  ') + json.dumps(record))
+            count += 1
+
+        if self.ndjson:
+            if error is not None:
+                out.write(json.dumps({**head, 'error': error}) + '\n')
+        else:
+            out.write('\n]' if count else ']')
+            if error is not None:
+                out.write(', "error": ' + json.dumps(error))
+            out.write('}')
+        out.flush()
+        return error is None
+
+    def close(self) -> None:
+        """Finish the document."""
+        if not self.ndjson:
+            if self.many:
+                self.out.write('\n]' if self._inputs else '[]')
+            self.out.write('\n')
+        self.out.flush()
@@ -0,0 +1,373 @@
+"""
+LZHUF decoding, shared by CrLZH and Teledisk images.
+
+LZHUF (Haruyasu Yoshizaki, 1988) is LZSS with an adaptive Huffman code
+for literals and match lengths, followed for each match by a static
+code for the upper six bits of its position and the lower bits sent
+verbatim. Teledisk's "advanced compression" is LZHUF.C as published;
+CrLZH uses a 2048-byte window, adds an end-of-stream code and, from
+v2.0, sends five low position bits instead of six. LzhufParams holds
+what differs.
+
+The decoder expands its input to one byte per bit before it starts
+(the conversion runs in C), so walking the tree indexes a bytes object
+instead of shifting a bit buffer for every bit. The 8-14 bits of a
+match position are taken from a 24-bit window of the input in one
+step. The sliding window is the output itself, preceded by the preset
+window contents, so matches are copied with slices.
+
+References:
+- LZHUF.C by Haruyasu Yoshizaki (1988)
+"""
+
+import sys
+from collections import namedtuple
+
+# Maximum frequency before tree reconstruction
+MAX_FREQ = 0x8000
+
+# Zero bits appended to the input: enough for any code to run off the
+# end of the data without an IndexError (the tree is at most N_CHAR deep)
+_PAD_BYTES = 128
+
+# ASCII '0'/'1' -> bit value
+_BIT_VALUES = bytes.maketrans(b'01', b'\x00\x01')
+
+
+class LzhufParams(namedtuple('LzhufParams', [
+    'window',  # Sliding window size (N)
+    'lookahead',  # Longest match (F)
+    'threshold',  # Longest match not worth coding (THRESHOLD)
+    'stop_code',  # Whether code 256 ends the stream
+    'position_bits',  # Low position bits sent verbatim
+    'spaces',  # Leading window bytes preset to spaces (the rest are 0)
+])):
+    """Parameters of an LZHUF variant."""
+    __slots__ = ()
+
+    @property
+    def n_char(self) -> int:
+        """Codes in the adaptive tree: literals, stop code, match lengths."""
+        return 256 + self.stop_code + self.lookahead - self.threshold
+
+
+# Teledisk advanced compression (LZHUF.C unchanged)
+TELEDISK = LzhufParams(4096, 60, 2, False, 6, 4096 - 60)
+
+# Position decoding tables from LZHUF.C
+# d_code: maps byte value to upper bits of position
+D_CODE = [
+    0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00,
+    0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00,
+    0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00,
+    0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00,
+    0x01, 0x01, 0x01, 0x01, 0x01, 0x01, 0x01, 0x01,
+    0x01, 0x01, 0x01, 0x01, 0x01, 0x01, 0x01, 0x01,
+    0x02, 0x02, 0x02, 0x02, 0x02, 0x02, 0x02, 0x02,
+    0x02, 0x02, 0x02, 0x02, 0x02, 0x02, 0x02, 0x02,
+    0x03, 0x03, 0x03, 0x03, 0x03, 0x03, 0x03, 0x03,
+    0x03, 0x03, 0x03, 0x03, 0x03, 0x03, 0x03, 0x03,
+    0x04, 0x04, 0x04, 0x04, 0x04, 0x04, 0x04, 0x04,
+    0x05, 0x05, 0x05, 0x05, 0x05, 0x05, 0x05, 0x05,
+    0x06, 0x06, 0x06, 0x06, 0x06, 0x06, 0x06, 0x06,
+    0x07, 0x07, 0x07, 0x07, 0x07, 0x07, 0x07, 0x07,
+    0x08, 0x08, 0x08, 0x08, 0x08, 0x08, 0x08, 0x08,
+    0x09, 0x09, 0x09, 0x09, 0x09, 0x09, 0x09, 0x09,
+    0x0A, 0x0A, 0x0A, 0x0A, 0x0A, 0x0A, 0x0A, 0x0A,
+    0x0B, 0x0B, 0x0B, 0x0B, 0x0B, 0x0B, 0x0B, 0x0B,
+    0x0C, 0x0C, 0x0C, 0x0C, 0x0D, 0x0D, 0x0D, 0x0D,
+    0x0E, 0x0E, 0x0E, 0x0E, 0x0F, 0x0F, 0x0F, 0x0F,
+    0x10, 0x10, 0x10, 0x10, 0x11, 0x11, 0x11, 0x11,
+    0x12, 0x12, 0x12, 0x12, 0x13, 0x13, 0x13, 0x13,
+    0x14, 0x14, 0x14, 0x14, 0x15, 0x15, 0x15, 0x15,
+    0x16, 0x16, 0x16, 0x16, 0x17, 0x17, 0x17, 0x17,
+    0x18, 0x18, 0x19, 0x19, 0x1A, 0x1A, 0x1B, 0x1B,
+    0x1C, 0x1C, 0x1D, 0x1D, 0x1E, 0x1E, 0x1F, 0x1F,
+    0x20, 0x20, 0x21, 0x21, 0x22, 0x22, 0x23, 0x23,
+    0x24, 0x24, 0x25, 0x25, 0x26, 0x26, 0x27, 0x27,
+    0x28, 0x28, 0x29, 0x29, 0x2A, 0x2A, 0x2B, 0x2B,
+    0x2C, 0x2C, 0x2D, 0x2D, 0x2E, 0x2E, 0x2F, 0x2F,
+    0x30, 0x31, 0x32, 0x33, 0x34, 0x35, 0x36, 0x37,
+    0x38, 0x39, 0x3A, 0x3B, 0x3C, 0x3D, 0x3E, 0x3F,
+]
+
+# d_len: number of bits used to encode this position value
+D_LEN = [
+    0x03, 0x03, 0x03, 0x03, 0x03, 0x03, 0x03, 0x03,
+    0x03, 0x03, 0x03, 0x03, 0x03, 0x03, 0x03, 0x03,
+    0x03, 0x03, 0x03, 0x03, 0x03, 0x03, 0x03, 0x03,
+    0x03, 0x03, 0x03, 0x03, 0x03, 0x03, 0x03, 0x03,
+    0x04, 0x04, 0x04, 0x04, 0x04, 0x04, 0x04, 0x04,
+    0x04, 0x04, 0x04, 0x04, 0x04, 0x04, 0x04, 0x04,
+    0x04, 0x04, 0x04, 0x04, 0x04, 0x04, 0x04, 0x04,
+    0x04, 0x04, 0x04, 0x04, 0x04, 0x04, 0x04, 0x04,
+    0x04, 0x04, 0x04, 0x04, 0x04, 0x04, 0x04, 0x04,
+    0x04, 0x04, 0x04, 0x04, 0x04, 0x04, 0x04, 0x04,
+    0x05, 0x05, 0x05, 0x05, 0x05, 0x05, 0x05, 0x05,
+    0x05, 0x05, 0x05, 0x05, 0x05, 0x05, 0x05, 0x05,
+    0x05, 0x05, 0x05, 0x05, 0x05, 0x05, 0x05, 0x05,
+    0x05, 0x05, 0x05, 0x05, 0x05, 0x05, 0x05, 0x05,
+    0x05, 0x05, 0x05, 0x05, 0x05, 0x05, 0x05, 0x05,
+    0x05, 0x05, 0x05, 0x05, 0x05, 0x05, 0x05, 0x05,
+    0x05, 0x05, 0x05, 0x05, 0x05, 0x05, 0x05, 0x05,
+    0x05, 0x05, 0x05, 0x05, 0x05, 0x05, 0x05, 0x05,
+    0x06, 0x06, 0x06, 0x06, 0x06, 0x06, 0x06, 0x06,
+    0x06, 0x06, 0x06, 0x06, 0x06, 0x06, 0x06, 0x06,
+    0x06, 0x06, 0x06, 0x06, 0x06, 0x06, 0x06, 0x06,
+    0x06, 0x06, 0x06, 0x06, 0x06, 0x06, 0x06, 0x06,
+    0x06, 0x06, 0x06, 0x06, 0x06, 0x06, 0x06, 0x06,
+    0x06, 0x06, 0x06, 0x06, 0x06, 0x06, 0x06, 0x06,
+    0x07, 0x07, 0x07, 0x07, 0x07, 0x07, 0x07, 0x07,
+    0x07, 0x07, 0x07, 0x07, 0x07, 0x07, 0x07, 0x07,
+    0x07, 0x07, 0x07, 0x07, 0x07, 0x07, 0x07, 0x07,
+    0x07, 0x07, 0x07, 0x07, 0x07, 0x07, 0x07, 0x07,
+    0x07, 0x07, 0x07, 0x07, 0x07, 0x07, 0x07, 0x07,
+    0x07, 0x07, 0x07, 0x07, 0x07, 0x07, 0x07, 0x07,
+    0x08, 0x08, 0x08, 0x08, 0x08, 0x08, 0x08, 0x08,
+    0x08, 0x08, 0x08, 0x08, 0x08, 0x08, 0x08, 0x08,
+]
+
+
+def _position_tables(low_bits: int) -> tuple[list[int], list[int]]:
+    """
+    Per first position byte: the upper position bits it codes, and how
+    many bits follow it (the low bits are the byte's own tail and these).
+    """
+    high = [code << low_bits for code in D_CODE]
+    extra = [length - 8 + low_bits for length in D_LEN]
+    return high, extra
+
+
+class HuffmanTree:
+    """
+    Adaptive Huffman tree of LZHUF.C.
+
+    Args:
+        n_char: Number of codes (LzhufParams.n_char)
+    """
+
+    def __init__(self, n_char: int):
+        self.n_char = n_char
+        self.T = T = n_char * 2 - 1  # Nodes in the tree
+        self.R = T - 1  # Root
+
+        # Frequency table for each node
+        self.freq = [0] * (T + 1)
+
+        # Parent pointers: prnt[T..T+N_CHAR-1] map codes to leaf positions
+        self.prnt = [0] * (T + n_char)
+
+        # Child pointers: son[i] and son[i]+1 are children of node i
+        self.son = [0] * T
+
+        # Number of _reconst() rebuilds (reported through counters)
+        self.reconsts = 0
+
+        self._init_tree()
+
+    def _init_tree(self):
+        """Initialize tree with uniform frequencies."""
+        T, R, n_char = self.T, self.R, self.n_char
+
+        # Initialize leaf nodes
+        for i in range(n_char):
+            self.freq[i] = 1
+            self.son[i] = i + T
+            self.prnt[i + T] = i
+
+        # Build internal nodes
+        i = 0
+        j = n_char
+        while j <= R:
+            self.freq[j] = self.freq[i] + self.freq[i + 1]
+            self.son[j] = i
+            self.prnt[i] = self.prnt[i + 1] = j
+            i += 2
+            j += 1
+
+        # Sentinel
+        self.freq[T] = 0xFFFF
+        self.prnt[R] = 0
+
+    def _reconst(self):
+        """Reconstruct tree when frequency counter saturates."""
+        self.reconsts += 1
+        T = self.T
+        freq, son, prnt = self.freq, self.son, self.prnt
+
+        # Collect leaf nodes and halve frequencies
+        j = 0
+        for i in range(T):
+            if son[i] >= T:
+                freq[j] = (freq[i] + 1) // 2
+                son[j] = son[i]
+                j += 1
+
+        # Rebuild tree by connecting sons
+        i = 0
+        j = self.n_char
+        while j < T:
+            f = freq[j] = freq[i] + freq[i + 1]
+
+            # Find insertion point
+            k = j - 1
+            while f < freq[k]:
+                k -= 1
+            k += 1
+
+            # Shift arrays
+            freq[k + 1:j + 1] = freq[k:j]
+            freq[k] = f
+            son[k + 1:j + 1] = son[k:j]
+            son[k] = i
+
+            i += 2
+            j += 1
+
+        # Reconnect parent pointers
+        for i in range(T):
+            k = son[i]
+            if k >= T:
+                prnt[k] = i
+            else:
+                prnt[k] = prnt[k + 1] = i
+
+    def update(self, c: int):
+        """Increment frequency of given code and update tree."""
+        freq, son, prnt = self.freq, self.son, self.prnt
+        T = self.T
+        if freq[self.R] == MAX_FREQ:
+            self._reconst()
+
+        c = prnt[c + T]
+        while True:
+            freq[c] += 1
+            k = freq[c]
+
+            # Check if order is disturbed
+            l = c + 1
+            if k > freq[l]:
+                # Find node to swap with
+                while k > freq[l + 1]:
+                    l += 1
+
+                # Swap frequencies
+                freq[c] = freq[l]
+                freq[l] = k
+
+                # Swap children and update parent pointers
+                i = son[c]
+                prnt[i] = l
+                if i < T:
+                    prnt[i + 1] = l
+
+                j = son[l]
+                son[l] = i
+                prnt[j] = c
+                if j < T:
+                    prnt[j + 1] = c
+                son[c] = j
+
+                c = l
+
+            c = prnt[c]
+            if c == 0:
+                break
+
+
+def decode(
+    data: bytes,
+    offset: int,
+    params: LzhufParams,
+    *,
+    limits=None,
+    counters=None,
+) -> bytearray:
+    """
+    Decode an LZHUF bit stream.
+
+    Decoding stops at the stop code (if the variant has one) or where the
+    data runs out. Without a stop code, the zero bits padding the last
+    byte may decode as a few bytes more than were encoded; Teledisk
+    images end with their own marker, so this does no harm there.
+
+    Args:
+        data: Buffer holding the bit stream
+        offset: Offset of the first byte of the bit stream
+        params: The variant (e.g. TELEDISK)
+        limits: Optional un80.limits.Limits for the stream being decoded
+        counters: Optional mapping to add huffman_reconsts/huffman_bits to
+
+    Returns:
+        Decoded data, as a bytearray
+
+    Raises:
+        LimitExceeded: If limits are given and one is passed
+    """
+    stream = bytes(data[offset:]) + bytes(_PAD_BYTES)
+    nbits = (len(stream) - _PAD_BYTES) * 8
+    value = int.from_bytes(stream, 'big')
+    bits = format(value, f'0{len(stream) * 8}b').encode('ascii').translate(_BIT_VALUES)
+
+    tree = HuffmanTree(params.n_char)
+    son, update = tree.son, tree.update
+    T, R = tree.T, tree.R
+    high, extra = _position_tables(params.position_bits)
+    low_mask = (1 << params.position_bits) - 1
+    window = params.window
+    window_mask = window - 1
+    stop = 256 if params.stop_code else -1
+    first_length = 256 + params.stop_code
+    length_bias = params.threshold + 1 - first_length
+
+    # The output follows the initial window contents, arranged so that
+    # out[-1 - position] is the byte a match refers to
+    out = bytearray(b' ' * params.spaces + bytes(window - params.spaces))
+    start = window - params.lookahead
+    out = out[start:] + out[:start]
+    check = sys.maxsize if limits is None else limits.check(0) + window
+
+    k = 0  # Bit position
+    while k < nbits:
+        c = son[R]
+        while c < T:
+            c = son[c + bits[k]]
+            k += 1
+        c -= T
+        update(c)
+
+        if c < 256:
+            out.append(c)
+            continue
+        if c == stop:
+            break
+
+        # Match: an 8-bit code for the upper position bits, then up to
+        # six more bits
+        p = k >> 3
+        w = stream[p] << 16 | stream[p + 1] << 8 | stream[p + 2]
+        s = k & 7
+        i = (w >> (16 - s)) & 0xFF
+        n = extra[i]
+        k += 8 + n
+        position = (high[i] | (w >> (16 - s - n)) & low_mask) & window_mask
+
+        length = c + length_bias
+        src = len(out) - position - 1
+        if length <= position + 1:
+            out += out[src:src + length]
+        else:
+            # Overlapping copy: the match repeats its first position + 1 bytes
+            run = out[src:]
+            out += (run * (length // len(run) + 1))[:length]
+
+        if len(out) > check:
+            check = limits.check(len(out) - window) + window
+
+    if counters is not None:
+        counters['huffman_reconsts'] += tree.reconsts
+        counters['huffman_bits'] += min(k, nbits)
+
+    # Dropping the window from the front of a bytearray does not copy
+    del out[:window]
+    return out
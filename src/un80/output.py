@@ -0,0 +1,228 @@
+"""
+Writing extracted files into an output directory.
+
+OutputDir opens the directory once and creates files relative to its
+descriptor, so each member costs an open, its writes and a close:
+
+- A new file is created with O_CREAT | O_EXCL. Nothing is stat'ed
+  first, and two extractions into one directory cannot both create the
+  same name; whichever loses sees the file as existing.
+- An existing file is skipped (no_clobber) or replaced: the data goes to
+  a temporary file in the same directory, which os.replace renames over
+  the old one, so readers see either the old or the new file.
+- The member's CP/M or DOS timestamp, if it has one, is set on the open
+  file before it is closed.
+- With fsync, every file is flushed to disk before it is closed, and the
+  directory (which records the new names) once per SYNC_BATCH files and
+  on close, rather than after every file.
+
+Platforms without dir_fd support (Windows) fall back to joined paths.
+
+Usage:
+    with OutputDir('out', no_clobber=True) as out:
+        for member in iter_lbr('archive.lbr'):
+            name = out.unique_name(member.filename)
+            out.write(name, member.chunks, member.entry.modified)
+"""
+
+from __future__ import annotations
+
+import os
+from collections.abc import Iterable
+from datetime import datetime
+
+from .stream import write_all
+
+# Files written between directory fsyncs
+SYNC_BATCH = 256
+
+_CREATE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0)
+_HAVE_DIR_FD = (
+    os.open in os.supports_dir_fd
+    and os.unlink in os.supports_dir_fd
+    and os.rename in os.supports_dir_fd  # os.replace takes the same arguments
+)
+
+
+class OutputDir:
+    """
+    A directory that extracted files are written into.
+
+    Args:
+        path: Directory to write into; created if missing
+        no_clobber: Skip files that already exist instead of replacing them
+        fsync: Flush files and the directory to disk (see SYNC_BATCH)
+    """
+
+    def __init__(self, path: str | os.PathLike, *, no_clobber: bool = False,
+                 fsync: bool = False):
+        self.path = os.fspath(path)
+        self.no_clobber = no_clobber
+        self.fsync = fsync
+        self._used: set[str] = set()  # Names handed out by unique_name
+        self._unsynced = 0  # Files written since the directory was synced
+
+        os.makedirs(self.path, exist_ok=True)
+        self._dir_fd = None
+        if _HAVE_DIR_FD:
+            self._dir_fd = os.open(self.path, os.O_RDONLY | getattr(os, 'O_DIRECTORY', 0))
+
+    def unique_name(self, name: str) -> str:
+        """
+        A name not yet given out by this OutputDir.
+
+        Handles duplicate names within one archive (e.g. two README.TXT
+        members) by appending _1, _2, etc. to the stem. Files already in
+        the directory are write()'s business, not this method's.
+        """
+        stem, dot, suffix = name.rpartition('.')
+        if not dot or not stem:
+            stem, suffix = name, ''
+        else:
+            suffix = '.' + suffix
+        candidate = name
+        counter = 1
+        while candidate in self._used:
+            candidate = f"{stem}_{counter}{suffix}"
+            counter += 1
+        self._used.add(candidate)
+        return candidate
+
+    def exists(self, name: str) -> bool:
+        """Whether name is in the directory (for skipping work before write)."""
+        try:
+            if self._dir_fd is None:
+                os.stat(self._join(name))
+            else:
+                os.stat(name, dir_fd=self._dir_fd)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def write(
+        self,
+        name: str,
+        data: bytes | Iterable[bytes],
+        modified: datetime | None = None,
+    ) -> str:
+        """
+        Write a file.
+
+        data may be bytes or an iterable of chunks; a chunk iterator with
+        a copy_to method (a stored member's FileRange) copies itself. If
+        writing fails, the directory is left as it was.
+
+        Args:
+            name: Filename within the directory
+            data: File contents
+            modified: Timestamp to give the file, if known
+
+        Returns:
+            'wrote', 'skipped' (exists and no_clobber) or 'overwrote'
+        """
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            data = (data,)
+
+        try:
+            fd = self._open(name)
+        except FileExistsError:
+            if self.no_clobber:
+                return 'skipped'
+        else:
+            self._fill(fd, name, data, modified)
+            return 'wrote'
+
+        while True:
+            tmp_name = f".{name}.{os.urandom(4).hex()}.tmp"
+            try:
+                fd = self._open(tmp_name)
+                break
+            except FileExistsError:
+                continue
+        self._fill(fd, tmp_name, data, modified)
+        try:
+            if self._dir_fd is None:
+                os.replace(self._join(tmp_name), self._join(name))
+            else:
+                os.replace(tmp_name, name, src_dir_fd=self._dir_fd, dst_dir_fd=self._dir_fd)
+        except BaseException:
+            self._unlink(tmp_name)
+            raise
+        return 'overwrote'
+
+    def _fill(self, fd: int, name: str, data: Iterable[bytes],
+              modified: datetime | None) -> None:
+        """Write data to a newly created file and close it, or remove it on error."""
+        try:
+            try:
+                copy_to = getattr(data, 'copy_to', None)
+                if copy_to is not None:
+                    copy_to(fd)
+                else:
+                    for chunk in data:
+                        write_all(fd, chunk)
+                if modified is not None:
+                    _set_mtime(fd, self._join(name), modified)
+                if self.fsync:
+                    os.fsync(fd)
+            finally:
+                os.close(fd)
+        except BaseException:
+            self._unlink(name)
+            raise
+        if self.fsync:
+            self._unsynced += 1
+            if self._unsynced >= SYNC_BATCH:
+                self.sync()
+
+    def sync(self) -> None:
+        """Flush the directory entries written so far to disk."""
+        self._unsynced = 0
+        if self._dir_fd is not None:
+            os.fsync(self._dir_fd)
+
+    def _open(self, name: str) -> int:
+        if self._dir_fd is None:
+            return os.open(self._join(name), _CREATE_FLAGS, 0o666)
+        return os.open(name, _CREATE_FLAGS, 0o666, dir_fd=self._dir_fd)
+
+    def _unlink(self, name: str) -> None:
+        try:
+            if self._dir_fd is None:
+                os.unlink(self._join(name))
+            else:
+                os.unlink(name, dir_fd=self._dir_fd)
+        except FileNotFoundError:
+            pass
+
+    def _join(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def close(self) -> None:
+        """Sync the directory if fsync was asked for, and close it."""
+        if self._dir_fd is None:
+            return
+        try:
+            if self.fsync and self._unsynced:
+                self.sync()
+        finally:
+            os.close(self._dir_fd)
+            self._dir_fd = None
+
+    def __enter__(self) -> OutputDir:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def _set_mtime(fd: int, path: str, modified: datetime) -> None:
+    """Set a file's access and modification times, through fd where possible."""
+    try:
+        stamp = modified.timestamp()
+    except (OverflowError, OSError, ValueError):
+        return  # Outside what the platform can represent
+    if os.utime in os.supports_fd:
+        os.utime(fd, (stamp, stamp))
+    else:
+        os.utime(path, (stamp, stamp))
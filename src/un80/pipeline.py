@@ -0,0 +1,209 @@
+"""
+Pipelined extraction: read, decode and write on separate threads.
+
+Extracting an archive reads each member's bytes, decodes them, and
+writes the result. Done in sequence, the CPU sits idle while a slow (for
+example network) file system reads or writes. Here the three steps
+overlap:
+
+    reader thread    read_ahead() iterates the members, reading their
+                     compressed bytes (and stored data that cannot be
+                     read independently) up to `depth` members ahead
+    caller's thread  decode_member() runs the decoder
+    writer thread    WriteBehind drains a bounded queue of decoded
+                     members into a write callback
+
+Usage:
+    with open(path, 'rb') as f, WriteBehind(write) as writer:
+        for member in read_ahead(iter_lbr(f)):
+            writer.put(decode_member(member))
+
+Decoding stays on one thread: the decoders are pure Python, so more
+threads would only contend for the GIL, while file I/O releases it.
+Queues are bounded, so at most about 2 * depth members are held in
+memory. Stored members read through a file descriptor are passed on as
+their FileRange and copied by the writer (see stream.FileRange), so the
+archive must stay open until the writer is done; pass an open file to
+iter_lbr/iter_arc rather than a path, which they would close as soon as
+the reader thread reaches the end.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import replace
+from typing import Any
+
+from .stream import FileRange, Member
+
+# Members each stage may run ahead of the next
+DEPTH = 4
+
+# How often a blocked put checks whether the pipeline was cancelled
+_POLL = 0.05
+
+_DONE = object()
+
+
+class _Failed:
+    """An exception raised on another thread, passed through a queue."""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def _put(q: queue.Queue, item, cancel: threading.Event) -> bool:
+    """Put item on a bounded queue unless cancel is set first."""
+    while not cancel.is_set():
+        try:
+            q.put(item, timeout=_POLL)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def stage_member(member: Member) -> Member:
+    """
+    Read whatever of a member still has to come from its archive.
+
+    Compressed members were read by unpack_member and are left to be
+    decoded. Stored members are read into memory, unless their chunks
+    are a FileRange over a file descriptor, which another thread can
+    read without disturbing the archive's file position.
+    """
+    chunks = member.chunks
+    if member.codec != 'stored':
+        return member
+    if isinstance(chunks, FileRange) and chunks.source_fd() is not None:
+        return member
+    # bytes() also copies memoryviews of a disk image, which is unmapped
+    # once its members have all been read
+    return replace(member, chunks=[bytes(chunk) for chunk in chunks])
+
+
+def decode_member(member: Member) -> Member:
+    """
+    Decode a member, returning it with its output as a list of chunks.
+
+    A FileRange is passed through so that the writer can copy it.
+
+    Raises:
+        LimitExceeded: If the member's decoder was given limits and
+            passes one
+    """
+    if isinstance(member.chunks, FileRange):
+        return member
+    return replace(member, chunks=list(member.chunks))
+
+
+def read_ahead(members: Iterable[Member], depth: int = DEPTH) -> Iterator[Member]:
+    """
+    Iterate over members staged (see stage_member) by a reader thread.
+
+    An exception raised while reading is re-raised here, after the
+    members read before it. Closing the iterator stops the reader.
+
+    Args:
+        members: Member iterator, e.g. from iter_lbr or iter_arc
+        depth: Members the reader may stage ahead of the caller
+
+    Yields:
+        Member objects in the order members produced them
+    """
+    q: queue.Queue = queue.Queue(depth)
+    cancel = threading.Event()
+
+    def read() -> None:
+        source = iter(members)
+        try:
+            for member in source:
+                if not _put(q, stage_member(member), cancel):
+                    break
+            else:
+                _put(q, _DONE, cancel)
+        except BaseException as e:
+            _put(q, _Failed(e), cancel)
+        finally:
+            close = getattr(source, 'close', None)
+            if close is not None:
+                close()
+
+    thread = threading.Thread(target=read, name='un80-read', daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = q.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failed):
+                raise item.error
+            yield item
+    finally:
+        cancel.set()
+        thread.join()
+
+
+class WriteBehind:
+    """
+    Hand decoded members to a writer thread through a bounded queue.
+
+    write is called on the writer thread, once per item put and in
+    order. Items are usually Members, but may be anything write takes
+    (the CLI passes (member, output path) pairs). If write raises, later
+    items are dropped, and the error is raised from the next put() and
+    from leaving the with block.
+
+    Args:
+        write: Called with each item
+        depth: Items that may wait for the writer
+    """
+
+    def __init__(self, write: Callable[[Any], object], depth: int = DEPTH):
+        self.write = write
+        self._queue: queue.Queue = queue.Queue(depth)
+        self._error: BaseException | None = None
+        self._thread = threading.Thread(target=self._drain, name='un80-write', daemon=True)
+        self._thread.start()
+
+    def _drain(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _DONE:
+                return
+            if self._error is None:
+                try:
+                    self.write(item)
+                except BaseException as e:
+                    self._error = e
+
+    def put(self, item: Any) -> None:
+        """Queue an item for writing, waiting while the queue is full."""
+        self._raise()
+        self._queue.put(item)
+
+    def close(self) -> None:
+        """Wait for queued members to be written, then stop the writer."""
+        if self._thread.is_alive():
+            self._queue.put(_DONE)
+            self._thread.join()
+        self._raise()
+
+    def _raise(self) -> None:
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self) -> WriteBehind:
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+            return
+        # Already failing: finish writing, but keep the original error
+        try:
+            self.close()
+        except BaseException:
+            pass
@@ -0,0 +1,315 @@
+"""
+Recovery of members from damaged or truncated ARC and LBR files.
+
+The regular readers stop at the first inconsistency: list_arc raises
+ArcError on a bad 0x1A marker and read_directory rejects an LBR whose
+directory size is out of range. salvage() instead searches the whole
+file for anything that still looks like a member:
+
+- LBR directory entries, read leniently from the first sector on
+- ARC member headers (0x1A, method 1-9, a plausible filename)
+- squeeze, crunch and CrLZH streams (magic 76 FF, 76 FE, 76 FD
+  followed by a plausible embedded filename)
+
+Candidates are located in the memory-mapped file with regular
+expressions that begin with the marker bytes and go on to match a
+plausible filename, so the search runs in C and most of a large file
+is never looked at from Python. Only candidates whose header is sane
+are decoded, and a member is kept only if its CRC (ARC, LBR) or
+checksum (squeeze) matches.
+Crunched and CrLZH streams carry no checksum in their header; they are
+kept if they decode, and reported as unverified. So is an ARC member
+that follows directly on from the previous one but is cut short by the
+end of the file or fails its CRC.
+
+Data covered by a recovered member is not searched again, so the
+compressed bytes of a good member do not produce spurious candidates.
+
+Usage:
+    for member in salvage('DAMAGED.ARK'):
+        print(member.offset, member.filename, member.verified)
+"""
+
+from __future__ import annotations
+
+import mmap
+import re
+from bisect import bisect_right, insort
+from collections import namedtuple
+from pathlib import Path
+
+from . import formats
+from .arc import decompress_member, header_size, unpack_header
+from .cpm import crc16, crc16_xmodem, detect_compression
+
+# ARC marker, method 1-9 and a plausible filename: 1-12 printable
+# characters, NUL-terminated within the 13-byte field
+ARC_HEADER = re.compile(rb'\x1a[\x01-\x09][\x21-\x7e]{1,12}\x00')
+
+# Plausible name in a squeeze/crunch/CrLZH header. CP/M attribute bits
+# may be set, and crunch and CrLZH append a [comment] (e.g. a date)
+_NAME = rb'[\x21-\x5a\x5c-\x7e\xa1-\xda\xdc-\xfe]{1,12}(?:\[[\x20-\x7e]{0,80})?\x00'
+
+# Squeeze magic (76 FF), checksum, name and a node count of at most
+# 257; or crunch (76 FE) or CrLZH (76 FD) magic, name and the version
+# bytes that follow it (0x10-0x2F for all known releases)
+STREAM_HEADER = re.compile(
+    rb'\x76(?:\xff..' + _NAME + rb'.[\x00\x01]|[\xfe\xfd]' + _NAME + rb'[\x10-\x2f]{2})',
+    re.DOTALL,
+)
+
+# Second magic byte (after 0x76) -> codec
+STREAM_MAGICS = {
+    0xFF: 'squeeze',
+    0xFE: 'crunch',
+    0xFD: 'crlzh',
+}
+
+# Active LBR directory entry name: 8 + 3 characters, not all blank
+LBR_NAME = re.compile(rb'[\x21-\x7e\xa1-\xfe][\x20-\x7e\xa0-\xfe]{10}')
+
+LBR_SECTOR = 128
+LBR_ENTRY = 32
+
+
+class Recovered(namedtuple('Recovered', [
+    'offset',  # Offset of the member's header (or LBR data) in the file
+    'source',  # 'lbr', 'arc', 'squeeze', 'crunch' or 'crlzh'
+    'filename',  # Stored or embedded name, made safe for writing
+    'data',  # Decoded data
+    'verified',  # True if a CRC or checksum confirmed the data
+])):
+    """A member recovered from a damaged file."""
+    __slots__ = ()
+
+
+def salvage(path: str | Path, *, limits=None) -> list[Recovered]:
+    """
+    Recover every member that can still be found in a damaged file.
+
+    Args:
+        path: File to search (any format; typically a damaged ARC or LBR)
+        limits: Optional un80.limits.Limits applied to each decode; a
+            candidate that passes a limit is skipped
+
+    Returns:
+        Recovered members in file order
+    """
+    with open(path, 'rb') as f:
+        try:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return []  # Empty file
+    with buf:
+        return salvage_buffer(buf, limits=limits)
+
+
+def salvage_buffer(buf, *, limits=None) -> list[Recovered]:
+    """
+    Recover members from bytes or a memory map (see salvage).
+
+    Args:
+        buf: File contents (bytes, bytearray or mmap)
+        limits: Optional un80.limits.Limits applied to each decode
+
+    Returns:
+        Recovered members in file order
+    """
+    claimed = _Claims()
+    recovered = _salvage_lbr(buf, claimed, limits)
+    recovered += _salvage_arc(buf, claimed, limits)
+    recovered += _salvage_streams(buf, claimed, limits)
+    recovered.sort(key=lambda member: member.offset)
+    return recovered
+
+
+class _Claims:
+    """Sorted, non-overlapping (start, end) ranges owned by recovered members."""
+
+    def __init__(self):
+        self.starts: list[int] = []
+        self.ends: list[int] = []
+
+    def add(self, start: int, end: int) -> None:
+        i = bisect_right(self.starts, start)
+        insort(self.starts, start)
+        self.ends.insert(i, end)
+
+    def end_of(self, pos: int) -> int | None:
+        """End of the range containing pos, or None if pos is unclaimed."""
+        i = bisect_right(self.starts, pos) - 1
+        if i >= 0 and pos < self.ends[i]:
+            return self.ends[i]
+        return None
+
+    def next_start(self, pos: int, default: int) -> int:
+        """Start of the first range after pos."""
+        i = bisect_right(self.starts, pos)
+        return self.starts[i] if i < len(self.starts) else default
+
+
+def _safe_name(name: str, offset: int) -> str:
+    """A name that stays inside the output directory."""
+    name = name.replace('/', '_').replace('\\', '_').strip('. ')
+    return name or f"{offset:08X}.bin"
+
+
+def _decode(codec: str, data: bytes, limits):
+    """Decode a single-file stream, or None if it will not decode."""
+    try:
+        return formats.decoder(codec)(data, limits=limits)
+    except Exception:
+        # Damaged data can upset any decoder, and a LimitExceeded only
+        # means this candidate is not worth recovering
+        return None
+
+
+def _salvage_lbr(buf, claimed: _Claims, limits) -> list[Recovered]:
+    """Members listed in an LBR directory, however damaged its header."""
+    if buf[:12] != b'\x00' + b' ' * 11:
+        return []
+    size = len(buf)
+
+    # The stated directory length is trusted only as far as the file
+    # goes, and the directory cannot run on into its first member
+    dir_sectors = int.from_bytes(buf[14:16], 'little')
+    dir_end = min(max(dir_sectors, 1) * LBR_SECTOR, size)
+
+    recovered = []
+    pos = 0
+    while pos + 2 * LBR_ENTRY <= dir_end:
+        pos += LBR_ENTRY
+        entry = buf[pos:pos + LBR_ENTRY]
+        if entry[0] != 0 or not LBR_NAME.fullmatch(entry, 1, 12):
+            continue
+        index = int.from_bytes(entry[12:14], 'little')
+        length = int.from_bytes(entry[14:16], 'little')
+        crc = int.from_bytes(entry[16:18], 'little')
+        start = index * LBR_SECTOR
+        end = start + length * LBR_SECTOR
+        if not length or start <= pos or start >= size or claimed.end_of(start) is not None:
+            continue
+        dir_end = min(dir_end, start)
+
+        if end > size:
+            # Truncated: keep what there is
+            end = size
+            data = buf[start:end]
+            verified = False
+        else:
+            data = buf[start:end]
+            if crc and crc16_xmodem(data) != crc:
+                continue
+            data = data[:max(len(data) - entry[26], 0)]  # Less the pad count
+            verified = bool(crc)
+
+        name = ''.join(chr(b & 0x7F) for b in entry[1:9]).strip()
+        ext = ''.join(chr(b & 0x7F) for b in entry[9:12]).strip()
+        filename = f"{name}.{ext}" if ext else name
+
+        codec = detect_compression(data[:2])
+        if codec in formats.COMPRESSED_FORMATS:
+            decoded = _decode(codec, data, limits)
+            if decoded is not None:
+                filename = formats.filename_getter(codec)(data) or filename
+                data = decoded
+
+        claimed.add(start, end)
+        recovered.append(Recovered(start, 'lbr', _safe_name(filename, start), data, verified))
+
+    claimed.add(0, dir_end)
+    return recovered
+
+
+def _salvage_arc(buf, claimed: _Claims, limits) -> list[Recovered]:
+    """ARC members found by their 0x1A markers anywhere in the file."""
+    recovered = []
+    size = len(buf)
+    search = ARC_HEADER.search
+    chain_end = 0  # Where the next member starts if the archive is intact
+    match = search(buf)
+    while match:
+        pos = match.start()
+        end = claimed.end_of(pos)
+        if end is not None:
+            match = search(buf, end)
+            continue
+
+        method = buf[pos + 1]
+        data_offset = pos + 2 + header_size(method)
+        if data_offset >= size:
+            break
+        entry = unpack_header(method, buf[pos + 2:data_offset], data_offset)
+        end = data_offset + entry.compressed_size
+        if method == 2 and entry.original_size != entry.compressed_size:
+            match = search(buf, pos + 1)
+            continue
+        # A member that follows on from the previous one is part of an
+        # intact run of headers, so it is kept even if it is cut short or
+        # fails its CRC. Elsewhere only a CRC match is believed: a stray
+        # 0x1A can carry any sizes.
+        chained = pos == chain_end
+        truncated = end > size
+        if truncated and not chained:
+            match = search(buf, pos + 1)
+            continue
+        end = min(end, size)
+
+        try:
+            data = decompress_member(entry, buf[data_offset:end], limits=limits)
+        except Exception:
+            data = None
+        verified = data is not None and not truncated \
+            and len(data) == entry.original_size and crc16(data) == entry.crc
+        if not verified and not (chained and data):
+            match = search(buf, pos + 1)
+            continue
+
+        claimed.add(pos, end)
+        recovered.append(Recovered(pos, 'arc', _safe_name(entry.filename, pos), data, verified))
+        chain_end = end
+        match = search(buf, end)
+    return recovered
+
+
+def _stream_candidates(buf, claimed: _Claims) -> list[tuple[int, str]]:
+    """(offset, codec) of unclaimed compressed-file headers."""
+    candidates = []
+    search = STREAM_HEADER.search
+    match = search(buf)
+    while match:
+        pos = match.start()
+        end = claimed.end_of(pos)
+        if end is not None:
+            match = search(buf, end)
+            continue
+        candidates.append((pos, STREAM_MAGICS[buf[pos + 1]]))
+        match = search(buf, pos + 1)
+    return candidates
+
+
+def _salvage_streams(buf, claimed: _Claims, limits) -> list[Recovered]:
+    """Squeezed, crunched and CrLZH files found by their magic."""
+    recovered = []
+    candidates = _stream_candidates(buf, claimed)
+    for i, (pos, codec) in enumerate(candidates):
+        # A stream's length is not recorded: it runs at most to the next
+        # candidate or recovered member
+        end = claimed.next_start(pos, len(buf))
+        if i + 1 < len(candidates):
+            end = min(end, candidates[i + 1][0])
+        data = buf[pos:end]
+
+        decoded = _decode(codec, data, limits)
+        if not decoded:
+            continue
+        verified = False
+        if codec == 'squeeze':
+            # The header holds the 16-bit sum of the decoded bytes
+            verified = sum(decoded) & 0xFFFF == int.from_bytes(data[2:4], 'little')
+            if not verified and end < len(buf):
+                continue
+
+        filename = formats.filename_getter(codec)(data) or ''
+        recovered.append(Recovered(pos, codec, _safe_name(filename, pos), decoded, verified))
+    return recovered
@@ -0,0 +1,155 @@
+"""
+Directory scanner for format detection over large collections.
+
+Walks a tree with os.scandir and reads only the first few bytes of each
+file, on a thread pool so that filesystem latency overlaps. Files are
+classified by magic bytes first and extension second, so misnamed
+compressed files are still recognised. For squeezed, crunched and
+CrLZH files the original filename embedded in the header is reported.
+
+Results are produced in walk order as they become available, so a
+report can be streamed while the scan is still running.
+"""
+
+from __future__ import annotations
+
+import os
+from collections import deque, namedtuple
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+
+from . import formats
+
+# Bytes read from each file; covers the longest embedded filename header
+HEADER_SIZE = 128
+
+# Default number of reader threads
+SCAN_WORKERS = 16
+
+# Files classified per pool task (amortises the per-task overhead)
+SCAN_BATCH = 64
+
+
+class ScanResult(namedtuple('ScanResult', [
+    'path',  # File path (str)
+    'format',  # Format name from formats.classify, or None
+    'original_name',  # Filename embedded in a compressed header, or None
+    'size',  # File size in bytes
+    'error',  # OSError message if the file could not be read, else None
+])):
+    """Classification of a single file."""
+    __slots__ = ()
+
+
+def walk_files(root: str | os.PathLike) -> Iterator[tuple[str, int]]:
+    """
+    Yield (path, size) for every regular file under root.
+
+    Symbolic links are not followed. Directories that cannot be read
+    are skipped.
+    """
+    stack = [os.fspath(root)]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+
+        subdirs = []
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry.path, entry.stat(follow_symlinks=False).st_size
+            except OSError:
+                continue
+        # Visit subdirectories in name order
+        stack.extend(reversed(subdirs))
+
+
+def classify_file(path: str, size: int) -> ScanResult:
+    """
+    Read the header of one file and classify it.
+
+    Args:
+        path: File path
+        size: File size (from the directory walk)
+
+    Returns:
+        ScanResult; format is None for unrecognised files
+    """
+    try:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            header = os.read(fd, HEADER_SIZE)
+        finally:
+            os.close(fd)
+    except OSError as e:
+        return ScanResult(path, None, None, size, e.strerror or str(e))
+
+    format_type = formats.classify(header, os.path.basename(path))
+
+    original_name = None
+    if format_type in formats.CODEC_FUNCTIONS:
+        original_name = formats.filename_getter(format_type)(header)
+
+    return ScanResult(path, format_type, original_name, size, None)
+
+
+def scan(
+    root: str | os.PathLike,
+    *,
+    workers: int = SCAN_WORKERS,
+) -> Iterator[ScanResult]:
+    """
+    Classify every file under root.
+
+    Args:
+        root: Directory to scan (a single file is also accepted)
+        workers: Number of threads reading file headers
+
+    Yields:
+        ScanResult for each file, in walk order
+    """
+    if os.path.isfile(root):
+        yield classify_file(os.fspath(root), os.path.getsize(root))
+        return
+
+    # Load the filename decoders once, before the threads need them
+    for codec in formats.CODEC_FUNCTIONS:
+        formats.load(codec)
+
+    batches = _batches(walk_files(root), SCAN_BATCH)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Keep every thread busy with a batch while one is reported
+        pending = deque()
+        for batch in batches:
+            pending.append(executor.submit(_classify_batch, batch))
+            if len(pending) >= 2 * workers:
+                break
+        while pending:
+            results = pending.popleft().result()
+            batch = next(batches, None)
+            if batch is not None:
+                pending.append(executor.submit(_classify_batch, batch))
+            yield from results
+
+
+def _classify_batch(batch: list[tuple[str, int]]) -> list[ScanResult]:
+    """Classify a list of (path, size) pairs on one worker thread."""
+    return [classify_file(path, size) for path, size in batch]
+
+
+def _batches(files: Iterator[tuple[str, int]], n: int) -> Iterator[list[tuple[str, int]]]:
+    """Group the walk into lists of up to n files."""
+    batch = []
+    for item in files:
+        batch.append(item)
+        if len(batch) == n:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -0,0 +1,178 @@
+"""
+Cost-ordered dispatch of extraction work to an executor.
+
+Submitting a mixed collection in walk order tends to leave one worker
+decoding a large CrLZH file at the end of a run while the others sit
+idle. The headers already say roughly how long each piece of work will
+take: ARC headers give the decoded size and method, LBR directories the
+stored length (and the middle letter of the name the codec), and a
+single file's size is known from the directory walk. estimate_member
+and estimate_file turn these into a Task's cost (decoded bytes times
+the codec's COST_FACTORS entry) and memory (the decoded bytes that will
+be held until the result is written).
+
+largest_first then submits tasks in descending cost, so that the long
+ones start first and the short ones fill in around them, and only
+admits a task while the memory of the results in flight stays within a
+budget. The biggest task is always admitted when nothing else is in
+flight, so a single member larger than the budget still runs (alone).
+
+The cost factors are nanoseconds per decoded byte, as measured by
+benchmarks/costs.py; only their ratios matter.
+"""
+
+from __future__ import annotations
+
+from collections import deque, namedtuple
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, wait
+from typing import Any
+
+from . import formats
+from .arc import METHOD_CODECS
+
+# Codec -> decoding time in ns per decoded byte (benchmarks/costs.py).
+# 'stored' is a worker reading the bytes back; 'rle' is ARC method 3.
+COST_FACTORS = {
+    'stored': 1.45,
+    'rle': 9.16,
+    'squeeze': 275,
+    'squash': 302,
+    'crunch': 449,
+    'crlzh': 1890,
+}
+
+# Everything not measured: BASIC files, disk images (which may hold
+# compressed files) and unknown ARC methods
+DEFAULT_COST_FACTOR = COST_FACTORS['crunch']
+
+# Codec -> typical decoded size per stored byte (benchmarks/costs.py),
+# for LBR members and single files whose headers give no decoded size
+EXPANSION = {
+    'squeeze': 1.3,
+    'crunch': 1.7,
+    'crlzh': 1.8,
+}
+
+# Default limit on the estimated size of results in flight
+MEMORY_BUDGET = 256 * 1024 * 1024
+
+
+class Task(namedtuple('Task', [
+    'cost',  # Estimated decoding time (COST_FACTORS units)
+    'memory',  # Estimated bytes held from submission until the result is consumed
+    'args',  # Arguments for the work function
+])):
+    """A unit of work with its estimated cost."""
+    __slots__ = ()
+
+
+def estimate(codec: str, decoded_size: int) -> float:
+    """Estimated cost of decoding decoded_size bytes with a codec."""
+    return decoded_size * COST_FACTORS.get(codec, DEFAULT_COST_FACTOR)
+
+
+def lbr_codec(filename: str) -> str:
+    """Codec of an LBR member going by its name ('stored' if not compressed)."""
+    _, dot, ext = filename.rpartition('.')
+    if dot and len(ext) == 3:
+        return formats.MIDDLE_LETTERS.get(ext[1].lower(), 'stored')
+    return 'stored'
+
+
+def estimate_member(format_type: str, entry: Any, args: tuple = ()) -> Task:
+    """
+    Task for one LBR or ARC member, from its directory entry alone.
+
+    Stored members are not read into memory by jobs.prepare_member, so
+    they take no memory.
+
+    Args:
+        format_type: 'lbr' or 'arc'
+        entry: LbrEntry or ArcEntry
+        args: Arguments for the work function
+
+    Returns:
+        Task
+    """
+    if format_type == 'arc':
+        codec = METHOD_CODECS.get(entry.method, 'unknown')
+        size = entry.original_size
+    else:
+        codec = lbr_codec(entry.filename)
+        size = int(entry.data_size * EXPANSION.get(codec, 1))
+    memory = 0 if codec == 'stored' else size
+    return Task(estimate(codec, size), memory, args)
+
+
+def estimate_file(format_type: str, size: int, args: tuple = ()) -> Task:
+    """
+    Task for decoding a whole file (single compressed file, BASIC file
+    or disk image) of the given size.
+    """
+    size = int(size * EXPANSION.get(format_type, 1))
+    return Task(estimate(format_type, size), size, args)
+
+
+def largest_first(
+    executor: Executor,
+    fn: Callable,
+    tasks: Iterable[Task],
+    *,
+    max_pending: int,
+    memory_budget: int = MEMORY_BUDGET,
+    discard: Callable[[Any], None] | None = None,
+) -> Iterator[tuple[Task, Future]]:
+    """
+    Run fn(*task.args) for every task, most expensive first.
+
+    Up to max_pending tasks are submitted at a time, as long as their
+    memory adds up to no more than memory_budget (one task is always
+    let in when nothing is in flight). A task's memory counts until the
+    consumer asks for the next result, so results waiting to be written
+    hold back further submissions.
+
+    If the iterator is closed early, tasks not yet started are
+    cancelled and, if discard is given, it is called with the result
+    of every task that finished without being yielded.
+
+    Args:
+        executor: Executor to submit to
+        fn: Work function (picklable for a process pool)
+        tasks: Tasks to run
+        max_pending: Most tasks submitted at once (e.g. twice the workers)
+        memory_budget: Bytes of estimated results allowed in flight
+        discard: Frees a result that will not be consumed
+
+    Yields:
+        (task, future) pairs in completion order; the future is done
+    """
+    queue = deque(sorted(tasks, key=lambda task: task.cost, reverse=True))
+    running: dict[Future, Task] = {}
+    in_flight = 0
+
+    try:
+        while queue or running:
+            # Admit in cost order; the next task waits for memory rather
+            # than being overtaken by smaller ones, so it is not starved
+            while queue and len(running) < max_pending:
+                task = queue[0]
+                if running and in_flight + task.memory > memory_budget:
+                    break
+                queue.popleft()
+                running[executor.submit(fn, *task.args)] = task
+                in_flight += task.memory
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                task = running.pop(future)
+                yield task, future
+                in_flight -= task.memory
+    finally:
+        for future in running:
+            if future.cancel() or discard is None:
+                continue
+            try:
+                discard(future.result())
+            except Exception:
+                pass
@@ -0,0 +1,322 @@
+"""
+HTTP extraction service.
+
+A small standard-library HTTP/1.1 server in front of a pool of warm
+worker processes, so interpreter startup and codec imports are paid
+once instead of per file. Archives are addressed relative to a root
+directory:
+
+    GET /list?path=DIR/FILE.LBR              JSON list of entries
+    GET /extract?path=FILE.ARC&member=NAME   one decoded member
+    GET /zip?path=FILE.LBR                   whole archive as a .zip
+
+Responses use chunked transfer encoding and connections are kept
+alive between requests. Large decoded members come back from the
+workers in shared memory rather than through the pool's pipe (see
+un80.jobs), so the server process copies them out a chunk at a time.
+If the server is given Limits, each request gets a fresh copy of them;
+a member that passes one is answered with 422 Unprocessable Entity (or,
+once streaming, a dropped connection).
+"""
+
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from dataclasses import asdict
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+from urllib.parse import parse_qs, urlsplit
+
+from . import __version__, jobs
+from .convert import write_zip
+from .limits import LimitExceeded, Limits
+from .stream import CHUNK_SIZE, Member
+
+# Number of members decoded ahead of the one being sent in /zip
+ZIP_LOOKAHEAD = 4
+
+
+class RequestError(Exception):
+    """A request that cannot be served; carries the HTTP status."""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _attachment(filename: str) -> str:
+    """Content-Disposition value for a download, safe for any member name."""
+    # Names come from the archive: drop CR, LF and other control
+    # characters, then escape what is special in a quoted-string
+    filename = ''.join(c for c in filename if c.isprintable())
+    filename = filename.replace('\\', '\\\\').replace('"', '\\"')
+    return f'attachment; filename="{filename}"'
+
+
+class _ChunkedWriter:
+    """Write-only file object that emits HTTP chunks (for zipfile)."""
+
+    def __init__(self, handler: 'RequestHandler'):
+        self.handler = handler
+
+    def write(self, data: bytes) -> int:
+        self.handler.write_chunk(data)
+        return len(data)
+
+    def flush(self) -> None:
+        self.handler.wfile.flush()
+
+
+class ExtractionServer(ThreadingHTTPServer):
+    """Threaded HTTP server that decodes archives on an executor."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple[str, int],
+        root: Path,
+        executor: Executor,
+        limits: Limits | None = None,
+    ):
+        super().__init__(address, RequestHandler)
+        self.root = root.resolve()
+        self.executor = executor
+        self.limits = limits
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """Routes list, extract and zip requests."""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = f'80un/{__version__}'
+    server: ExtractionServer
+    _streaming = False  # Response headers already sent
+
+    def do_GET(self) -> None:
+        # One handler serves every request on a keep-alive connection
+        self._streaming = False
+        url = urlsplit(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        routes = {
+            '/list': self._list,
+            '/extract': self._extract,
+            '/zip': self._zip,
+        }
+
+        route = routes.get(url.path)
+        try:
+            if route is None:
+                raise RequestError(HTTPStatus.NOT_FOUND, f"Unknown endpoint: {url.path}")
+            route(params)
+        except Exception as e:
+            if self._streaming:
+                # Too late for an error status; drop the connection so the
+                # client sees a truncated chunked body
+                self.log_error("Error while streaming: %s", e)
+                self.close_connection = True
+            elif isinstance(e, RequestError):
+                self.send_error(e.status, str(e))
+            elif isinstance(e, LimitExceeded):
+                self.send_error(HTTPStatus.UNPROCESSABLE_ENTITY, str(e))
+            else:
+                self.send_error(HTTPStatus.INTERNAL_SERVER_ERROR, str(e))
+
+    def _resolve(self, params: dict[str, str]) -> tuple[Path, str]:
+        """Map the path parameter to an archive under the root."""
+        rel = params.get('path')
+        if not rel:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "Missing path parameter")
+
+        path = (self.server.root / rel).resolve()
+        if self.server.root not in path.parents or not path.is_file():
+            raise RequestError(HTTPStatus.NOT_FOUND, f"No such archive: {rel}")
+
+        format_type = self._run(jobs.detect, path)
+        if format_type not in ('lbr', 'arc'):
+            raise RequestError(HTTPStatus.UNSUPPORTED_MEDIA_TYPE, f"Not an archive: {rel}")
+        return path, format_type
+
+    def _run(self, fn, *args):
+        return self.server.executor.submit(fn, *args).result()
+
+    def _limits(self) -> Limits | None:
+        """Fresh limits for one request."""
+        return self.server.limits.copy() if self.server.limits is not None else None
+
+    def _list(self, params: dict[str, str]) -> None:
+        path, format_type = self._resolve(params)
+        entries = self._run(jobs.list_entries, path, format_type)
+        body = json.dumps({
+            'format': format_type,
+            'entries': [{'filename': e.filename, **asdict(e)} for e in entries],
+        }).encode()
+        self.send_chunked('application/json', [body])
+
+    def _extract(self, params: dict[str, str]) -> None:
+        path, format_type = self._resolve(params)
+        name = params.get('member')
+        if not name:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "Missing member parameter")
+
+        entries = self._run(jobs.list_entries, path, format_type)
+        matches = [e for e in entries if e.filename.upper() == name.upper()]
+        if not matches:
+            raise RequestError(HTTPStatus.NOT_FOUND, f"No such member: {name}")
+
+        (filename, _, data, offset, size), _ = self._run(
+            jobs.prepare_member_limited, path, format_type, matches[0],
+            params.get('text') == '1', self._limits(), True,
+        )
+        if data is not None:
+            chunks: Iterable[bytes] = jobs.shared_chunks(data)
+        else:
+            chunks = self._read_chunks(path, offset, size)
+        self.send_chunked(
+            'application/octet-stream', chunks,
+            {'Content-Disposition': _attachment(filename)},
+        )
+
+    def _read_chunks(self, path: Path, offset: int, size: int) -> Iterator[bytes]:
+        while size > 0:
+            chunk = self._run(jobs.read_range, path, offset, min(CHUNK_SIZE, size))
+            if not chunk:
+                return
+            offset += len(chunk)
+            size -= len(chunk)
+            yield chunk
+
+    def _zip(self, params: dict[str, str]) -> None:
+        path, format_type = self._resolve(params)
+        entries = iter(self._run(jobs.list_entries, path, format_type))
+        text = params.get('text') == '1'
+        # Usage is added as each member completes; members already in
+        # flight were submitted with the totals known at the time
+        limits = self._limits()
+
+        # Keep a few members decoding on the pool while one is written
+        pending: deque[tuple[Any, Future]] = deque()
+
+        def submit_next() -> None:
+            entry = next(entries, None)
+            if entry is not None:
+                pending.append((entry, self.server.executor.submit(
+                    jobs.prepare_member_limited, path, format_type, entry, text, limits,
+                    True,
+                )))
+
+        def members() -> Iterator[Member]:
+            for _ in range(ZIP_LOOKAHEAD):
+                submit_next()
+            try:
+                while pending:
+                    entry, future = pending.popleft()
+                    (filename, codec, data, offset, size), usage = future.result()
+                    if limits is not None:
+                        limits.charge(*usage)
+                    submit_next()
+                    if data is None:
+                        chunks = self._read_chunks(path, offset, size)
+                    else:
+                        chunks = jobs.shared_chunks(data)
+                    yield Member(entry=entry, filename=filename, codec=codec, chunks=chunks)
+            finally:
+                # Members decoded for a response that was abandoned
+                for _, future in pending:
+                    try:
+                        jobs.discard(future.result()[0][2])
+                    except Exception:
+                        pass
+
+        self._start_chunked('application/zip', {
+            'Content-Disposition': _attachment(f'{path.stem}.zip'),
+        })
+        write_zip(members(), _ChunkedWriter(self))
+        self._end_chunked()
+
+    def send_chunked(
+        self,
+        content_type: str,
+        chunks: Iterable[bytes],
+        headers: dict[str, str] | None = None,
+    ) -> None:
+        """Send a 200 response body using chunked transfer encoding."""
+        # Pull the first chunk before committing to a 200 response
+        chunks = iter(chunks)
+        first = next(chunks, b'')
+        self._start_chunked(content_type, headers)
+        self.write_chunk(first)
+        for chunk in chunks:
+            self.write_chunk(chunk)
+        self._end_chunked()
+
+    def _start_chunked(self, content_type: str, headers: dict[str, str] | None = None) -> None:
+        self._streaming = True
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Transfer-Encoding', 'chunked')
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+
+    def write_chunk(self, data: bytes) -> None:
+        """Write one chunk of a chunked response."""
+        if data:
+            self.wfile.write(b'%X\r\n%s\r\n' % (len(data), data))
+
+    def _end_chunked(self) -> None:
+        self.wfile.write(b'0\r\n\r\n')
+        self.wfile.flush()
+
+
+def make_server(
+    host: str = '127.0.0.1',
+    port: int = 8080,
+    root: str | Path = '.',
+    workers: int | None = None,
+    limits: Limits | None = None,
+) -> ExtractionServer:
+    """
+    Create a server with a warmed-up process pool.
+
+    Args:
+        host: Address to bind
+        port: Port to bind (0 picks a free port)
+        root: Directory archives are served from
+        workers: Number of worker processes (default: CPU count)
+        limits: Resource limits applied to each request
+
+    Returns:
+        ExtractionServer; call serve_forever() and, when done,
+        server_close() and server.executor.shutdown()
+    """
+    workers = workers or os.cpu_count() or 1
+    executor = ProcessPoolExecutor(max_workers=workers)
+    # Start every worker now and load the codecs into it
+    for future in [executor.submit(jobs.warm_up) for _ in range(workers)]:
+        future.result()
+    return ExtractionServer((host, port), Path(root), executor, limits)
+
+
+def serve(
+    host: str = '127.0.0.1',
+    port: int = 8080,
+    root: str | Path = '.',
+    workers: int | None = None,
+    limits: Limits | None = None,
+) -> None:
+    """Run the extraction service until interrupted."""
+    server = make_server(host, port, root, workers, limits)
+    print(f"Serving {server.root} on http://{host}:{server.server_address[1]}/",
+          file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.executor.shutdown()
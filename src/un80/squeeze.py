@@ -21,11 +21,17 @@ Huffman tree:
 RLE encoding (RLE90):
 - 0x90 is the escape byte
 - 0x90 0x00 = literal 0x90
-- 0x90 N = repeat previous byte N times (N > 0)
+- 0x90 N = previous byte occurs N times in all (N > 0)
 """
 
+from __future__ import annotations
+
 import struct
-from typing import Iterator
+import sys
+from typing import BinaryIO
+
+from .cpm import OutputSizeError, copy_into
+from .stream import read_source
 
 SQUEEZE_MAGIC = 0x76FF
 RLE_MARKER = 0x90
@@ -36,121 +42,248 @@ class SqueezeError(Exception):
     """Error during squeeze decompression."""
 
 
-class BitReader:
-    """Read individual bits from a byte stream, LSB first."""
+# Symbols in a decoding table. Literal bytes are below 256 and are just
+# appended; everything else takes the slower path.
+STOP = EOF_VALUE  # EOF, an invalid code, or the end of the data
+MARKER = 256 + RLE_MARKER  # RLE90 marker; the next symbol is a count
+SUBTREE = 512  # + node index: the code is longer than the table's bits
 
-    def __init__(self, data: bytes, offset: int = 0):
-        self.data = data
-        self.pos = offset
-        self.bit_pos = 8  # Force initial read (like USQ's bpos=99)
-        self.current_byte = 0
+# Longest code resolved by a single table lookup
+MAX_TABLE_BITS = 12
 
-    def read_bit(self) -> int:
-        """Read a single bit LSB-first, returns 0 or 1."""
-        if self.bit_pos >= 8:
-            if self.pos >= len(self.data):
-                raise SqueezeError("Unexpected end of data")
-            self.current_byte = self.data[self.pos]
-            self.pos += 1
-            self.bit_pos = 0
 
-        bit = (self.current_byte >> self.bit_pos) & 1
-        self.bit_pos += 1
-        return bit
+def compile_tree(nodes: list[tuple[int, int]]) -> tuple[list[tuple[int, int]], int]:
+    """
+    Build the lookup table for a squeeze Huffman tree.
 
+    Children that point outside the tree or hold a value above 256 decode
+    as STOP, ending the stream where USQ would have failed.
 
-class HuffmanTree:
-    """Huffman tree for squeeze decompression."""
+    Args:
+        nodes: List of (left, right) child indices.
+               Positive = node index, negative = -(value + 1)
 
-    def __init__(self, nodes: list[tuple[int, int]]):
-        """
-        Initialize with node array.
+    Returns:
+        (table, bits): table has 2**bits (symbol, code length) entries,
+        indexed by the next `bits` bits of input (LSB first). Codes
+        longer than MAX_TABLE_BITS give SUBTREE + the node reached.
+    """
+    count = len(nodes)
+    entries = []  # (code, length, symbol)
+    bits = 1
+    stack = [(0, 0, 0)]  # (node, code so far, depth)
+    while stack:
+        node, code, depth = stack.pop()
+        depth += 1
+        bits = max(bits, depth)
+        for bit, child in enumerate(nodes[node]):
+            child_code = code | (bit << (depth - 1))
+            if child < 0:
+                value = -(child + 1)
+                symbol = MARKER if value == RLE_MARKER else min(value, STOP)
+                entries.append((child_code, depth, symbol))
+            elif child >= count:
+                entries.append((child_code, depth, STOP))
+            elif depth == MAX_TABLE_BITS:
+                entries.append((child_code, depth, SUBTREE + child))
+            else:
+                stack.append((child, child_code, depth))
+
+    table = [(STOP, bits)] * (1 << bits)
+    for code, length, symbol in entries:
+        table[code::1 << length] = [(symbol, length)] * (1 << (bits - length))
+    return table, bits
+
+
+def _walk(
+    nodes: list[tuple[int, int]],
+    node: int,
+    data: bytes,
+    pos: int,
+    buf: int,
+    nbits: int,
+) -> tuple[int, int, int, int]:
+    """
+    Follow a code bit by bit from node (for long codes and RLE counts).
 
-        Args:
-            nodes: List of (left, right) child indices.
-                   Positive = node index, negative = -(value + 1)
-        """
-        self.nodes = nodes
+    Returns:
+        (value, pos, buf, nbits): value is 0-255, or STOP at EOF, an
+        invalid code or the end of the data
+    """
+    count = len(nodes)
+    while True:
+        if not nbits:
+            if pos >= len(data):
+                return STOP, pos, buf, nbits
+            buf = data[pos]
+            pos += 1
+            nbits = 8
+        child = nodes[node][buf & 1]
+        buf >>= 1
+        nbits -= 1
+        if child < 0:
+            return min(-(child + 1), STOP), pos, buf, nbits
+        if child >= count:
+            return STOP, pos, buf, nbits
+        node = child
+
+
+def _next_check(limits, size: int, expected_size: int) -> int:
+    """Output size at which decode_squeezed should next call this."""
+    if size > expected_size:
+        raise OutputSizeError(f"Output exceeds expected size of {expected_size} bytes")
+    if limits is None:
+        return expected_size
+    return min(expected_size, limits.check(size))
+
+
+def decode_squeezed(
+    data: bytes,
+    pos: int,
+    nodes: list[tuple[int, int]],
+    expected_size: int | None = None,
+    limits=None,
+    counters=None,
+) -> bytearray:
+    """
+    Decode a squeeze Huffman bit stream and its RLE90 layer in one pass.
 
-    def decode_symbol(self, bits: BitReader) -> int:
-        """
-        Decode one symbol from the bit stream.
+    Used for squeezed files and for ARC method 4, which store the same
+    tree in different headers. Decoding stops at the EOF symbol, at an
+    invalid code, or where the data runs out.
 
-        Returns:
-            The decoded byte value (0-255) or EOF_VALUE (256)
-        """
-        if not self.nodes:
-            raise SqueezeError("Empty Huffman tree")
+    Args:
+        data: Buffer holding the bit stream
+        pos: Offset of the first byte of the bit stream
+        nodes: Huffman tree (see compile_tree)
+        expected_size: Decoded size if known (e.g. ArcEntry.original_size)
+        limits: Optional un80.limits.Limits for the member being decoded
+        counters: Optional mapping to add huffman_symbols/huffman_bits to
 
-        node_idx = 0
+    Returns:
+        Decoded data, as a bytearray
 
-        while True:
-            if node_idx < 0 or node_idx >= len(self.nodes):
-                raise SqueezeError(f"Invalid node index: {node_idx}")
+    Raises:
+        OutputSizeError: If the output exceeds expected_size
+        LimitExceeded: If limits are given and one is passed
+    """
+    if not nodes:
+        return bytearray()
+
+    table, bits = compile_tree(nodes)
+    mask = (1 << bits) - 1
+    limit = sys.maxsize if expected_size is None else expected_size
+    check = _next_check(limits, 0, limit)
+
+    out = bytearray()
+    append = out.append
+    start = pos
+    buf = nbits = 0
+    extra = 0  # Symbols decoded minus bytes they produced (for counters)
+
+    while True:
+        if nbits < bits:
+            chunk = data[pos:pos + 8]
+            buf |= int.from_bytes(chunk, 'little') << nbits
+            nbits += len(chunk) << 3
+            pos += len(chunk)
+            if len(out) > check:
+                check = _next_check(limits, len(out), limit)
+            if nbits < bits and table[buf & mask][1] > nbits:
+                # The next code runs past the end of the data
+                break
 
-            left, right = self.nodes[node_idx]
-            bit = bits.read_bit()
+        symbol, length = table[buf & mask]
+        buf >>= length
+        nbits -= length
+        if symbol < 256:
+            append(symbol)
+            continue
+
+        if symbol >= SUBTREE:
+            symbol, pos, buf, nbits = _walk(nodes, symbol - SUBTREE, data, pos, buf, nbits)
+            if symbol < 256 and symbol != RLE_MARKER:
+                append(symbol)
+                continue
+        if symbol == STOP:
+            break
+
+        # RLE90 marker: the next symbol is the repeat count
+        count, pos, buf, nbits = _walk(nodes, 0, data, pos, buf, nbits)
+        if count == STOP:
+            # Trailing marker without a count: keep it as a literal
+            append(RLE_MARKER)
+            break
+        if count == 0:
+            append(RLE_MARKER)
+            extra += 1
+        elif count == 1:
+            extra += 2
+        else:
+            out += bytes((out[-1] if out else 0,)) * (count - 1)
+            extra += 3 - count
+            if len(out) > check:
+                check = _next_check(limits, len(out), limit)
 
-            child = right if bit else left
+    if len(out) > check:
+        _next_check(limits, len(out), limit)
 
-            if child < 0:
-                # Leaf node: value is -(child + 1)
-                value = -(child + 1)
-                return value
+    if counters is not None:
+        counters['huffman_symbols'] += len(out) + extra
+        counters['huffman_bits'] += (pos - start) * 8 - nbits
 
-            # Internal node: continue traversal
-            node_idx = child
+    return out
 
 
-def decode_rle(data: Iterator[int]) -> bytes:
+def unsqueeze(data: bytes | BinaryIO, *, counters=None, limits=None) -> bytes:
     """
-    Decode RLE90-encoded data.
+    Decompress squeezed data.
 
     Args:
-        data: Iterator of byte values
+        data: Squeezed file data (including magic header), or an open
+            binary file to read it from
+        counters: Optional mapping to fill in (see un80.counters)
+        limits: Optional un80.limits.Limits to enforce while decoding
 
     Returns:
-        Decoded bytes
-    """
-    result = bytearray()
-    prev_byte = 0
-
-    for byte in data:
-        if byte == RLE_MARKER:
-            try:
-                count = next(data)
-            except StopIteration:
-                # Trailing RLE marker, treat as literal
-                result.append(RLE_MARKER)
-                break
-
-            if count == 0:
-                # Literal 0x90
-                result.append(RLE_MARKER)
-                prev_byte = RLE_MARKER
-            else:
-                # Repeat previous byte count times
-                result.extend([prev_byte] * count)
-        else:
-            result.append(byte)
-            prev_byte = byte
+        Decompressed data
 
-    return bytes(result)
+    Raises:
+        SqueezeError: If decompression fails
+        LimitExceeded: If limits are given and one is passed
+    """
+    return bytes(_unsqueeze(data, counters, limits))
 
 
-def unsqueeze(data: bytes) -> bytes:
+def unsqueeze_into(src: bytes | BinaryIO, dst, *, counters=None, limits=None) -> int:
     """
-    Decompress squeezed data.
+    Decompress squeezed data into a caller's buffer.
+
+    Decoding stops as soon as the output would overflow dst.
 
     Args:
-        data: Squeezed file data (including magic header)
+        src: Squeezed file data (including magic header), or an open
+            binary file to read it from
+        dst: Writable buffer (bytearray, mmap, SharedMemory.buf, ...)
+        counters: Optional mapping to fill in (see un80.counters)
+        limits: Optional un80.limits.Limits to enforce while decoding
 
     Returns:
-        Decompressed data
+        Number of bytes written to the start of dst
 
     Raises:
         SqueezeError: If decompression fails
+        OutputSizeError: If the output does not fit in dst
+        LimitExceeded: If limits are given and one is passed
     """
+    with memoryview(dst) as view:
+        size = view.nbytes
+    return copy_into(_unsqueeze(src, counters, limits, size), dst)
+
+
+def _unsqueeze(data, counters, limits, expected_size: int | None = None) -> bytearray:
+    """unsqueeze without the copy to bytes."""
+    data = read_source(data)
     if len(data) < 4:
         raise SqueezeError("Data too short")
 
@@ -183,34 +316,21 @@ def unsqueeze(data: bytes) -> bytes:
         raise SqueezeError(f"Invalid node count: {node_count}")
 
     # Read Huffman tree nodes
-    nodes = []
-    for _ in range(node_count):
-        if pos + 4 > len(data):
-            raise SqueezeError("Data too short for Huffman tree")
-        left, right = struct.unpack('<hh', data[pos:pos+4])
-        nodes.append((left, right))
-        pos += 4
-
-    # Build tree and decode
-    tree = HuffmanTree(nodes)
-    bits = BitReader(data, pos)
-
-    # Decode Huffman symbols
-    decoded_symbols = []
-    try:
-        while True:
-            symbol = tree.decode_symbol(bits)
-            if symbol == EOF_VALUE:
-                break
-            if symbol > 255:
-                raise SqueezeError(f"Invalid symbol: {symbol}")
-            decoded_symbols.append(symbol)
-    except SqueezeError:
-        # End of data, might be okay
-        pass
-
-    # Decode RLE
-    result = decode_rle(iter(decoded_symbols))
+    tree_end = pos + 4 * node_count
+    if tree_end > len(data):
+        raise SqueezeError("Data too short for Huffman tree")
+    nodes = list(struct.iter_unpack('<hh', data[pos:tree_end]))
+
+    if limits is not None:
+        limits.begin(len(data))
+    result = decode_squeezed(data, tree_end, nodes, expected_size, limits, counters)
+    if limits is not None:
+        limits.end(len(result))
+
+    if counters is not None:
+        counters['huffman_nodes'] += node_count
+        counters['input_bytes'] += len(data)
+        counters['output_bytes'] += len(result)
 
     return result
 
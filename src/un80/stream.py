@@ -0,0 +1,305 @@
+"""
+Streaming helpers shared by the archive readers.
+
+Archive members are produced one at a time as Member objects whose
+data is an iterator of byte chunks. Callers can write each member out
+(or discard it) before the next one is read, so peak memory is bounded
+by a single member rather than the whole archive.
+"""
+
+from __future__ import annotations
+
+import errno
+import io
+import os
+import sys
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from typing import Any, BinaryIO
+
+from .cpm import strip_cpm_eof, crlf_to_lf
+
+# Read size used when copying stored member data
+CHUNK_SIZE = 64 * 1024
+
+# Bytes a PipeReader keeps so that it can seek back over them
+LOOKBEHIND = 64 * 1024
+
+
+@dataclass
+class Member:
+    """A single archive member, decoded lazily."""
+    entry: Any  # LbrEntry or ArcEntry
+    filename: str  # Output filename (original name if embedded in header)
+    codec: str  # 'stored', 'squeeze', 'crunch', 'crlzh', ...
+    chunks: Iterator[bytes]  # Member data; consume before the next member
+
+    def read(self) -> bytes:
+        """Consume the chunk iterator and return the whole member."""
+        return b''.join(self.chunks)
+
+
+class PipeReader:
+    """
+    Read-only file over a stream that cannot seek, such as stdin.
+
+    Seeking forward reads and discards the data in between. Seeking back
+    works within the last `lookbehind` bytes read, which are kept; further
+    back raises io.UnsupportedOperation. That is enough for the ARC
+    reader, which reads headers and data in order, and for the LBR
+    reader, which reads members in file order when seekable() is False.
+
+    Args:
+        raw: Binary stream to read (e.g. sys.stdin.buffer)
+        name: Name to report for the stream
+        lookbehind: Bytes kept for seeking back
+    """
+
+    def __init__(self, raw: BinaryIO, name: str = 'stdin', lookbehind: int = LOOKBEHIND):
+        self.raw = raw
+        self.name = name
+        self.lookbehind = lookbehind
+        self._kept = bytearray()  # The last bytes read from raw
+        self._end = 0  # Bytes read from raw so far
+        self._pos = 0
+
+    def seekable(self) -> bool:
+        return False
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, pos: int, whence: int = 0) -> int:
+        if whence == 1:
+            pos += self._pos
+        elif whence != 0:
+            raise io.UnsupportedOperation("cannot seek from the end of a pipe")
+        if pos < self._end - len(self._kept):
+            raise io.UnsupportedOperation(
+                f"cannot seek back to {pos}: only the last {self.lookbehind} bytes are kept")
+        while self._end < pos:
+            if not self._fill(min(pos - self._end, CHUNK_SIZE)):
+                break  # Past the end: reads return b''
+        self._pos = pos
+        return pos
+
+    def read(self, size: int = -1) -> bytes:
+        out = bytearray()
+        if self._pos < self._end:
+            start = len(self._kept) - (self._end - self._pos)
+            stop = len(self._kept) if size < 0 else start + size
+            out += self._kept[start:stop]
+        while size < 0 or len(out) < size:
+            chunk = self._fill(CHUNK_SIZE if size < 0 else size - len(out))
+            if not chunk:
+                break
+            out += chunk
+        self._pos += len(out)
+        return bytes(out)
+
+    def _fill(self, size: int) -> bytes:
+        """Read up to size bytes from raw, keeping the tail of what was read."""
+        chunk = self.raw.read(size)
+        self._end += len(chunk)
+        self._kept += chunk
+        if len(self._kept) > self.lookbehind:
+            del self._kept[:len(self._kept) - self.lookbehind]
+        return chunk
+
+    def close(self) -> None:
+        pass  # The stream belongs to the caller
+
+
+def read_source(data: bytes | BinaryIO) -> bytes:
+    """data itself, or the rest of an open binary file (a pipe, an archive member)."""
+    return data.read() if hasattr(data, 'read') else data
+
+
+class open_source:
+    """
+    Context manager that opens a path for reading, or passes through an
+    already open binary file (which is left open on exit).
+
+    Lets the archive readers take an archive held in memory, such as a
+    file read out of a disk image, without a temporary file. Member
+    offsets are absolute, so a passed file is rewound to its start.
+    """
+
+    def __init__(self, source: str | os.PathLike | BinaryIO):
+        self._owned = not hasattr(source, 'read')
+        self.file = open(source, 'rb') if self._owned else source
+
+    def __enter__(self) -> BinaryIO:
+        if not self._owned:
+            self.file.seek(0)
+        return self.file
+
+    def __exit__(self, *exc_info) -> None:
+        if self._owned:
+            self.file.close()
+
+
+class FileRange:
+    """
+    Iterator over a byte range of an open file, in chunks.
+
+    Files with a descriptor are read with os.pread, which leaves their
+    position alone, so the range can be read from another thread while
+    f is in use (un80.pipeline relies on this). Other files are
+    re-positioned before every read, so the iterator stays correct if f
+    is used for something else between chunks. Stops early if the file
+    is truncated.
+
+    Writers that hold a file descriptor can call copy_to instead of
+    iterating, which copies the remaining bytes inside the kernel.
+    """
+
+    __slots__ = ('file', 'offset', 'size', 'chunk_size')
+
+    def __init__(self, f: BinaryIO, offset: int, size: int, chunk_size: int = CHUNK_SIZE):
+        self.file = f
+        self.offset = offset
+        self.size = size
+        self.chunk_size = chunk_size
+
+    def __iter__(self) -> FileRange:
+        return self
+
+    def __next__(self) -> bytes:
+        if self.size <= 0:
+            raise StopIteration
+        fd = self.source_fd()
+        if fd is not None:
+            chunk = os.pread(fd, min(self.chunk_size, self.size), self.offset)
+        else:
+            self.file.seek(self.offset)
+            chunk = self.file.read(min(self.chunk_size, self.size))
+        if not chunk:
+            self.size = 0
+            raise StopIteration
+        self.offset += len(chunk)
+        self.size -= len(chunk)
+        return chunk
+
+    def source_fd(self) -> int | None:
+        """Descriptor to pread the file through, or None to seek and read."""
+        if not hasattr(os, 'pread'):
+            return None
+        try:
+            return self.file.fileno()
+        except (AttributeError, OSError):
+            return None  # In-memory file
+
+    def copy_to(self, fd: int) -> int:
+        """
+        Write the rest of the range to fd at its current position.
+
+        Args:
+            fd: File descriptor open for writing
+
+        Returns:
+            Number of bytes written (less than the range if the file is
+            truncated)
+        """
+        src = self.source_fd()
+        if src is None:
+            copied = 0
+            for chunk in self:
+                write_all(fd, chunk)
+                copied += len(chunk)
+            return copied
+
+        copied = copy_range(src, self.offset, self.size, fd)
+        self.offset += copied
+        self.size = 0
+        return copied
+
+
+def iter_chunks(
+    f: BinaryIO,
+    offset: int,
+    size: int,
+    chunk_size: int = CHUNK_SIZE,
+) -> FileRange:
+    """Iterate over size bytes of f starting at offset (see FileRange)."""
+    return FileRange(f, offset, size, chunk_size)
+
+
+def copy_range(src: int, offset: int, size: int, dst: int) -> int:
+    """
+    Copy size bytes at offset in one file to the current position of another.
+
+    Uses os.copy_file_range where the kernel and file systems allow it,
+    then os.sendfile, and otherwise a pread/write loop; whatever one
+    method has copied, the next one carries on from. The position of
+    src is not changed.
+
+    Args:
+        src: File descriptor to read from
+        offset: Where to start reading in src
+        size: Number of bytes to copy
+        dst: File descriptor to write to
+
+    Returns:
+        Number of bytes copied (less than size if src ends first)
+    """
+    copied = 0
+    for copy in _COPY_METHODS:
+        if copy is None:
+            continue
+        try:
+            while copied < size:
+                n = copy(src, dst, offset + copied, size - copied)
+                if not n:
+                    return copied  # End of src
+                copied += n
+            return copied
+        except OSError as e:
+            if e.errno not in _FALLBACK_ERRNOS:
+                raise
+    return copied
+
+
+def _copy_file_range(src: int, dst: int, offset: int, count: int) -> int:
+    return os.copy_file_range(src, dst, count, offset)
+
+
+def _sendfile(src: int, dst: int, offset: int, count: int) -> int:
+    return os.sendfile(dst, src, offset, count)
+
+
+def _pread_write(src: int, dst: int, offset: int, count: int) -> int:
+    chunk = os.pread(src, min(count, CHUNK_SIZE), offset)
+    write_all(dst, chunk)
+    return len(chunk)
+
+
+def write_all(fd: int, data: bytes) -> None:
+    """Write all of data to fd, however many os.write calls it takes."""
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+# Tried in order. The kernel methods are skipped where the platform
+# lacks them (copy_file_range is Linux/FreeBSD only; macOS sendfile only
+# writes to sockets) or refuses the pair of files
+_COPY_METHODS = (
+    _copy_file_range if hasattr(os, 'copy_file_range') else None,
+    _sendfile if hasattr(os, 'sendfile') and sys.platform.startswith('linux') else None,
+    _pread_write,
+)
+_FALLBACK_ERRNOS = {
+    errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EBADF,
+    errno.EOPNOTSUPP, errno.ENOTSUP, errno.ESPIPE,
+}
+
+
+def text_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Apply CP/M text conversion (strip ^Z, CR/LF to LF) to a chunk stream.
+
+    ^Z stripping needs to see the end of the member, so the data is
+    joined before conversion.
+    """
+    yield crlf_to_lf(strip_cpm_eof(b''.join(chunks)))
@@ -0,0 +1,211 @@
+"""
+Teledisk (.TD0) image reading.
+
+Teledisk (Sydex, 1985-1991) stores a floppy track by track. With
+"advanced compression" (signature "td" instead of "TD") everything after
+the 12-byte header is LZHUF compressed; this is decoded with the engine
+CrLZH uses (un80.lzhuf, TELEDISK parameters). The older Teledisk 1.x
+LZW compression is not supported.
+
+Layout (after decompression):
+- Image header (12 bytes): signature, sequence, check signature,
+  version, data rate, drive type, stepping (bit 7: a comment follows),
+  DOS allocation flag, sides, CRC
+- Comment header (10 bytes: CRC, length, date and time) and text, if any
+- Tracks: header (sector count, cylinder, head, CRC), then per sector a
+  header (cylinder, head, sector ID, size code, flags, CRC) and, unless
+  flags 0x10/0x20 say it was not stored, a data block: length, encoding
+  and the encoded bytes
+- A sector count of 0xFF ends the image
+
+Sector data encodings:
+  0  Raw bytes
+  1  Repeated 2-byte pattern: count (2 bytes), pattern
+  2  Run-length blocks: 0, length, literal bytes; or n > 0, count and a
+     2**n byte fragment repeated count times
+
+The header CRCs are not checked. read_td0 returns the sectors as they
+were recorded; un80.disk reads CP/M files from them.
+
+Usage:
+    image = read_td0(Path('DISK.TD0').read_bytes())
+    for track in image.tracks:
+        for sector in track.sectors:
+            ...
+"""
+
+from __future__ import annotations
+
+from collections import namedtuple
+
+from . import lzhuf
+
+SIGNATURE = b'TD'
+SIGNATURE_COMPRESSED = b'td'
+HEADER_SIZE = 12
+COMMENT_HEADER_SIZE = 10
+
+# Teledisk 2.x; earlier versions compressed with LZW
+MIN_LZHUF_VERSION = 20
+
+# Stepping byte flag: a comment block follows the header
+COMMENT_FLAG = 0x80
+
+# Sector flags meaning no data block follows
+NO_DATA_FLAGS = 0x30
+
+END_OF_IMAGE = 0xFF
+
+
+class Td0Error(Exception):
+    """Error reading a Teledisk image."""
+
+
+class Td0Sector(namedtuple('Td0Sector', [
+    'cylinder',  # Cylinder recorded in the sector ID
+    'head',  # Head recorded in the sector ID
+    'sector_id',  # Sector number
+    'size',  # Sector size in bytes
+    'flags',  # Teledisk sector flags
+    'data',  # Sector contents, or None if not stored
+])):
+    """A sector as recorded in a Teledisk image."""
+    __slots__ = ()
+
+
+class Td0Track(namedtuple('Td0Track', [
+    'cylinder',  # Physical cylinder
+    'head',  # Physical head
+    'sectors',  # Td0Sector objects in recorded order
+])):
+    """A track of a Teledisk image."""
+    __slots__ = ()
+
+
+class Td0Image(namedtuple('Td0Image', [
+    'version',  # Teledisk version times ten (e.g. 21 for 2.1)
+    'compressed',  # Whether advanced compression was used
+    'sides',  # Sides recorded
+    'comment',  # Comment text, or '' if none
+    'tracks',  # Td0Track objects in recorded order
+])):
+    """A decoded Teledisk image."""
+    __slots__ = ()
+
+
+def is_td0(header: bytes) -> bool:
+    """Whether header (the first bytes of a file) starts a Teledisk image."""
+    return (
+        len(header) >= HEADER_SIZE
+        and header[:2] in (SIGNATURE, SIGNATURE_COMPRESSED)
+        and 10 <= header[4] <= 0x21
+    )
+
+
+def read_td0(data: bytes, *, limits=None) -> Td0Image:
+    """
+    Decode a Teledisk image.
+
+    Args:
+        data: Contents of the .TD0 file
+        limits: Optional un80.limits.Limits applied to decompression
+
+    Returns:
+        Td0Image with every recorded sector
+
+    Raises:
+        Td0Error: If the image is not a Teledisk image or is damaged
+        LimitExceeded: If limits are given and one is passed
+    """
+    if not is_td0(data[:HEADER_SIZE]):
+        raise Td0Error("Not a Teledisk image")
+    version = data[4]
+    compressed = data[:2] == SIGNATURE_COMPRESSED
+
+    if compressed:
+        if version < MIN_LZHUF_VERSION:
+            raise Td0Error(f"Teledisk {version // 10}.{version % 10} compression "
+                           "is not supported")
+        if limits is not None:
+            limits.begin(len(data))
+        body = lzhuf.decode(data, HEADER_SIZE, lzhuf.TELEDISK, limits=limits)
+        if limits is not None:
+            limits.end(len(body))
+    else:
+        body = data[HEADER_SIZE:]
+
+    pos = 0
+    comment = ''
+    if data[7] & COMMENT_FLAG:
+        length = int.from_bytes(body[2:4], 'little')
+        pos = COMMENT_HEADER_SIZE + length
+        if pos > len(body):
+            raise Td0Error("Truncated comment")
+        text = bytes(body[COMMENT_HEADER_SIZE:pos])
+        comment = text.replace(b'\0', b'\n').decode('latin-1').rstrip('\n')
+
+    tracks = []
+    while True:
+        if pos >= len(body):
+            break  # Some writers omit the end marker
+        count = body[pos]
+        if count == END_OF_IMAGE:
+            break
+        if pos + 4 > len(body):
+            raise Td0Error("Truncated track header")
+        cylinder, head = body[pos + 1], body[pos + 2]
+        pos += 4
+
+        sectors = []
+        for _ in range(count):
+            if pos + 6 > len(body):
+                raise Td0Error("Truncated sector header")
+            sector_cyl, sector_head, sector_id, size_code, flags = body[pos:pos + 5]
+            pos += 6
+            size = 128 << size_code if size_code <= 6 else 0
+            sector_data = None
+            if not flags & NO_DATA_FLAGS and size:
+                if pos + 3 > len(body):
+                    raise Td0Error("Truncated sector data")
+                length = int.from_bytes(body[pos:pos + 2], 'little')
+                end = pos + 2 + length
+                if not length or end > len(body):
+                    raise Td0Error("Truncated sector data")
+                sector_data = _decode_sector(body[pos + 2], body[pos + 3:end], size)
+                pos = end
+            sectors.append(Td0Sector(sector_cyl, sector_head, sector_id, size, flags,
+                                     sector_data))
+        tracks.append(Td0Track(cylinder, head, sectors))
+
+    return Td0Image(version, compressed, data[9], comment, tracks)
+
+
+def _decode_sector(encoding: int, block: bytes, size: int) -> bytes:
+    """Expand a sector data block to size bytes."""
+    if encoding == 0:
+        data = bytes(block)
+    elif encoding == 1:
+        if len(block) < 4:
+            raise Td0Error("Truncated pattern block")
+        count = int.from_bytes(block[:2], 'little')
+        data = bytes(block[2:4]) * count
+    elif encoding == 2:
+        out = bytearray()
+        pos = 0
+        while len(out) < size and pos + 2 <= len(block):
+            kind, count = block[pos], block[pos + 1]
+            pos += 2
+            if kind == 0:
+                out += block[pos:pos + count]
+                pos += count
+            else:
+                length = 1 << kind
+                out += bytes(block[pos:pos + length]) * count
+                pos += length
+        data = bytes(out)
+    else:
+        raise Td0Error(f"Unknown sector encoding: {encoding}")
+
+    if len(data) < size:
+        raise Td0Error("Sector data too short")
+    return data[:size]
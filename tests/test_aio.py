@@ -0,0 +1,107 @@
+"""Tests for the asyncio extraction API."""
+
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from un80.aio import open_archive_async, list_archive_async, decompress_async
+from un80.arc import extract_arc, list_arc
+from un80.lbr import extract_lbr
+from un80.squeeze import unsqueeze
+
+SAMPLES_DIR = Path(__file__).parent / "samples"
+
+
+async def _collect(path, **kwargs):
+    return [(m.filename, await m.read()) async for m in open_archive_async(path, **kwargs)]
+
+
+class TestAio:
+    """Tests for the asyncio extraction API."""
+
+    def test_lbr_matches_sync(self):
+        """Test that async extraction of an LBR matches extract_lbr."""
+        sample = SAMPLES_DIR / "lbr" / "crlzh20.lbr"
+        if not sample.exists():
+            pytest.skip("crlzh20.lbr sample not available")
+
+        assert asyncio.run(_collect(sample)) == extract_lbr(sample)
+
+    def test_arc_matches_sync_process_pool(self):
+        """Test async ARC extraction on a process pool executor."""
+        sample = SAMPLES_DIR / "arc" / "method2.arc"
+        if not sample.exists():
+            pytest.skip("method2.arc sample not available")
+
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            result = asyncio.run(_collect(sample, executor=pool))
+        assert result == extract_arc(sample)
+
+    def test_stored_chunks(self):
+        """Test that stored members are read in chunks of the requested size."""
+        sample = SAMPLES_DIR / "arc" / "method2.arc"
+        if not sample.exists():
+            pytest.skip("method2.arc sample not available")
+
+        async def run():
+            sizes = []
+            async for member in open_archive_async(sample):
+                if member.codec == 'stored':
+                    member.chunk_size = 100
+                    sizes.append([len(c) async for c in member])
+            return sizes
+
+        for sizes in asyncio.run(run()):
+            assert all(size <= 100 for size in sizes)
+
+    def test_concurrent_archives(self):
+        """Test extracting several archives concurrently."""
+        samples = [SAMPLES_DIR / "arc" / "ark11.arc", SAMPLES_DIR / "lbr" / "crlzh20.lbr"]
+        if not all(s.exists() for s in samples):
+            pytest.skip("samples not available")
+
+        async def run():
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                return await asyncio.gather(*(_collect(s, executor=pool) for s in samples))
+
+        arc_result, lbr_result = asyncio.run(run())
+        assert arc_result == extract_arc(samples[0])
+        assert lbr_result == extract_lbr(samples[1])
+
+    def test_cancellation(self):
+        """Test that cancelling a consumer stops extraction cleanly."""
+        sample = SAMPLES_DIR / "lbr" / "crlzh20.lbr"
+        if not sample.exists():
+            pytest.skip("crlzh20.lbr sample not available")
+
+        seen = []
+
+        async def consume():
+            async for member in open_archive_async(sample):
+                seen.append(member.filename)
+                await asyncio.sleep(10)
+
+        async def run():
+            task = asyncio.create_task(consume())
+            while not seen:
+                await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(run())
+        assert len(seen) == 1
+
+    def test_list_and_decompress(self):
+        """Test async listing and single-file decompression."""
+        arc_sample = SAMPLES_DIR / "arc" / "ark11.arc"
+        sq_sample = SAMPLES_DIR / "squeeze" / "mbastip.tqt"
+        if not (arc_sample.exists() and sq_sample.exists()):
+            pytest.skip("samples not available")
+
+        data = sq_sample.read_bytes()
+        entries = asyncio.run(list_archive_async(arc_sample))
+        assert entries == list_arc(arc_sample)
+        assert asyncio.run(decompress_async(data, 'squeeze')) == unsqueeze(data)
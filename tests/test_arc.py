@@ -3,8 +3,10 @@
 import pytest
 from pathlib import Path
 import tempfile
+from dataclasses import replace
 
-from un80.arc import list_arc, extract_arc, ArcError, ARC_MARKER
+from un80.arc import list_arc, extract_arc, iter_arc, ArcError, ARC_MARKER
+from un80.stream import CHUNK_SIZE
 
 SAMPLES_DIR = Path(__file__).parent / "samples" / "arc"
 
@@ -112,3 +114,138 @@ class TestARC:
         # Extract - 13-bit LZW decompression should work
         results = extract_arc(sample, None)
         assert len(results) > 0
+
+    def test_iter_arc_matches_extract(self):
+        """Test that streaming iteration yields the same members as extract_arc."""
+        for name in ("ark11.arc", "method2.arc", "method3.arc", "method9.arc"):
+            sample = SAMPLES_DIR / name
+            if not sample.exists():
+                continue
+
+            expected = extract_arc(sample)
+            streamed = [(m.filename, m.read()) for m in iter_arc(sample)]
+            assert streamed == expected
+
+    def test_iter_arc_stored_chunks(self):
+        """Test that stored members are streamed in bounded chunks."""
+        sample = SAMPLES_DIR / "method2.arc"
+        if not sample.exists():
+            pytest.skip("method2.arc sample not available")
+
+        for member in iter_arc(sample):
+            if member.codec != 'stored':
+                continue
+            chunks = list(member.chunks)
+            assert all(len(c) <= CHUNK_SIZE for c in chunks)
+            assert sum(len(c) for c in chunks) == member.entry.original_size
+
+    def test_decompress_counters(self):
+        """Test LZW reset and table-full counts for a squashed archive."""
+        sample = SAMPLES_DIR / "method9.arc"
+        if not sample.exists():
+            pytest.skip("method9.arc sample not available")
+
+        from un80.arc import decompress_member
+        from un80.counters import DecodeCounters
+        counters = DecodeCounters()
+        total = 0
+        with open(sample, 'rb') as f:
+            for entry in list_arc(sample):
+                f.seek(entry.data_offset)
+                data = f.read(entry.compressed_size)
+                result = decompress_member(entry, data, counters=counters)
+                assert result == decompress_member(entry, data)
+                total += len(result)
+
+        assert counters['output_bytes'] == total
+        assert counters['lzw_resets'] >= 1
+
+    def test_decompress_matches_header_crc(self):
+        """Test decoded members match the CRC and size in their headers."""
+        from un80.arc import decompress_member
+        from un80.cpm import crc16
+
+        for name in ("ark11.arc", "method3.arc", "method2.arc"):
+            sample = SAMPLES_DIR / name
+            if not sample.exists():
+                pytest.skip(f"{name} sample not available")
+            with open(sample, 'rb') as f:
+                for entry in list_arc(sample):
+                    f.seek(entry.data_offset)
+                    result = decompress_member(entry, f.read(entry.compressed_size))
+                    assert len(result) == entry.original_size, entry.filename
+                    assert crc16(result) == entry.crc, entry.filename
+
+    def test_decompress_oversize_stops(self):
+        """Test output beyond the header's original size raises ArcError."""
+        sample = SAMPLES_DIR / "method3.arc"
+        if not sample.exists():
+            pytest.skip("method3.arc sample not available")
+
+        from un80.arc import decompress_member
+        with open(sample, 'rb') as f:
+            for entry in list_arc(sample):
+                if entry.method_name == 'stored':
+                    continue
+                f.seek(entry.data_offset)
+                data = f.read(entry.compressed_size)
+                with pytest.raises(ArcError, match="exceeds expected size"):
+                    decompress_member(replace(entry, original_size=100), data)
+
+    def test_oversize_member_not_stored_raw(self):
+        """Test a member decoding past its header's size fails rather than coming out raw."""
+        import io
+        import struct
+
+        arc = bytearray((Path(__file__).parent / "test.arc").read_bytes())
+        entry = next(e for e in list_arc(io.BytesIO(arc)) if e.method == 8)
+        # The original size is the last field of the 29-byte header
+        struct.pack_into('<I', arc, entry.data_offset - 4, 100)
+        with pytest.raises(ArcError, match="exceeds expected size"):
+            extract_arc(io.BytesIO(arc))
+        for member in iter_arc(io.BytesIO(arc)):
+            if member.filename == entry.filename:
+                with pytest.raises(ArcError, match="exceeds expected size"):
+                    member.read()
+
+    def test_parse_header_old_format(self):
+        """Test a short method 1 header leaves the file at the member's data."""
+        import io
+        import struct
+        from un80.arc import parse_header
+
+        header = b'\x1a\x01' + b'OLD.TXT'.ljust(13, b'\0') + struct.pack('<IIH', 5, 0, 0)
+        f = io.BytesIO(header + b'HELLO' + b'\x1a\x00')
+        entry = parse_header(f)
+        assert (entry.filename, entry.original_size) == ('OLD.TXT', 5)
+        assert not hasattr(entry, '__dict__')
+        assert entry.data_offset == f.tell() == len(header)
+        assert f.read(5) == b'HELLO'
+        assert parse_header(f) is None
+
+    def test_parse_header_truncated(self):
+        """Test a header cut short raises ArcError."""
+        import io
+        from un80.arc import parse_header
+
+        with pytest.raises(ArcError, match='Truncated'):
+            parse_header(io.BytesIO(b'\x1a\x02SHORT'))
+
+    def test_decompress_into(self):
+        """Test members decode into a caller's buffer, and oversize ones are refused."""
+        from un80.arc import decompress_member, decompress_member_into
+        from un80.cpm import OutputSizeError
+
+        sample = Path(__file__).parent / "test.arc"
+        buf = bytearray(64 * 1024)
+        with open(sample, 'rb') as f:
+            for entry in list_arc(sample):
+                f.seek(entry.data_offset)
+                data = f.read(entry.compressed_size)
+                expected = decompress_member(entry, data)
+                if entry.method in (1, 2) or entry.original_size <= len(buf):
+                    assert decompress_member_into(entry, data, buf) == len(expected)
+                    assert buf[:len(expected)] == expected
+                if entry.method not in (1, 2):
+                    with pytest.raises(OutputSizeError):
+                        decompress_member_into(entry, data, bytearray(entry.original_size - 1))
@@ -0,0 +1,165 @@
+"""Tests for reading archives out of zip and tar bundles."""
+
+import io
+import json
+import tarfile
+import zipfile
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from un80.arc import extract_arc
+from un80.bundle import BundleError, iter_bundle, member_path
+from un80.cli import main
+from un80.lbr import extract_lbr, iter_lbr
+from un80.squeeze import unsqueeze
+from un80.stream import PipeReader
+
+TESTS_DIR = Path(__file__).parent
+
+# Bundle member name -> sample file
+MEMBERS = {
+    'cpm/test2.lbr': 'test2.lbr',
+    'cpm/games/test.arc': 'test.arc',
+    'cpm/test.aqm': 'test.aqm',
+    'cpm/README': None,
+}
+
+
+def _member_data(sample):
+    return (TESTS_DIR / sample).read_bytes() if sample else b'Not a CP/M file\n'
+
+
+@pytest.fixture(params=['zip', 'tar.gz'])
+def bundle(request, tmp_path):
+    """A zip or gzipped tar bundle of the sample archives."""
+    path = tmp_path / f'bundle.{request.param}'
+    if request.param == 'zip':
+        with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as z:
+            z.writestr('cpm/', b'')
+            for name, sample in MEMBERS.items():
+                z.writestr(name, _member_data(sample))
+    else:
+        with tarfile.open(path, 'w:gz') as t:
+            for name, sample in MEMBERS.items():
+                data = _member_data(sample)
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                t.addfile(info, io.BytesIO(data))
+    return path
+
+
+class TestIterBundle:
+    """Tests for iterating over bundle members."""
+
+    def test_members(self, bundle):
+        """Test every regular file comes out with its data."""
+        members = {m.name: m.file.read() for m in iter_bundle(bundle)}
+        assert members == {name: _member_data(s) for name, s in MEMBERS.items()}
+
+    def test_archive_member(self, bundle):
+        """Test an archive member is read in one forward pass."""
+        for member in iter_bundle(bundle):
+            if member.name.endswith('.lbr'):
+                result = [(m.filename, m.read()) for m in iter_lbr(PipeReader(member.file))]
+        assert result == extract_lbr(TESTS_DIR / 'test2.lbr')
+
+    def test_tar_from_pipe(self, tmp_path):
+        """Test a tar bundle is read from a stream that cannot seek."""
+        path = tmp_path / 'bundle.tar'
+        with tarfile.open(path, 'w') as t:
+            t.add(TESTS_DIR / 'test.arc', 'test.arc')
+        pipe = PipeReader(io.BytesIO(path.read_bytes()))
+        assert [m.name for m in iter_bundle(pipe)] == ['test.arc']
+
+    def test_not_a_bundle(self):
+        """Test other data is rejected."""
+        with pytest.raises(BundleError):
+            list(iter_bundle(TESTS_DIR / 'test.arc'))
+
+    @pytest.mark.parametrize('name, expected', [
+        ('/etc/passwd', 'etc/passwd'),
+        ('../../A.LBR', 'A.LBR'),
+        ('a/./b/../C.ARC', 'a/b/C.ARC'),
+        ('C:\\CPM\\D.LBR', 'CPM/D.LBR'),
+        ('..', ''),
+    ])
+    def test_member_path(self, name, expected):
+        """Test member names cannot escape the output directory."""
+        assert member_path(name) == expected
+
+
+class TestFileObjects:
+    """Tests for the readers and decoders taking open files."""
+
+    def test_decoder(self):
+        """Test a single-file decoder reads an open file."""
+        data = (TESTS_DIR / 'test.aqm').read_bytes()
+        assert unsqueeze(io.BytesIO(data)) == unsqueeze(data)
+
+    def test_extract_from_pipe(self):
+        """Test extract_arc reads a stream that cannot seek."""
+        data = (TESTS_DIR / 'test.arc').read_bytes()
+        assert extract_arc(PipeReader(io.BytesIO(data))) == extract_arc(TESTS_DIR / 'test.arc')
+
+
+class TestBundleCLI:
+    """Tests for --from-bundle."""
+
+    def test_extract(self, bundle, tmp_path, capsys):
+        """Test archives are extracted under their stems, files beside them."""
+        out = tmp_path / 'out'
+        assert main(['--from-bundle', str(bundle), '-o', str(out)]) == 0
+        for filename, data in extract_arc(TESTS_DIR / 'test.arc'):
+            assert (out / 'cpm/games/test' / filename).read_bytes() == data
+        for filename, data in extract_lbr(TESTS_DIR / 'test2.lbr'):
+            assert (out / 'cpm/test2' / filename).read_bytes() == data
+        expected = unsqueeze((TESTS_DIR / 'test.aqm').read_bytes())
+        assert (out / 'cpm/REDIR.ASM').read_bytes() == expected
+        assert not (out / 'cpm/README').exists()
+
+    def test_ndjson(self, bundle, capsys):
+        """Test each member is listed under the bundle's name."""
+        assert main(['--from-bundle', str(bundle), '--ndjson']) == 0
+        records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        files = {record['file'] for record in records}
+        assert files == {f'{bundle}/{name}' for name in list(MEMBERS)[:3]}
+
+    def test_ndjson_closed_stdout(self, bundle, monkeypatch):
+        """Test a reader that goes away ends the listing quietly."""
+        class ClosedPipe(io.StringIO):
+            def write(self, s):
+                raise BrokenPipeError(32, 'Broken pipe')
+
+        monkeypatch.setattr('sys.stdout', ClosedPipe())
+        assert main(['--from-bundle', str(bundle), '--ndjson']) == 1
+
+    def test_list(self, bundle, capsys):
+        """Test each archive is listed after a heading."""
+        assert main(['--from-bundle', str(bundle), '-l']) == 0
+        out = capsys.readouterr().out
+        assert f'{bundle}/cpm/games/test.arc:' in out
+        assert 'REDIR.ASM' in out
+
+    def test_tar_from_stdin(self, tmp_path, monkeypatch):
+        """Test a compressed tar bundle is extracted from stdin."""
+        path = tmp_path / 'bundle.tar.xz'
+        with tarfile.open(path, 'w:xz') as t:
+            t.add(TESTS_DIR / 'test.arc', 'test.arc')
+        monkeypatch.setattr('sys.stdin', SimpleNamespace(buffer=io.BytesIO(path.read_bytes())))
+        assert main(['--from-bundle', '-', '-o', str(tmp_path / 'out')]) == 0
+        for filename, data in extract_arc(TESTS_DIR / 'test.arc'):
+            assert (tmp_path / 'out/test' / filename).read_bytes() == data
+
+    def test_bad_bundle(self, tmp_path, capsys):
+        """Test an unreadable bundle is reported and fails the run."""
+        assert main(['--from-bundle', str(TESTS_DIR / 'test.arc'), '-o', str(tmp_path)]) == 1
+        assert 'test.arc' in capsys.readouterr().err
+
+    @pytest.mark.parametrize('command', ['convert', 'salvage'])
+    def test_not_for_subcommands(self, command, bundle, tmp_path):
+        """Test subcommands that cannot read bundles reject the option."""
+        with pytest.raises(SystemExit) as exc:
+            main([command, '--from-bundle', str(bundle), str(tmp_path / 'out.zip')])
+        assert exc.value.code == 2
@@ -0,0 +1,103 @@
+"""Tests for ZIP/TAR conversion."""
+
+import io
+import tarfile
+import tempfile
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from un80.arc import extract_arc, list_arc
+from un80.cli import main
+from un80.convert import convert_archive, output_kind, write_zip, ConvertError
+from un80.cpm import cpm_datetime, dos_datetime
+from un80.lbr import extract_lbr, iter_lbr
+
+SAMPLES_DIR = Path(__file__).parent / "samples"
+
+
+class TestConvert:
+    """Tests for ZIP/TAR conversion."""
+
+    def test_output_kind(self):
+        """Test container detection from the output suffix."""
+        assert output_kind("a.zip") == ('zip', '')
+        assert output_kind("a.TAR") == ('tar', '')
+        assert output_kind("a.tar.gz") == ('tar', 'gz')
+        assert output_kind("a.tgz") == ('tar', 'gz')
+        with pytest.raises(ConvertError):
+            output_kind("a.rar")
+
+    def test_arc_to_zip_preserves_dates(self):
+        """Test ARC to ZIP conversion keeps content and header dates."""
+        sample = SAMPLES_DIR / "arc" / "ark11.arc"
+        if not sample.exists():
+            pytest.skip("ark11.arc sample not available")
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            out = Path(tmpdir) / "ark11.zip"
+            assert convert_archive(sample, out) == len(list_arc(sample))
+
+            with zipfile.ZipFile(out) as zf:
+                infos = zf.infolist()
+                assert [(i.filename, zf.read(i)) for i in infos] == extract_arc(sample)
+                for info, entry in zip(infos, list_arc(sample)):
+                    assert info.date_time == entry.modified.timetuple()[:6]
+
+    def test_lbr_to_tar_gz(self):
+        """Test LBR to .tar.gz conversion."""
+        sample = SAMPLES_DIR / "lbr" / "crlzh20.lbr"
+        if not sample.exists():
+            pytest.skip("crlzh20.lbr sample not available")
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            out = Path(tmpdir) / "crlzh20.tar.gz"
+            convert_archive(sample, out)
+
+            with tarfile.open(out) as tf:
+                result = [(m.name, tf.extractfile(m).read()) for m in tf.getmembers()]
+            assert result == extract_lbr(sample)
+
+    def test_zip_to_unseekable_stream(self):
+        """Test writing a ZIP to a stream that cannot seek."""
+        sample = SAMPLES_DIR / "lbr" / "crlzh20.lbr"
+        if not sample.exists():
+            pytest.skip("crlzh20.lbr sample not available")
+
+        class Unseekable(io.RawIOBase):
+            def __init__(self):
+                self.buf = bytearray()
+
+            def writable(self):
+                return True
+
+            def write(self, b):
+                self.buf += b
+                return len(b)
+
+        stream = Unseekable()
+        write_zip(iter_lbr(sample), stream)
+        with zipfile.ZipFile(io.BytesIO(bytes(stream.buf))) as zf:
+            assert len(zf.infolist()) == len(extract_lbr(sample))
+
+    def test_cli_convert(self, capsys):
+        """Test the convert subcommand."""
+        sample = SAMPLES_DIR / "arc" / "method2.arc"
+        if not sample.exists():
+            pytest.skip("method2.arc sample not available")
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            out = Path(tmpdir) / "out.tar"
+            assert main(['convert', str(sample), str(out)]) == 0
+            with tarfile.open(out) as tf:
+                assert len(tf.getmembers()) == len(extract_arc(sample))
+
+    def test_dates(self):
+        """Test CP/M and DOS date conversion."""
+        assert cpm_datetime(0) is None
+        assert cpm_datetime(1).date().isoformat() == '1978-01-01'
+        # 12:34:56 in DOS time format
+        assert cpm_datetime(1, (12 << 11) | (34 << 5) | 28).time().isoformat() == '12:34:56'
+        assert dos_datetime(0, 0) is None
+        assert dos_datetime((9 << 9) | (9 << 5) | 30, 0).date().isoformat() == '1989-09-30'
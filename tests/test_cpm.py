@@ -0,0 +1,59 @@
+"""Tests for CP/M utilities."""
+
+import pytest
+
+from un80.cpm import OutputSizeError, crc16, crc16_xmodem, decode_rle90
+
+
+class TestRLE90:
+    """Tests for RLE90 decoding."""
+
+    def test_repeat_counts_total_occurrences(self):
+        """Test 0x90 N means the previous byte occurs N times in all."""
+        assert decode_rle90(b'A\x90\x05') == b'AAAAA'
+        assert decode_rle90(b'A\x90\x01B') == b'AB'
+        assert decode_rle90(b'AB\x90\x03C') == b'ABBBC'
+
+    def test_literal_marker(self):
+        """Test 0x90 0x00 is a literal 0x90 that becomes the previous byte."""
+        assert decode_rle90(b'\x90\x00') == b'\x90'
+        assert decode_rle90(b'\x90\x00\x90\x03') == b'\x90\x90\x90'
+        assert decode_rle90(b'AB\x90') == b'AB\x90'
+
+    def test_expected_size(self):
+        """Test the size hint accepts exact/short output and stops oversize output."""
+        data = b'X\x90\xffY'
+        assert decode_rle90(data, 256) == b'X' * 255 + b'Y'
+        assert decode_rle90(data, 1000) == b'X' * 255 + b'Y'
+        with pytest.raises(OutputSizeError):
+            decode_rle90(data, 10)
+
+    def test_bytearray_input(self):
+        """Test bytearray input gives the same result as bytes."""
+        assert decode_rle90(bytearray(b'A\x90\x04B')) == b'AAAAB'
+
+
+class TestCRC16:
+    """Tests for the ARC CRC-16."""
+
+    def test_check_value(self):
+        """Test the standard CRC-16/ARC check value."""
+        assert crc16(b'123456789') == 0xBB3D
+
+    def test_chunked(self):
+        """Test a running CRC over chunks equals the one-shot CRC."""
+        data = bytes(range(256)) * 3
+        assert crc16(data[100:], crc16(data[:100])) == crc16(data)
+
+
+class TestCRC16Xmodem:
+    """Tests for the LBR directory CRC-16."""
+
+    def test_check_value(self):
+        """Test the standard CRC-16/XMODEM check value."""
+        assert crc16_xmodem(b'123456789') == 0x31C3
+
+    def test_chunked(self):
+        """Test a running CRC over chunks equals the one-shot CRC."""
+        data = bytes(range(256)) * 3
+        assert crc16_xmodem(data[100:], crc16_xmodem(data[:100])) == crc16_xmodem(data)
@@ -146,3 +146,23 @@ class TestCrLZH:
         # Should decompress to assembly source
         assert len(result) > 1000
         assert b"QTERM" in result or b"qterm" in result.lower()
+
+    def test_counters(self):
+        """Test counters are reported through get_crlzh_info."""
+        from un80.counters import DecodeCounters
+        from un80.crlzh import get_crlzh_info
+        data = (Path(__file__).parent / "test.aym").read_bytes()
+
+        info = get_crlzh_info(data, DecodeCounters())
+        counters = info['counters']
+        assert counters['output_bytes'] == len(uncrlzh(data))
+        assert counters['huffman_reconsts'] == 0
+        assert 0 < counters['huffman_bits'] <= (len(data) - 4) * 8
+
+    def test_reconst_counted(self):
+        """Test tree rebuilds are counted when the root frequency saturates."""
+        from un80.crlzh import HuffmanTree, MAX_FREQ, R
+        tree = HuffmanTree()
+        for _ in range(MAX_FREQ - tree.freq[R] + 1):
+            tree.update(ord('A'))
+        assert tree.reconsts == 1
@@ -55,3 +55,23 @@ class TestCrunch:
         """Verify crunch magic constant."""
         from un80.crunch import CRUNCH_MAGIC
         assert CRUNCH_MAGIC == 0x76FE
+
+    def test_counters(self):
+        """Test decoder counters and their exposure through get_crunch_info."""
+        sample = Path(__file__).parent / "test.lzt"
+        data = sample.read_bytes()
+
+        from un80.counters import DecodeCounters
+        from un80.crunch import get_crunch_info
+        counters = DecodeCounters()
+        result = uncrunch(data, counters=counters)
+
+        assert result == uncrunch(data)
+        assert counters['input_bytes'] == len(data)
+        assert counters['output_bytes'] == len(result)
+        assert counters['lzw_table_full'] == 1
+        assert counters['lzw_resets'] == 0
+
+        info = get_crunch_info(data, DecodeCounters())
+        assert info['counters'] == counters
+        assert 'counters' not in get_crunch_info(data)
@@ -0,0 +1,292 @@
+"""Tests for CP/M disk image support."""
+
+import io
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from un80.cli import main
+from un80.disk import (
+    DISK_FORMATS, DiskError, DiskImage, ENTRY_FORMAT, RECORD_SIZE,
+    extract_disk, iter_disk, list_disk,
+)
+from un80.formats import classify
+from un80.lbr import extract_lbr, list_lbr
+from un80.squeeze import unsqueeze
+
+TESTS_DIR = Path(__file__).parent
+
+
+def _build_image(fmt, files):
+    """
+    Write a raw image in physical sector order.
+
+    files holds (user, filename, data, attributes) tuples; blocks are
+    allocated in order after the directory.
+    """
+    image = bytearray(b'\xe5' * fmt.image_size)
+    translate = fmt.translate()
+
+    def offset(record):
+        track, index = divmod(record, fmt.records_per_track)
+        sector, part = divmod(index * RECORD_SIZE, fmt.sector_size)
+        return ((track + fmt.reserved_tracks) * fmt.sectors + translate[sector]) \
+            * fmt.sector_size + part
+
+    per_entry = 8 if fmt.wide_pointers else 16
+    entries = []
+    block = fmt.dir_blocks
+    for user, filename, data, attributes in files:
+        name, _, ext = filename.partition('.')
+        name = bytearray(name.ljust(8).encode())
+        ext = bytearray(ext.ljust(3).encode())
+        for i in range(3):
+            if attributes & 1 << i:
+                ext[i] |= 0x80
+        data += b'\x1a' * (-len(data) % RECORD_SIZE)
+        records = len(data) // RECORD_SIZE
+        k = 0
+        while True:
+            first = k * per_entry * fmt.block_records
+            count = min(records - first, per_entry * fmt.block_records)
+            pointers = []
+            for r in range(count):
+                if r % fmt.block_records == 0:
+                    pointers.append(block)
+                    block += 1
+                at = (pointers[-1] * fmt.block_records + r % fmt.block_records)
+                image[offset(at):offset(at) + RECORD_SIZE] = \
+                    data[(first + r) * RECORD_SIZE:(first + r + 1) * RECORD_SIZE]
+            extent = k * (fmt.extent_mask + 1) + max(count - 1, 0) // 128
+            rc = count - max(count - 1, 0) // 128 * 128
+            width = 2 if fmt.wide_pointers else 1
+            raw = b''.join(p.to_bytes(width, 'little') for p in pointers).ljust(16, b'\0')
+            entries.append(ENTRY_FORMAT.pack(user, bytes(name), bytes(ext),
+                                             extent & 31, 0, extent >> 5, rc, raw))
+            k += 1
+            if first + count >= records:
+                break
+
+    directory = b''.join(entries).ljust(fmt.dir_entries * 32, b'\xe5')
+    for r in range(len(directory) // RECORD_SIZE):
+        image[offset(r):offset(r) + RECORD_SIZE] = directory[r * RECORD_SIZE:(r + 1) * RECORD_SIZE]
+    return bytes(image)
+
+
+def _to_imd(fmt, raw):
+    """Wrap a raw image in ImageDisk form, with sector IDs interleaved."""
+    out = bytearray(b'IMD 1.18: 01/01/1984 00:00:00\r\nTest image\x1a')
+    size_code = fmt.sector_size.bit_length() - 8
+    ids = list(range(1, fmt.sectors + 1, 2)) + list(range(2, fmt.sectors + 1, 2))
+    for track in range(fmt.tracks):
+        out += bytes([5, track, 0, fmt.sectors, size_code]) + bytes(ids)
+        for sector_id in ids:
+            start = (track * fmt.sectors + sector_id - 1) * fmt.sector_size
+            data = raw[start:start + fmt.sector_size]
+            if data == data[:1] * len(data):
+                out += bytes([2, data[0]])  # Compressed: one fill byte
+            else:
+                out += b'\x01' + data
+    return bytes(out)
+
+
+TEXT = b''.join(b'Line %04d of the test file\r\n' % i for i in range(700))
+
+
+def _sample_files():
+    return [
+        (0, 'README.TXT', b'Hello from CP/M\r\n\x1a', 0),
+        (0, 'BIG.DAT', TEXT, 1),  # Over 16K: several extents
+        (3, 'USER3.COM', bytes(range(256)) * 10, 2),
+    ]
+
+
+class TestDiskFormat:
+    """Tests for disk parameter calculations."""
+
+    def test_ibm_skew(self):
+        """Test the 8" skew table matches the standard CP/M translation."""
+        table = [s + 1 for s in DISK_FORMATS['ibm-8ss'].translate()]
+        assert table[:14] == [1, 7, 13, 19, 25, 5, 11, 17, 23, 3, 9, 15, 21, 2]
+
+    def test_no_skew(self):
+        """Test a skew of 1 leaves sectors in order."""
+        fmt = DISK_FORMATS['kaypro2']
+        assert fmt.translate() == list(range(fmt.sectors))
+
+    def test_parameters(self):
+        """Test derived disk parameter block values."""
+        fmt = DISK_FORMATS['ibm-8ss']
+        assert fmt.image_size == 256256
+        assert fmt.dir_blocks == 2
+        assert fmt.extent_mask == 0
+        assert DISK_FORMATS['kaypro4'].extent_mask == 1
+
+
+class TestDiskImage:
+    """Tests for reading raw disk images."""
+
+    @pytest.mark.parametrize('name', ['ibm-8ss', 'kaypro2', 'osborne1'])
+    def test_round_trip(self, name, tmp_path):
+        """Test files come back intact, with the format detected from the image."""
+        fmt = DISK_FORMATS[name]
+        path = tmp_path / 'TEST.DSK'
+        path.write_bytes(_build_image(fmt, _sample_files()))
+        with DiskImage(path) as image:
+            assert image.format == fmt
+            files = image.list()
+            assert [(f.user, f.filename) for f in files] == \
+                [(user, filename) for user, filename, _, _ in _sample_files()]
+            for file, (_, _, data, _) in zip(files, _sample_files()):
+                assert image.read(file).rstrip(b'\x1a') == data.rstrip(b'\x1a')
+
+    def test_attributes(self, tmp_path):
+        """Test attribute bits are reported and masked out of the name."""
+        path = tmp_path / 'TEST.DSK'
+        path.write_bytes(_build_image(DISK_FORMATS['ibm-8ss'], _sample_files()))
+        files = list_disk(path)
+        assert [f.ext for f in files] == ['TXT', 'DAT', 'COM']
+        assert [(f.read_only, f.system) for f in files] == \
+            [(False, False), (True, False), (False, True)]
+        assert files[1].data_size == len(TEXT) + (-len(TEXT) % RECORD_SIZE)
+
+    def test_multiple_extents(self, tmp_path):
+        """Test a file spread over several directory entries is joined."""
+        fmt = DISK_FORMATS['kaypro4']
+        data = bytes(range(256)) * 200  # 50K: two 32K entries
+        path = tmp_path / 'TEST.DSK'
+        path.write_bytes(_build_image(fmt, [(0, 'LARGE.BIN', data, 0)]))
+        with DiskImage(path, 'kaypro4') as image:
+            (file,) = image.list()
+            assert file.records == len(data) // RECORD_SIZE
+            assert image.read(file) == data
+
+    def test_zero_copy_chunks(self, tmp_path):
+        """Test unskewed data comes back as a few memoryview runs."""
+        path = tmp_path / 'TEST.DSK'
+        path.write_bytes(_build_image(DISK_FORMATS['kaypro2'], _sample_files()))
+        with DiskImage(path) as image:
+            chunks = list(image.chunks(image.find('big.dat')))
+            assert all(isinstance(chunk, memoryview) for chunk in chunks)
+            assert len(chunks) < 10
+            del chunks
+
+    def test_find_missing(self, tmp_path):
+        """Test looking up a missing file raises KeyError."""
+        path = tmp_path / 'TEST.DSK'
+        path.write_bytes(_build_image(DISK_FORMATS['kaypro2'], _sample_files()))
+        with DiskImage(path) as image:
+            with pytest.raises(KeyError):
+                image.find('NONE.TXT')
+            assert image.find('USER3.COM', user=3).user == 3
+
+    def test_unknown_size(self, tmp_path):
+        """Test an image of no known size needs an explicit format."""
+        path = tmp_path / 'TEST.DSK'
+        path.write_bytes(b'\xe5' * 1000)
+        with pytest.raises(DiskError):
+            list_disk(path)
+
+    def test_unknown_format_name(self, tmp_path):
+        """Test an unknown format name is rejected."""
+        path = tmp_path / 'TEST.DSK'
+        path.write_bytes(_build_image(DISK_FORMATS['kaypro2'], []))
+        with pytest.raises(DiskError, match='kaypro2'):
+            list_disk(path, disk_format='apple')
+
+    def test_empty_image(self, tmp_path):
+        """Test an empty file raises DiskError."""
+        path = tmp_path / 'TEST.DSK'
+        path.write_bytes(b'')
+        with pytest.raises(DiskError):
+            DiskImage(path)
+
+
+class TestImageDisk:
+    """Tests for ImageDisk (.IMD) images."""
+
+    def test_matches_raw(self, tmp_path):
+        """Test an IMD image reads the same as the raw image it holds."""
+        fmt = DISK_FORMATS['kaypro2']
+        raw = _build_image(fmt, _sample_files())
+        (tmp_path / 'TEST.DSK').write_bytes(raw)
+        (tmp_path / 'TEST.IMD').write_bytes(_to_imd(fmt, raw))
+        assert extract_disk(tmp_path / 'TEST.IMD') == extract_disk(tmp_path / 'TEST.DSK')
+
+    def test_truncated(self, tmp_path):
+        """Test a truncated IMD image raises DiskError."""
+        fmt = DISK_FORMATS['kaypro2']
+        imd = _to_imd(fmt, _build_image(fmt, _sample_files()))
+        path = tmp_path / 'TEST.IMD'
+        path.write_bytes(imd[:len(imd) // 2])
+        with pytest.raises(DiskError):
+            list_disk(path)
+
+
+class TestContainedFiles:
+    """Tests for archives and compressed files stored on a disk."""
+
+    def test_compressed_file(self, tmp_path):
+        """Test a squeezed file is decoded under its original name."""
+        squeezed = (TESTS_DIR / 'test.aqm').read_bytes()
+        path = tmp_path / 'TEST.DSK'
+        path.write_bytes(_build_image(DISK_FORMATS['ibm-8ss'], [(0, 'TEST.AQM', squeezed, 0)]))
+        (member,) = iter_disk(path)
+        assert member.codec == 'squeeze'
+        assert member.read() == unsqueeze(squeezed)
+        (member,) = iter_disk(path, decompress=False)
+        assert member.filename == 'TEST.AQM'
+
+    def test_nested_library(self, tmp_path):
+        """Test an LBR on the disk is read without writing it out."""
+        library = (TESTS_DIR / 'test.lbr').read_bytes()
+        path = tmp_path / 'TEST.DSK'
+        path.write_bytes(_build_image(DISK_FORMATS['kaypro2'], [(0, 'TEST.LBR', library, 0)]))
+        with DiskImage(path) as image:
+            f = image.open('TEST.LBR')
+        assert isinstance(f, io.BytesIO)
+        assert list_lbr(f) == list_lbr(TESTS_DIR / 'test.lbr')
+        # The sample library is one byte short of its last sector
+        assert [(name, data.rstrip(b'\x1a')) for name, data in extract_lbr(f)] == \
+            [(name, data.rstrip(b'\x1a')) for name, data in extract_lbr(TESTS_DIR / 'test.lbr')]
+
+
+class TestDiskDetection:
+    """Tests for recognising disk images."""
+
+    def test_classify(self):
+        """Test IMD magic and disk image extensions are recognised."""
+        assert classify(b'IMD 1.18: ', 'DISK.BIN') == 'disk'
+        assert classify(b'\xe5' * 32, 'KAYPRO.DSK') == 'disk'
+
+
+class TestDiskCLI:
+    """Tests for disk images on the command line."""
+
+    def test_list_and_extract(self, tmp_path, capsys):
+        """Test listing and extracting a disk image."""
+        path = tmp_path / 'TEST.DSK'
+        path.write_bytes(_build_image(DISK_FORMATS['kaypro2'], _sample_files()))
+        assert main([str(path), '-l']) == 0
+        out = capsys.readouterr().out
+        assert 'USER3.COM' in out and '3 file(s)' in out
+
+        out_dir = tmp_path / 'out'
+        assert main([str(path), '-o', str(out_dir), '--disk-format', 'kaypro2']) == 0
+        assert (out_dir / 'README.TXT').read_bytes().startswith(b'Hello from CP/M')
+        assert (out_dir / 'BIG.DAT').read_bytes().rstrip(b'\x1a') == TEXT
+
+    def test_from_stdin(self, tmp_path, monkeypatch, capsys):
+        """Test an ImageDisk image piped to stdin is read whole."""
+        fmt = DISK_FORMATS['kaypro2']
+        image = _to_imd(fmt, _build_image(fmt, _sample_files()))
+        monkeypatch.setattr('sys.stdin', SimpleNamespace(buffer=io.BytesIO(image)))
+        assert main(['-', '-o', str(tmp_path)]) == 0
+        assert (tmp_path / 'README.TXT').read_bytes().startswith(b'Hello from CP/M')
+
+    def test_open_file(self):
+        """Test DiskImage reads an image from an open file."""
+        raw = _build_image(DISK_FORMATS['kaypro2'], _sample_files())
+        with DiskImage(io.BytesIO(raw)) as image:
+            assert [f.filename for f in image.list()] == ['README.TXT', 'BIG.DAT', 'USER3.COM']
@@ -0,0 +1,128 @@
+"""Tests for the format registry and lazy loading."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import un80
+from un80 import formats
+
+TESTS_DIR = Path(__file__).parent
+SRC_DIR = TESTS_DIR.parent / "src"
+
+
+class TestFormats:
+    """Tests for format detection and the codec registry."""
+
+    def test_classify_magic(self):
+        """Test magic bytes take precedence over the extension."""
+        assert formats.classify(b'\x76\xff', 'FOO.LBR') == 'squeeze'
+        assert formats.classify(b'\x76\xfe', 'FOO') == 'crunch'
+        assert formats.classify(b'\x76\xfd', 'FOO') == 'crlzh'
+
+    def test_classify_extension(self):
+        """Test the extension fallbacks."""
+        assert formats.classify(b'', 'FOO.LBR') == 'lbr'
+        assert formats.classify(b'', 'foo.ark') == 'arc'
+        assert formats.classify(b'', 'FOO.TZT') == 'crunch'
+        assert formats.classify(b'', 'FOO.TXT') is None
+        assert formats.classify(b'', 'NOEXT') is None
+
+    def test_detect_format_samples(self):
+        """Test detection of the bundled test files."""
+        assert formats.detect_format(TESTS_DIR / "test.lbr") == 'lbr'
+        assert formats.detect_format(TESTS_DIR / "test.arc") == 'arc'
+        assert formats.detect_format(TESTS_DIR / "test.aqm") == 'squeeze'
+        assert formats.detect_format(TESTS_DIR / "test.aym") == 'crlzh'
+
+    def test_decoder_registry(self):
+        """Test codec lookup returns the module functions."""
+        from un80.squeeze import unsqueeze, get_squeezed_filename
+        assert formats.decoder('squeeze') is unsqueeze
+        assert formats.filename_getter('squeeze') is get_squeezed_filename
+        with pytest.raises(ValueError):
+            formats.load('zip')
+
+    def test_package_exports(self):
+        """Test names exported from the package resolve lazily."""
+        from un80.lbr import extract_lbr
+        assert un80.extract_lbr is extract_lbr
+        assert 'uncrunch' in dir(un80)
+        with pytest.raises(AttributeError):
+            un80.no_such_name
+
+    def test_list_lbr_imports(self):
+        """Test listing an LBR does not import unused codecs."""
+        code = (
+            "import sys; from un80.cli import main; "
+            f"main(['-l', {str(TESTS_DIR / 'test.lbr')!r}]); "
+            "print(' '.join(sorted(sys.modules)))"
+        )
+        env = dict(os.environ, PYTHONPATH=str(SRC_DIR))
+        result = subprocess.run([sys.executable, "-c", code], env=env,
+                                capture_output=True, text=True, check=True)
+        loaded = set(result.stdout.splitlines()[-1].split())
+
+        assert 'un80.lbr' in loaded
+        for name in ('un80.arc', 'un80.bas', 'un80.squeeze', 'un80.crunch',
+                     'un80.crlzh'):
+            assert name not in loaded, name
+
+
+class TestDecodeInto:
+    """Tests for decoding into caller buffers."""
+
+    SAMPLES = [('squeeze', 'test.aqm'), ('crunch', 'test.lzt'), ('crlzh', 'test.aym')]
+
+    @pytest.mark.parametrize('codec, name', SAMPLES)
+    def test_buffers(self, codec, name):
+        """Test output lands in a bytearray, an mmap and shared memory."""
+        import mmap
+        from multiprocessing import shared_memory
+
+        data = (TESTS_DIR / name).read_bytes()
+        expected = formats.decoder(codec)(data)
+        size = len(expected) + 100
+
+        buf = bytearray(size)
+        assert formats.decode_into(codec, data, buf) == len(expected)
+        assert buf[:len(expected)] == expected
+
+        with mmap.mmap(-1, size) as mapped:
+            assert formats.decode_into(codec, data, mapped) == len(expected)
+            assert mapped[:len(expected)] == expected
+
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        try:
+            assert formats.decode_into(codec, data, shm.buf) == len(expected)
+            assert bytes(shm.buf[:len(expected)]) == expected
+        finally:
+            shm.close()
+            shm.unlink()
+
+    @pytest.mark.parametrize('codec, name', SAMPLES)
+    def test_too_small(self, codec, name):
+        """Test a buffer too small for the output is refused."""
+        from un80.cpm import OutputSizeError
+
+        data = (TESTS_DIR / name).read_bytes()
+        size = len(formats.decoder(codec)(data))
+        with pytest.raises(OutputSizeError):
+            formats.decode_into(codec, data, bytearray(size - 1))
+
+    def test_read_only(self):
+        """Test a read-only buffer is refused."""
+        data = (TESTS_DIR / 'test.aqm').read_bytes()
+        with pytest.raises(TypeError):
+            formats.decode_into('squeeze', data, bytes(64 * 1024))
+
+    @pytest.mark.parametrize('codec, name', SAMPLES)
+    def test_buffer_decoder(self, codec, name):
+        """Test the bytearray decoders match the public ones."""
+        data = (TESTS_DIR / name).read_bytes()
+        result = formats.decoder(codec, buffer=True)(data, None, None)
+        assert isinstance(result, bytearray)
+        assert result == formats.decoder(codec)(data)
@@ -0,0 +1,74 @@
+"""Tests for the executor work units."""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from un80 import jobs
+from un80.arc import decompress_member, list_arc
+
+TESTS_DIR = Path(__file__).parent
+SAMPLE = TESTS_DIR / "test.arc"
+
+pytestmark = pytest.mark.skipif(not jobs._HAVE_SHARED, reason="needs POSIX shared memory")
+
+
+@pytest.fixture(autouse=True)
+def min_size(monkeypatch):
+    """Share anything over 4K, so that the sample's members qualify."""
+    monkeypatch.setattr(jobs, 'SHARED_MIN_SIZE', 4096)
+
+
+def _largest_entry():
+    return max(list_arc(SAMPLE), key=lambda entry: entry.original_size)
+
+
+def _expected(entry):
+    with open(SAMPLE, 'rb') as f:
+        f.seek(entry.data_offset)
+        return decompress_member(entry, f.read(entry.compressed_size))
+
+
+def _segment_exists(shared):
+    return os.path.exists(f'/dev/shm/{shared.name}')
+
+
+class TestSharedResults:
+    """Tests for returning decoded members in shared memory."""
+
+    def test_process_pool(self):
+        """Test a large member crosses the pool as a descriptor and reads back intact."""
+        entry = _largest_entry()
+        # Forked, so the worker sees the lowered SHARED_MIN_SIZE
+        context = multiprocessing.get_context('fork')
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            _, _, data, _, _ = pool.submit(
+                jobs.prepare_member, SAMPLE, 'arc', entry, False, None, True).result()
+        assert isinstance(data, jobs.SharedData)
+
+        chunks = jobs.shared_chunks(data, chunk_size=4096)
+        assert not _segment_exists(data)  # Unlinked as soon as it is mapped
+        assert b''.join(bytes(chunk) for chunk in chunks) == _expected(entry)
+
+    def test_small_members_pickled(self):
+        """Test members under SHARED_MIN_SIZE are returned as bytes."""
+        entry = min(list_arc(SAMPLE), key=lambda entry: entry.original_size)
+        _, _, data, _, _ = jobs.prepare_member(SAMPLE, 'arc', entry, shared=True)
+        assert data == _expected(entry)
+        assert list(jobs.shared_chunks(data)) == [data]
+
+    def test_discard(self):
+        """Test a result that is never read is freed."""
+        _, _, data, _, _ = jobs.prepare_member(SAMPLE, 'arc', _largest_entry(), shared=True)
+        assert _segment_exists(data)
+        jobs.discard(data)
+        assert not _segment_exists(data)
+
+    def test_not_shared_by_default(self):
+        """Test results are plain bytes unless shared is asked for."""
+        entry = _largest_entry()
+        _, _, data, _, _ = jobs.prepare_member(SAMPLE, 'arc', entry)
+        assert data == _expected(entry)
@@ -0,0 +1,154 @@
+"""Tests for the batch journal and resuming batch runs."""
+
+import json
+import shutil
+from pathlib import Path
+
+from un80.arc import list_arc
+from un80.batch import find_sources, plan, run_batch
+from un80.cli import main
+from un80.journal import JOURNAL_NAME, Journal, file_hash, read_journal
+
+TESTS_DIR = Path(__file__).parent
+
+
+def _make_tree(root: Path) -> None:
+    root.mkdir()
+    shutil.copy(TESTS_DIR / "test.arc", root / "test.arc")
+    shutil.copy(TESTS_DIR / "test.aym", root / "test.aym")
+
+
+class TestJournal:
+    """Tests for writing and reading the journal."""
+
+    def test_batched_writes(self, tmp_path):
+        """Test records are held back until a batch is full."""
+        path = tmp_path / "journal"
+        with Journal(path, batch=3, interval=3600) as journal:
+            for offset in range(2):
+                journal.record('a.arc', 'h', offset, f'out/{offset}')
+            assert path.read_text() == ''
+            journal.record('a.arc', 'h', 2, 'out/2')
+            assert len(path.read_text().splitlines()) == 3
+            journal.record('a.arc', 'h', 3, None, 'failed', 'bad data')
+        records = list(read_journal(path))
+        assert [r['offset'] for r in records] == [0, 1, 2, 3]
+        assert records[3]['error'] == 'bad data'
+
+    def test_resume(self, tmp_path):
+        """Test completed units are loaded, failed ones are not, and appends follow."""
+        path = tmp_path / "journal"
+        with Journal(path) as journal:
+            journal.record('a.arc', 'h', 0, 'out/A')
+            journal.record('a.arc', 'h', 9, None, 'failed', 'bad data')
+            journal.record('b.tqt', 'g', None, 'out/B')
+        with Journal(path, resume=True) as journal:
+            assert journal.completed == {('a.arc', 'h', 0): 'out/A',
+                                         ('b.tqt', 'g', None): 'out/B'}
+            journal.record('a.arc', 'h', 9, 'out/C')
+        assert len(list(read_journal(path))) == 4
+
+    def test_fresh_start(self, tmp_path):
+        """Test a journal opened without resume starts empty."""
+        path = tmp_path / "journal"
+        path.write_text(json.dumps({'hash': 'h', 'offset': 0, 'status': 'done'}) + '\n')
+        with Journal(path) as journal:
+            assert journal.completed == {}
+        assert path.read_text() == ''
+
+    def test_cut_short(self, tmp_path):
+        """Test a line cut short by a crash is ignored and dropped before appending."""
+        path = tmp_path / "journal"
+        line = json.dumps({'source': 'a.arc', 'hash': 'h', 'offset': 0, 'output': 'A',
+                           'status': 'done'})
+        path.write_text(line + '\n' + line[:20])
+        with Journal(path, resume=True) as journal:
+            assert list(journal.completed) == [('a.arc', 'h', 0)]
+            journal.record('a.arc', 'h', 1, 'B')
+        assert [r['offset'] for r in read_journal(path)] == [0, 1]
+
+    def test_file_hash(self, tmp_path):
+        """Test the hash follows the contents."""
+        (tmp_path / "a").write_bytes(b'x' * 3000000)
+        (tmp_path / "b").write_bytes(b'x' * 3000000)
+        assert file_hash(tmp_path / "a") == file_hash(tmp_path / "b")
+        (tmp_path / "b").write_bytes(b'y')
+        assert file_hash(tmp_path / "a") != file_hash(tmp_path / "b")
+
+
+class TestResume:
+    """Tests for resuming an interrupted batch run."""
+
+    def _interrupted_run(self, tmp_path, units):
+        """Run a batch over the sample tree, stopping after some units."""
+        out = tmp_path / "out"
+        out.mkdir()
+        with Journal(out / JOURNAL_NAME, batch=1) as journal:
+            results = run_batch([tmp_path / "in"], out, workers=1, journal=journal)
+            for _ in range(units):
+                next(results)
+            results.close()
+        return out
+
+    def test_resume_skips_finished(self, tmp_path):
+        """Test finished units are not decoded again and the rest are completed."""
+        _make_tree(tmp_path / "in")
+        out = self._interrupted_run(tmp_path, 3)
+        done = [r['output'] for r in read_journal(out / JOURNAL_NAME)]
+        assert len(done) == 2  # The unit being written when stopped is not recorded
+        for output in done:
+            Path(output).unlink()
+
+        with Journal(out / JOURNAL_NAME, resume=True) as journal:
+            results = list(run_batch([tmp_path / "in"], out, workers=2, journal=journal))
+        total = len(list_arc(TESTS_DIR / "test.arc")) + 1
+        assert len(results) == total - 2
+        assert not any(Path(output).exists() for output in done)
+        assert len(list(read_journal(out / JOURNAL_NAME))) == total
+
+    def test_changed_source(self, tmp_path):
+        """Test a source changed since the journal was written is done again."""
+        _make_tree(tmp_path / "in")
+        out = self._interrupted_run(tmp_path, 3)
+        shutil.copy(TESTS_DIR / "test.lzt", tmp_path / "in" / "test.aym")
+        shutil.copy(TESTS_DIR / "test.lbr", tmp_path / "in" / "test.arc")
+        with Journal(out / JOURNAL_NAME, resume=True) as journal:
+            assert journal.completed
+            results = list(run_batch([tmp_path / "in"], out, workers=2, journal=journal))
+        assert {r.source.path for r in results} == {str(tmp_path / "in" / "test.aym"),
+                                                   str(tmp_path / "in" / "test.arc")}
+
+    def test_copy_at_new_path(self, tmp_path):
+        """Test an identical archive at another path is not taken as done."""
+        _make_tree(tmp_path / "in")
+        out = self._interrupted_run(tmp_path, 0)
+        with Journal(out / JOURNAL_NAME, resume=True) as journal:
+            list(run_batch([tmp_path / "in"], out, workers=2, journal=journal))
+        shutil.copy(TESTS_DIR / "test.arc", tmp_path / "in" / "copy.arc")
+        with Journal(out / JOURNAL_NAME, resume=True) as journal:
+            results = list(run_batch([tmp_path / "in"], out, workers=2, journal=journal))
+        assert {r.source.path for r in results} == {str(tmp_path / "in" / "copy.arc")}
+        assert len(results) == len(list_arc(TESTS_DIR / "test.arc"))
+
+    def test_fresh_run_hashes_late(self, tmp_path):
+        """Test sources are only hashed up front when the journal lists them."""
+        _make_tree(tmp_path / "in")
+        out = tmp_path / "out"
+        out.mkdir()
+        with Journal(out / JOURNAL_NAME) as journal:
+            tasks, _ = plan(find_sources([tmp_path / "in"], out), journal=journal)
+            assert {task.args[0].hash for task in tasks} == {None}
+            list(run_batch([tmp_path / "in"], out, workers=2, journal=journal))
+        digest = file_hash(tmp_path / "in" / "test.arc")
+        assert {r['hash'] for r in read_journal(out / JOURNAL_NAME)
+                if r['source'].endswith('test.arc')} == {digest}
+
+    def test_cli(self, tmp_path, capsys):
+        """Test --resume picks up the journal in the output directory."""
+        _make_tree(tmp_path / "in")
+        out = self._interrupted_run(tmp_path, 5)
+        assert main(['batch', str(tmp_path / "in"), '-o', str(out), '--resume']) == 0
+        captured = capsys.readouterr().out
+        assert 'Resuming: 4 unit(s) already done' in captured
+        total = len(list_arc(TESTS_DIR / "test.arc")) + 1
+        assert f"{total - 4} file(s)" in captured
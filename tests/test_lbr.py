@@ -1,11 +1,13 @@
 """Tests for LBR archive handling."""
 
+import io
 import pytest
 from pathlib import Path
+import struct
 import tempfile
 import os
 
-from un80.lbr import list_lbr, extract_lbr
+from un80.lbr import list_lbr, extract_lbr, iter_lbr, parse_entry, read_directory
 
 SAMPLES_DIR = Path(__file__).parent / "samples" / "lbr"
 
@@ -69,3 +71,73 @@ class TestLBR:
             content = txt_path.read_bytes()
             # Should contain printable ASCII
             assert any(32 <= b < 127 for b in content[:100])
+
+    def test_iter_lbr_matches_extract(self):
+        """Test that streaming iteration yields the same members as extract_lbr."""
+        sample = SAMPLES_DIR / "crlzh20.lbr"
+        if not sample.exists():
+            pytest.skip("crlzh20.lbr sample not available")
+
+        expected = extract_lbr(sample)
+        streamed = [(m.filename, m.read()) for m in iter_lbr(sample)]
+        assert streamed == expected
+
+    def test_iter_lbr_skipping_members(self):
+        """Test that unconsumed members do not disturb later ones."""
+        sample = SAMPLES_DIR / "crlzh20.lbr"
+        if not sample.exists():
+            pytest.skip("crlzh20.lbr sample not available")
+
+        expected = extract_lbr(sample)
+        # Read only every other member
+        for i, member in enumerate(iter_lbr(sample)):
+            assert member.filename == expected[i][0]
+            if i % 2:
+                assert member.read() == expected[i][1]
+
+    def test_iter_lbr_codecs(self):
+        """Test that members report the codec they were stored with."""
+        sample = SAMPLES_DIR / "crlzh20.lbr"
+        if not sample.exists():
+            pytest.skip("crlzh20.lbr sample not available")
+
+        codecs = {m.codec for m in iter_lbr(sample)}
+        assert 'crlzh' in codecs
+        assert codecs <= {'stored', 'squeeze', 'crunch', 'crlzh'}
+
+
+def _directory(*entries, sectors=1):
+    """An LBR directory holding the given 32-byte entries, then unused slots."""
+    head = bytes(12) + (0).to_bytes(2, 'little') + sectors.to_bytes(2, 'little') + bytes(16)
+    return (head + b''.join(entries)).ljust(sectors * 128, b'\xff')
+
+
+def _entry(name, ext, index, status=0):
+    return (bytes([status]) + name.ljust(8).encode('latin-1') + ext.ljust(3).encode('latin-1')
+            + struct.pack('<HHHHHHHB', index, 1, 0x1234, 0, 0, 0, 0, 7) + bytes(5))
+
+
+class TestReadDirectory:
+    """Tests for parsing the LBR directory."""
+
+    def test_fields(self):
+        """Test fields are unpacked and attribute bits masked from the name."""
+        entry = parse_entry(_entry('R\xc5ADME', 'T\xd8T', 5))
+        assert (entry.name, entry.ext) == ('README  ', 'TXT')
+        assert (entry.index, entry.length, entry.crc, entry.pad_count) == (5, 1, 0x1234, 7)
+        assert not hasattr(entry, '__dict__')
+
+    def test_entries(self):
+        """Test active entries are kept across sectors, up to the first unused slot."""
+        entries = [_entry(f'FILE{i}', 'DAT', 2 + i) for i in range(6)]
+        entries[2] = _entry('GONE', 'DAT', 4, status=0xFE)
+        directory = _directory(*entries, sectors=2)
+        directory += _entry('AFTER', 'DAT', 20)  # Past the directory
+        names = [e.filename for e in read_directory(io.BytesIO(directory))]
+        assert names == ['FILE0.DAT', 'FILE1.DAT', 'FILE3.DAT', 'FILE4.DAT', 'FILE5.DAT']
+
+    def test_truncated(self):
+        """Test a directory cut short keeps the whole sectors read."""
+        directory = _directory(*[_entry(f'FILE{i}', 'DAT', 9 + i) for i in range(6)], sectors=4)
+        names = [e.filename for e in read_directory(io.BytesIO(directory[:200]))]
+        assert names == ['FILE0.DAT', 'FILE1.DAT', 'FILE2.DAT']
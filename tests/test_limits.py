@@ -0,0 +1,192 @@
+"""Tests for decoding resource limits."""
+
+import asyncio
+import pickle
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from un80 import jobs
+from un80.aio import open_archive_async
+from un80.arc import decompress_member, extract_arc, iter_arc, list_arc
+from un80.cli import main
+from un80.cpm import decode_rle90
+from un80.crlzh import uncrlzh
+from un80.crunch import uncrunch
+from un80.lbr import extract_lbr
+from un80.limits import LimitExceeded, Limits, parse_size
+from un80.squeeze import unsqueeze
+
+TESTS_DIR = Path(__file__).parent
+SAMPLES_DIR = TESTS_DIR / "samples"
+
+# 4 KB of RLE90 that decodes to half a megabyte
+RLE_BOMB = b'A' + b'\x90\xff' * 2000
+
+
+class TestLimits:
+    """Tests for the Limits object itself."""
+
+    def test_parse_size(self):
+        """Test byte counts with and without suffixes."""
+        assert parse_size('1000') == 1000
+        assert parse_size('64K') == 64 * 1024
+        assert parse_size('1.5m') == 3 * 512 * 1024
+        assert parse_size('2GB') == 2 << 30
+        with pytest.raises(ValueError):
+            parse_size('lots')
+
+    def test_check_returns_checkpoint(self):
+        """Test check returns the next size to check at, capped by the limit."""
+        limits = Limits(max_output=100_000)
+        limits.begin(10)
+        assert limits.check(0) == 65536
+        assert limits.check(65537) == 100_000
+        with pytest.raises(LimitExceeded) as e:
+            limits.check(100_001)
+        assert e.value.limit == 'max_output'
+        assert e.value.value == 100_000
+
+    def test_ratio_uses_input_size(self):
+        """Test the ratio cap scales with the member's input size."""
+        limits = Limits(max_ratio=10)
+        limits.begin(50)
+        limits.check(500)
+        with pytest.raises(LimitExceeded, match='max_ratio'):
+            limits.check(501)
+
+    def test_totals_and_copy(self):
+        """Test usage accumulates across members and copy() starts afresh."""
+        limits = Limits(max_total_output=1000)
+        limits.begin(10)
+        limits.end(600)
+        limits.begin(10)
+        limits.check(400)
+        with pytest.raises(LimitExceeded, match='max_total_output'):
+            limits.check(401)
+        assert limits.copy().total_output == 0
+
+    def test_pickle(self):
+        """Test limits survive pickling with their usage (process pools)."""
+        limits = Limits(max_output=5, max_cpu=1.5)
+        limits.charge(3, 0.25)
+        copy = pickle.loads(pickle.dumps(limits))
+        assert (copy.max_output, copy.max_cpu, copy.total_output, copy.total_cpu) == (5, 1.5, 3, 0.25)
+        assert repr(copy) == 'Limits(max_output=5, max_cpu=1.5)'
+
+
+class TestDecoderLimits:
+    """Tests for limits enforced inside the decoders."""
+
+    def test_rle_bomb(self):
+        """Test RLE output stops at the cap rather than after decoding."""
+        assert len(decode_rle90(RLE_BOMB)) == 1 + 2000 * 254
+        limits = Limits(max_ratio=100)
+        limits.begin(len(RLE_BOMB))
+        with pytest.raises(LimitExceeded, match='max_ratio'):
+            decode_rle90(RLE_BOMB, limits=limits)
+
+    def test_cpu_limit(self):
+        """Test the CPU clock is checked as output grows."""
+        limits = Limits(max_cpu=0)
+        limits.begin(len(RLE_BOMB))
+        with pytest.raises(LimitExceeded) as e:
+            decode_rle90(RLE_BOMB, limits=limits)
+        assert e.value.limit == 'max_cpu'
+
+    @pytest.mark.parametrize('decode, name', [
+        (uncrunch, 'test.lzt'),
+        (unsqueeze, 'test.aqm'),
+        (uncrlzh, 'test.aym'),
+    ])
+    def test_single_file_codecs(self, decode, name):
+        """Test each codec honours limits and is unchanged within them."""
+        data = (TESTS_DIR / name).read_bytes()
+        expected = decode(data)
+
+        limits = Limits(max_output=len(expected), max_cpu=60)
+        assert decode(data, limits=limits) == expected
+        assert limits.total_output == len(expected)
+
+        with pytest.raises(LimitExceeded, match='max_output'):
+            decode(data, limits=Limits(max_output=len(expected) - 1))
+        with pytest.raises(LimitExceeded, match='max_ratio'):
+            decode(data, limits=Limits(max_ratio=len(expected) / len(data) / 2))
+
+    def test_arc_members(self):
+        """Test every ARC method path stops at max_output."""
+        for path in (TESTS_DIR / "test.arc", *sorted((SAMPLES_DIR / "arc").glob("*.ar*"))):
+            with open(path, 'rb') as f:
+                for entry in list_arc(path):
+                    if entry.method_name == 'stored':
+                        continue
+                    f.seek(entry.data_offset)
+                    data = f.read(entry.compressed_size)
+                    size = len(decompress_member(entry, data))
+                    limits = Limits(max_output=size - 1)
+                    with pytest.raises(LimitExceeded, match='max_output'):
+                        decompress_member(entry, data, limits=limits)
+
+    def test_archive_total(self):
+        """Test max_total_output applies across the members of an archive."""
+        sample = TESTS_DIR / "test.arc"
+        sizes = [len(data) for _, data in extract_arc(sample)]
+        limits = Limits(max_total_output=sum(sizes) - 1)
+        with pytest.raises(LimitExceeded, match='max_total_output'):
+            for member in iter_arc(sample, limits=limits):
+                member.read()
+
+        limits = Limits(max_total_output=sum(sizes))
+        assert extract_arc(sample, limits=limits) == extract_arc(sample)
+
+    def test_lbr_members(self):
+        """Test compressed LBR members are decoded under the limits."""
+        sample = TESTS_DIR / "test2.lbr"
+        with pytest.raises(LimitExceeded):
+            extract_lbr(sample, limits=Limits(max_ratio=1))
+
+
+class TestBatchLimits:
+    """Tests for limits in the job, asyncio and CLI interfaces."""
+
+    def test_prepare_member_limited(self):
+        """Test usage is returned and the caller's limits are untouched."""
+        sample = TESTS_DIR / "test.arc"
+        limits = Limits(max_output=1 << 20)
+        entry = next(e for e in list_arc(sample) if e.method_name != 'stored')
+        prepared, (output, cpu) = jobs.prepare_member_limited(sample, 'arc', entry, False, limits)
+        assert output == len(prepared[2]) == entry.original_size
+        assert cpu >= 0
+        assert limits.total_output == 0
+
+    def test_async_process_pool_total(self):
+        """Test archive totals hold when members decode in other processes."""
+        sample = TESTS_DIR / "test.arc"
+        total = sum(len(data) for _, data in extract_arc(sample))
+        limits = Limits(max_total_output=total // 2)
+
+        async def run():
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                async for member in open_archive_async(sample, executor=pool, limits=limits):
+                    await member.read()
+
+        with pytest.raises(LimitExceeded, match='max_total_output'):
+            asyncio.run(run())
+        assert 0 < limits.total_output <= total // 2
+
+    def test_cli_stops_archive(self, capsys):
+        """Test the CLI stops at the first member over a limit."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            assert main([str(TESTS_DIR / "test.arc"), '-o', tmpdir, '--max-ratio', '1']) == 1
+            assert 'max_ratio' in capsys.readouterr().err
+            assert not list(Path(tmpdir).glob('.*.tmp'))
+
+    def test_cli_within_limits(self):
+        """Test generous limits do not change the extracted files."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            assert main([str(TESTS_DIR / "test.lzt"), '-o', tmpdir,
+                         '--max-output', '64M', '--max-cpu', '60']) == 0
+            out, = Path(tmpdir).iterdir()
+            assert out.read_bytes() == uncrunch((TESTS_DIR / "test.lzt").read_bytes())
@@ -0,0 +1,138 @@
+"""Tests for JSON and NDJSON listings."""
+
+import io
+import json
+from pathlib import Path
+
+from un80.arc import list_arc
+from un80.cli import main
+from un80.disk import DISK_FORMATS
+from un80.lbr import list_lbr
+from un80.listing import JsonWriter, iter_records
+
+from .test_disk import _build_image, _sample_files
+
+TESTS_DIR = Path(__file__).parent
+
+
+class TestRecords:
+    """Tests for the records made from directory entries."""
+
+    def test_lbr(self):
+        """Test LBR records carry the entry fields and embedded names."""
+        sample = TESTS_DIR / 'test2.lbr'
+        records = list(iter_records(sample, 'lbr'))
+        entries = list_lbr(sample)
+        assert [r['filename'] for r in records] == [e.filename for e in entries]
+        first = records[0]
+        assert first['index'] == entries[0].index and first['crc'] == entries[0].crc
+        assert first['offset'] == entries[0].index * 128
+        assert first['codec'] == 'crlzh'
+        assert first['original_filename'] == '-LT31FIL.LST'
+        assert any(r['codec'] == 'stored' and r['original_filename'] is None for r in records)
+
+    def test_arc(self):
+        """Test ARC records carry the header fields and method."""
+        sample = TESTS_DIR / 'test.arc'
+        records = list(iter_records(sample, 'arc'))
+        entries = list_arc(sample)
+        assert len(records) == len(entries)
+        for record, entry in zip(records, entries):
+            assert record['datetime'] == entry.datetime
+            assert record['offset'] == entry.data_offset
+            assert record['method'] == entry.method
+            assert record['method_name'] == entry.method_name
+            assert record['modified'] == entry.modified.isoformat()
+
+    def test_streamed(self):
+        """Test records are produced before the archive has been read."""
+        data = (TESTS_DIR / 'test.arc').read_bytes()
+        f = io.BytesIO(data)
+        next(iter_records(f, 'arc'))
+        assert f.tell() < len(data) // 2
+
+    def test_disk(self, tmp_path):
+        """Test disk image records list the files and block pointers."""
+        path = tmp_path / 'TEST.DSK'
+        path.write_bytes(_build_image(DISK_FORMATS['kaypro2'], _sample_files()))
+        records = list(iter_records(path, 'disk'))
+        assert [r['filename'] for r in records] == ['README.TXT', 'BIG.DAT', 'USER3.COM']
+        assert records[2]['user'] == 3 and isinstance(records[2]['blocks'], list)
+        assert records[0]['disk_format'] == DISK_FORMATS['kaypro2'].description
+
+    def test_single_file(self):
+        """Test a compressed file is one record with its original name."""
+        (record,) = iter_records(TESTS_DIR / 'test.aqm', 'squeeze')
+        assert record['original_filename'] == 'REDIR.ASM'
+        assert record['size'] == (TESTS_DIR / 'test.aqm').stat().st_size
+
+
+class TestJsonWriter:
+    """Tests for the JSON and NDJSON output."""
+
+    def test_json_many(self):
+        """Test several inputs make one valid JSON array, errors included."""
+        out = io.StringIO()
+        writer = JsonWriter(out, many=True)
+        writer.write_input('A.LBR', 'lbr', [{'filename': 'X'}, {'filename': 'Y'}])
+        writer.write_input('B.LBR', None, error='Cannot determine format')
+        writer.write_input('C.LBR', 'lbr', [])
+        writer.close()
+        assert json.loads(out.getvalue()) == [
+            {'file': 'A.LBR', 'format': 'lbr', 'entries': [{'filename': 'X'}, {'filename': 'Y'}]},
+            {'file': 'B.LBR', 'format': None, 'entries': [], 'error': 'Cannot determine format'},
+            {'file': 'C.LBR', 'format': 'lbr', 'entries': []},
+        ]
+
+    def test_read_error(self):
+        """Test an error part way through an input is reported after its entries."""
+        def records():
+            yield {'filename': 'X'}
+            raise ValueError('truncated')
+
+        out = io.StringIO()
+        writer = JsonWriter(out, ndjson=True)
+        assert not writer.write_input('A.ARC', 'arc', records())
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        assert lines == [
+            {'file': 'A.ARC', 'format': 'arc', 'filename': 'X'},
+            {'file': 'A.ARC', 'format': 'arc', 'error': 'truncated'},
+        ]
+
+
+class TestJsonCLI:
+    """Tests for --json and --ndjson on the command line."""
+
+    def test_ndjson_batch(self, capsys):
+        """Test many inputs are listed in one run, one line per entry."""
+        files = [TESTS_DIR / 'test.arc', TESTS_DIR / 'test2.lbr', TESTS_DIR / 'MISSING.LBR']
+        assert main([*map(str, files), '--ndjson']) == 1
+        lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        counts = {}
+        for line in lines:
+            counts[line['file']] = counts.get(line['file'], 0) + 1
+        assert counts[str(files[0])] == len(list_arc(files[0]))
+        assert counts[str(files[1])] == len(list_lbr(files[1]))
+        assert 'not found' in lines[-1]['error']
+
+    def test_json_single(self, capsys):
+        """Test one input is a single JSON object."""
+        assert main([str(TESTS_DIR / 'test.lbr'), '--json']) == 0
+        document = json.loads(capsys.readouterr().out)
+        assert document['format'] == 'lbr'
+        assert [entry['filename'] for entry in document['entries']] == ['TEST.TXT']
+
+    def test_several_without_json(self, capsys):
+        """Test several files are refused without a JSON listing."""
+        assert main([str(TESTS_DIR / 'test.lbr'), str(TESTS_DIR / 'test.arc'), '-l']) == 1
+        assert '--ndjson' in capsys.readouterr().err
+
+    def test_closed_stdout(self, monkeypatch):
+        """Test a reader that goes away (e.g. `| head -1`) ends the listing quietly."""
+        class ClosedPipe(io.StringIO):
+            def write(self, s):
+                raise BrokenPipeError(32, 'Broken pipe')
+
+        monkeypatch.setattr('sys.stdout', ClosedPipe())
+        assert main([str(TESTS_DIR / 'test.arc'), '--ndjson']) == 1
+        assert main([str(TESTS_DIR / 'test.arc'), str(TESTS_DIR / 'test.lbr'), '--json']) == 1
@@ -0,0 +1,139 @@
+"""Tests for the shared LZHUF decoder."""
+
+from pathlib import Path
+
+import pytest
+
+from un80 import lzhuf
+from un80.counters import DecodeCounters
+from un80.crlzh import V1_PARAMS, V2_PARAMS, uncrlzh
+from un80.lzhuf import D_CODE, D_LEN, TELEDISK, HuffmanTree, decode
+
+TESTS_DIR = Path(__file__).parent
+
+
+def _tokens(data, params):
+    """Greedy LZSS parse: byte values and (length, position) matches."""
+    tokens = []
+    j = 0
+    while j < len(data):
+        best = (0, 0)
+        lo = max(0, j - params.window + 1)
+        key = data[j:j + params.threshold + 1]
+        src = data.rfind(key, lo, j + len(key) - 1) if len(key) > params.threshold else -1
+        while src >= lo:
+            length = 0
+            while (length < params.lookahead and j + length < len(data)
+                   and data[src + length] == data[j + length]):
+                length += 1
+            if length > best[0]:
+                best = (length, j - src - 1)
+            src = data.rfind(key, lo, src + len(key) - 1) if src > lo else -1
+            if best[0] == params.lookahead:
+                break
+        if best[0] > params.threshold:
+            tokens.append(best)
+            j += best[0]
+        else:
+            tokens.append(data[j])
+            j += 1
+    return tokens
+
+
+def _encode(tokens, params):
+    """Encode tokens as LZHUF.C does, with the stop code if there is one."""
+    tree = HuffmanTree(params.n_char)
+    bits = []
+
+    def put_code(c):
+        path = []
+        k = tree.prnt[c + tree.T]
+        while True:
+            path.append(k & 1)
+            k = tree.prnt[k]
+            if k == tree.R:
+                break
+        bits.extend(reversed(path))
+        tree.update(c)
+
+    def put_bits(value, count):
+        bits.extend((value >> i) & 1 for i in reversed(range(count)))
+
+    low = params.position_bits
+    for token in tokens:
+        if isinstance(token, int):
+            put_code(token)
+            continue
+        length, position = token
+        put_code(256 + params.stop_code + length - params.threshold - 1)
+        first = D_CODE.index(position >> low)
+        put_bits(first >> (8 - D_LEN[first]), D_LEN[first])
+        put_bits(position, low)
+    if params.stop_code:
+        put_code(256)
+
+    bits += [0] * (-len(bits) % 8)
+    return bytes(int(''.join(map(str, bits[i:i + 8])), 2) for i in range(0, len(bits), 8))
+
+
+# Bytes at the end of a stream that may come from the padding bits
+F_SLACK = 60
+
+TEXT = b''.join(b'%d bottles of beer on the wall\r\n' % i for i in range(200)) + b'A' * 300
+
+
+class TestLzhufDecode:
+    """Tests for decoding LZHUF streams."""
+
+    @pytest.mark.parametrize('params', [TELEDISK, V1_PARAMS, V2_PARAMS])
+    def test_round_trip(self, params):
+        """Test literals, matches and overlapping matches decode."""
+        tokens = _tokens(TEXT, params)
+        assert any(isinstance(token, tuple) and token[0] > token[1] + 1 for token in tokens)
+        result = decode(_encode(tokens, params), 0, params)
+        if params.stop_code:
+            assert result == TEXT
+        else:
+            # The zero bits padding the last byte may decode as more data
+            assert result[:len(TEXT)] == TEXT and len(result) - len(TEXT) <= F_SLACK
+
+    def test_offset(self):
+        """Test the stream may start part way into the buffer."""
+        stream = _encode(_tokens(TEXT, TELEDISK), TELEDISK)
+        assert decode(b'HEADER' + stream, 6, TELEDISK).startswith(TEXT)
+
+    def test_preset_window(self):
+        """Test matches into the initial window see spaces, then zeros."""
+        stream = _encode([(5, 0), (3, TELEDISK.window - 6)], TELEDISK)
+        assert decode(stream, 0, TELEDISK)[:8] == b' ' * 5 + b'\0' * 3
+
+        # CrLZH presets the whole window to spaces
+        stream = _encode([(5, V2_PARAMS.window - 1)], V2_PARAMS)
+        assert decode(stream, 0, V2_PARAMS) == b' ' * 5
+
+    def test_stop_code(self):
+        """Test decoding ends at the stop code, ignoring what follows."""
+        stream = _encode(_tokens(b'HELLO HELLO', V2_PARAMS), V2_PARAMS)
+        assert decode(stream + b'\x1a' * 128, 0, V2_PARAMS) == b'HELLO HELLO'
+
+    def test_truncated(self):
+        """Test a stream without its end decodes as far as it goes."""
+        stream = _encode(_tokens(TEXT, V2_PARAMS), V2_PARAMS)
+        result = decode(stream[:len(stream) // 2], 0, V2_PARAMS)
+        assert 0 < len(result) < len(TEXT)
+        assert TEXT.startswith(result[:-F_SLACK])
+
+    def test_reconst(self):
+        """Test the tree is rebuilt when the root frequency saturates."""
+        data = bytes((i * 7919 >> 3) & 0xFF for i in range(lzhuf.MAX_FREQ + 1000))
+        counters = DecodeCounters()
+        stream = _encode(list(data), TELEDISK)
+        assert decode(stream, 0, TELEDISK, counters=counters).startswith(data)
+        assert counters['huffman_reconsts'] == 1
+        assert counters['huffman_bits'] <= len(stream) * 8
+
+    def test_crlzh_header(self):
+        """Test uncrlzh decodes a stream made with the shared parameters."""
+        header = b'\x76\xfdTEST.TXT\x00\x20\x00\x00\x00'
+        data = header + _encode(_tokens(TEXT, V2_PARAMS), V2_PARAMS)
+        assert uncrlzh(data) == TEXT
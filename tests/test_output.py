@@ -0,0 +1,98 @@
+"""Tests for the output directory writer."""
+
+import os
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from un80 import output
+from un80.arc import list_arc
+from un80.cli import main
+from un80.output import OutputDir
+
+TESTS_DIR = Path(__file__).parent
+
+
+@pytest.fixture(params=[True, False], ids=['dir_fd', 'paths'])
+def out(request, tmp_path, monkeypatch):
+    """An OutputDir with and without directory descriptor support."""
+    monkeypatch.setattr(output, '_HAVE_DIR_FD', request.param)
+    with OutputDir(tmp_path / 'out') as out:
+        yield out
+
+
+class TestOutputDir:
+    """Tests for creating, replacing and skipping files."""
+
+    def test_create(self, out):
+        """Test a new file is written from chunks."""
+        assert out.write('NEW.TXT', [b'abc', b'def']) == 'wrote'
+        assert Path(out.path, 'NEW.TXT').read_bytes() == b'abcdef'
+
+    def test_overwrite(self, out):
+        """Test an existing file is replaced, leaving no temporary file."""
+        Path(out.path, 'OLD.TXT').write_bytes(b'old')
+        assert out.write('OLD.TXT', b'new') == 'overwrote'
+        assert os.listdir(out.path) == ['OLD.TXT']
+        assert Path(out.path, 'OLD.TXT').read_bytes() == b'new'
+
+    def test_no_clobber(self, tmp_path):
+        """Test an existing file is kept with no_clobber."""
+        (tmp_path / 'KEEP.TXT').write_bytes(b'keep')
+        with OutputDir(tmp_path, no_clobber=True) as out:
+            assert out.exists('KEEP.TXT')
+            assert out.write('KEEP.TXT', b'new') == 'skipped'
+        assert (tmp_path / 'KEEP.TXT').read_bytes() == b'keep'
+
+    @pytest.mark.parametrize('existing', [False, True])
+    def test_failed_write(self, out, existing):
+        """Test a failure part way through leaves the directory as it was."""
+        if existing:
+            Path(out.path, 'FILE.TXT').write_bytes(b'old')
+
+        def chunks():
+            yield b'partial'
+            raise ValueError('decoder failed')
+
+        with pytest.raises(ValueError):
+            out.write('FILE.TXT', chunks())
+        assert os.listdir(out.path) == (['FILE.TXT'] if existing else [])
+        if existing:
+            assert Path(out.path, 'FILE.TXT').read_bytes() == b'old'
+
+    def test_modified(self, out):
+        """Test the timestamp is applied to the file."""
+        stamp = datetime(1986, 5, 17, 14, 30)
+        out.write('DATED.TXT', b'x', stamp)
+        assert os.stat(Path(out.path, 'DATED.TXT')).st_mtime == stamp.timestamp()
+
+    def test_unique_name(self, out):
+        """Test repeated names get a numbered stem."""
+        names = [out.unique_name(name) for name in ['A.TXT', 'A.TXT', 'A.TXT', 'NOEXT', 'NOEXT']]
+        assert names == ['A.TXT', 'A_1.TXT', 'A_2.TXT', 'NOEXT', 'NOEXT_1']
+
+    def test_fsync_batched(self, tmp_path, monkeypatch):
+        """Test files are synced one by one and the directory once per batch."""
+        synced = []
+        monkeypatch.setattr(output.os, 'fsync', synced.append)
+        monkeypatch.setattr(output, 'SYNC_BATCH', 3)
+        with OutputDir(tmp_path, fsync=True) as out:
+            for i in range(7):
+                out.write(f'{i}.TXT', b'x')
+            dir_fd = out._dir_fd
+        assert synced.count(dir_fd) == 3  # After files 3 and 6, then on close
+        assert len(synced) == 7 + 3
+
+
+class TestOutputCLI:
+    """Tests for files written by the command line."""
+
+    def test_timestamps(self, tmp_path):
+        """Test extracted members carry their archive timestamps."""
+        sample = TESTS_DIR / 'test.arc'
+        assert main([str(sample), '-o', str(tmp_path), '--fsync']) == 0
+        for entry in list_arc(sample):
+            if entry.modified:
+                mtime = os.stat(tmp_path / entry.filename).st_mtime
+                assert mtime == entry.modified.timestamp()
@@ -0,0 +1,113 @@
+"""Tests for pipelined extraction."""
+
+import io
+import threading
+from pathlib import Path
+
+import pytest
+
+from un80.arc import extract_arc, iter_arc
+from un80.cli import main
+from un80.lbr import extract_lbr, iter_lbr
+from un80.pipeline import WriteBehind, decode_member, read_ahead, stage_member
+from un80.stream import FileRange, Member
+
+TESTS_DIR = Path(__file__).parent
+
+
+def _pipeline_threads():
+    return [t for t in threading.enumerate() if t.name.startswith('un80-')]
+
+
+class TestReadAhead:
+    """Tests for the reader thread."""
+
+    @pytest.mark.parametrize('name, iterate, extract', [
+        ('test.arc', iter_arc, extract_arc),
+        ('test2.lbr', iter_lbr, extract_lbr),
+    ])
+    def test_same_members(self, name, iterate, extract):
+        """Test members come through in order with the same data."""
+        with open(TESTS_DIR / name, 'rb') as f:
+            members = [decode_member(m) for m in read_ahead(iterate(f), depth=2)]
+            result = [(m.filename, b''.join(m.chunks)) for m in members]
+        assert result == extract(TESTS_DIR / name)
+        assert not _pipeline_threads()
+
+    def test_stored_ranges_passed_on(self):
+        """Test stored members of a real file are left for the writer to copy."""
+        with open(TESTS_DIR / 'test2.lbr', 'rb') as f:
+            stored = [m for m in read_ahead(iter_lbr(f)) if m.codec == 'stored']
+            assert stored and all(isinstance(m.chunks, FileRange) for m in stored)
+
+    def test_in_memory_stored_read(self):
+        """Test stored members of an in-memory archive are read by the reader."""
+        data = (TESTS_DIR / 'test2.lbr').read_bytes()
+        member = next(m for m in iter_lbr(io.BytesIO(data)) if m.codec == 'stored')
+        staged = stage_member(member)
+        assert isinstance(staged.chunks, list)
+
+    def test_error_after_members(self):
+        """Test a reading error is raised after the members before it."""
+        def members():
+            yield Member(None, 'A.TXT', 'stored', [b'a'])
+            raise ValueError('damaged')
+
+        staged = read_ahead(members())
+        assert next(staged).filename == 'A.TXT'
+        with pytest.raises(ValueError, match='damaged'):
+            next(staged)
+
+    def test_close_stops_reader(self):
+        """Test abandoning the iterator stops the reader thread."""
+        def members():
+            for i in range(100):
+                yield Member(None, f'{i}.TXT', 'stored', [b'x'])
+
+        staged = read_ahead(members(), depth=1)
+        next(staged)
+        staged.close()
+        assert not _pipeline_threads()
+
+
+class TestWriteBehind:
+    """Tests for the writer thread."""
+
+    def test_order(self):
+        """Test items are written in order before the block is left."""
+        written = []
+        with WriteBehind(written.append, depth=1) as writer:
+            for i in range(20):
+                writer.put(i)
+        assert written == list(range(20))
+        assert not _pipeline_threads()
+
+    def test_error(self):
+        """Test a write error stops writing and is raised."""
+        written = []
+
+        def write(item):
+            if item == 3:
+                raise OSError('disk full')
+            written.append(item)
+
+        with pytest.raises(OSError, match='disk full'):
+            with WriteBehind(write) as writer:
+                for i in range(10):
+                    writer.put(i)
+        assert written == [0, 1, 2]
+
+
+class TestPipelinedCLI:
+    """Tests for the CLI's pipelined extraction."""
+
+    def test_no_clobber_skips_decoding(self, tmp_path, capsys):
+        """Test existing files are skipped, and the rest still extracted."""
+        sample = TESTS_DIR / 'test.arc'
+        members = extract_arc(sample)
+        (tmp_path / members[0][0]).write_bytes(b'KEEP')
+        assert main([str(sample), '-o', str(tmp_path), '-n']) == 0
+        assert '(skipped, already exists)' in capsys.readouterr().out
+        assert (tmp_path / members[0][0]).read_bytes() == b'KEEP'
+        for filename, data in members[1:]:
+            assert (tmp_path / filename).read_bytes() == data
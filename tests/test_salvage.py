@@ -0,0 +1,146 @@
+"""Tests for recovering members from damaged files."""
+
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from un80.arc import ArcError, extract_arc, list_arc
+from un80.cli import main
+from un80.lbr import extract_lbr, list_lbr
+from un80.salvage import salvage, salvage_buffer
+
+TESTS_DIR = Path(__file__).parent
+SAMPLES_DIR = TESTS_DIR / "samples"
+
+
+def _arc_bytes():
+    path = TESTS_DIR / "test.arc"
+    return path.read_bytes(), list_arc(path)
+
+
+class TestSalvageArc:
+    """Tests for ARC members found by header search."""
+
+    def test_intact_archive(self):
+        """Test an undamaged archive is recovered whole, in order."""
+        sample = TESTS_DIR / "test.arc"
+        members = salvage(sample)
+        assert [(m.filename, m.data) for m in members] == extract_arc(sample)
+        assert [m.offset + 29 for m in members] == [e.data_offset for e in list_arc(sample)]
+
+    def test_bad_marker(self):
+        """Test members after a corrupted header are still recovered."""
+        data, entries = _arc_bytes()
+        damaged = bytearray(data)
+        damaged[entries[2].data_offset - 29] = 0
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "BAD.ARC"
+            path.write_bytes(damaged)
+            with pytest.raises(ArcError):
+                list_arc(path)
+            names = [m.filename for m in salvage(path)]
+        assert names == [e.filename for i, e in enumerate(entries) if i != 2]
+
+    def test_crc_mismatch(self):
+        """Test a member in an intact run that fails its CRC is kept, unverified."""
+        data, entries = _arc_bytes()
+        damaged = bytearray(data)
+        damaged[entries[2].data_offset - 6] ^= 0xFF  # Low byte of the CRC
+        members = salvage_buffer(bytes(damaged))
+        assert [m.data for m in members] == [m.data for m in salvage_buffer(data)]
+        assert not members[2].verified
+        assert members[3].verified
+
+    def test_truncated(self):
+        """Test the last member of a truncated archive is partly recovered."""
+        data, entries = _arc_bytes()
+        members = salvage_buffer(data[:entries[-1].data_offset + 200])
+        assert [m.filename for m in members] == [e.filename for e in entries]
+        assert not members[-1].verified and members[-1].data
+        intact = salvage_buffer(data)
+        assert [m.verified for m in members[:-1]] == [m.verified for m in intact[:-1]]
+
+    def test_embedded_in_junk(self):
+        """Test an archive inside random data is found at its offset."""
+        data, entries = _arc_bytes()
+        junk = bytes(range(256)) * 64 + os.urandom(65536)
+        members = salvage_buffer(junk + data + junk)
+        assert [m.offset for m in members][:1] == [len(junk)]
+        assert len(members) == len(entries)
+
+    def test_random_data(self):
+        """Test random data yields nothing."""
+        assert salvage_buffer(os.urandom(1 << 20)) == []
+        assert salvage_buffer(b'') == []
+
+
+class TestSalvageLbr:
+    """Tests for LBR directories and bare compressed streams."""
+
+    def test_bad_directory_size(self):
+        """Test a directory size read_directory rejects is read leniently."""
+        sample = SAMPLES_DIR / "lbr" / "crlzh20.lbr"
+        if not sample.exists():
+            pytest.skip("crlzh20.lbr not found")
+        damaged = bytearray(sample.read_bytes())
+        damaged[14:16] = (200).to_bytes(2, 'little')
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "BAD.LBR"
+            path.write_bytes(damaged)
+            with pytest.raises(ValueError):
+                list_lbr(path)
+            members = salvage(path)
+        expected = extract_lbr(sample)
+        assert sorted((m.filename, m.data) for m in members) == sorted(expected)
+        assert all(m.verified for m in members)
+
+    def test_lost_directory(self):
+        """Test compressed members are found by magic without a directory."""
+        sample = TESTS_DIR / "test2.lbr"
+        damaged = bytearray(sample.read_bytes())
+        first = min(e.index for e in list_lbr(sample)) * 128
+        damaged[:first] = bytes(first)
+        members = salvage_buffer(bytes(damaged))
+        expected = dict(extract_lbr(sample))
+        compressed = [e for e in list_lbr(sample) if damaged[e.index * 128] == 0x76]
+        assert len(members) == len(compressed)
+        for member in members:
+            assert member.source in ('squeeze', 'crunch', 'crlzh')
+            assert member.data == expected[member.filename]
+
+    def test_squeeze_checksum(self):
+        """Test a squeezed stream is verified by its checksum."""
+        data = (TESTS_DIR / "test.aqm").read_bytes()
+        member, = salvage_buffer(b'\x00' * 1000 + data + b'\x1a' * 300)
+        assert member.offset == 1000 and member.verified
+
+        # A damaged stream is dropped unless the file ends inside it
+        damaged = bytearray(data)
+        damaged[len(data) // 2] ^= 0x55
+        member, = salvage_buffer(bytes(damaged) + data)
+        assert member.offset == len(damaged) and member.verified
+
+
+class TestSalvageCli:
+    """Tests for 80un salvage."""
+
+    def test_extract(self, capsys):
+        """Test recovered members are written out."""
+        data, entries = _arc_bytes()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "BAD.ARC"
+            path.write_bytes(data[:entries[3].data_offset - 29] + b'\xff' * 40
+                             + data[entries[3].data_offset + 11:])
+            out = Path(tmpdir) / "out"
+            assert main(['salvage', str(path), '-o', str(out)]) == 0
+            names = sorted(p.name for p in out.iterdir())
+        assert names == sorted(e.filename for i, e in enumerate(entries) if i != 3)
+        assert f"{len(entries) - 1} extracted" in capsys.readouterr().out
+
+    def test_list_and_nothing_found(self, capsys):
+        """Test --list output and the exit status when nothing is found."""
+        assert main(['salvage', str(TESTS_DIR / "test.aqm"), '--list']) == 0
+        assert 'squeeze' in capsys.readouterr().out
+        assert main(['salvage', str(TESTS_DIR / "test.txt")]) == 1
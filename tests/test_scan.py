@@ -0,0 +1,81 @@
+"""Tests for the directory scanner."""
+
+import shutil
+import tempfile
+from pathlib import Path
+
+from un80.cli import main
+from un80.scan import classify_file, scan, walk_files
+
+TESTS_DIR = Path(__file__).parent
+
+
+def _make_tree(root: Path) -> None:
+    """Sample tree with nested directories and misnamed files."""
+    (root / "a" / "b").mkdir(parents=True)
+    shutil.copy(TESTS_DIR / "test.lbr", root / "a" / "ONE.LBR")
+    shutil.copy(TESTS_DIR / "test.aqm", root / "a" / "b" / "renamed.dat")
+    shutil.copy(TESTS_DIR / "test.lzt", root / "CRUNCHED")
+    shutil.copy(TESTS_DIR / "test.txt", root / "plain.txt")
+    (root / "empty").write_bytes(b'')
+
+
+class TestScan:
+    """Tests for the directory scanner."""
+
+    def test_walk_files(self):
+        """Test the walk finds every file with its size, in name order."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            _make_tree(root)
+            files = list(walk_files(root))
+            names = [Path(p).relative_to(root).as_posix() for p, _ in files]
+            assert names == ['CRUNCHED', 'empty', 'plain.txt',
+                             'a/ONE.LBR', 'a/b/renamed.dat']
+            assert dict(files)[str(root / 'CRUNCHED')] == (TESTS_DIR / "test.lzt").stat().st_size
+
+    def test_scan_detects_misnamed(self):
+        """Test magic bytes win over names and embedded names are reported."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            _make_tree(root)
+            results = {Path(r.path).name: r for r in scan(root, workers=2)}
+
+            assert len(results) == 5
+            assert results['ONE.LBR'].format == 'lbr'
+            assert results['renamed.dat'].format == 'squeeze'
+            assert results['renamed.dat'].original_name == 'REDIR.ASM'
+            assert results['CRUNCHED'].format == 'crunch'
+            assert results['CRUNCHED'].original_name == 'RCPM0593.LST'
+            assert results['plain.txt'].format is None
+            assert results['empty'].format is None
+
+    def test_scan_order_matches_walk(self):
+        """Test results stream in walk order across many batches."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            data = (TESTS_DIR / "test.aym").read_bytes()[:128]
+            for i in range(300):
+                (root / f"F{i:03}.X").write_bytes(data)
+            paths = [r.path for r in scan(root, workers=4)]
+            assert paths == [p for p, _ in walk_files(root)]
+
+    def test_classify_missing_file(self):
+        """Test unreadable files are reported rather than raised."""
+        result = classify_file('/nonexistent/FILE.LBR', 0)
+        assert result.format is None
+        assert result.error
+
+    def test_cli_scan(self, capsys):
+        """Test 80un scan prints one line per recognised file and a summary."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            _make_tree(root)
+            assert main(['scan', str(root)]) == 0
+            out = capsys.readouterr().out
+            assert 'renamed.dat  (REDIR.ASM)' in out
+            assert 'plain.txt' not in out
+            assert '5 file(s) scanned: 1 crunch, 1 lbr, 1 squeeze' in out
+
+            assert main(['scan', '--all', str(root)]) == 0
+            assert 'plain.txt' in capsys.readouterr().out
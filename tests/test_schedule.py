@@ -0,0 +1,169 @@
+"""Tests for cost-ordered scheduling and batch extraction."""
+
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from un80 import schedule
+from un80.arc import extract_arc, list_arc
+from un80.batch import run_batch
+from un80.cli import main
+from un80.crlzh import uncrlzh
+from un80.lbr import extract_lbr, list_lbr
+from un80.limits import Limits
+from un80.schedule import Task, estimate_file, estimate_member, largest_first, lbr_codec
+
+TESTS_DIR = Path(__file__).parent
+
+
+def _make_tree(root: Path) -> None:
+    """Mirror-like tree of archives, a compressed file and a plain file."""
+    (root / "sub").mkdir(parents=True)
+    shutil.copy(TESTS_DIR / "test.arc", root / "test.arc")
+    shutil.copy(TESTS_DIR / "test2.lbr", root / "sub" / "test2.lbr")
+    shutil.copy(TESTS_DIR / "test.aym", root / "sub" / "test.aym")
+    shutil.copy(TESTS_DIR / "test.txt", root / "plain.txt")
+
+
+class TestEstimates:
+    """Tests for estimating task costs from headers."""
+
+    def test_arc_member(self):
+        """Test ARC members are costed by decoded size and method."""
+        for entry in list_arc(TESTS_DIR / "test.arc"):
+            task = estimate_member('arc', entry)
+            assert task.memory == (0 if entry.method in (1, 2) else entry.original_size)
+            assert task.cost > 0
+
+    def test_codec_order(self):
+        """Test the same size costs more with a slower codec."""
+        costs = [estimate_file(codec, 10000).cost for codec in ('squeeze', 'crunch', 'crlzh')]
+        assert costs == sorted(costs)
+        assert schedule.estimate('stored', 10000) < costs[0]
+
+    def test_lbr_member(self):
+        """Test LBR members are costed by the codec their name implies."""
+        entries = {e.filename: e for e in list_lbr(TESTS_DIR / "test2.lbr")}
+        assert lbr_codec('README.TQT') == 'squeeze'
+        assert lbr_codec('LT31.COM') == 'stored'
+        assert lbr_codec('NOEXT') == 'stored'
+        for name, entry in entries.items():
+            task = estimate_member('lbr', entry, ('args',))
+            assert task.args == ('args',)
+            if lbr_codec(name) == 'stored':
+                assert task.memory == 0
+
+
+class TestLargestFirst:
+    """Tests for the cost-ordered dispatcher."""
+
+    def test_order(self):
+        """Test tasks start in descending cost and every result comes back."""
+        started = []
+
+        def work(key):
+            started.append(key)
+            return key
+
+        tasks = [Task(cost, 0, (cost,)) for cost in (3, 10, 1, 7)]
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            results = [future.result() for _, future in
+                       largest_first(executor, work, tasks, max_pending=1)]
+        assert started == [10, 7, 3, 1]
+        assert sorted(results) == [1, 3, 7, 10]
+
+    def test_memory_budget(self):
+        """Test submissions wait while results in flight fill the budget."""
+        in_flight = []
+        peak = 0
+        lock = threading.Lock()
+
+        def work(memory):
+            with lock:
+                in_flight.append(memory)
+            return memory
+
+        tasks = [Task(memory, memory, (memory,)) for memory in (60, 50, 40, 30, 20)]
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            for task, future in largest_first(executor, work, tasks, max_pending=4,
+                                              memory_budget=100):
+                with lock:
+                    peak = max(peak, sum(in_flight))
+                    in_flight.remove(future.result())
+        assert peak <= 100
+
+    def test_oversized_task(self):
+        """Test a task bigger than the budget still runs on its own."""
+        tasks = [Task(1, 500, (1,)), Task(2, 500, (2,))]
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            results = [f.result() for _, f in
+                       largest_first(executor, lambda x: x, tasks, max_pending=2,
+                                     memory_budget=100)]
+        assert results == [2, 1]
+
+    def test_close_discards(self):
+        """Test results never consumed are discarded when the iterator is closed."""
+        discarded = []
+        gate = threading.Event()
+
+        def work(key):
+            if key != 3:
+                gate.wait(5)
+            return key
+
+        tasks = [Task(cost, 0, (cost,)) for cost in (3, 2, 1)]
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            results = largest_first(executor, work, tasks, max_pending=3,
+                                    discard=discarded.append)
+            _, first = next(results)
+            gate.set()
+            results.close()
+        assert first.result() == 3
+        assert sorted(discarded) == [1, 2]
+
+
+class TestBatch:
+    """Tests for extracting a tree on a process pool."""
+
+    def test_run_batch(self, tmp_path):
+        """Test every archive member and file lands in the mirrored tree."""
+        _make_tree(tmp_path / "in")
+        out = tmp_path / "out"
+        results = list(run_batch([tmp_path / "in"], out, workers=2))
+        assert {r.status for r in results} == {'wrote'}
+
+        for filename, data in extract_arc(TESTS_DIR / "test.arc"):
+            assert (out / "test" / filename).read_bytes() == data
+        for filename, data in extract_lbr(TESTS_DIR / "test2.lbr"):
+            assert (out / "sub" / "test2" / filename).read_bytes() == data
+        decoded = uncrlzh((TESTS_DIR / "test.aym").read_bytes())
+        assert [p.read_bytes() for p in (out / "sub").iterdir() if p.is_file()] == [decoded]
+        assert len(results) == len(list_arc(TESTS_DIR / "test.arc")) + \
+            len(list_lbr(TESTS_DIR / "test2.lbr")) + 1
+
+    def test_failures_reported(self, tmp_path):
+        """Test a member that passes a limit is reported and the others still extracted."""
+        sizes = sorted((len(data), name) for name, data in extract_arc(TESTS_DIR / "test.arc"))
+        limits = Limits(max_output=sizes[-2][0])
+        results = list(run_batch([TESTS_DIR / "test.arc"], tmp_path, workers=2,
+                                 memory_budget=1, limits=limits))
+        failed = [r for r in results if r.status == 'failed']
+        assert [r.name for r in failed] == [sizes[-1][1]]
+        assert 'max_output' in failed[0].error
+        assert len(results) == len(sizes)
+
+    def test_cli(self, tmp_path, capsys):
+        """Test 80un batch extracts the tree and skips existing files with -n."""
+        _make_tree(tmp_path / "in")
+        out = tmp_path / "out"
+        assert main(['batch', str(tmp_path / "in"), '-o', str(out), '-j', '2']) == 0
+        assert 'extracted' in capsys.readouterr().out
+        assert main(['batch', str(tmp_path / "in"), '-o', str(out), '-n',
+                     '--memory', '1M']) == 0
+        assert 'skipped' in capsys.readouterr().out
+
+    def test_cli_missing(self, capsys):
+        """Test a missing input is reported."""
+        assert main(['batch', 'missing-dir']) == 1
+        assert 'missing-dir' in capsys.readouterr().err
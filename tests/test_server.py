@@ -0,0 +1,119 @@
+"""Tests for the HTTP extraction service."""
+
+import http.client
+import io
+import json
+import shutil
+import threading
+import zipfile
+from pathlib import Path
+from urllib.parse import quote
+
+import pytest
+
+from un80.arc import extract_arc
+from un80.lbr import extract_lbr, list_lbr
+from un80.server import make_server
+
+SAMPLES_DIR = Path(__file__).parent / "samples"
+
+
+@pytest.fixture(scope="module")
+def server():
+    srv = make_server(port=0, root=SAMPLES_DIR, workers=1)
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+    srv.executor.shutdown()
+
+
+@pytest.fixture
+def conn(server):
+    connection = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=30)
+    yield connection
+    connection.close()
+
+
+def _get(conn, url):
+    conn.request('GET', url)
+    response = conn.getresponse()
+    return response, response.read()
+
+
+class TestServer:
+    """Tests for the HTTP extraction service."""
+
+    def test_list(self, conn):
+        """Test the JSON listing endpoint."""
+        response, body = _get(conn, '/list?path=lbr/crlzh20.lbr')
+        assert response.status == 200
+        assert response.getheader('Transfer-Encoding') == 'chunked'
+
+        listing = json.loads(body)
+        assert listing['format'] == 'lbr'
+        names = [e['filename'] for e in listing['entries']]
+        assert names == [e.filename for e in list_lbr(SAMPLES_DIR / "lbr" / "crlzh20.lbr")]
+
+    def test_extract_keep_alive(self, conn):
+        """Test extracting several members over one connection."""
+        expected = extract_arc(SAMPLES_DIR / "arc" / "ark11.arc")
+        for filename, data in expected:
+            response, body = _get(conn, f'/extract?path=arc/ark11.arc&member={filename}')
+            assert response.status == 200
+            assert not response.will_close
+            assert body == data
+
+    def test_zip(self, conn):
+        """Test downloading a whole archive as a zip."""
+        response, body = _get(conn, '/zip?path=lbr/crlzh20.lbr')
+        assert response.status == 200
+
+        expected = extract_lbr(SAMPLES_DIR / "lbr" / "crlzh20.lbr")
+        with zipfile.ZipFile(io.BytesIO(body)) as zf:
+            assert [(i.filename, zf.read(i)) for i in zf.infolist()] == expected
+
+    def test_errors(self, conn):
+        """Test error responses for bad requests."""
+        assert _get(conn, '/list?path=../pyproject.toml')[0].status == 404
+        assert _get(conn, '/list?path=lbr/missing.lbr')[0].status == 404
+        assert _get(conn, '/list')[0].status == 400
+        assert _get(conn, '/nowhere')[0].status == 404
+        assert _get(conn, '/extract?path=arc/ark11.arc&member=NOPE')[0].status == 404
+
+    def test_error_after_stream(self, conn):
+        """Test an error after a streamed response on the same connection is answered."""
+        assert _get(conn, '/list?path=arc/ark11.arc')[0].status == 200
+        assert _get(conn, '/list?path=nope.arc')[0].status == 404
+
+    def test_limits(self, server, conn):
+        """Test a member over the server's limits is answered with 422."""
+        from un80.arc import list_arc
+        from un80.limits import Limits
+
+        entry = next(e for e in list_arc(SAMPLES_DIR / "arc" / "ark11.arc")
+                     if e.method_name != 'stored')
+        server.limits = Limits(max_ratio=1)
+        try:
+            response, body = _get(conn, f'/extract?path=arc/ark11.arc&member={entry.filename}')
+        finally:
+            server.limits = None
+        assert response.status == 422
+        assert b'max_ratio' in body
+
+    def test_hostile_member_name(self, server, conn, tmp_path):
+        """Test a member name cannot add response headers."""
+        shutil.copy(SAMPLES_DIR / "lbr" / "crlzh20.lbr", tmp_path / "evil.lbr")
+        with open(tmp_path / "evil.lbr", 'r+b') as f:
+            f.seek(32 + 1)  # Name of the first member's directory entry
+            f.write(b'A"\r\nX: 1')
+        name = list_lbr(tmp_path / "evil.lbr")[0].filename
+        root, server.root = server.root, tmp_path.resolve()
+        try:
+            response, _ = _get(conn, f'/extract?path=evil.lbr&member={quote(name)}')
+        finally:
+            server.root = root
+        assert response.status == 200
+        assert response.getheader('X') is None
+        assert response.getheader('Content-Disposition').startswith('attachment; filename="A\\"X: 1')
@@ -55,3 +55,106 @@ class TestSqueeze:
         """Verify squeeze magic constant."""
         from un80.squeeze import SQUEEZE_MAGIC
         assert SQUEEZE_MAGIC == 0x76FF
+
+    def test_counters(self):
+        """Test Huffman counters give a plausible average code length."""
+        data = (Path(__file__).parent / "test.aqm").read_bytes()
+
+        from un80.counters import DecodeCounters
+        counters = DecodeCounters()
+        result = unsqueeze(data, counters=counters)
+
+        assert result == unsqueeze(data)
+        assert counters['output_bytes'] == len(result)
+        assert 0 < counters['huffman_nodes'] <= 256
+        assert counters['huffman_symbols'] > 0
+        assert 1 <= counters.avg_code_length <= 16
+
+    def test_checksum_matches(self):
+        """Test the output matches the 16-bit byte sum in the header."""
+        import struct
+        for path in (Path(__file__).parent / "test.aqm", SAMPLES_DIR / "mbastip.tqt"):
+            if not path.exists():
+                continue
+            data = path.read_bytes()
+            checksum, = struct.unpack('<H', data[2:4])
+            assert sum(unsqueeze(data)) & 0xFFFF == checksum
+
+
+def _chain_tree(length: int) -> list[tuple[int, int]]:
+    """Degenerate tree: symbol k has code k ones then a zero; EOF is all ones."""
+    nodes = [(-(k + 1), k + 1) for k in range(length - 1)]
+    nodes.append((-(length), -257))
+    return nodes
+
+
+def _chain_bits(symbols: list[int], length: int) -> bytes:
+    """Encode symbols (256 = EOF) for _chain_tree, LSB first."""
+    bits = []
+    for symbol in symbols:
+        bits += [1] * length if symbol == 256 else [1] * symbol + [0]
+    value = sum(bit << i for i, bit in enumerate(bits))
+    return value.to_bytes((len(bits) + 7) // 8, 'little')
+
+
+class TestHuffmanEngine:
+    """Tests for the shared table-driven squeeze decoder."""
+
+    def test_compile_tree(self):
+        """Test table entries give each code's symbol and length."""
+        from un80.squeeze import STOP, compile_tree
+        # 0 -> 'A', 10 -> 'B', 11 -> EOF (bits read LSB first)
+        table, bits = compile_tree([(-66, 1), (-67, -257)])
+        assert bits == 2
+        assert table == [(65, 1), (66, 2), (65, 1), (STOP, 2)]
+
+    def test_long_codes(self):
+        """Test codes longer than the table fall back to walking the tree."""
+        from un80.squeeze import MAX_TABLE_BITS, decode_squeezed
+        length = MAX_TABLE_BITS + 8
+        symbols = [0, 3, MAX_TABLE_BITS + 2, 1, length - 1, 5]
+        data = _chain_bits(symbols + [256], length)
+        assert decode_squeezed(data, 0, _chain_tree(length)) == bytes(symbols)
+
+    def test_rle_fused(self):
+        """Test RLE90 runs, literal markers and a trailing marker."""
+        from un80.squeeze import decode_squeezed
+        length = 200
+        nodes = _chain_tree(length)
+        data = _chain_bits([7, 0x90, 4, 0x90, 0, 0x90, 1, 9, 0x90, 256], length)
+        assert decode_squeezed(data, 0, nodes) == bytes([7, 7, 7, 7, 0x90, 9, 0x90])
+
+    def test_truncated_stream(self):
+        """Test running out of data keeps what was decoded, without errors."""
+        from un80.squeeze import decode_squeezed
+        data = _chain_bits([1, 2, 3, 4, 256], 16)
+        # The stream ends partway through the EOF code
+        assert decode_squeezed(data[:-1], 0, _chain_tree(16)) == bytes([1, 2, 3, 4])
+
+    def test_invalid_node_stops(self):
+        """Test a child outside the tree ends decoding like EOF."""
+        from un80.squeeze import decode_squeezed
+        # 0 -> 'A', 1 -> node 5 (does not exist)
+        assert decode_squeezed(b'\x02', 0, [(-66, 5)]) == b'A'
+
+    def test_expected_size(self):
+        """Test output beyond expected_size raises OutputSizeError."""
+        from un80.cpm import OutputSizeError
+        from un80.squeeze import decode_squeezed
+        data = _chain_bits([7, 0x90, 150, 256], 200)
+        assert len(decode_squeezed(data, 0, _chain_tree(200), 150)) == 150
+        with pytest.raises(OutputSizeError):
+            decode_squeezed(data, 0, _chain_tree(200), 149)
+
+    def test_arc_method4_matches(self):
+        """Test ARC method 4 decodes a squeezed body exactly like unsqueeze."""
+        from un80.arc import ArcEntry, decompress_member
+        from un80.cpm import crc16
+
+        for path in (Path(__file__).parent / "test.aqm", *sorted(SAMPLES_DIR.glob("*"))):
+            data = path.read_bytes()
+            expected = unsqueeze(data)
+            # ARC stores the node count, tree and bit stream of the file
+            body = data[data.index(0, 4) + 1:]
+            entry = ArcEntry(4, 'X', len(body), len(expected), crc16(expected), None, 0)
+            assert decompress_member(entry, body) == expected
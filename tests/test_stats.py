@@ -0,0 +1,85 @@
+"""Tests for extraction statistics."""
+
+import json
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from un80.arc import iter_arc, list_arc
+from un80.cli import main
+from un80.lbr import iter_lbr
+from un80.stats import RunStats
+
+TESTS_DIR = Path(__file__).parent
+SAMPLES_DIR = TESTS_DIR / "samples"
+
+
+class TestStats:
+    """Tests for extraction statistics."""
+
+    def test_track_arc(self):
+        """Test every ARC member is recorded with sizes and method."""
+        sample = SAMPLES_DIR / "arc" / "method9.arc"
+        if not sample.exists():
+            pytest.skip("method9.arc sample not available")
+
+        run = RunStats()
+        archive = run.archive(sample, 'arc')
+        outputs = [member.read() for member in archive.track(iter_arc(sample))]
+        run.finish()
+
+        entries = list_arc(sample)
+        assert [m.filename for m in archive.members] == [e.filename for e in entries]
+        for stats, entry, data in zip(archive.members, entries, outputs):
+            assert stats.input_bytes == entry.compressed_size
+            assert stats.output_bytes == len(data)
+            assert stats.method == entry.method_name
+            assert stats.wall >= 0 and stats.cpu >= 0
+            assert stats.peak_memory is None
+
+        totals = run.by_codec()
+        assert sum(c.members for c in totals.values()) == len(entries)
+        assert sum(c.output_bytes for c in totals.values()) == sum(map(len, outputs))
+
+    def test_track_abandoned_member(self):
+        """Test a member that is not read is still recorded."""
+        archive = RunStats().archive(TESTS_DIR / "test.lbr", 'lbr')
+        for member in archive.track(iter_lbr(TESTS_DIR / "test.lbr")):
+            member.chunks.close()
+        assert len(archive.members) == len(list(iter_lbr(TESTS_DIR / "test.lbr")))
+        assert all(m.output_bytes == 0 for m in archive.members)
+
+    def test_trace_memory(self):
+        """Test peak memory is recorded when tracing is on."""
+        import tracemalloc
+        run = RunStats()
+        run.start(trace_memory=True)
+        try:
+            archive = run.archive(TESTS_DIR / "test.lbr", 'lbr')
+            for member in archive.track(iter_lbr(TESTS_DIR / "test.lbr")):
+                member.read()
+        finally:
+            tracemalloc.stop()
+        assert all(m.peak_memory is not None for m in archive.members)
+
+    def test_cli_stats_json(self, capsys):
+        """Test --stats-format json writes a parseable report to stderr."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            assert main([str(TESTS_DIR / "test.aqm"), '-o', tmpdir, '--stats-format', 'json']) == 0
+            captured = capsys.readouterr()
+            report = json.loads(captured.err)
+
+            assert 'REDIR.ASM' in captured.out
+            member, = report['archives'][0]['members']
+            assert member['codec'] == 'squeeze'
+            assert member['output_bytes'] == (Path(tmpdir) / "REDIR.ASM").stat().st_size
+            assert report['codecs']['squeeze']['members'] == 1
+
+    def test_cli_stats_text(self, capsys):
+        """Test --stats prints the member table and codec totals."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            assert main(['--stats', str(TESTS_DIR / "test.arc"), '-o', tmpdir]) == 0
+            err = capsys.readouterr().err
+            assert 'MB/s' in err
+            assert 'Total elapsed' in err
@@ -0,0 +1,226 @@
+"""Tests for the streaming helpers."""
+
+import errno
+import io
+import os
+from pathlib import Path
+
+import pytest
+
+from un80 import stream
+from un80.cli import main
+from un80.arc import extract_arc, iter_arc
+from un80.lbr import extract_lbr, iter_lbr
+from un80.squeeze import unsqueeze
+from un80.stream import FileRange, PipeReader, copy_range
+
+TESTS_DIR = Path(__file__).parent
+
+DATA = bytes(range(256)) * 1000
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / 'SOURCE.BIN'
+    path.write_bytes(DATA)
+    with open(path, 'rb') as f:
+        yield f
+
+
+class TestFileRange:
+    """Tests for iterating and copying file ranges."""
+
+    def test_iterate(self, source):
+        """Test the range is read in chunks."""
+        chunks = list(FileRange(source, 100, 5000, chunk_size=1024))
+        assert [len(chunk) for chunk in chunks] == [1024] * 4 + [904]
+        assert b''.join(chunks) == DATA[100:5100]
+
+    def test_truncated(self, source):
+        """Test iteration stops at the end of the file."""
+        assert b''.join(FileRange(source, len(DATA) - 10, 100)) == DATA[-10:]
+
+    def test_copy_to(self, source, tmp_path):
+        """Test the range is copied to a file descriptor."""
+        out = tmp_path / 'OUT.BIN'
+        with open(out, 'wb') as f:
+            f.write(b'HEAD')
+            f.flush()
+            assert FileRange(source, 1000, 200000).copy_to(f.fileno()) == 200000
+        assert out.read_bytes() == b'HEAD' + DATA[1000:201000]
+
+    def test_copy_after_iterating(self, source, tmp_path):
+        """Test copy_to copies only what iteration has not consumed."""
+        out = tmp_path / 'OUT.BIN'
+        chunks = FileRange(source, 0, 10000, chunk_size=4096)
+        first = next(chunks)
+        with open(out, 'wb') as f:
+            assert chunks.copy_to(f.fileno()) == 10000 - 4096
+        assert first + out.read_bytes() == DATA[:10000]
+
+    def test_copy_from_memory(self, tmp_path):
+        """Test an in-memory source is copied through Python."""
+        out = tmp_path / 'OUT.BIN'
+        with open(out, 'wb') as f:
+            assert FileRange(io.BytesIO(DATA), 5, 100).copy_to(f.fileno()) == 100
+        assert out.read_bytes() == DATA[5:105]
+
+
+class TestCopyRange:
+    """Tests for kernel-side copying with fallbacks."""
+
+    def test_source_position_kept(self, source, tmp_path):
+        """Test the source file position is not moved."""
+        source.seek(7)
+        with open(tmp_path / 'OUT.BIN', 'wb') as f:
+            assert copy_range(source.fileno(), 0, len(DATA), f.fileno()) == len(DATA)
+        assert os.lseek(source.fileno(), 0, os.SEEK_CUR) == 7
+        assert (tmp_path / 'OUT.BIN').read_bytes() == DATA
+
+    def test_fallback(self, source, tmp_path, monkeypatch):
+        """Test a refused kernel copy carries on with the next method."""
+        calls = []
+
+        def partial_then_refuse(src, dst, offset, count):
+            if calls:
+                raise OSError(errno.EXDEV, 'cross-device')
+            calls.append(offset)
+            return stream._pread_write(src, dst, offset, min(count, 1000))
+
+        monkeypatch.setattr(stream, '_COPY_METHODS', (partial_then_refuse, stream._pread_write))
+        with open(tmp_path / 'OUT.BIN', 'wb') as f:
+            assert copy_range(source.fileno(), 10, 50000, f.fileno()) == 50000
+        assert (tmp_path / 'OUT.BIN').read_bytes() == DATA[10:50010]
+
+    def test_other_errors_raised(self, source, tmp_path, monkeypatch):
+        """Test errors other than an unsupported copy are raised."""
+        def fail(src, dst, offset, count):
+            raise OSError(errno.ENOSPC, 'No space left on device')
+
+        monkeypatch.setattr(stream, '_COPY_METHODS', (fail, stream._pread_write))
+        with open(tmp_path / 'OUT.BIN', 'wb') as f:
+            with pytest.raises(OSError):
+                copy_range(source.fileno(), 0, 100, f.fileno())
+
+
+class TestStoredExtraction:
+    """Tests for extracting stored members by copying."""
+
+    def test_cli_matches_library(self, tmp_path):
+        """Test members written by the CLI match the library's output."""
+        sample = TESTS_DIR / 'test2.lbr'
+        assert any(member.codec == 'stored' for member in iter_lbr(sample))
+        assert main([str(sample), '-o', str(tmp_path)]) == 0
+        for filename, data in extract_lbr(sample):
+            assert (tmp_path / filename).read_bytes() == data
+
+
+class _Pipe(io.BytesIO):
+    """In-memory stream that refuses to seek, like a pipe."""
+
+    def seekable(self):
+        return False
+
+    def seek(self, *args):
+        raise io.UnsupportedOperation("not seekable")
+
+
+class _Stdio:
+    """Stand-in for sys.stdin/sys.stdout with a binary buffer."""
+
+    def __init__(self, data=b''):
+        self.buffer = io.BytesIO(data)
+
+
+class TestPipeReader:
+    """Tests for reading streams that cannot seek."""
+
+    def test_seek_within_lookbehind(self):
+        """Test seeking forward skips data and back re-reads kept bytes."""
+        f = PipeReader(_Pipe(DATA), lookbehind=1000)
+        assert f.read(10) == DATA[:10]
+        f.seek(5000)
+        assert f.read(100) == DATA[5000:5100]
+        f.seek(4500)
+        assert f.read(700) == DATA[4500:5200]
+        assert f.tell() == 5200
+
+    def test_seek_too_far_back(self):
+        """Test seeking back past the kept bytes is refused."""
+        f = PipeReader(_Pipe(DATA), lookbehind=100)
+        f.seek(5000)
+        f.read(10)
+        with pytest.raises(io.UnsupportedOperation):
+            f.seek(0)
+
+    def test_read_to_end(self):
+        """Test read() returns everything left, then b''."""
+        f = PipeReader(_Pipe(DATA))
+        f.read(3)
+        assert f.read() == DATA[3:]
+        assert f.read(10) == b''
+
+    @pytest.mark.parametrize('name, iterate, extract', [
+        ('test.arc', iter_arc, extract_arc),
+        ('test2.lbr', iter_lbr, extract_lbr),
+    ])
+    def test_archives(self, name, iterate, extract):
+        """Test archives are read in one pass with little lookbehind."""
+        raw = (TESTS_DIR / name).read_bytes()
+        members = iterate(PipeReader(_Pipe(raw), lookbehind=512))
+        assert sorted((m.filename, m.read()) for m in members) == \
+            sorted(extract(TESTS_DIR / name))
+
+
+class TestPipeCLI:
+    """Tests for reading stdin and writing stdout from the command line."""
+
+    def test_extract_from_stdin(self, tmp_path, monkeypatch):
+        """Test an archive on stdin is extracted to the output directory."""
+        sample = TESTS_DIR / 'test2.lbr'
+        monkeypatch.setattr('sys.stdin', _Stdio(sample.read_bytes()))
+        assert main(['-', '-o', str(tmp_path)]) == 0
+        for filename, data in extract_lbr(sample):
+            assert (tmp_path / filename).read_bytes() == data
+
+    def test_member_to_stdout(self, monkeypatch):
+        """Test -x writes just one member, matched case-insensitively."""
+        sample = TESTS_DIR / 'test.arc'
+        expected = dict(extract_arc(sample))
+        stdout = _Stdio()
+        monkeypatch.setattr('sys.stdin', _Stdio(sample.read_bytes()))
+        monkeypatch.setattr('sys.stdout', stdout)
+        assert main(['-', '-x', 'b5-cpm3.doc']) == 0
+        assert stdout.buffer.getvalue() == expected['B5-CPM3.DOC']
+
+    def test_member_missing(self, monkeypatch, capsys):
+        """Test a missing member is an error."""
+        monkeypatch.setattr('sys.stdout', _Stdio())
+        assert main([str(TESTS_DIR / 'test.arc'), '-x', 'NONE.TXT']) == 1
+        assert 'Member not found' in capsys.readouterr().err
+
+    def test_archive_to_stdout(self, monkeypatch):
+        """Test -c concatenates every member, stored ones included."""
+        sample = TESTS_DIR / 'test2.lbr'
+        stdout = _Stdio()
+        monkeypatch.setattr('sys.stdout', stdout)
+        assert main([str(sample), '--stdout']) == 0
+        assert stdout.buffer.getvalue() == \
+            b''.join(data for _, data in extract_lbr(sample))
+
+    def test_stored_member_to_file(self, tmp_path, monkeypatch):
+        """Test a stored member is copied straight to a stdout file."""
+        sample = TESTS_DIR / 'test2.lbr'
+        member = next(m for m in iter_lbr(sample) if m.codec == 'stored')
+        with open(tmp_path / 'OUT.BIN', 'wb') as f:
+            monkeypatch.setattr('sys.stdout', io.TextIOWrapper(f))
+            assert main([str(sample), f'--member={member.filename}']) == 0
+        assert (tmp_path / 'OUT.BIN').read_bytes() == dict(extract_lbr(sample))[member.filename]
+
+    def test_single_file_to_stdout(self, monkeypatch):
+        """Test a compressed file on stdin is decoded to stdout."""
+        stdout = _Stdio()
+        monkeypatch.setattr('sys.stdin', _Stdio((TESTS_DIR / 'test.aqm').read_bytes()))
+        monkeypatch.setattr('sys.stdout', stdout)
+        assert main(['-', '-c']) == 0
+        assert stdout.buffer.getvalue() == unsqueeze((TESTS_DIR / 'test.aqm').read_bytes())
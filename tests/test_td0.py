@@ -0,0 +1,122 @@
+"""Tests for Teledisk image support."""
+
+import pytest
+
+from un80.disk import DISK_FORMATS, DiskError, extract_disk, list_disk
+from un80.formats import classify
+from un80.lzhuf import TELEDISK
+from un80.td0 import Td0Error, _decode_sector, is_td0, read_td0
+
+from .test_disk import _build_image, _sample_files
+from .test_lzhuf import _encode
+
+COMMENT = b'Test disk\x00Second line\x00'
+
+
+def _to_td0(fmt, raw, compressed=False, version=21):
+    """Wrap a raw image in Teledisk form, with sector IDs interleaved."""
+    size_code = fmt.sector_size.bit_length() - 8
+    ids = list(range(1, fmt.sectors + 1, 2)) + list(range(2, fmt.sectors + 1, 2))
+    body = bytearray(b'\0\0' + len(COMMENT).to_bytes(2, 'little') + bytes(6) + COMMENT)
+    for track in range(fmt.tracks):
+        body += bytes([fmt.sectors, track, 0, 0])
+        for sector_id in ids:
+            body += bytes([track, 0, sector_id, size_code, 0, 0])
+            start = (track * fmt.sectors + sector_id - 1) * fmt.sector_size
+            data = raw[start:start + fmt.sector_size]
+            if data == data[:2] * (len(data) // 2):
+                block = b'\x01' + (len(data) // 2).to_bytes(2, 'little') + data[:2]
+            else:
+                block = b'\x00' + data
+            body += len(block).to_bytes(2, 'little') + block
+    body += b'\xff'
+
+    signature = b'td' if compressed else b'TD'
+    header = signature + bytes([0, 0, version, 2, 1, 0x80, 0, 1, 0, 0])
+    if compressed:
+        body = _encode(list(body), TELEDISK)
+    return header + bytes(body)
+
+
+@pytest.fixture(scope='module')
+def raw_image():
+    return _build_image(DISK_FORMATS['kaypro2'], _sample_files())
+
+
+class TestReadTd0:
+    """Tests for decoding Teledisk images."""
+
+    @pytest.mark.parametrize('compressed', [False, True])
+    def test_sectors(self, raw_image, compressed):
+        """Test every sector is recovered with its ID and the comment."""
+        fmt = DISK_FORMATS['kaypro2']
+        image = read_td0(_to_td0(fmt, raw_image, compressed))
+        assert image.compressed == compressed
+        assert image.comment == 'Test disk\nSecond line'
+        assert len(image.tracks) == fmt.tracks
+        track = image.tracks[1]
+        assert [sector.sector_id for sector in track.sectors][:3] == [1, 3, 5]
+        sector = track.sectors[1]
+        start = (fmt.sectors + 2) * fmt.sector_size
+        assert sector.data == raw_image[start:start + fmt.sector_size]
+
+    def test_old_compression(self, raw_image):
+        """Test Teledisk 1.x compressed images are rejected."""
+        data = _to_td0(DISK_FORMATS['kaypro2'], raw_image, compressed=True, version=15)
+        with pytest.raises(Td0Error, match='not supported'):
+            read_td0(data)
+
+    def test_not_td0(self):
+        """Test other data is rejected."""
+        with pytest.raises(Td0Error):
+            read_td0(b'IMD 1.18: ' + bytes(20))
+
+    def test_truncated(self, raw_image):
+        """Test a truncated image raises Td0Error."""
+        data = _to_td0(DISK_FORMATS['kaypro2'], raw_image)
+        with pytest.raises(Td0Error):
+            read_td0(data[:len(data) // 2])
+
+
+class TestSectorEncoding:
+    """Tests for Teledisk sector data encodings."""
+
+    def test_pattern(self):
+        """Test a repeated 2-byte pattern."""
+        assert _decode_sector(1, b'\x40\x00\xe5\xe6', 128) == b'\xe5\xe6' * 64
+
+    def test_run_length(self):
+        """Test literal and repeated fragments."""
+        block = b'\x00\x03ABC' + b'\x01\x02xy' + b'\x02\x01WXYZ'
+        assert _decode_sector(2, block, 11) == b'ABCxyxyWXYZ'
+
+    def test_short(self):
+        """Test data shorter than the sector raises Td0Error."""
+        with pytest.raises(Td0Error):
+            _decode_sector(0, b'ABC', 128)
+
+
+class TestTd0Disk:
+    """Tests for reading CP/M files from Teledisk images."""
+
+    @pytest.mark.parametrize('compressed', [False, True])
+    def test_matches_raw(self, raw_image, compressed, tmp_path):
+        """Test a Teledisk image reads the same as the raw image it holds."""
+        fmt = DISK_FORMATS['kaypro2']
+        (tmp_path / 'TEST.DSK').write_bytes(raw_image)
+        (tmp_path / 'TEST.TD0').write_bytes(_to_td0(fmt, raw_image, compressed))
+        assert extract_disk(tmp_path / 'TEST.TD0') == extract_disk(tmp_path / 'TEST.DSK')
+
+    def test_old_compression(self, raw_image, tmp_path):
+        """Test unsupported images raise DiskError."""
+        path = tmp_path / 'OLD.TD0'
+        path.write_bytes(_to_td0(DISK_FORMATS['kaypro2'], raw_image, True, version=15))
+        with pytest.raises(DiskError):
+            list_disk(path)
+
+    def test_classify(self, raw_image):
+        """Test Teledisk images are recognised by their header."""
+        data = _to_td0(DISK_FORMATS['kaypro2'], raw_image)
+        assert is_td0(data[:12])
+        assert classify(data[:32], 'DISK.BIN') == 'disk'
+        assert classify(b'TD is a text file', 'NOTES.TXT') is None